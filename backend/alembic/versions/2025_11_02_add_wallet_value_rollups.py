@@ -0,0 +1,67 @@
+"""add wallet value rollups
+
+Revision ID: add_wallet_value_rollups
+Revises: add_oauth_connections
+Create Date: 2025-11-02 10:00:00
+
+Creates wallet_value_rollups: hourly/daily/weekly OHLC buckets of wallet
+value, so raw wallet_snapshots / wallet_value_history can be pruned while
+multi-year charts stay cheap.
+
+After upgrading, run the `backfill_wallet_rollups` Celery task once.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_wallet_value_rollups'
+down_revision = 'add_oauth_connections'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'wallet_value_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('wallet_id', sa.Integer(), nullable=True),
+
+        # Bucket
+        sa.Column('resolution', sa.String(length=10), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+
+        # USD values
+        sa.Column('open_value_usd', sa.Numeric(precision=20, scale=8), nullable=False, server_default='0'),
+        sa.Column('min_value_usd', sa.Numeric(precision=20, scale=8), nullable=False, server_default='0'),
+        sa.Column('max_value_usd', sa.Numeric(precision=20, scale=8), nullable=False, server_default='0'),
+        sa.Column('close_value_usd', sa.Numeric(precision=20, scale=8), nullable=False, server_default='0'),
+
+        # Local currency
+        sa.Column('close_value_local', sa.Numeric(precision=20, scale=8), nullable=True),
+        sa.Column('local_currency', sa.String(length=3), nullable=True),
+
+        sa.Column('first_at', sa.DateTime(), nullable=False),
+        sa.Column('last_at', sa.DateTime(), nullable=False),
+        sa.Column('sample_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.text('now()')),
+
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['wallet_id'], ['user_wallets.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_index('ix_wallet_value_rollups_id', 'wallet_value_rollups', ['id'])
+    op.create_index('ix_wallet_value_rollups_user_id', 'wallet_value_rollups', ['user_id'])
+    op.create_index('ix_wallet_value_rollups_wallet_id', 'wallet_value_rollups', ['wallet_id'])
+    op.create_index('idx_rollup_wallet_res_bucket', 'wallet_value_rollups', ['wallet_id', 'resolution', 'bucket_start'])
+    op.create_index('idx_rollup_user_res_bucket', 'wallet_value_rollups', ['user_id', 'resolution', 'bucket_start'])
+
+
+def downgrade():
+    op.drop_index('idx_rollup_user_res_bucket', table_name='wallet_value_rollups')
+    op.drop_index('idx_rollup_wallet_res_bucket', table_name='wallet_value_rollups')
+    op.drop_index('ix_wallet_value_rollups_wallet_id', table_name='wallet_value_rollups')
+    op.drop_index('ix_wallet_value_rollups_user_id', table_name='wallet_value_rollups')
+    op.drop_index('ix_wallet_value_rollups_id', table_name='wallet_value_rollups')
+    op.drop_table('wallet_value_rollups')
@@ -0,0 +1,25 @@
+"""add defi transaction report index
+
+Revision ID: add_defi_tx_report_index
+Revises: add_wallet_value_rollups
+Create Date: 2025-11-03 10:00:00
+
+Index on defi_transactions (audit_id, timestamp, id) for the keyset
+pagination of audit reports: every page is a range scan of one audit's
+transactions, newest first, however deep the page is.
+"""
+from alembic import op
+
+# revision identifiers
+revision = 'add_defi_tx_report_index'
+down_revision = 'add_wallet_value_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('idx_defi_tx_audit_ts_id', 'defi_transactions', ['audit_id', 'timestamp', 'id'])
+
+
+def downgrade():
+    op.drop_index('idx_defi_tx_audit_ts_id', table_name='defi_transactions')
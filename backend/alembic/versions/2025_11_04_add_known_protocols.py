@@ -0,0 +1,43 @@
+"""add known protocols
+
+Revision ID: add_known_protocols
+Revises: add_defi_tx_report_index
+Create Date: 2025-11-04 10:00:00
+
+Creates known_protocols: DeFi protocol contract addresses per chain, synced
+from DeFiLlama and loaded in memory for address -> protocol lookups.
+
+After upgrading, run the `sync_protocol_registry` Celery task once.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_known_protocols'
+down_revision = 'add_defi_tx_report_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'known_protocols',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chain', sa.String(length=50), nullable=False),
+        sa.Column('address', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=False),
+        sa.Column('slug', sa.String(length=255), nullable=True),
+        sa.Column('protocol_type', sa.String(length=50), nullable=False, server_default='other'),
+        sa.Column('source', sa.String(length=20), nullable=False, server_default='defillama'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('chain', 'address', name='uq_known_protocol_chain_address')
+    )
+    op.create_index('ix_known_protocols_id', 'known_protocols', ['id'])
+    op.create_index('idx_known_protocol_slug', 'known_protocols', ['slug'])
+
+
+def downgrade():
+    op.drop_index('idx_known_protocol_slug', table_name='known_protocols')
+    op.drop_index('ix_known_protocols_id', table_name='known_protocols')
+    op.drop_table('known_protocols')
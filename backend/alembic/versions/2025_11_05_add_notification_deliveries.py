@@ -0,0 +1,51 @@
+"""add notification deliveries
+
+Revision ID: add_notification_deliveries
+Revises: add_known_protocols
+Create Date: 2025-11-05 10:00:00
+
+Creates notification_deliveries: delivery log of the notification fan-out,
+one row per (notification, channel, user), unique on the idempotency key so
+re-triggered fan-outs don't notify anyone twice.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_notification_deliveries'
+down_revision = 'add_known_protocols'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_deliveries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('idempotency_key', sa.String(length=64), nullable=False),
+        sa.Column('notification_key', sa.String(length=200), nullable=False),
+        sa.Column('channel', sa.String(length=20), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('recipient', sa.String(length=500), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('provider_message_id', sa.String(length=255), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='1'),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('idempotency_key')
+    )
+    op.create_index('ix_notification_deliveries_id', 'notification_deliveries', ['id'])
+    op.create_index('ix_notification_deliveries_user_id', 'notification_deliveries', ['user_id'])
+    op.create_index(
+        'idx_notification_delivery_key_status', 'notification_deliveries', ['notification_key', 'status']
+    )
+
+
+def downgrade():
+    op.drop_index('idx_notification_delivery_key_status', table_name='notification_deliveries')
+    op.drop_index('ix_notification_deliveries_user_id', table_name='notification_deliveries')
+    op.drop_index('ix_notification_deliveries_id', table_name='notification_deliveries')
+    op.drop_table('notification_deliveries')
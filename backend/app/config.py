@@ -5,6 +5,8 @@ from functools import lru_cache
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    DATABASE_REPLICA_URL: str = ""  # Read replica for report/dashboard reads (primary when empty)
+    DATABASE_ROLE: str = ""  # Engine profile: web, worker, batch (default: worker under Celery, else web)
 
     # Security
     SECRET_KEY: str
@@ -66,6 +68,7 @@ class Settings(BaseSettings):
 
     # Monitoring
     SENTRY_DSN: str = ""
+    METRICS_TOKEN: str = ""  # Bearer token required on /metrics (open when empty)
 
     # Email (SMTP) - Legacy
     SMTP_HOST: str = ""
@@ -78,6 +81,24 @@ class Settings(BaseSettings):
     # Email (Resend API) - Modern
     RESEND_API_KEY: str = ""
 
+    # Notifications (SendGrid email, Twilio SMS)
+    SENDGRID_API_KEY: str = ""
+    SENDGRID_FROM_EMAIL: str = "noreply@cryptonomadhub.com"
+    TWILIO_ACCOUNT_SID: str = ""
+    TWILIO_AUTH_TOKEN: str = ""
+    TWILIO_FROM_NUMBER: str = ""
+
+    # Notification fan-out - provider base URLs (point them to a local stand-in for
+    # offline load tests) and per-provider limits (requests in flight, requests/s)
+    SENDGRID_API_URL: str = "https://api.sendgrid.com"
+    TWILIO_API_URL: str = "https://api.twilio.com"
+    NOTIFICATION_EMAIL_CONCURRENCY: int = 4
+    NOTIFICATION_EMAIL_RATE: float = 10.0  # Each request carries up to 1000 recipients
+    NOTIFICATION_SMS_CONCURRENCY: int = 10
+    NOTIFICATION_SMS_RATE: float = 30.0
+    NOTIFICATION_WEBHOOK_CONCURRENCY: int = 20
+    NOTIFICATION_WEBHOOK_RATE: float = 50.0
+
     # Blockchain API Keys
     # SECURITY: These MUST be set in .env file, NOT hardcoded here
     # Single Etherscan API key works for 50+ EVM chains via v2 API
@@ -88,6 +109,7 @@ class Settings(BaseSettings):
     ALCHEMY_API_KEY: str = ""  # Alchemy (EVM only, best rate limits)
     INFURA_API_KEY: str = ""  # Infura (EVM backup)
     QUICKNODE_API_KEY: str = ""  # QuickNode (multi-chain)
+    EVM_RPC_URL_OVERRIDE: str = ""  # Send all EVM RPC reads to one node (e.g. local anvil for tests)
 
     # Solana API Keys
     SOLANA_API_KEY: str = ""  # Solscan (fallback)
@@ -101,6 +123,13 @@ class Settings(BaseSettings):
     COINMARKETCAP_API_KEY: str = ""  # CoinMarketCap (fallback for prices)
     COINGECKO_API_KEY: str = ""  # CoinGecko Pro (optional, free tier works)
 
+    # Tax data sync - raw source documents (KPMG PDF, PwC/Tax Foundation pages) + parsed snapshots
+    TAX_SOURCE_SNAPSHOT_DIR: str = "/tmp/cryptonomadhub/tax_sources"
+
+    # PDF / Excel rendering - process pool size and on-disk cache of rendered documents
+    REPORT_RENDER_WORKERS: int = 2
+    REPORT_CACHE_DIR: str = "/tmp/cryptonomadhub/reports"
+
     class Config:
         env_file = ".env"
 
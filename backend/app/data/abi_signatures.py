@@ -0,0 +1,235 @@
+"""
+ABI signatures decoded by app.services.abi_registry
+
+Each entry: (signature, protocol, activity)
+- signature: Solidity-style, `indexed` marks event topics, parameter names
+  are optional (args are returned by name when given, by position otherwise)
+- activity: transaction type the call/event stands for (TransactionType
+  values + transfer, approve, wrap, unwrap, bridge, nft_transfer,
+  nft_trade), or None when it depends on the protocol (e.g. withdraw(uint256)
+  is an unwrap on WETH and an unstake on staking contracts)
+
+Topics and selectors are computed when the registry is loaded.
+"""
+
+EVENT_SIGNATURES = [
+    # ERC20 / WETH
+    ("Transfer(address indexed from, address indexed to, uint256 value)", "erc20", "transfer"),
+    ("Approval(address indexed owner, address indexed spender, uint256 value)", "erc20", "approve"),
+    ("Deposit(address indexed dst, uint256 wad)", "weth", "wrap"),
+    ("Withdrawal(address indexed src, uint256 wad)", "weth", "unwrap"),
+
+    # ERC721 (same topic as the ERC20 Transfer, one more indexed topic) / ERC1155
+    ("Transfer(address indexed from, address indexed to, uint256 indexed tokenId)", "erc721", "nft_transfer"),
+    ("TransferSingle(address indexed operator, address indexed from, address indexed to, uint256 id, uint256 value)",
+     "erc1155", "nft_transfer"),
+    ("TransferBatch(address indexed operator, address indexed from, address indexed to, uint256[] ids, uint256[] values)",
+     "erc1155", "nft_transfer"),
+
+    # Uniswap V2 (and forks: Sushiswap, PancakeSwap...)
+    ("Swap(address indexed sender, uint256 amount0In, uint256 amount1In, uint256 amount0Out, uint256 amount1Out, address indexed to)",
+     "uniswap_v2", "swap"),
+    ("Mint(address indexed sender, uint256 amount0, uint256 amount1)", "uniswap_v2", "provide_liquidity"),
+    ("Burn(address indexed sender, uint256 amount0, uint256 amount1, address indexed to)", "uniswap_v2", "remove_liquidity"),
+    ("Sync(uint112 reserve0, uint112 reserve1)", "uniswap_v2", None),
+
+    # Uniswap V3
+    ("Swap(address indexed sender, address indexed recipient, int256 amount0, int256 amount1, uint160 sqrtPriceX96, uint128 liquidity, int24 tick)",
+     "uniswap_v3", "swap"),
+    ("Mint(address sender, address indexed owner, int24 indexed tickLower, int24 indexed tickUpper, uint128 amount, uint256 amount0, uint256 amount1)",
+     "uniswap_v3", "provide_liquidity"),
+    ("Burn(address indexed owner, int24 indexed tickLower, int24 indexed tickUpper, uint128 amount, uint256 amount0, uint256 amount1)",
+     "uniswap_v3", "remove_liquidity"),
+    ("Collect(address indexed owner, address recipient, int24 indexed tickLower, int24 indexed tickUpper, uint128 amount0, uint128 amount1)",
+     "uniswap_v3", "claim_rewards"),
+    ("IncreaseLiquidity(uint256 indexed tokenId, uint128 liquidity, uint256 amount0, uint256 amount1)",
+     "uniswap_v3", "provide_liquidity"),
+    ("DecreaseLiquidity(uint256 indexed tokenId, uint128 liquidity, uint256 amount0, uint256 amount1)",
+     "uniswap_v3", "remove_liquidity"),
+
+    # Curve
+    ("TokenExchange(address indexed buyer, int128 sold_id, uint256 tokens_sold, int128 bought_id, uint256 tokens_bought)",
+     "curve", "swap"),
+    ("TokenExchangeUnderlying(address indexed buyer, int128 sold_id, uint256 tokens_sold, int128 bought_id, uint256 tokens_bought)",
+     "curve", "swap"),
+    ("AddLiquidity(address indexed provider, uint256[2] token_amounts, uint256[2] fees, uint256 invariant, uint256 token_supply)",
+     "curve", "provide_liquidity"),
+    ("AddLiquidity(address indexed provider, uint256[3] token_amounts, uint256[3] fees, uint256 invariant, uint256 token_supply)",
+     "curve", "provide_liquidity"),
+    ("RemoveLiquidity(address indexed provider, uint256[2] token_amounts, uint256[2] fees, uint256 token_supply)",
+     "curve", "remove_liquidity"),
+    ("RemoveLiquidity(address indexed provider, uint256[3] token_amounts, uint256[3] fees, uint256 token_supply)",
+     "curve", "remove_liquidity"),
+    ("RemoveLiquidityOne(address indexed provider, uint256 token_amount, uint256 coin_amount)", "curve", "remove_liquidity"),
+
+    # Aave V2
+    ("Deposit(address indexed reserve, address user, address indexed onBehalfOf, uint256 amount, uint16 indexed referral)",
+     "aave", "lend"),
+    ("Withdraw(address indexed reserve, address indexed user, address indexed to, uint256 amount)", "aave", "withdraw"),
+    ("Borrow(address indexed reserve, address user, address indexed onBehalfOf, uint256 amount, uint256 borrowRateMode, uint256 borrowRate, uint16 indexed referral)",
+     "aave", "borrow"),
+    ("Repay(address indexed reserve, address indexed user, address indexed repayer, uint256 amount)", "aave", "repay"),
+
+    # Aave V3 (Withdraw is the V2 event)
+    ("Supply(address indexed reserve, address user, address indexed onBehalfOf, uint256 amount, uint16 indexed referralCode)",
+     "aave", "lend"),
+    ("Borrow(address indexed reserve, address user, address indexed onBehalfOf, uint256 amount, uint8 interestRateMode, uint256 borrowRate, uint16 indexed referralCode)",
+     "aave", "borrow"),
+    ("Repay(address indexed reserve, address indexed user, address indexed repayer, uint256 amount, bool useATokens)",
+     "aave", "repay"),
+
+    # Compound V2 (cTokens)
+    ("Mint(address minter, uint256 mintAmount, uint256 mintTokens)", "compound", "lend"),
+    ("Redeem(address redeemer, uint256 redeemAmount, uint256 redeemTokens)", "compound", "withdraw"),
+    ("Borrow(address borrower, uint256 borrowAmount, uint256 accountBorrows, uint256 totalBorrows)", "compound", "borrow"),
+    ("RepayBorrow(address payer, address borrower, uint256 repayAmount, uint256 accountBorrows, uint256 totalBorrows)",
+     "compound", "repay"),
+
+    # Lido
+    ("Submitted(address indexed sender, uint256 amount, address referral)", "lido", "stake"),
+    ("WithdrawalRequested(uint256 indexed requestId, address indexed requestor, address indexed owner, uint256 amountOfStETH, uint256 amountOfShares)",
+     "lido", "unstake"),
+    ("WithdrawalClaimed(uint256 indexed requestId, address indexed owner, address indexed receiver, uint256 amountOfETH)",
+     "lido", "withdraw"),
+
+    # Staking rewards contracts (Synthetix-style)
+    ("Staked(address indexed user, uint256 amount)", "staking", "stake"),
+    ("Withdrawn(address indexed user, uint256 amount)", "staking", "unstake"),
+    ("RewardPaid(address indexed user, uint256 reward)", "staking", "claim_rewards"),
+
+    # ERC4626 vaults (Yearn V3, Morpho, ...)
+    ("Deposit(address indexed sender, address indexed owner, uint256 assets, uint256 shares)", "erc4626", "deposit"),
+    ("Withdraw(address indexed sender, address indexed receiver, address indexed owner, uint256 assets, uint256 shares)",
+     "erc4626", "withdraw"),
+
+    # Aggregators
+    ("Swapped(address sender, address srcToken, address dstToken, address dstReceiver, uint256 spentAmount, uint256 returnAmount)",
+     "1inch", "swap"),
+    ("TransformedERC20(address indexed taker, address inputToken, address outputToken, uint256 inputTokenAmount, uint256 outputTokenAmount)",
+     "0x", "swap"),
+    ("RfqOrderFilled(bytes32 orderHash, address maker, address taker, address makerToken, address takerToken, uint128 takerTokenFilledAmount, uint128 makerTokenFilledAmount, bytes32 pool)",
+     "0x", "swap"),
+
+    # Bridges
+    ("ETHDepositInitiated(address indexed from, address indexed to, uint256 amount, bytes extraData)", "optimism_bridge", "bridge"),
+    ("ERC20DepositInitiated(address indexed l1Token, address indexed l2Token, address indexed from, address to, uint256 amount, bytes extraData)",
+     "optimism_bridge", "bridge"),
+    ("TransferSent(bytes32 indexed transferId, uint256 indexed chainId, address indexed recipient, uint256 amount, bytes32 transferNonce, uint256 bonderFee, uint256 index, uint256 amountOutMin, uint256 deadline)",
+     "hop", "bridge"),
+    ("FundsDeposited(uint256 amount, uint256 originChainId, uint256 indexed destinationChainId, int64 relayerFeePct, uint32 indexed depositId, uint32 quoteTimestamp, address originToken, address recipient, address indexed depositor, bytes message)",
+     "across", "bridge"),
+    ("LogMessagePublished(address indexed sender, uint64 sequence, uint32 nonce, bytes payload, uint8 consistencyLevel)",
+     "wormhole", "bridge"),
+
+    # NFT marketplaces
+    ("OrderFulfilled(bytes32 orderHash, address indexed offerer, address indexed zone, address recipient, (uint8,address,uint256,uint256)[] offer, (uint8,address,uint256,uint256,address)[] consideration)",
+     "seaport", "nft_trade"),
+]
+
+FUNCTION_SIGNATURES = [
+    # ERC20 / WETH
+    ("transfer(address to, uint256 amount)", "erc20", "transfer"),
+    ("transferFrom(address from, address to, uint256 amount)", "erc20", "transfer"),
+    ("approve(address spender, uint256 amount)", "erc20", "approve"),
+    ("deposit()", "weth", "wrap"),
+    ("withdraw(uint256 amount)", "weth", None),
+
+    # ERC721 / ERC1155
+    ("safeTransferFrom(address from, address to, uint256 tokenId)", "erc721", "nft_transfer"),
+    ("safeTransferFrom(address from, address to, uint256 id, uint256 amount, bytes data)", "erc1155", "nft_transfer"),
+
+    # Uniswap V2 router
+    ("swapExactTokensForTokens(uint256 amountIn, uint256 amountOutMin, address[] path, address to, uint256 deadline)",
+     "uniswap_v2", "swap"),
+    ("swapTokensForExactTokens(uint256 amountOut, uint256 amountInMax, address[] path, address to, uint256 deadline)",
+     "uniswap_v2", "swap"),
+    ("swapExactETHForTokens(uint256 amountOutMin, address[] path, address to, uint256 deadline)", "uniswap_v2", "swap"),
+    ("swapETHForExactTokens(uint256 amountOut, address[] path, address to, uint256 deadline)", "uniswap_v2", "swap"),
+    ("swapExactTokensForETH(uint256 amountIn, uint256 amountOutMin, address[] path, address to, uint256 deadline)",
+     "uniswap_v2", "swap"),
+    ("swapTokensForExactETH(uint256 amountOut, uint256 amountInMax, address[] path, address to, uint256 deadline)",
+     "uniswap_v2", "swap"),
+    ("swapExactTokensForTokensSupportingFeeOnTransferTokens(uint256 amountIn, uint256 amountOutMin, address[] path, address to, uint256 deadline)",
+     "uniswap_v2", "swap"),
+    ("addLiquidity(address tokenA, address tokenB, uint256 amountADesired, uint256 amountBDesired, uint256 amountAMin, uint256 amountBMin, address to, uint256 deadline)",
+     "uniswap_v2", "provide_liquidity"),
+    ("addLiquidityETH(address token, uint256 amountTokenDesired, uint256 amountTokenMin, uint256 amountETHMin, address to, uint256 deadline)",
+     "uniswap_v2", "provide_liquidity"),
+    ("removeLiquidity(address tokenA, address tokenB, uint256 liquidity, uint256 amountAMin, uint256 amountBMin, address to, uint256 deadline)",
+     "uniswap_v2", "remove_liquidity"),
+    ("removeLiquidityETH(address token, uint256 liquidity, uint256 amountTokenMin, uint256 amountETHMin, address to, uint256 deadline)",
+     "uniswap_v2", "remove_liquidity"),
+
+    # Uniswap V3 SwapRouter / SwapRouter02 / Universal Router
+    ("exactInputSingle((address,address,uint24,address,uint256,uint256,uint256,uint160) params)", "uniswap_v3", "swap"),
+    ("exactInputSingle((address,address,uint24,address,uint256,uint256,uint160) params)", "uniswap_v3", "swap"),
+    ("exactInput((bytes,address,uint256,uint256,uint256) params)", "uniswap_v3", "swap"),
+    ("exactInput((bytes,address,uint256,uint256) params)", "uniswap_v3", "swap"),
+    ("exactOutputSingle((address,address,uint24,address,uint256,uint256,uint256,uint160) params)", "uniswap_v3", "swap"),
+    ("exactOutput((bytes,address,uint256,uint256,uint256) params)", "uniswap_v3", "swap"),
+    ("exactOutput((bytes,address,uint256,uint256) params)", "uniswap_v3", "swap"),
+    ("multicall(uint256 deadline, bytes[] data)", "uniswap_v3", None),
+    ("multicall(bytes[] data)", "uniswap_v3", None),
+    ("execute(bytes commands, bytes[] inputs, uint256 deadline)", "uniswap_universal_router", "swap"),
+    ("execute(bytes commands, bytes[] inputs)", "uniswap_universal_router", "swap"),
+
+    # Curve
+    ("exchange(int128 i, int128 j, uint256 dx, uint256 min_dy)", "curve", "swap"),
+    ("exchange_underlying(int128 i, int128 j, uint256 dx, uint256 min_dy)", "curve", "swap"),
+    ("add_liquidity(uint256[2] amounts, uint256 min_mint_amount)", "curve", "provide_liquidity"),
+    ("add_liquidity(uint256[3] amounts, uint256 min_mint_amount)", "curve", "provide_liquidity"),
+    ("remove_liquidity(uint256 _amount, uint256[2] min_amounts)", "curve", "remove_liquidity"),
+    ("remove_liquidity(uint256 _amount, uint256[3] min_amounts)", "curve", "remove_liquidity"),
+    ("remove_liquidity_one_coin(uint256 _token_amount, int128 i, uint256 min_amount)", "curve", "remove_liquidity"),
+
+    # Aave V2 / V3
+    ("deposit(address asset, uint256 amount, address onBehalfOf, uint16 referralCode)", "aave", "lend"),
+    ("supply(address asset, uint256 amount, address onBehalfOf, uint16 referralCode)", "aave", "lend"),
+    ("withdraw(address asset, uint256 amount, address to)", "aave", "withdraw"),
+    ("borrow(address asset, uint256 amount, uint256 interestRateMode, uint16 referralCode, address onBehalfOf)", "aave", "borrow"),
+    ("repay(address asset, uint256 amount, uint256 rateMode, address onBehalfOf)", "aave", "repay"),
+
+    # Compound V2
+    ("mint(uint256 mintAmount)", "compound", "lend"),
+    ("mint()", "compound", "lend"),
+    ("redeem(uint256 redeemTokens)", "compound", "withdraw"),
+    ("redeemUnderlying(uint256 redeemAmount)", "compound", "withdraw"),
+    ("borrow(uint256 borrowAmount)", "compound", "borrow"),
+    ("repayBorrow(uint256 repayAmount)", "compound", "repay"),
+    ("repayBorrow()", "compound", "repay"),
+    ("claimComp(address holder)", "compound", "claim_rewards"),
+
+    # Lido
+    ("submit(address _referral)", "lido", "stake"),
+    ("requestWithdrawals(uint256[] _amounts, address _owner)", "lido", "unstake"),
+    ("claimWithdrawal(uint256 _requestId)", "lido", "withdraw"),
+
+    # Staking rewards contracts
+    ("stake(uint256 amount)", "staking", "stake"),
+    ("getReward()", "staking", "claim_rewards"),
+    ("exit()", "staking", "unstake"),
+
+    # Aggregators
+    ("swap(address caller, (address,address,address,address,uint256,uint256,uint256,bytes) desc, bytes data)", "1inch", "swap"),
+    ("swap(address executor, (address,address,address,address,uint256,uint256,uint256) desc, bytes permit, bytes data)",
+     "1inch", "swap"),
+    ("unoswap(address srcToken, uint256 amount, uint256 minReturn, bytes32[] pools)", "1inch", "swap"),
+    ("uniswapV3Swap(uint256 amount, uint256 minReturn, uint256[] pools)", "1inch", "swap"),
+    ("transformERC20(address inputToken, address outputToken, uint256 inputTokenAmount, uint256 minOutputTokenAmount, (uint32,bytes)[] transformations)",
+     "0x", "swap"),
+    ("sellToUniswap(address[] tokens, uint256 sellAmount, uint256 minBuyAmount, bool isSushi)", "0x", "swap"),
+
+    # Bridges
+    ("depositETH(uint32 _minGasLimit, bytes _extraData)", "optimism_bridge", "bridge"),
+    ("depositERC20(address _l1Token, address _l2Token, uint256 _amount, uint32 _minGasLimit, bytes _extraData)",
+     "optimism_bridge", "bridge"),
+    ("depositEth()", "arbitrum_bridge", "bridge"),
+    ("sendToL2(uint256 chainId, address recipient, uint256 amount, uint256 amountOutMin, uint256 deadline, address relayer, uint256 relayerFee)",
+     "hop", "bridge"),
+    ("deposit(address recipient, address originToken, uint256 amount, uint256 destinationChainId, int64 relayerFeePct, uint32 quoteTimestamp, bytes message, uint256 maxCount)",
+     "across", "bridge"),
+
+    # NFT marketplaces
+    ("fulfillBasicOrder((address,uint256,uint256,address,address,address,uint256,uint256,uint8,uint256,uint256,bytes32,uint256,bytes32,bytes32,uint256,(uint256,address)[],bytes) parameters)",
+     "seaport", "nft_trade"),
+]
@@ -1,11 +1,178 @@
-from sqlalchemy import create_engine
+"""
+Database engines and sessions
+
+Each process picks an engine profile for its role (settings.DATABASE_ROLE,
+or "worker" when started by Celery, "web" otherwise):
+
+- web: API requests. Bigger pool, short statement timeout, fail fast when
+  the pool is exhausted.
+- worker: Celery tasks (audits, syncs). Smaller pool, long statements.
+- batch: Bulk loads and nightly jobs (see get_batch_session). Few
+  connections, no statement timeout, psycopg2 executemany batching.
+
+Read-only report queries can use get_read_db, which goes to
+DATABASE_REPLICA_URL when configured (replicas may lag a little behind the
+primary) and to the primary otherwise.
+
+Hot read routes (dashboard, cost basis lots/portfolio, regulations, wallet
+portfolio) go through the async repositories in app.repositories instead:
+AsyncSession on asyncpg (engines created on first use, same role profile),
+so their queries don't block the event loop and independent ones can run
+concurrently.
+
+Pool usage (checked out connections, overflow, checkouts...) is exposed on
+/metrics by pool_stats().
+"""
+
+import logging
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: int                # Seconds to wait for a connection when the pool is exhausted
+    statement_timeout_ms: int        # 0 = no timeout
+    executemany_mode: Optional[str] = None
+    pool_recycle: int = 1800
+    pool_use_lifo: bool = False
+
+
+ENGINE_PROFILES: Dict[str, EngineProfile] = {
+    "web": EngineProfile(pool_size=10, max_overflow=10, pool_timeout=10, statement_timeout_ms=30_000, pool_use_lifo=True),
+    "worker": EngineProfile(pool_size=4, max_overflow=4, pool_timeout=60, statement_timeout_ms=600_000),
+    "batch": EngineProfile(pool_size=2, max_overflow=0, pool_timeout=300, statement_timeout_ms=0,
+                           executemany_mode="values_plus_batch"),
+}
+
+
+def current_role() -> str:
+    """Engine profile of this process"""
+    if settings.DATABASE_ROLE:
+        return settings.DATABASE_ROLE
+    return "worker" if sys.argv and sys.argv[0].endswith("celery") else "web"
+
+
+def engine_options(url: str, role: str, read_only: bool = False) -> Dict:
+    """
+    create_engine() keyword arguments for a role
+
+    Args:
+        url: Database URL
+        role: Engine profile ("web", "worker", "batch")
+        read_only: Replica engine (default_transaction_read_only on PostgreSQL)
+    """
+    profile = ENGINE_PROFILES[role]
+    kwargs = {"pool_pre_ping": True}
+
+    if url.startswith("postgresql"):
+        options = []
+        if profile.statement_timeout_ms:
+            options.append(f"-c statement_timeout={profile.statement_timeout_ms}")
+        if read_only:
+            options.append("-c default_transaction_read_only=on")
+
+        kwargs.update(
+            pool_size=profile.pool_size,
+            max_overflow=profile.max_overflow,
+            pool_timeout=profile.pool_timeout,
+            pool_recycle=profile.pool_recycle,
+            pool_use_lifo=profile.pool_use_lifo,
+            connect_args={
+                "application_name": f"cryptonomadhub-{role}{'-replica' if read_only else ''}",
+                **({"options": " ".join(options)} if options else {})
+            }
+        )
+        if profile.executemany_mode and url.startswith(("postgresql://", "postgresql+psycopg2://")):
+            kwargs["executemany_mode"] = profile.executemany_mode
+
+    return kwargs
+
+
+def create_db_engine(url: str, role: str, read_only: bool = False) -> Engine:
+    """Create an engine with the pool/timeout settings of a role (see engine_options)"""
+    logger.info(f"Database engine: {role} profile{' (read replica)' if read_only else ''}")
+    return create_engine(url, **engine_options(url, role, read_only))
+
+
+# ========== Pool metrics ==========
+
+_pool_counters: Dict[str, Dict[str, int]] = {}
+
+
+def _track_pool(name: str, db_engine: Engine):
+    counters = _pool_counters.setdefault(name, {"connects": 0, "checkouts": 0, "invalidations": 0})
+
+    @event.listens_for(db_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        counters["connects"] += 1
+
+    @event.listens_for(db_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counters["checkouts"] += 1
+
+    @event.listens_for(db_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        counters["invalidations"] += 1
+
+
+_engines: Dict[str, Engine] = {}
+
+
+def _register(name: str, db_engine: Engine) -> Engine:
+    _engines[name] = db_engine
+    _track_pool(name, db_engine)
+    return db_engine
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Pool usage per engine
+
+    Returns:
+        {engine_name: {"size", "checked_out", "overflow", "checked_in",
+                       "connects", "checkouts", "invalidations"}}
+    """
+    stats = {}
+    for name, db_engine in _engines.items():
+        pool = db_engine.pool
+        current = {}
+        for key, attr in (("size", "size"), ("checked_out", "checkedout"),
+                          ("overflow", "overflow"), ("checked_in", "checkedin")):
+            method = getattr(pool, attr, None)
+            if method is not None:
+                # QueuePool.overflow() starts at -pool_size
+                current[key] = max(method(), 0) if key == "overflow" else method()
+        stats[name] = {**current, **_pool_counters.get(name, {})}
+    return stats
+
+
+# ========== Engines and sessions ==========
+
+ROLE = current_role()
+
+engine = _register(ROLE, create_db_engine(settings.DATABASE_URL, ROLE))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if settings.DATABASE_REPLICA_URL:
+    read_engine = _register(f"{ROLE}-replica", create_db_engine(settings.DATABASE_REPLICA_URL, ROLE, read_only=True))
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
 
@@ -16,3 +183,119 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Dependency for read-only queries (replica when configured, may lag slightly)"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+_batch_lock = threading.Lock()
+
+
+def get_batch_session() -> Session:
+    """Session on the batch engine (created on first use), for bulk loads and nightly jobs"""
+    with _batch_lock:
+        if "batch" not in _engines:
+            _register("batch", create_db_engine(settings.DATABASE_URL, "batch"))
+    return Session(bind=_engines["batch"], autoflush=False)
+
+
+# ========== Async engines and sessions ==========
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Same database URL with an asyncio driver (asyncpg, aiosqlite)"""
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+def async_engine_options(url: str, role: str, read_only: bool = False) -> Dict:
+    """
+    create_async_engine() keyword arguments for a role
+
+    Same pool settings as engine_options(); asyncpg takes the statement
+    timeout and read-only flag as server_settings instead of libpq options.
+    """
+    kwargs = engine_options(url, role, read_only)
+    connect_args = kwargs.pop("connect_args", None)
+
+    if connect_args:
+        profile = ENGINE_PROFILES[role]
+        server_settings = {"application_name": connect_args["application_name"]}
+        if profile.statement_timeout_ms:
+            server_settings["statement_timeout"] = str(profile.statement_timeout_ms)
+        if read_only:
+            server_settings["default_transaction_read_only"] = "on"
+        kwargs["connect_args"] = {"server_settings": server_settings}
+
+    return kwargs
+
+
+_async_sessions: Dict[bool, async_sessionmaker] = {}
+_async_lock = threading.Lock()
+
+
+def get_async_sessionmaker(read_only: bool = False) -> async_sessionmaker:
+    """
+    AsyncSession factory (the async engine is created on first use)
+
+    Args:
+        read_only: Use DATABASE_REPLICA_URL when configured (same engine as
+                   the primary otherwise)
+    """
+    replica = read_only and bool(settings.DATABASE_REPLICA_URL)
+
+    with _async_lock:
+        if replica not in _async_sessions:
+            url = async_database_url(settings.DATABASE_REPLICA_URL if replica else settings.DATABASE_URL)
+            name = f"{ROLE}-async{'-replica' if replica else ''}"
+            logger.info(f"Database engine: {ROLE} profile (async{', read replica' if replica else ''})")
+            async_engine = create_async_engine(url, **async_engine_options(url, ROLE, replica))
+            _register(name, async_engine.sync_engine)
+            _async_sessions[replica] = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+    return _async_sessions[replica]
+
+
+async def get_async_db():
+    """Dependency for an AsyncSession on the primary"""
+    async with get_async_sessionmaker()() as session:
+        yield session
+
+
+def get_async_sessions() -> async_sessionmaker:
+    """
+    Dependency for the async repositories: AsyncSession factory on the primary
+
+    Repositories open one session per query (an AsyncSession runs one
+    statement at a time), which lets independent queries run concurrently.
+    Use it for routes that must see the user's own writes right away.
+    """
+    return get_async_sessionmaker()
+
+
+def get_async_read_sessions() -> async_sessionmaker:
+    """
+    Same as get_async_sessions, on the read replica when configured
+
+    Only for report and dashboard reads, which tolerate replication lag.
+    """
+    return get_async_sessionmaker(read_only=True)
+
+
+def dispose_engines():
+    """Drop pooled connections inherited from a parent process (call after fork)"""
+    for db_engine in _engines.values():
+        db_engine.dispose(close=False)
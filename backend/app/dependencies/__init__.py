@@ -9,6 +9,7 @@ from .license_check import (
 )
 from .exchange_rate import (
     get_redis_client,
+    get_async_redis_client,
     get_exchange_rate_service
 )
 
@@ -19,5 +20,6 @@ __all__ = [
     "require_pdf_export",
     "require_chat_message",
     "get_redis_client",
+    "get_async_redis_client",
     "get_exchange_rate_service"
 ]
@@ -5,6 +5,7 @@ Provides dependency injection for ExchangeRateService.
 """
 import os
 import redis
+import redis.asyncio
 from functools import lru_cache
 from app.services.exchange_rate import ExchangeRateService
 
@@ -16,6 +17,13 @@ def get_redis_client() -> redis.Redis:
     return redis.Redis.from_url(redis_url, decode_responses=True)
 
 
+@lru_cache()
+def get_async_redis_client() -> redis.asyncio.Redis:
+    """Get asyncio Redis client singleton (pub/sub subscriptions in request handlers)"""
+    redis_url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    return redis.asyncio.Redis.from_url(redis_url, decode_responses=True)
+
+
 def get_exchange_rate_service() -> ExchangeRateService:
     """Get ExchangeRateService instance with Redis caching"""
     redis_client = get_redis_client()
@@ -2,14 +2,19 @@
 License Check Dependencies
 
 FastAPI dependencies for enforcing license limits on endpoints
+
+Tier checks read the cached principal (see app.services.principal_cache)
+and quotas are metered in Redis (see app.services.usage_meter): no license
+query or update per request.
 """
 
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.user import User
+from app.models.license import LicenseTier
 from app.routers.auth import get_current_user
 from app.services.license_service import LicenseService
+from app.services.principal_cache import Principal
 from typing import Callable
 
 
@@ -20,7 +25,7 @@ def require_license(resource: str):
     Usage:
         @router.post("/simulations")
         async def create_simulation(
-            user: User = Depends(get_current_user),
+            user: Principal = Depends(get_current_user),
             license_check = Depends(require_license("simulations")),
             db: Session = Depends(get_db)
         ):
@@ -35,7 +40,7 @@ def require_license(resource: str):
     """
 
     async def check_license(
-        current_user: User = Depends(get_current_user),
+        current_user: Principal = Depends(get_current_user),
         db: Session = Depends(get_db)
     ):
         """Check if user can use the resource and increment counter"""
@@ -45,7 +50,8 @@ def require_license(resource: str):
         # Check and increment usage
         allowed, error_message = license_service.check_and_increment_usage(
             user_id=current_user.id,
-            resource=resource
+            resource=resource,
+            principal=current_user
         )
 
         if not allowed:
@@ -78,7 +84,7 @@ def require_pro_tier():
     Usage:
         @router.get("/tax-optimizer/analyze")
         async def analyze(
-            user: User = Depends(get_current_user),
+            user: Principal = Depends(get_current_user),
             _check = Depends(require_pro_tier()),
             db: Session = Depends(get_db)
         ):
@@ -87,22 +93,16 @@ def require_pro_tier():
     """
 
     async def check_pro_tier(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_user)
     ):
         """Check if user has PRO tier"""
-        from app.models.license import LicenseTier
-
-        license_service = LicenseService(db)
-        license = license_service.get_user_license(current_user.id)
-
-        if not license or license.tier not in [LicenseTier.PRO, LicenseTier.ENTERPRISE]:
+        if not current_user.has_license or current_user.tier not in [LicenseTier.PRO, LicenseTier.ENTERPRISE]:
             raise HTTPException(
                 status_code=status.HTTP_402_PAYMENT_REQUIRED,
                 detail={
                     "error": "pro_required",
                     "message": "Tax Optimizer is a PRO feature. Upgrade to PRO to access AI-powered tax optimization.",
-                    "current_tier": license.tier.value if license else "free",
+                    "current_tier": current_user.tier.value,
                     "required_tier": "pro",
                     "upgrade_url": "/pricing"
                 }
@@ -121,16 +121,10 @@ def require_starter_plus():
     """
 
     async def check_starter_plus(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_user)
     ):
         """Check if user has STARTER or higher"""
-        from app.models.license import LicenseTier
-
-        license_service = LicenseService(db)
-        license = license_service.get_user_license(current_user.id)
-
-        if not license or license.tier == LicenseTier.FREE:
+        if not current_user.has_license or current_user.tier == LicenseTier.FREE:
             raise HTTPException(
                 status_code=status.HTTP_402_PAYMENT_REQUIRED,
                 detail={
@@ -155,22 +149,16 @@ def require_csv_export():
     """
 
     async def check_csv_export(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: Principal = Depends(get_current_user)
     ):
         """Check if user has PRO tier for CSV export"""
-        from app.models.license import LicenseTier
-
-        license_service = LicenseService(db)
-        license = license_service.get_user_license(current_user.id)
-
-        if not license or license.tier not in [LicenseTier.PRO, LicenseTier.ENTERPRISE]:
+        if not current_user.has_license or current_user.tier not in [LicenseTier.PRO, LicenseTier.ENTERPRISE]:
             raise HTTPException(
                 status_code=status.HTTP_402_PAYMENT_REQUIRED,
                 detail={
                     "error": "pro_required",
                     "message": "CSV export is a PRO feature. Upgrade to PRO to export your data in CSV format.",
-                    "current_tier": license.tier.value if license else "free",
+                    "current_tier": current_user.tier.value,
                     "required_tier": "pro",
                     "upgrade_url": "/pricing"
                 }
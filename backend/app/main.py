@@ -17,10 +17,16 @@ from app.models import (
 from app.middleware import (
     limiter,
     rate_limit_exceeded_handler,
-    setup_security_middleware
+    setup_security_middleware,
+    setup_profiling_middleware
 )
 from app.monitoring import init_sentry
 from app.error_handlers import register_error_handlers  # ✅ PHASE 2.7
+from app.services.regulation_catalog import load_regulation_catalog
+from app.services.protocol_registry import load_protocol_registry
+from app.services.report_renderer import shutdown_render_pool
+from app.services.feature_flags import listen_for_flag_changes
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -57,9 +63,31 @@ register_error_handlers(app)
 # Create tables on startup
 @app.on_event("startup")
 async def startup_event():
-    """Create database tables on startup"""
+    """Create database tables on startup, warm the regulation catalog and protocol registry, follow feature flag changes"""
     Base.metadata.create_all(bind=engine)
 
+    try:
+        load_regulation_catalog()
+    except Exception as e:
+        # Loaded lazily on first read instead
+        logger.warning(f"Regulation catalog not loaded at startup: {e}")
+
+    # Address -> protocol lookups of the parser (built-ins only if the table can't be read)
+    load_protocol_registry()
+
+    # Loads the feature flag snapshot, then reloads it on every published change
+    app.state.flag_listener = asyncio.create_task(listen_for_flag_changes())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the feature flag listener and the report render pool"""
+    listener = getattr(app.state, "flag_listener", None)
+    if listener is not None:
+        listener.cancel()
+
+    shutdown_render_pool()
+
 # CORS - Dynamic configuration based on environment
 allowed_origins = settings.get_cors_origins()
 app.add_middleware(
@@ -71,6 +99,9 @@ app.add_middleware(
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
+# Per-request SQL/Redis/HTTP profiling (/metrics, Server-Timing outside production)
+setup_profiling_middleware(app)
+
 @app.get("/")
 async def root():
     return {
@@ -6,6 +6,7 @@ from .security import (
     SecurityHeadersMiddleware,
     setup_security_middleware
 )
+from .profiling import ProfilingMiddleware, setup_profiling_middleware
 
 __all__ = [
     "limiter",
@@ -13,5 +14,7 @@ __all__ = [
     "get_rate_limit",
     "HTTPSRedirectMiddleware",
     "SecurityHeadersMiddleware",
-    "setup_security_middleware"
+    "setup_security_middleware",
+    "ProfilingMiddleware",
+    "setup_profiling_middleware"
 ]
@@ -0,0 +1,75 @@
+"""
+Request profiling middleware
+
+Profiles every request (SQL, Redis and outbound HTTP calls, see
+app.monitoring.profiler), aggregates the result per route for /metrics and,
+outside production, adds a Server-Timing header so the browser devtools show
+where the time went.
+"""
+
+import time
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp
+from app.config import settings
+from app.monitoring.profiler import instrument, record_request, start_profile, stop_profile
+
+
+# Not profiled (scrapes and probes would drown the real routes)
+UNPROFILED_PATHS = {"/metrics", "/health", "/health/liveness", "/health/readiness"}
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware to profile requests
+
+    Adds (non-production only):
+    - Server-Timing: db/redis/http durations and call counts, total time
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        super().__init__(app)
+        self.server_timing = server_timing
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in UNPROFILED_PATHS:
+            return await call_next(request)
+
+        profile, token = start_profile()
+        start = time.perf_counter()
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            elapsed = time.perf_counter() - start
+            stop_profile(token)
+
+            # The router stores the matched route in the scope
+            route = request.scope.get("route")
+            record_request(
+                request.method,
+                getattr(route, "path", "unmatched"),
+                status_code,
+                elapsed,
+                profile
+            )
+
+        if self.server_timing:
+            response.headers["Server-Timing"] = profile.server_timing(elapsed)
+
+        return response
+
+
+def setup_profiling_middleware(app):
+    """
+    Setup request profiling
+
+    Call this function in main.py after creating the FastAPI app
+    """
+    instrument()
+    app.add_middleware(
+        ProfilingMiddleware,
+        server_timing=settings.ENVIRONMENT != "production"
+    )
@@ -5,6 +5,7 @@ from .simulation import Simulation
 from .feature_flag import FeatureFlag
 from .audit_log import AuditLog
 from .defi_protocol import DeFiProtocol, DeFiTransaction, DeFiAudit
+from .known_protocol import KnownProtocol
 from .license import License, LicenseTier, SubscriptionStatus
 from .cost_basis import (
     CostBasisLot,
@@ -31,10 +32,12 @@ from .tax_opportunity import (
 from .user_wallet import UserWallet
 from .wallet_snapshot import WalletSnapshot
 from .wallet_value_history import WalletValueHistory
+from .wallet_value_rollup import WalletValueRollup
 from .nft_transaction import NFTTransaction
 from .yield_position import YieldPosition, YieldReward
 from .chat import ChatConversation, ChatMessage
 from .dashboard_activity import DashboardActivity
+from .notification_delivery import NotificationDelivery
 
 __all__ = [
     "User",
@@ -47,6 +50,7 @@ __all__ = [
     "DeFiProtocol",
     "DeFiTransaction",
     "DeFiAudit",
+    "KnownProtocol",
     "License",
     "LicenseTier",
     "SubscriptionStatus",
@@ -69,10 +73,12 @@ __all__ = [
     "UserWallet",
     "WalletSnapshot",
     "WalletValueHistory",
+    "WalletValueRollup",
     "NFTTransaction",
     "YieldPosition",
     "YieldReward",
     "ChatConversation",
     "ChatMessage",
     "DashboardActivity",
+    "NotificationDelivery",
 ]
@@ -4,7 +4,7 @@ DeFi Protocol Models
 Models for tracking DeFi protocols, transactions, and audit results
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Enum, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Enum, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -124,6 +124,11 @@ class DeFiTransaction(Base):
     user = relationship("User")
     audit = relationship("DeFiAudit", back_populates="transactions")
 
+    __table_args__ = (
+        # Audit report keyset pagination (newest first, see DeFiAuditService.get_audit_report)
+        Index('idx_defi_tx_audit_ts_id', 'audit_id', 'timestamp', 'id'),
+    )
+
 
 class DeFiAudit(Base):
     """
@@ -0,0 +1,36 @@
+"""
+Known Protocol Model
+
+Contract addresses of DeFi protocols (built-in list + DeFiLlama sync).
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
+from datetime import datetime
+from app.database import Base
+
+
+class KnownProtocol(Base):
+    """
+    One protocol contract address on one chain
+
+    Synced from the DeFiLlama /protocols list by the sync_protocol_registry
+    task and loaded in memory by app.services.protocol_registry, so address
+    lookups never query this table.
+    """
+    __tablename__ = "known_protocols"
+
+    id = Column(Integer, primary_key=True, index=True)
+    chain = Column(String(50), nullable=False)      # ethereum, arbitrum, bsc...
+    address = Column(String(255), nullable=False)   # Lowercase contract address
+
+    name = Column(String(255), nullable=False)      # e.g., "Uniswap"
+    slug = Column(String(255), nullable=True)       # DeFiLlama slug, e.g., "uniswap"
+    protocol_type = Column(String(50), nullable=False, default="other")  # dex, lending, staking...
+    source = Column(String(20), nullable=False, default="defillama")
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('chain', 'address', name='uq_known_protocol_chain_address'),
+        Index('idx_known_protocol_slug', 'slug'),
+    )
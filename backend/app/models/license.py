@@ -11,10 +11,26 @@ Handles freemium pricing tiers with usage limits:
 from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Enum as SQLEnum, ForeignKey
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
+from typing import Optional
 import enum
 from app.database import Base
 
 
+# Resources with monthly usage counters (<resource>_used columns)
+USAGE_RESOURCES = ("simulations", "defi_audits", "pdf_exports", "chat_messages")
+
+
+def billing_period_start(now: Optional[datetime] = None) -> datetime:
+    """Start of the monthly usage period containing now (UTC)"""
+    now = now or datetime.utcnow()
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_billing_period_start(period_start: datetime) -> datetime:
+    """Start of the usage period following period_start"""
+    return billing_period_start(period_start + timedelta(days=32))
+
+
 class LicenseTier(str, enum.Enum):
     """License tiers matching Paddle plans"""
     FREE = "free"
@@ -87,6 +103,7 @@ class License(Base):
 
     def to_dict(self):
         """Convert to dictionary"""
+        usage = self.get_usage()
         return {
             "id": self.id,
             "user_id": self.user_id,
@@ -100,10 +117,10 @@ class License(Base):
             "activated_at": self.activated_at.isoformat() if self.activated_at else None,
             "expires_at": self.expires_at.isoformat() if self.expires_at else None,
             "next_billing_date": self.next_billing_date.isoformat() if self.next_billing_date else None,
-            "simulations_used": self.simulations_used,
-            "defi_audits_used": self.defi_audits_used,
-            "pdf_exports_used": self.pdf_exports_used,
-            "chat_messages_used": self.chat_messages_used,
+            "simulations_used": usage["simulations"],
+            "defi_audits_used": usage["defi_audits"],
+            "pdf_exports_used": usage["pdf_exports"],
+            "chat_messages_used": usage["chat_messages"],
             "usage_reset_at": self.usage_reset_at.isoformat(),
             "limits": self.get_limits(),
             "remaining": self.get_remaining(),
@@ -149,15 +166,24 @@ class License(Base):
         }
         return limits.get(self.tier, limits[LicenseTier.FREE])
 
+    def get_usage(self, period_start: Optional[datetime] = None) -> dict:
+        """
+        Usage counters for a billing period (default: the current one)
+
+        Counters last reset before the period started belong to an earlier
+        period and count as 0: periods roll over without resetting rows
+        (see app.services.usage_meter).
+        """
+        period_start = period_start or billing_period_start()
+        if self.usage_reset_at and self.usage_reset_at < period_start:
+            return dict.fromkeys(USAGE_RESOURCES, 0)
+        return {resource: getattr(self, f"{resource}_used") or 0 for resource in USAGE_RESOURCES}
+
     def get_remaining(self) -> dict:
         """Get remaining usage for current billing period"""
         limits = self.get_limits()
-        return {
-            "simulations": max(0, limits["simulations"] - self.simulations_used),
-            "defi_audits": max(0, limits["defi_audits"] - self.defi_audits_used),
-            "pdf_exports": max(0, limits["pdf_exports"] - self.pdf_exports_used),
-            "chat_messages": max(0, limits["chat_messages"] - self.chat_messages_used),
-        }
+        usage = self.get_usage()
+        return {resource: max(0, limits[resource] - usage[resource]) for resource in USAGE_RESOURCES}
 
     def can_use(self, resource: str) -> bool:
         """
@@ -180,6 +206,9 @@ class License(Base):
             resource: "simulations", "defi_audits", "pdf_exports", "chat_messages"
             amount: Amount to increment (default 1)
         """
+        if self.usage_reset_at and self.usage_reset_at < billing_period_start():
+            self.reset_usage()
+
         if resource == "simulations":
             self.simulations_used += amount
         elif resource == "defi_audits":
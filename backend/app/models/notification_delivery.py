@@ -0,0 +1,41 @@
+"""
+Notification Delivery Model
+
+One row per (notification, channel, user): the delivery log of the
+notification fan-out, also used to deduplicate re-sends.
+"""
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from datetime import datetime
+from app.database import Base
+
+
+class NotificationDelivery(Base):
+    """
+    Result of sending one notification to one recipient on one channel
+
+    idempotency_key is derived from (notification key, channel, user). A
+    fan-out claims the row ("pending") before sending, so a retried or
+    re-triggered fan-out skips recipients already sent to or being sent to,
+    and only retries the failed ones.
+    """
+    __tablename__ = "notification_deliveries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String(64), nullable=False, unique=True)
+    notification_key = Column(String(200), nullable=False)  # e.g. "usage_reset:2025-11"
+    channel = Column(String(20), nullable=False)             # email, sms, webhook
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True, index=True)
+    recipient = Column(String(500), nullable=False)          # Email, phone number or webhook URL
+
+    status = Column(String(20), nullable=False)              # pending, sent, failed
+    provider_message_id = Column(String(255), nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=1)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_notification_delivery_key_status', 'notification_key', 'status'),
+    )
@@ -0,0 +1,71 @@
+"""
+Wallet Value Rollup Model
+
+Downsampled wallet value time-series (hourly / daily / weekly buckets).
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+
+class WalletValueRollup(Base):
+    """
+    Aggregated wallet value over one time bucket
+
+    Each raw value point (WalletSnapshot / WalletValueHistory) updates one
+    bucket per resolution as it's written, so every tier is complete over
+    its retention window. History queries read a single tier, and raw rows
+    can be pruned without losing long-range charts.
+    """
+    __tablename__ = "wallet_value_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    wallet_id = Column(Integer, ForeignKey("user_wallets.id", ondelete="CASCADE"), nullable=True, index=True)  # null = consolidated
+
+    # Bucket
+    resolution = Column(String(10), nullable=False)  # hour, day, week
+    bucket_start = Column(DateTime, nullable=False)
+
+    # USD values (OHLC-style)
+    open_value_usd = Column(Numeric(20, 8), nullable=False, default=0)
+    min_value_usd = Column(Numeric(20, 8), nullable=False, default=0)
+    max_value_usd = Column(Numeric(20, 8), nullable=False, default=0)
+    close_value_usd = Column(Numeric(20, 8), nullable=False, default=0)
+
+    # Local currency (close only)
+    close_value_local = Column(Numeric(20, 8), nullable=True)
+    local_currency = Column(String(3), nullable=True)
+
+    # First/last raw point folded into this bucket (for open/close ordering)
+    first_at = Column(DateTime, nullable=False)
+    last_at = Column(DateTime, nullable=False)
+    sample_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    user = relationship("User")
+    wallet = relationship("UserWallet")
+
+    __table_args__ = (
+        Index('idx_rollup_wallet_res_bucket', 'wallet_id', 'resolution', 'bucket_start'),
+        Index('idx_rollup_user_res_bucket', 'user_id', 'resolution', 'bucket_start'),
+    )
+
+    def to_dict(self):
+        """Convert to dictionary for API responses"""
+        return {
+            "wallet_id": self.wallet_id,
+            "resolution": self.resolution,
+            "bucket_start": self.bucket_start.isoformat() if self.bucket_start else None,
+            "open_value_usd": float(self.open_value_usd) if self.open_value_usd else 0,
+            "min_value_usd": float(self.min_value_usd) if self.min_value_usd else 0,
+            "max_value_usd": float(self.max_value_usd) if self.max_value_usd else 0,
+            "close_value_usd": float(self.close_value_usd) if self.close_value_usd else 0,
+            "close_value_local": float(self.close_value_local) if self.close_value_local else None,
+            "local_currency": self.local_currency,
+            "sample_count": self.sample_count
+        }
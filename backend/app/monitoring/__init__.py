@@ -7,11 +7,14 @@ from .sentry_config import (
     capture_message,
     capture_exception
 )
+from .profiler import render_prometheus, render_pool_metrics
 
 __all__ = [
     "init_sentry",
     "set_user_context",
     "set_transaction_context",
     "capture_message",
-    "capture_exception"
+    "capture_exception",
+    "render_prometheus",
+    "render_pool_metrics"
 ]
@@ -0,0 +1,279 @@
+"""
+Request Profiler
+
+Counts and times, for every HTTP request:
+- SQL statements (SQLAlchemy engine events)
+- Redis commands (sync and asyncio clients)
+- Outbound HTTP calls (httpx sync and async clients)
+
+The current request's RequestProfile lives in a context variable, so calls
+made from threads started with asyncio.to_thread / run_in_threadpool (which
+copy the context) are attributed to the request too. Calls made outside a
+request (Celery tasks, startup) aren't recorded.
+
+Aggregates are kept per route template (e.g. "/defi-audit/{audit_id}") in
+this process and rendered in Prometheus text format by render_prometheus()
+(served on /metrics).
+
+N+1 patterns show up as the same SQL statement executed many times in one
+request: they're logged and counted in app_request_repeated_queries_total.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+
+# Kinds of calls profiled, in Server-Timing / metrics order
+CALL_KINDS = ("db", "redis", "http")
+
+# Same statement this many times in one request = probably an N+1
+REPEATED_QUERY_THRESHOLD = 10
+
+# Requests slower than this get a summary log line
+SLOW_REQUEST_SECONDS = 1.0
+
+
+@dataclass
+class RequestProfile:
+    """Calls made while serving one request"""
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(CALL_KINDS, 0))
+    seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(CALL_KINDS, 0.0))
+    statements: Counter = field(default_factory=Counter)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, kind: str, elapsed: float, statement: Optional[str] = None):
+        with self.lock:
+            self.counts[kind] += 1
+            self.seconds[kind] += elapsed
+            if statement is not None:
+                self.statements[statement] += 1
+
+    def repeated_statements(self) -> Dict[str, int]:
+        return {s: n for s, n in self.statements.items() if n >= REPEATED_QUERY_THRESHOLD}
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Server-Timing header value (durations in ms)"""
+        metrics = [
+            f'{kind};dur={self.seconds[kind] * 1000:.1f};desc="{self.counts[kind]} calls"'
+            for kind in CALL_KINDS if self.counts[kind]
+        ]
+        metrics.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def start_profile() -> Tuple[RequestProfile, object]:
+    """Start profiling the current request (returns the profile and a reset token)"""
+    profile = RequestProfile()
+    return profile, _current_profile.set(profile)
+
+
+def stop_profile(token):
+    _current_profile.reset(token)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+# ========== Aggregates ==========
+
+@dataclass
+class RouteStats:
+    requests: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    counts: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(CALL_KINDS, 0))
+    call_seconds: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(CALL_KINDS, 0.0))
+    repeated_queries: int = 0
+
+
+_route_stats: Dict[Tuple[str, str], RouteStats] = {}
+_stats_lock = threading.Lock()
+
+
+def record_request(method: str, route: str, status_code: int, elapsed: float, profile: RequestProfile):
+    """Add a finished request to the per-route aggregates"""
+    repeated = profile.repeated_statements()
+
+    with _stats_lock:
+        stats = _route_stats.setdefault((method, route), RouteStats())
+        stats.requests += 1
+        stats.errors += status_code >= 500
+        stats.seconds += elapsed
+        for kind in CALL_KINDS:
+            stats.counts[kind] += profile.counts[kind]
+            stats.call_seconds[kind] += profile.seconds[kind]
+        stats.repeated_queries += len(repeated)
+
+    for statement, times in repeated.items():
+        logger.warning(
+            f"⚠️ Possible N+1 on {method} {route}: statement ran {times}x - {statement[:200]}"
+        )
+
+    if elapsed >= SLOW_REQUEST_SECONDS:
+        calls = ", ".join(
+            f"{kind} {profile.counts[kind]}x/{profile.seconds[kind]:.2f}s" for kind in CALL_KINDS
+        )
+        logger.info(f"🐢 Slow request {method} {route}: {elapsed:.2f}s ({calls})")
+
+
+def reset_metrics():
+    with _stats_lock:
+        _route_stats.clear()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    """Per-route aggregates in Prometheus text exposition format"""
+    with _stats_lock:
+        snapshot = {key: (stats.requests, stats.errors, stats.seconds, dict(stats.counts),
+                          dict(stats.call_seconds), stats.repeated_queries)
+                    for key, stats in _route_stats.items()}
+
+    lines = []
+
+    def metric(name: str, help_text: str, values):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in values:
+            rendered = ",".join(f'{k}="{_label(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{rendered}}} {value}")
+
+    def route_labels(method, route):
+        return [("method", method), ("route", route)]
+
+    metric("app_requests_total", "HTTP requests served",
+           [(route_labels(*key), s[0]) for key, s in snapshot.items()])
+    metric("app_request_errors_total", "HTTP requests answered with a 5xx status",
+           [(route_labels(*key), s[1]) for key, s in snapshot.items()])
+    metric("app_request_seconds_total", "Time spent serving HTTP requests",
+           [(route_labels(*key), f"{s[2]:.6f}") for key, s in snapshot.items()])
+    metric("app_request_calls_total", "SQL statements, Redis commands and outbound HTTP calls made by requests",
+           [(route_labels(*key) + [("kind", kind)], s[3][kind]) for key, s in snapshot.items() for kind in CALL_KINDS])
+    metric("app_request_call_seconds_total", "Time spent in SQL, Redis and outbound HTTP calls by requests",
+           [(route_labels(*key) + [("kind", kind)], f"{s[4][kind]:.6f}") for key, s in snapshot.items() for kind in CALL_KINDS])
+    metric("app_request_repeated_queries_total", "SQL statements run at least 10 times in one request (likely N+1)",
+           [(route_labels(*key), s[5]) for key, s in snapshot.items()])
+
+    return "\n".join(lines) + "\n"
+
+
+def render_pool_metrics(pools: Dict[str, Dict[str, int]]) -> str:
+    """
+    Database pool usage in Prometheus text exposition format
+
+    Args:
+        pools: app.database.pool_stats()
+    """
+    gauges = {
+        "size": "Configured pool size",
+        "checked_out": "Connections currently checked out",
+        "overflow": "Connections opened beyond the pool size",
+        "checked_in": "Idle connections in the pool",
+    }
+    counters = {
+        "connects": "Connections opened",
+        "checkouts": "Connections checked out of the pool",
+        "invalidations": "Connections invalidated (e.g. failed pre-ping)",
+    }
+
+    lines = []
+    for kinds, metric_type, suffix in ((gauges, "gauge", ""), (counters, "counter", "_total")):
+        for key, help_text in kinds.items():
+            name = f"app_db_pool_{key}{suffix}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for engine_name, stats in pools.items():
+                if key in stats:
+                    lines.append(f'{name}{{engine="{_label(engine_name)}"}} {stats[key]}')
+
+    return "\n".join(lines) + "\n"
+
+
+# ========== Instrumentation ==========
+
+_instrumented = False
+
+
+def _timed(kind: str, method):
+    """Wrap a sync client method so its calls are recorded on the current profile"""
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            profile.record(kind, time.perf_counter() - start)
+
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def _timed_async(kind: str, method):
+    """Async counterpart of _timed"""
+    async def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None:
+            return await method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            profile.record(kind, time.perf_counter() - start)
+
+    wrapper.__wrapped__ = method
+    return wrapper
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_profile.get() is not None:
+        context._profiler_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    start = getattr(context, "_profiler_start", None)
+    if profile is not None and start is not None:
+        profile.record("db", time.perf_counter() - start, statement)
+
+
+def instrument():
+    """Install the SQLAlchemy listeners and Redis/httpx wrappers (idempotent)"""
+    global _instrumented
+    if _instrumented:
+        return
+    _instrumented = True
+
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    import redis
+    import redis.asyncio
+    redis.Redis.execute_command = _timed("redis", redis.Redis.execute_command)
+    redis.client.Pipeline.execute = _timed("redis", redis.client.Pipeline.execute)
+    redis.asyncio.Redis.execute_command = _timed_async("redis", redis.asyncio.Redis.execute_command)
+    redis.asyncio.client.Pipeline.execute = _timed_async("redis", redis.asyncio.client.Pipeline.execute)
+
+    import httpx
+    httpx.Client.send = _timed("http", httpx.Client.send)
+    httpx.AsyncClient.send = _timed_async("http", httpx.AsyncClient.send)
+
+    logger.info("Request profiler installed (SQL, Redis, httpx)")
@@ -0,0 +1,25 @@
+"""
+Async repositories
+
+Read queries of the hot API routes on AsyncSession (asyncpg). Routes get
+them from the get_async_sessions dependency (app.database), or from
+get_async_read_sessions for report and dashboard reads that can go to the
+read replica:
+
+    repo = CostBasisRepository(sessions)
+    lots, snapshot = await asyncio.gather(repo.open_lots(user_id), ...)
+"""
+
+from .base import AsyncRepository
+from .cost_basis import CostBasisRepository
+from .dashboard import DashboardRepository
+from .regulations import RegulationRepository
+from .wallet_portfolio import WalletPortfolioRepository
+
+__all__ = [
+    "AsyncRepository",
+    "CostBasisRepository",
+    "DashboardRepository",
+    "RegulationRepository",
+    "WalletPortfolioRepository"
+]
@@ -0,0 +1,36 @@
+"""
+Base class of the async repositories
+"""
+
+from typing import Any, List
+
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.sql import Select
+
+
+class AsyncRepository:
+    """
+    Runs each query on its own short-lived AsyncSession
+
+    An AsyncSession can't run two statements at once, so repositories take
+    the session factory rather than a session: independent queries of a
+    request can then be awaited together (asyncio.gather), each on its own
+    pooled connection. Returned objects are detached (columns are loaded,
+    relationships are not).
+    """
+
+    def __init__(self, sessions: async_sessionmaker):
+        self.sessions = sessions
+
+    async def _all(self, statement: Select) -> List[Any]:
+        async with self.sessions() as session:
+            return list((await session.scalars(statement)).all())
+
+    async def _first(self, statement: Select) -> Any:
+        async with self.sessions() as session:
+            return (await session.scalars(statement.limit(1))).first()
+
+    async def _one_row(self, statement: Select) -> Row:
+        async with self.sessions() as session:
+            return (await session.execute(statement)).one()
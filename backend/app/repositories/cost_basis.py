@@ -0,0 +1,36 @@
+"""
+Cost basis lot queries
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import desc, select
+from app.models.cost_basis import CostBasisLot
+from .base import AsyncRepository
+
+
+class CostBasisRepository(AsyncRepository):
+
+    async def lots(self, user_id: int, token: Optional[str] = None, chain: Optional[str] = None) -> List[CostBasisLot]:
+        """
+        All lots of a user, most recent acquisition first
+
+        Args:
+            token: Only this token (e.g. "ETH")
+            chain: Only this chain (e.g. "ethereum")
+        """
+        statement = select(CostBasisLot).where(CostBasisLot.user_id == user_id)
+        if token:
+            statement = statement.where(CostBasisLot.token == token.upper())
+        if chain:
+            statement = statement.where(CostBasisLot.chain == chain.lower())
+        return await self._all(statement.order_by(desc(CostBasisLot.acquisition_date)))
+
+    async def open_lots(self, user_id: int) -> List[CostBasisLot]:
+        """Lots with a remaining amount (the current holdings)"""
+        return await self._all(
+            select(CostBasisLot).where(
+                CostBasisLot.user_id == user_id,
+                CostBasisLot.remaining_amount > 0
+            )
+        )
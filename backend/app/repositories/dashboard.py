@@ -0,0 +1,60 @@
+"""
+Dashboard queries
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import desc, func, select
+from sqlalchemy.engine import Row
+from app.models.cost_basis import UserCostBasisSettings, WashSaleViolation
+from app.models.dashboard_activity import DashboardActivity
+from app.models.defi_protocol import DeFiAudit
+from app.models.tax_opportunity import TaxOpportunity, OpportunityStatus
+from app.models.user import User
+from .base import AsyncRepository
+
+
+class DashboardRepository(AsyncRepository):
+
+    async def summary(self, user_id: int) -> Row:
+        """
+        Counters and profile fields of the dashboard stats, in one round trip
+
+        Returns:
+            Row with total_audits, last_audit_at, wash_sale_warnings,
+            settings_jurisdiction (cost basis settings) and current_country
+        """
+        return await self._one_row(select(
+            select(func.count(DeFiAudit.id))
+            .where(DeFiAudit.user_id == user_id)
+            .scalar_subquery().label("total_audits"),
+            select(func.max(DeFiAudit.created_at))
+            .where(DeFiAudit.user_id == user_id)
+            .scalar_subquery().label("last_audit_at"),
+            select(func.count(WashSaleViolation.id))
+            .where(WashSaleViolation.user_id == user_id)
+            .scalar_subquery().label("wash_sale_warnings"),
+            select(UserCostBasisSettings.tax_jurisdiction)
+            .where(UserCostBasisSettings.user_id == user_id)
+            .scalar_subquery().label("settings_jurisdiction"),
+            select(User.current_country)
+            .where(User.id == user_id)
+            .scalar_subquery().label("current_country")
+        ))
+
+    async def active_opportunities(self, user_id: int) -> List[TaxOpportunity]:
+        """Active tax opportunities, biggest potential savings first"""
+        return await self._all(
+            select(TaxOpportunity).where(
+                TaxOpportunity.user_id == user_id,
+                TaxOpportunity.status == OpportunityStatus.ACTIVE
+            ).order_by(desc(TaxOpportunity.potential_savings))
+        )
+
+    async def recent_activities(self, user_id: int, limit: int = 10,
+                                activity_type: Optional[str] = None) -> List[DashboardActivity]:
+        """Latest timeline activities (optionally of one type)"""
+        statement = select(DashboardActivity).where(DashboardActivity.user_id == user_id)
+        if activity_type:
+            statement = statement.where(DashboardActivity.activity_type == activity_type)
+        return await self._all(statement.order_by(desc(DashboardActivity.created_at)).limit(limit))
@@ -0,0 +1,22 @@
+"""
+Country analysis queries (regulations themselves come from the in-memory
+regulation catalog)
+"""
+
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from app.models.country_analysis import CountryAnalysis
+from .base import AsyncRepository
+
+
+class RegulationRepository(AsyncRepository):
+
+    async def analyses(self) -> Dict[str, CountryAnalysis]:
+        """AI analyses by country code"""
+        return {a.country_code: a for a in await self._all(select(CountryAnalysis))}
+
+    async def analysis(self, country_code: str) -> Optional[CountryAnalysis]:
+        return await self._first(
+            select(CountryAnalysis).where(CountryAnalysis.country_code == country_code.upper())
+        )
@@ -0,0 +1,23 @@
+"""
+Wallet snapshot queries
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import desc, select
+from app.models.wallet_snapshot import WalletSnapshot
+from .base import AsyncRepository
+
+
+class WalletPortfolioRepository(AsyncRepository):
+
+    async def consolidated_snapshot_before(self, user_id: int, before: datetime) -> Optional[WalletSnapshot]:
+        """Latest consolidated (all wallets) snapshot taken at or before a date"""
+        return await self._first(
+            select(WalletSnapshot).where(
+                WalletSnapshot.user_id == user_id,
+                WalletSnapshot.wallet_id.is_(None),
+                WalletSnapshot.snapshot_date <= before
+            ).order_by(desc(WalletSnapshot.snapshot_date))
+        )
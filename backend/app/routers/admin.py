@@ -11,6 +11,8 @@ from app.models.feature_flag import FeatureFlag
 from app.models.regulation import Regulation
 from app.models.simulation import Simulation
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
+from app.services.feature_flags import publish_flag_change
 from app.services.tax_data_monitor import TaxDataMonitor
 from app.services.tax_data_sources import TaxDataAggregator
 from app.services.notification_service import NotificationService
@@ -24,7 +26,7 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 # ADMIN ROLE REQUIREMENT
 # ============================================================================
 
-async def require_admin(current_user: User = Depends(get_current_user)) -> User:
+async def require_admin(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Require admin role for sensitive operations"""
     # ✅ PHASE 1.2: Utiliser enum au lieu de string
     if current_user.role != UserRole.ADMIN:
@@ -41,7 +43,7 @@ class SyncRequest(BaseModel):
 
 @router.get("/tax-data/freshness")
 async def check_tax_data_freshness(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -55,7 +57,7 @@ async def check_tax_data_freshness(
 
 @router.get("/tax-data/checklist")
 async def get_update_checklist(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -72,7 +74,7 @@ async def get_update_checklist(
 
 @router.get("/tax-data/report")
 async def get_tax_data_report(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -91,7 +93,7 @@ async def get_tax_data_report(
 async def sync_tax_data(
     sync_request: SyncRequest,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -134,7 +136,7 @@ async def sync_tax_data(
 
 @router.post("/tax-data/sync-all")
 async def sync_all_tax_data(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -165,20 +167,40 @@ async def sync_all_tax_data(
 
 @router.get("/tax-data/test-sources")
 async def test_tax_data_sources(
-    current_user: User = Depends(get_current_user),
+    probe: bool = False,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Test connectivity to all free tax data sources
+    Health of all free tax data sources
 
-    Returns status of:
-    - World Bank API
-    - Tax Foundation (web scraping)
-    - OECD API
+    By default returns what sync runs recorded for each source (status,
+    success rate, latency, circuit state) without any network calls.
+    With probe=true, tests connectivity to every source live.
     """
     aggregator = TaxDataAggregator(db)
 
     try:
+        if not probe:
+            health = aggregator.get_source_health()
+            await aggregator.close()
+
+            statuses = [source['status'] for source in health['sources'].values()]
+            if 'down' in statuses:
+                status = "partial_failure"
+            elif 'degraded' in statuses:
+                status = "degraded"
+            elif 'unknown' in statuses:
+                status = "unknown"
+            else:
+                status = "all_operational"
+
+            return {
+                "status": status,
+                "sources": health['sources'],
+                "timestamp": health['timestamp']
+            }
+
         results = await aggregator.test_all_sources()
         await aggregator.close()
 
@@ -199,7 +221,7 @@ async def get_notifications(
     unread_only: bool = False,
     limit: int = 50,
     offset: int = 0,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -241,7 +263,7 @@ async def get_notifications(
 @router.post("/notifications/{notification_id}/read")
 async def mark_notification_read(
     notification_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Mark a notification as read"""
@@ -256,7 +278,7 @@ async def mark_notification_read(
 
 @router.post("/notifications/read-all")
 async def mark_all_notifications_read(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Mark all notifications as read"""
@@ -299,7 +321,7 @@ class FeatureFlagCreate(BaseModel):
 
 @router.get("/feature-flags", response_model=List[FeatureFlagResponse])
 async def get_all_feature_flags(
-    admin: User = Depends(require_admin),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -329,7 +351,7 @@ async def get_all_feature_flags(
 async def update_feature_flag(
     flag_name: str,
     updates: FeatureFlagUpdate,
-    admin: User = Depends(require_admin),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -359,6 +381,7 @@ async def update_feature_flag(
 
     db.commit()
     db.refresh(flag)
+    publish_flag_change(flag_name, db)
 
     return {
         "success": True,
@@ -380,7 +403,7 @@ async def update_feature_flag(
 @router.post("/feature-flags")
 async def create_feature_flag(
     flag_data: FeatureFlagCreate,
-    admin: User = Depends(require_admin),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -405,6 +428,7 @@ async def create_feature_flag(
     db.add(flag)
     db.commit()
     db.refresh(flag)
+    publish_flag_change(flag_data.name, db)
 
     return {
         "success": True,
@@ -426,7 +450,7 @@ async def create_feature_flag(
 @router.delete("/feature-flags/{flag_name}")
 async def delete_feature_flag(
     flag_name: str,
-    admin: User = Depends(require_admin),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -441,6 +465,7 @@ async def delete_feature_flag(
 
     db.delete(flag)
     db.commit()
+    publish_flag_change(flag_name, db)
 
     return {
         "success": True,
@@ -454,7 +479,7 @@ async def delete_feature_flag(
 
 @router.get("/stats")
 async def get_system_stats(
-    admin: User = Depends(require_admin),
+    admin: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -8,6 +8,7 @@ from app.utils.security import hash_password, verify_password, create_access_tok
 from app.middleware import limiter, get_rate_limit
 from app.services.license_service import LicenseService
 from app.services.email_service import EmailService
+from app.services.principal_cache import Principal, get_principal, invalidate_principals
 from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import datetime, timedelta, timezone
 import secrets
@@ -97,8 +98,14 @@ class RefreshTokenRequest(BaseModel):
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
-) -> User:
-    """Dependency to get current authenticated user"""
+) -> Principal:
+    """
+    Dependency to get current authenticated user
+
+    Returns the cached principal (id, email, role, license tier and limits):
+    no database query unless it isn't cached yet. Use get_current_user_record
+    for routes that read other profile fields or modify the user.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -113,10 +120,27 @@ async def get_current_user(
     if email is None:
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+    principal = get_principal(db, email)
+    if principal is None:
         raise credentials_exception
 
+    return principal
+
+
+async def get_current_user_record(
+    principal: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+) -> User:
+    """Dependency to get current authenticated user as a database row (profile routes)"""
+    user = db.get(User, principal.id)
+    if user is None:
+        invalidate_principals(subjects={principal.email}, user_ids={principal.id})
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
     return user
 
 
@@ -285,7 +309,7 @@ async def refresh_access_token(
 async def get_me(
     request: Request,
     response: Response,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """Get current user info with license data"""
@@ -422,7 +446,7 @@ async def reset_password(
 async def send_verification_email(
     request: Request,
     response: Response,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
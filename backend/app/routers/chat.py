@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.user import User
 from app.models.chat import ChatConversation, ChatMessage as ChatMessageModel
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.chat_assistant import ChatAssistant
+from app.services.regulation_catalog import get_regulation_catalog
 from app.middleware import limiter, get_rate_limit
 from app.dependencies.license_check import require_chat_message
+from app.utils.sse import format_sse
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from sqlalchemy import desc
+from datetime import datetime
 
 router = APIRouter(prefix="/chat", tags=["Chat"])
 
@@ -54,7 +58,7 @@ class SendMessageResponse(BaseModel):
 
 @router.get("/conversations", response_model=List[ChatConversationResponse])
 async def list_conversations(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -96,7 +100,7 @@ async def list_conversations(
 
 @router.post("/conversations")
 async def create_conversation(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -123,7 +127,7 @@ async def create_conversation(
 @router.get("/conversations/{conversation_id}/messages", response_model=List[ChatMessageSchema])
 async def get_conversation_messages(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -162,7 +166,7 @@ async def send_message(
     request: Request,
     response: Response,
     message_request: SendMessageRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     license_check = Depends(require_chat_message),
     db: Session = Depends(get_db)
 ):
@@ -171,10 +175,105 @@ async def send_message(
 
     Saves user message, gets AI response, saves AI response
     """
+    conversation, conversation_history = _start_exchange(
+        db, conversation_id, current_user.id, message_request.message
+    )
+
+    # Get AI response
+    assistant = ChatAssistant(db)
+    try:
+        ai_response = await assistant.process_message(
+            user_id=current_user.id,
+            message=message_request.message,
+            conversation_history=conversation_history
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI failed: {str(e)}")
+
+    _save_reply(db, conversation, message_request.message, ai_response["message"], conversation_history)
+
+    return SendMessageResponse(
+        conversation_id=conversation_id,
+        message=ai_response["message"],
+        suggestions=ai_response.get("suggestions", []),
+        can_simulate=ai_response.get("can_simulate", False),
+        simulation_params=ai_response.get("simulation_params", {})
+    )
+
+
+@router.post("/conversations/{conversation_id}/messages/stream")
+@limiter.limit(get_rate_limit("chat"))
+async def stream_message(
+    conversation_id: int,
+    request: Request,
+    message_request: SendMessageRequest,
+    current_user: Principal = Depends(get_current_user),
+    license_check = Depends(require_chat_message),
+    db: Session = Depends(get_db)
+):
+    """
+    Send a message in a conversation, streaming the AI response (Server-Sent Events)
+
+    Events:
+    - start: {"conversation_id"} (sent right away)
+    - delta: {"text"} chunks of the AI response as they're generated
+    - done: {"conversation_id", "message", "suggestions", "can_simulate", "simulation_params"}
+      (sent once the AI response is saved)
+    - error: {"conversation_id", "message"} instead of done if the AI response
+      broke off mid-stream (nothing is saved, the deltas so far are partial)
+    """
+    conversation, conversation_history = _start_exchange(
+        db, conversation_id, current_user.id, message_request.message
+    )
+    assistant = ChatAssistant(db)
+
+    async def events():
+        yield format_sse("start", {"conversation_id": conversation_id})
+
+        async for event in assistant.stream_message(
+            user_id=current_user.id,
+            message=message_request.message,
+            conversation_history=conversation_history
+        ):
+            if event["type"] == "delta":
+                yield format_sse("delta", {"text": event["text"]})
+                continue
+            if event["type"] == "error":
+                yield format_sse("error", {"conversation_id": conversation_id, "message": event["message"]})
+                return
+
+            _save_reply(db, conversation, message_request.message, event["message"], conversation_history)
+            yield format_sse("done", {
+                "conversation_id": conversation_id,
+                "message": event["message"],
+                "suggestions": event.get("suggestions", []),
+                "can_simulate": event.get("can_simulate", False),
+                "simulation_params": event.get("simulation_params", {})
+            })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _start_exchange(
+    db: Session,
+    conversation_id: int,
+    user_id: int,
+    message: str
+) -> Tuple[ChatConversation, List[Dict]]:
+    """
+    Save the user's message and load the history the AI gets
+
+    Returns:
+        (conversation, history before this message)
+    """
     # Verify conversation belongs to user
     conversation = db.query(ChatConversation).filter(
         ChatConversation.id == conversation_id,
-        ChatConversation.user_id == current_user.id
+        ChatConversation.user_id == user_id
     ).first()
 
     if not conversation:
@@ -184,7 +283,7 @@ async def send_message(
     user_message = ChatMessageModel(
         conversation_id=conversation_id,
         role="user",
-        content=message_request.message
+        content=message
     )
     db.add(user_message)
     db.commit()
@@ -201,48 +300,37 @@ async def send_message(
         {"role": msg.role, "content": msg.content}
         for msg in history_messages[:-1]  # Exclude the message we just added (it's in message_request.message)
     ]
+    return conversation, conversation_history
 
-    # Get AI response
-    assistant = ChatAssistant(db)
-    try:
-        ai_response = await assistant.process_message(
-            user_id=current_user.id,
-            message=message_request.message,
-            conversation_history=conversation_history
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI failed: {str(e)}")
 
-    # Save AI response
+def _save_reply(
+    db: Session,
+    conversation: ChatConversation,
+    user_message: str,
+    ai_message: str,
+    conversation_history: List[Dict]
+):
+    """Save the AI response and update the conversation"""
     assistant_message = ChatMessageModel(
-        conversation_id=conversation_id,
+        conversation_id=conversation.id,
         role="assistant",
-        content=ai_response["message"]
+        content=ai_message
     )
     db.add(assistant_message)
 
     # Update conversation title if first message
-    if len(history_messages) == 1:  # Only user's first message
+    if not conversation_history:  # Only user's first message
         # Generate title from first user message (first 50 chars)
-        title = message_request.message[:50].strip()
-        if len(message_request.message) > 50:
+        title = user_message[:50].strip()
+        if len(user_message) > 50:
             title += "..."
         conversation.title = title
 
     # Update conversation timestamp
-    from datetime import datetime
     conversation.updated_at = datetime.utcnow()
 
     db.commit()
 
-    return SendMessageResponse(
-        conversation_id=conversation_id,
-        message=ai_response["message"],
-        suggestions=ai_response.get("suggestions", []),
-        can_simulate=ai_response.get("can_simulate", False),
-        simulation_params=ai_response.get("simulation_params", {})
-    )
-
 
 @router.post("/message", response_model=SendMessageResponse)
 @limiter.limit(get_rate_limit("chat"))
@@ -250,7 +338,7 @@ async def send_message_auto_create(
     request: Request,
     response: Response,
     message_request: SendMessageRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     license_check = Depends(require_chat_message),
     db: Session = Depends(get_db)
 ):
@@ -287,7 +375,7 @@ async def send_message_auto_create(
 @router.delete("/conversations/{conversation_id}")
 async def delete_conversation(
     conversation_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -311,13 +399,11 @@ async def delete_conversation(
 
 @router.get("/countries")
 async def get_available_countries(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get list of countries for chat suggestions"""
-    from app.models.regulation import Regulation
-
-    countries = db.query(Regulation).all()
+    countries = get_regulation_catalog(db).all()
 
     return {
         "countries": [
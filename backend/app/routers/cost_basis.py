@@ -7,8 +7,8 @@ API routes for cost basis lot tracking and portfolio management.
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func
-from app.database import get_db
-from app.models.user import User
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.database import get_db, get_async_sessions
 from app.models.cost_basis import (
     CostBasisLot,
     CostBasisDisposal,
@@ -17,13 +17,16 @@ from app.models.cost_basis import (
     AcquisitionMethod
 )
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.dependencies import get_exchange_rate_service
 from app.dependencies.license_check import require_starter_plus
 from app.data.currency_mapping import get_currency_info
+from app.repositories import CostBasisRepository
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime
 from decimal import Decimal
+import asyncio
 import csv
 import io
 import logging
@@ -34,6 +37,18 @@ router = APIRouter(prefix="/cost-basis", tags=["Cost Basis"])
 
 
 # Helper functions
+async def _current_prices(lots: List[CostBasisLot]) -> Dict[str, Optional[Decimal]]:
+    """Current prices of the lots' tokens (one batch call, off the event loop)"""
+    if not lots:
+        return {}
+
+    from app.services.price_service import PriceService
+    return await asyncio.to_thread(
+        PriceService().get_current_prices_batch,
+        list({lot.token for lot in lots})
+    )
+
+
 async def enrich_lot_with_local_currency(
     lot: CostBasisLot,
     user_id: int,
@@ -174,8 +189,9 @@ class UpdateSettingsRequest(BaseModel):
 async def get_cost_basis_lots(
     token: Optional[str] = None,
     chain: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    sessions: async_sessionmaker = Depends(get_async_sessions)
 ):
     """
     Get all cost basis lots for the current user
@@ -185,14 +201,10 @@ async def get_cost_basis_lots(
     ⚠️ FREE tier: Returns example data for preview
     """
     # Check if user has access to Cost Basis
-    from app.services.license_service import LicenseService
     from app.models.license import LicenseTier
 
-    license_service = LicenseService(db)
-    license = license_service.get_user_license(current_user.id)
-
     # FREE tier gets example data
-    if license.tier == LicenseTier.FREE:
+    if current_user.tier == LicenseTier.FREE:
         return [
             LotResponse(
                 id=0,
@@ -234,25 +246,15 @@ async def get_cost_basis_lots(
             )
         ]
 
-    query = db.query(CostBasisLot).filter(
-        CostBasisLot.user_id == current_user.id
-    )
-
-    if token:
-        query = query.filter(CostBasisLot.token == token.upper())
-    if chain:
-        query = query.filter(CostBasisLot.chain == chain.lower())
+    lots = await CostBasisRepository(sessions).lots(current_user.id, token=token, chain=chain)
 
-    lots = query.order_by(desc(CostBasisLot.acquisition_date)).all()
-
-    # Get current prices from price service
-    from app.services.price_service import PriceService
-    price_service = PriceService()
+    # Get current prices from price service (one batch call)
+    prices = await _current_prices(lots)
 
     result = []
     for lot in lots:
         # Get real-time price from price service
-        current_price_decimal = price_service.get_current_price(lot.token)
+        current_price_decimal = prices.get(lot.token)
         if current_price_decimal:
             current_price = float(current_price_decimal)
         else:
@@ -287,7 +289,7 @@ async def get_cost_basis_lots(
 @router.get("/lots/from-audit/{audit_id}", response_model=List[LotResponse])
 async def get_lots_from_audit(
     audit_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -339,7 +341,7 @@ async def get_lots_from_audit(
 @router.post("/lots", response_model=LotResponse)
 async def create_cost_basis_lot(
     request: CreateLotRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -419,7 +421,7 @@ async def create_cost_basis_lot(
 @router.delete("/lots/{lot_id}")
 async def delete_cost_basis_lot(
     lot_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a cost basis lot"""
@@ -439,18 +441,15 @@ async def delete_cost_basis_lot(
 
 @router.get("/portfolio", response_model=PortfolioSummary)
 async def get_portfolio_summary(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    sessions: async_sessionmaker = Depends(get_async_sessions)
 ):
     """
     Get portfolio summary with aggregated cost basis data
 
     Returns total portfolio value, cost basis, and unrealized gains/losses.
     """
-    lots = db.query(CostBasisLot).filter(
-        CostBasisLot.user_id == current_user.id,
-        CostBasisLot.remaining_amount > 0
-    ).all()
+    lots = await CostBasisRepository(sessions).open_lots(current_user.id)
 
     if not lots:
         return PortfolioSummary(
@@ -462,11 +461,8 @@ async def get_portfolio_summary(
             by_chain={}
         )
 
-    # Get price service for real-time prices
-    from app.services.price_service import PriceService
-    price_service = PriceService()
-
-    # Cache prices per token to avoid repeated API calls
+    # Real-time prices for all tokens (one batch call)
+    prices = await _current_prices(lots)
     price_cache = {}
 
     # Aggregate by token
@@ -477,9 +473,9 @@ async def get_portfolio_summary(
     total_cost_basis = 0.0
 
     for lot in lots:
-        # Get current price (use cache to avoid repeated calls)
+        # Current price (per token; first lot's acquisition price when unavailable)
         if lot.token not in price_cache:
-            current_price_decimal = price_service.get_current_price(lot.token)
+            current_price_decimal = prices.get(lot.token)
             if current_price_decimal:
                 price_cache[lot.token] = float(current_price_decimal)
             else:
@@ -535,7 +531,7 @@ async def get_portfolio_summary(
 async def import_exchange_csv(
     file: UploadFile = File(...),
     exchange: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -690,7 +686,7 @@ async def import_exchange_csv(
 @router.post("/import-csv")
 async def import_cost_basis_csv(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -863,7 +859,7 @@ async def import_cost_basis_csv(
 
 @router.get("/settings")
 async def get_cost_basis_settings(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get user's cost basis calculation settings"""
@@ -899,7 +895,7 @@ async def get_cost_basis_settings(
 @router.put("/settings")
 async def update_cost_basis_settings(
     request: UpdateSettingsRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update user's cost basis calculation settings"""
@@ -948,7 +944,7 @@ async def update_cost_basis_settings(
 @router.get("/export/irs-8949/validate")
 async def validate_export_data(
     year: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -1025,7 +1021,7 @@ async def validate_export_data(
 @router.get("/export/irs-8949")
 async def export_irs_form_8949(
     year: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -1162,7 +1158,7 @@ async def update_cost_basis_lot(
     acquisition_date: Optional[str] = None,
     notes: Optional[str] = None,
     verified: Optional[bool] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -1210,7 +1206,7 @@ async def update_cost_basis_lot(
 @router.get("/lots/unverified")
 async def get_unverified_lots(
     limit: int = 50,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -1263,7 +1259,7 @@ async def get_unverified_lots(
 @router.get("/wash-sale-warnings")
 async def get_wash_sale_warnings(
     days: int = 30,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -6,18 +6,18 @@ Aggregates data from multiple sources for a unified dashboard view.
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, get_async_read_sessions
 from app.models.dashboard_activity import DashboardActivity
-from app.models.defi_protocol import DeFiAudit
-from app.models.cost_basis import CostBasisLot, WashSaleViolation
-from app.models.tax_opportunity import TaxOpportunity, OpportunityStatus
-from app.models.chat import ChatConversation
-from app.models.regulation import Regulation
+from app.models.cost_basis import CostBasisLot
+from app.models.tax_opportunity import TaxOpportunity
+from app.repositories import CostBasisRepository, DashboardRepository
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.dependencies.exchange_rate import get_exchange_rate_service
+from app.services.regulation_catalog import get_regulation_catalog
 from app.schemas.dashboard import (
     DashboardOverview,
     DashboardStats,
@@ -32,8 +32,9 @@ from app.schemas.dashboard import (
     AlertCategory,
     ActivityType
 )
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -43,98 +44,89 @@ router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
 # ========== Helper Functions ==========
 
-async def _get_user_stats(db: Session, user_id: int) -> DashboardStats:
-    """Calculate dashboard statistics for a user"""
-    import time
-    func_start = time.time()
+# (currency code, currency symbol, USD -> local rate)
+LocalCurrency = Tuple[Optional[str], Optional[str], Optional[float]]
+NO_LOCAL_CURRENCY: LocalCurrency = (None, None, None)
 
-    # Count simulations (if table exists - placeholder for now)
-    total_simulations = 0
-    active_simulations = 0
 
-    # Count DeFi audits
-    total_audits = db.query(DeFiAudit).filter(DeFiAudit.user_id == user_id).count()
+def _tax_jurisdiction(summary: Row) -> Optional[str]:
+    """Jurisdiction from the cost basis settings, falling back to the user profile"""
+    return summary.settings_jurisdiction or summary.current_country
 
-    last_audit = db.query(DeFiAudit).filter(
-        DeFiAudit.user_id == user_id
-    ).order_by(desc(DeFiAudit.created_at)).first()
 
-    last_audit_date = last_audit.created_at.isoformat() if last_audit else None
+async def _current_prices(lots: List[CostBasisLot]) -> Dict[str, Any]:
+    """Current prices of the lots' tokens (one batch call, off the event loop)"""
+    if not lots:
+        return {}
 
-    # Get portfolio data from cost basis lots
-    lots = db.query(CostBasisLot).filter(
-        CostBasisLot.user_id == user_id,
-        CostBasisLot.remaining_amount > 0
-    ).all()
+    from app.services.price_service import PriceService
+    return await asyncio.to_thread(
+        PriceService().get_current_prices_batch,
+        list({lot.token for lot in lots})
+    )
 
-    total_portfolio_value = 0.0
-    portfolio_cost_basis = 0.0
 
-    # ⚡ PERFORMANCE: Batch fetch all prices in ONE API call instead of N calls
-    from app.services.price_service import PriceService
-    price_service = PriceService()
+async def _local_currency(tax_jurisdiction: Optional[str]) -> LocalCurrency:
+    """Local currency and exchange rate of a tax jurisdiction"""
+    if not tax_jurisdiction:
+        return NO_LOCAL_CURRENCY
+
+    try:
+        catalog = await asyncio.to_thread(get_regulation_catalog)
+        record = catalog.get(tax_jurisdiction)
+        if not record or not record.currency_code:
+            return NO_LOCAL_CURRENCY
+
+        # Get exchange rate (USD to local currency)
+        exchange_service = get_exchange_rate_service()
+        rate, source = await exchange_service.get_exchange_rate(
+            from_currency="USD",
+            to_currency=record.currency_code
+        )
+        return record.currency_code, record.currency_symbol, float(rate) if rate else None
+    except Exception as e:
+        logger.warning(f"Could not get exchange rate for jurisdiction: {e}")
+        return NO_LOCAL_CURRENCY
 
-    # Collect unique tokens
-    unique_tokens = list(set([lot.token for lot in lots]))
 
-    # Batch fetch prices (1 API call for ALL tokens!)
-    token_prices = price_service.get_current_prices_batch(unique_tokens)
+def _lot_price(lot: CostBasisLot, prices: Dict[str, Any]) -> float:
+    """Current price of a lot's token, acquisition price when unavailable"""
+    current_price = prices.get(lot.token)
+    return float(current_price) if current_price else float(lot.acquisition_price_usd)
 
-    # Calculate portfolio value using batch-fetched prices
-    for lot in lots:
-        current_price_decimal = token_prices.get(lot.token)
-        if current_price_decimal:
-            current_price = float(current_price_decimal)
-        else:
-            current_price = float(lot.acquisition_price_usd)
 
-        lot_value = float(lot.remaining_amount) * current_price
-        lot_cost = float(lot.remaining_amount) * float(lot.acquisition_price_usd)
+def _build_user_stats(
+    summary: Row,
+    lots: List[CostBasisLot],
+    opportunities: List[TaxOpportunity],
+    prices: Dict[str, Any],
+    currency: LocalCurrency
+) -> DashboardStats:
+    """Dashboard statistics from the queried rows"""
 
-        total_portfolio_value += lot_value
-        portfolio_cost_basis += lot_cost
+    # Count simulations (if table exists - placeholder for now)
+    total_simulations = 0
+    active_simulations = 0
+
+    total_audits = summary.total_audits
+    last_audit_date = summary.last_audit_at.isoformat() if summary.last_audit_at else None
+
+    # Portfolio value from the open cost basis lots
+    total_portfolio_value = 0.0
+    portfolio_cost_basis = 0.0
+
+    for lot in lots:
+        total_portfolio_value += float(lot.remaining_amount) * _lot_price(lot, prices)
+        portfolio_cost_basis += float(lot.remaining_amount) * float(lot.acquisition_price_usd)
 
     unrealized_gains = total_portfolio_value - portfolio_cost_basis
     unrealized_gains_percentage = (unrealized_gains / portfolio_cost_basis * 100) if portfolio_cost_basis > 0 else 0
 
     # Tax opportunities
-    active_opportunities = db.query(TaxOpportunity).filter(
-        TaxOpportunity.user_id == user_id,
-        TaxOpportunity.status == OpportunityStatus.ACTIVE
-    ).all()
-
-    potential_tax_savings = sum(float(opp.potential_savings) for opp in active_opportunities)
-    tax_loss_harvesting_opportunities = len([o for o in active_opportunities if o.opportunity_type.value == 'tax_loss_harvest'])
-
-    # Unverified lots count
-    unverified_lots_count = db.query(CostBasisLot).filter(
-        CostBasisLot.user_id == user_id,
-        CostBasisLot.verified == False,
-        CostBasisLot.remaining_amount > 0
-    ).count()
-
-    # Wash sale warnings
-    wash_sale_warnings_count = db.query(WashSaleViolation).filter(
-        WashSaleViolation.user_id == user_id
-    ).count()
-
-    # User profile checks - get tax jurisdiction from cost basis settings
-    from app.models.user import User as UserModel
-    from app.models.cost_basis import UserCostBasisSettings
-
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
-
-    # Get tax jurisdiction from UserCostBasisSettings (primary source)
-    cost_basis_settings = db.query(UserCostBasisSettings).filter(
-        UserCostBasisSettings.user_id == user_id
-    ).first()
-
-    tax_jurisdiction = None
-    if cost_basis_settings and cost_basis_settings.tax_jurisdiction:
-        tax_jurisdiction = cost_basis_settings.tax_jurisdiction
-    elif user and user.current_country:
-        # Fallback to user profile if not set in cost basis settings
-        tax_jurisdiction = user.current_country
+    potential_tax_savings = sum(float(opp.potential_savings) for opp in opportunities)
+    tax_loss_harvesting_opportunities = len([o for o in opportunities if o.opportunity_type.value == 'tax_loss_harvest'])
+
+    tax_jurisdiction = _tax_jurisdiction(summary)
 
     # Check if user has wallets/audits
     has_wallets = total_audits > 0
@@ -142,37 +134,8 @@ async def _get_user_stats(db: Session, user_id: int) -> DashboardStats:
     # Onboarding complete if user has tax jurisdiction and at least one activity
     onboarding_complete = bool(tax_jurisdiction and (total_audits > 0 or total_simulations > 0))
 
-    # Get exchange rate and currency info for local currency display
-    exchange_rate = None
-    local_currency = None
-    currency_symbol = None
-    potential_tax_savings_local = None
-
-    if tax_jurisdiction:
-        try:
-            # Get currency info from regulation
-            regulation = db.query(Regulation).filter(
-                Regulation.country_code == tax_jurisdiction
-            ).first()
-
-            if regulation and regulation.currency_code:
-                local_currency = regulation.currency_code
-                currency_symbol = regulation.currency_symbol
-
-                # Get exchange rate (USD to local currency)
-                exchange_service = get_exchange_rate_service()
-                rate, source = await exchange_service.get_exchange_rate(
-                    from_currency="USD",
-                    to_currency=local_currency
-                )
-                if rate:
-                    exchange_rate = float(rate)
-                    potential_tax_savings_local = potential_tax_savings * exchange_rate
-        except Exception as e:
-            logger.warning(f"Could not get exchange rate for jurisdiction: {e}")
-
-    stats_time = time.time() - func_start
-    logger.info(f"[_get_user_stats] User {user_id} - Completed in {stats_time:.2f}s")
+    local_currency, currency_symbol, exchange_rate = currency
+    potential_tax_savings_local = potential_tax_savings * exchange_rate if exchange_rate else None
 
     return DashboardStats(
         total_simulations=total_simulations,
@@ -186,8 +149,8 @@ async def _get_user_stats(db: Session, user_id: int) -> DashboardStats:
         potential_tax_savings=potential_tax_savings,
         potential_tax_savings_local=potential_tax_savings_local,
         tax_loss_harvesting_opportunities=tax_loss_harvesting_opportunities,
-        unverified_lots_count=unverified_lots_count,
-        wash_sale_warnings_count=wash_sale_warnings_count,
+        unverified_lots_count=sum(1 for lot in lots if not lot.verified),
+        wash_sale_warnings_count=summary.wash_sale_warnings,
         tax_jurisdiction=tax_jurisdiction,
         has_wallets=has_wallets,
         onboarding_complete=onboarding_complete,
@@ -196,7 +159,21 @@ async def _get_user_stats(db: Session, user_id: int) -> DashboardStats:
     )
 
 
-def _get_user_alerts(db: Session, user_id: int, stats: DashboardStats) -> List[DashboardAlert]:
+async def _get_user_stats(sessions: async_sessionmaker, user_id: int) -> DashboardStats:
+    """Calculate dashboard statistics for a user"""
+    summary, lots, opportunities = await asyncio.gather(
+        DashboardRepository(sessions).summary(user_id),
+        CostBasisRepository(sessions).open_lots(user_id),
+        DashboardRepository(sessions).active_opportunities(user_id)
+    )
+    prices, currency = await asyncio.gather(
+        _current_prices(lots),
+        _local_currency(_tax_jurisdiction(summary))
+    )
+    return _build_user_stats(summary, lots, opportunities, prices, currency)
+
+
+def _get_user_alerts(stats: DashboardStats) -> List[DashboardAlert]:
     """Generate dashboard alerts for a user"""
     alerts = []
 
@@ -268,99 +245,46 @@ def _get_user_alerts(db: Session, user_id: int, stats: DashboardStats) -> List[D
     return alerts
 
 
-def _get_recent_activities(db: Session, user_id: int, limit: int = 10) -> List[DashboardActivityResponse]:
-    """Get recent user activities"""
-    activities = db.query(DashboardActivity).filter(
-        DashboardActivity.user_id == user_id
-    ).order_by(desc(DashboardActivity.created_at)).limit(limit).all()
-
-    return [
-        DashboardActivityResponse(
-            id=activity.id,
-            activity_type=ActivityType(activity.activity_type),
-            activity_id=activity.activity_id,
-            title=activity.title,
-            subtitle=activity.subtitle,
-            metadata=activity.metadata,
-            created_at=activity.created_at.isoformat()
-        )
-        for activity in activities
-    ]
-
-
-def _get_tax_opportunities(db: Session, user_id: int, limit: int = 5) -> List[TaxOpportunityResponse]:
-    """Get active tax opportunities"""
-    opportunities = db.query(TaxOpportunity).filter(
-        TaxOpportunity.user_id == user_id,
-        TaxOpportunity.status == OpportunityStatus.ACTIVE
-    ).order_by(desc(TaxOpportunity.potential_savings)).limit(limit).all()
-
-    return [
-        TaxOpportunityResponse(
-            id=opp.id,
-            opportunity_type=opp.opportunity_type.value,
-            title=f"{opp.opportunity_type.value.replace('_', ' ').title()}: {opp.token}",
-            description=opp.action_description or "Tax optimization opportunity detected",
-            potential_savings=float(opp.potential_savings),
-            status=opp.status.value,
-            token=opp.token,
-            chain=opp.chain,
-            amount=float(opp.current_amount),
-            current_gain_loss=float(opp.unrealized_gain_loss),
-            recommended_action=opp.recommended_action or "Review opportunity",
-            deadline=opp.deadline.isoformat() if opp.deadline else None,
-            created_at=opp.created_at.isoformat()
-        )
-        for opp in opportunities
-    ]
+def _activity_response(activity: DashboardActivity) -> DashboardActivityResponse:
+    return DashboardActivityResponse(
+        id=activity.id,
+        activity_type=ActivityType(activity.activity_type),
+        activity_id=activity.activity_id,
+        title=activity.title,
+        subtitle=activity.subtitle,
+        metadata=activity.activity_metadata,
+        created_at=activity.created_at.isoformat()
+    )
+
 
+def _opportunity_response(opp: TaxOpportunity) -> TaxOpportunityResponse:
+    return TaxOpportunityResponse(
+        id=opp.id,
+        opportunity_type=opp.opportunity_type.value,
+        title=f"{opp.opportunity_type.value.replace('_', ' ').title()}: {opp.token}",
+        description=opp.action_description or "Tax optimization opportunity detected",
+        potential_savings=float(opp.potential_savings),
+        status=opp.status.value,
+        token=opp.token,
+        chain=opp.chain,
+        amount=float(opp.current_amount),
+        current_gain_loss=float(opp.unrealized_gain_loss),
+        recommended_action=opp.recommended_action or "Review opportunity",
+        deadline=opp.deadline.isoformat() if opp.deadline else None,
+        created_at=opp.created_at.isoformat()
+    )
 
-async def _get_portfolio_summary(db: Session, user_id: int) -> Optional[PortfolioSummary]:
-    """Get portfolio summary"""
-    lots = db.query(CostBasisLot).filter(
-        CostBasisLot.user_id == user_id,
-        CostBasisLot.remaining_amount > 0
-    ).all()
 
+def _build_portfolio_summary(
+    lots: List[CostBasisLot],
+    prices: Dict[str, Any],
+    currency: LocalCurrency
+) -> Optional[PortfolioSummary]:
+    """Portfolio summary of the open lots"""
     if not lots:
         return None
 
-    # Get exchange rate and currency info
-    from app.models.cost_basis import UserCostBasisSettings
-
-    cost_basis_settings = db.query(UserCostBasisSettings).filter(
-        UserCostBasisSettings.user_id == user_id
-    ).first()
-
-    exchange_rate = None
-    local_currency = None
-    currency_symbol = None
-
-    if cost_basis_settings and cost_basis_settings.tax_jurisdiction:
-        try:
-            # Get currency info from regulation
-            regulation = db.query(Regulation).filter(
-                Regulation.country_code == cost_basis_settings.tax_jurisdiction
-            ).first()
-
-            if regulation and regulation.currency_code:
-                local_currency = regulation.currency_code
-                currency_symbol = regulation.currency_symbol
-
-                # Get exchange rate (USD to local currency)
-                exchange_service = get_exchange_rate_service()
-                rate, source = await exchange_service.get_exchange_rate(
-                    from_currency="USD",
-                    to_currency=local_currency
-                )
-                if rate:
-                    exchange_rate = float(rate)
-        except Exception as e:
-            logger.warning(f"Could not get exchange rate for jurisdiction: {e}")
-
-    # Calculate portfolio metrics
-    from app.services.price_service import PriceService
-    price_service = PriceService()
+    local_currency, currency_symbol, exchange_rate = currency
 
     total_value = 0.0
     total_cost = 0.0
@@ -368,13 +292,7 @@ async def _get_portfolio_summary(db: Session, user_id: int) -> Optional[Portfoli
     chains = set()
 
     for lot in lots:
-        current_price_decimal = price_service.get_current_price(lot.token)
-        if current_price_decimal:
-            current_price = float(current_price_decimal)
-        else:
-            current_price = float(lot.acquisition_price_usd)
-
-        lot_value = float(lot.remaining_amount) * current_price
+        lot_value = float(lot.remaining_amount) * _lot_price(lot, prices)
         lot_cost = float(lot.remaining_amount) * float(lot.acquisition_price_usd)
 
         total_value += lot_value
@@ -453,8 +371,8 @@ async def _get_portfolio_summary(db: Session, user_id: int) -> Optional[Portfoli
 
 @router.get("/overview", response_model=DashboardOverview)
 async def get_dashboard_overview(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    sessions: async_sessionmaker = Depends(get_async_read_sessions)
 ):
     """
     Get complete dashboard overview
@@ -467,37 +385,34 @@ async def get_dashboard_overview(
     - Portfolio summary
     """
     try:
-        # ⚡ PERFORMANCE: Fetch stats and portfolio in PARALLEL (both call exchange rate)
-        import asyncio
-        import time
-
-        logger.info(f"[DASHBOARD] User {current_user.id} - Starting dashboard fetch")
-        start_time = time.time()
+        dashboard = DashboardRepository(sessions)
+
+        # ⚡ PERFORMANCE: Independent queries run concurrently (one connection each)
+        summary, lots, opportunities, activities = await asyncio.gather(
+            dashboard.summary(current_user.id),
+            CostBasisRepository(sessions).open_lots(current_user.id),
+            dashboard.active_opportunities(current_user.id),
+            dashboard.recent_activities(current_user.id, limit=10)
+        )
 
-        stats_start = time.time()
-        stats, portfolio = await asyncio.gather(
-            _get_user_stats(db, current_user.id),
-            _get_portfolio_summary(db, current_user.id)
+        # Stats and portfolio share the lots, prices and exchange rate
+        tax_jurisdiction = _tax_jurisdiction(summary)
+        prices, currency = await asyncio.gather(
+            _current_prices(lots),
+            _local_currency(tax_jurisdiction)
         )
-        parallel_time = time.time() - stats_start
-        logger.info(f"[DASHBOARD] User {current_user.id} - Stats+Portfolio: {parallel_time:.2f}s")
 
-        # These are fast (no async calls), run them after
-        sync_start = time.time()
-        alerts = _get_user_alerts(db, current_user.id, stats)
-        activities = _get_recent_activities(db, current_user.id, limit=10)
-        tax_opportunities = _get_tax_opportunities(db, current_user.id, limit=5)
-        sync_time = time.time() - sync_start
-        logger.info(f"[DASHBOARD] User {current_user.id} - Sync operations: {sync_time:.2f}s")
+        stats = _build_user_stats(summary, lots, opportunities, prices, currency)
 
-        total_time = time.time() - start_time
-        logger.info(f"[DASHBOARD] User {current_user.id} - TOTAL TIME: {total_time:.2f}s")
+        # Portfolio shows local values only for the cost basis settings jurisdiction
+        portfolio_currency = currency if summary.settings_jurisdiction == tax_jurisdiction else NO_LOCAL_CURRENCY
+        portfolio = _build_portfolio_summary(lots, prices, portfolio_currency)
 
         return DashboardOverview(
             stats=stats,
-            alerts=alerts,
-            activities=activities,
-            tax_opportunities=tax_opportunities,
+            alerts=_get_user_alerts(stats),
+            activities=[_activity_response(a) for a in activities],
+            tax_opportunities=[_opportunity_response(o) for o in opportunities[:5]],
             portfolio=portfolio
         )
     except Exception as e:
@@ -507,8 +422,8 @@ async def get_dashboard_overview(
 
 @router.get("/alerts", response_model=List[DashboardAlert])
 async def get_dashboard_alerts(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    sessions: async_sessionmaker = Depends(get_async_read_sessions)
 ):
     """
     Get dashboard alerts only
@@ -516,16 +431,16 @@ async def get_dashboard_alerts(
     Returns alerts for critical issues and opportunities.
     Useful for checking alerts independently of full dashboard load.
     """
-    stats = _get_user_stats(db, current_user.id)
-    return _get_user_alerts(db, current_user.id, stats)
+    stats = await _get_user_stats(sessions, current_user.id)
+    return _get_user_alerts(stats)
 
 
 @router.get("/activities", response_model=List[DashboardActivityResponse])
 async def get_dashboard_activities(
     limit: int = 20,
     activity_type: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    sessions: async_sessionmaker = Depends(get_async_read_sessions)
 ):
     """
     Get dashboard activities (timeline)
@@ -536,33 +451,16 @@ async def get_dashboard_activities(
 
     Returns recent user activities for the dashboard timeline.
     """
-    query = db.query(DashboardActivity).filter(
-        DashboardActivity.user_id == current_user.id
+    activities = await DashboardRepository(sessions).recent_activities(
+        current_user.id, limit=limit, activity_type=activity_type
     )
-
-    if activity_type:
-        query = query.filter(DashboardActivity.activity_type == activity_type)
-
-    activities = query.order_by(desc(DashboardActivity.created_at)).limit(limit).all()
-
-    return [
-        DashboardActivityResponse(
-            id=activity.id,
-            activity_type=ActivityType(activity.activity_type),
-            activity_id=activity.activity_id,
-            title=activity.title,
-            subtitle=activity.subtitle,
-            metadata=activity.metadata,
-            created_at=activity.created_at.isoformat()
-        )
-        for activity in activities
-    ]
+    return [_activity_response(activity) for activity in activities]
 
 
 @router.post("/activities", response_model=DashboardActivityResponse)
 async def create_dashboard_activity(
     request: CreateActivityRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -584,21 +482,13 @@ async def create_dashboard_activity(
     db.commit()
     db.refresh(activity)
 
-    return DashboardActivityResponse(
-        id=activity.id,
-        activity_type=ActivityType(activity.activity_type),
-        activity_id=activity.activity_id,
-        title=activity.title,
-        subtitle=activity.subtitle,
-        metadata=activity.metadata,
-        created_at=activity.created_at.isoformat()
-    )
+    return _activity_response(activity)
 
 
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    sessions: async_sessionmaker = Depends(get_async_read_sessions)
 ):
     """
     Get dashboard statistics only
@@ -606,13 +496,13 @@ async def get_dashboard_stats(
     Returns stats without alerts, activities, or opportunities.
     Useful for quick stats refresh without full dashboard reload.
     """
-    return _get_user_stats(db, current_user.id)
+    return await _get_user_stats(sessions, current_user.id)
 
 
 @router.post("/alerts/dismiss")
 async def dismiss_alert(
     request: DismissAlertRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -5,21 +5,32 @@ API routes for DeFi transaction auditing
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response as FastAPIResponse
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.user import User
-from app.models.defi_protocol import DeFiAudit
+from app.database import get_db, get_read_db
+from app.models.defi_protocol import DeFiAudit, DeFiTransaction
 from app.models.cost_basis import UserCostBasisSettings
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.defi_audit_service import DeFiAuditService
+from app.services.audit_progress import (
+    TERMINAL_STATUSES,
+    audit_event,
+    audit_progress_events,
+    get_audit_progress,
+    is_stale,
+    publish_audit
+)
 from app.middleware import limiter, get_rate_limit
 from app.dependencies import get_exchange_rate_service
 from app.dependencies.license_check import require_defi_audit, require_pdf_export, require_csv_export
 from app.data.currency_mapping import get_currency_info
+from app.utils.sse import format_sse
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
 from decimal import Decimal
+import asyncio
 import logging
 import re
 
@@ -28,6 +39,25 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/defi", tags=["DeFi Audit"])
 
 
+AUDIT_TIMEOUT_HOURS = 1
+
+
+def _fail_if_timed_out(db: Session, audit: DeFiAudit):
+    """Mark a pending/processing audit as failed if stuck for > AUDIT_TIMEOUT_HOURS"""
+    if audit.status not in ["pending", "processing"]:
+        return
+
+    time_elapsed = datetime.utcnow() - audit.created_at
+    if time_elapsed.total_seconds() > AUDIT_TIMEOUT_HOURS * 3600:
+        logger.warning(f"Audit {audit.id} timed out after {time_elapsed.total_seconds() / 3600:.1f} hours")
+        audit.status = "failed"
+        audit.error_message = f"Audit timed out after {AUDIT_TIMEOUT_HOURS} hour(s). The Celery worker may be unavailable. Please try again or contact support."
+        audit.completed_at = datetime.utcnow()
+        db.commit()
+        db.refresh(audit)
+        publish_audit(audit)
+
+
 # Helper function to add local currency values to audit response
 async def enrich_audit_with_local_currency(
     audit: DeFiAudit,
@@ -188,7 +218,7 @@ async def create_defi_audit(
     request: Request,
     response: FastAPIResponse,
     audit_request: CreateAuditRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     license_check = Depends(require_defi_audit),
     db: Session = Depends(get_db)
 ):
@@ -302,6 +332,7 @@ async def create_defi_audit(
     db.refresh(audit)
 
     logger.info(f"Audit {audit.id} created with status pending")
+    publish_audit(audit)
 
     # Launch background task to process audit
     try:
@@ -314,6 +345,7 @@ async def create_defi_audit(
         audit.status = "failed"
         audit.error_message = f"Failed to start processing: {str(e)}"
         db.commit()
+        publish_audit(audit)
 
     # Enrich with local currency values
     local_currency_data = await enrich_audit_with_local_currency(audit, current_user.id, db)
@@ -344,7 +376,7 @@ async def create_defi_audit(
 async def list_user_audits(
     request: Request,
     response: FastAPIResponse,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all audits for current user with local currency values"""
@@ -357,16 +389,7 @@ async def list_user_audits(
     results = []
     for audit in audits:
         # ✅ TIMEOUT CHECK: Mark audit as failed if stuck for > 1 hour
-        if audit.status in ["pending", "processing"]:
-            timeout_hours = 1
-            time_elapsed = datetime.utcnow() - audit.created_at
-            if time_elapsed.total_seconds() > timeout_hours * 3600:
-                logger.warning(f"Audit {audit.id} timed out after {time_elapsed.total_seconds() / 3600:.1f} hours")
-                audit.status = "failed"
-                audit.error_message = f"Audit timed out after {timeout_hours} hour(s). The Celery worker may be unavailable. Please try again or contact support."
-                audit.completed_at = datetime.utcnow()
-                db.commit()
-                db.refresh(audit)
+        _fail_if_timed_out(db, audit)
 
         local_currency_data = await enrich_audit_with_local_currency(audit, current_user.id, db)
 
@@ -401,7 +424,8 @@ async def get_audit_report(
     audit_id: int,
     limit: int = 100,
     offset: int = 0,
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -410,7 +434,8 @@ async def get_audit_report(
     Args:
         audit_id: Audit ID
         limit: Max transactions to return (default 100, max 1000)
-        offset: Offset for pagination (default 0)
+        offset: Offset for pagination (default 0, prefer cursor)
+        cursor: pagination.next_cursor of the previous page
 
     Returns detailed breakdown of all DeFi activity, tax implications,
     and optimization recommendations.
@@ -432,20 +457,14 @@ async def get_audit_report(
         raise HTTPException(status_code=404, detail="Audit not found")
 
     # ✅ TIMEOUT CHECK: Mark audit as failed if stuck for > 1 hour
-    if audit.status in ["pending", "processing"]:
-        timeout_hours = 1
-        time_elapsed = datetime.utcnow() - audit.created_at
-        if time_elapsed.total_seconds() > timeout_hours * 3600:
-            logger.warning(f"Audit {audit.id} timed out after {time_elapsed.total_seconds() / 3600:.1f} hours")
-            audit.status = "failed"
-            audit.error_message = f"Audit timed out after {timeout_hours} hour(s). The Celery worker may be unavailable. Please try again or contact support."
-            audit.completed_at = datetime.utcnow()
-            db.commit()
-            db.refresh(audit)
+    _fail_if_timed_out(db, audit)
 
     # Get full report with pagination
     service = DeFiAuditService(db)
-    report = await service.get_audit_report(audit_id, limit=limit, offset=offset)
+    try:
+        report = await service.get_audit_report(audit_id, limit=limit, offset=offset, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return report
 
@@ -453,9 +472,9 @@ async def get_audit_report(
 @router.get("/audit/{audit_id}/export/csv")
 async def export_audit_csv(
     audit_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     license_check = Depends(require_csv_export),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Export DeFi audit transactions as CSV
@@ -559,9 +578,9 @@ async def export_audit_csv(
 @router.get("/audit/{audit_id}/export/pdf")
 async def export_audit_pdf(
     audit_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     license_check = Depends(require_pdf_export),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Export DeFi audit report as PDF
@@ -569,7 +588,8 @@ async def export_audit_pdf(
     Returns a comprehensive PDF report with transaction summary and tax breakdown.
     """
     from fastapi.responses import Response
-    from app.services.pdf_generator import PDFGenerator
+    from app.services.pdf_generator import render_html_pdf
+    from app.services.report_renderer import data_version, render_cached
 
     # Verify ownership
     audit = db.query(DeFiAudit).filter(
@@ -638,8 +658,15 @@ async def export_audit_pdf(
         </html>
         """
 
-        # Convert to PDF
-        pdf_bytes = await PDFGenerator.html_to_pdf(html_content)
+        # Convert to PDF (render pool), or serve the copy of this audit version
+        pdf_bytes = await render_cached(
+            "defi_audit_pdf",
+            audit_id,
+            data_version(html_content),
+            "pdf",
+            render_html_pdf,
+            html_content
+        )
 
         # Generate filename
         filename = f"defi_audit_{audit_id}.pdf"
@@ -662,7 +689,7 @@ async def export_audit_pdf(
 @router.delete("/audit/{audit_id}")
 async def delete_audit(
     audit_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete audit and all associated transactions"""
@@ -746,107 +773,145 @@ async def list_supported_chains():
     }
 
 
+def _status_response(event: Dict) -> Dict:
+    """Progress event as returned to the owner (without user_id)"""
+    return {key: value for key, value in event.items() if key != "user_id"}
+
+
+def _audit_status_from_db(db: Session, audit_id: int, user_id: int) -> Dict:
+    """
+    Status from the database, when Redis has no (fresh) progress for the audit
+
+    Also runs the timeout check, and republishes finished audits so the next
+    polls are served from Redis.
+    """
+    audit = db.query(DeFiAudit).filter(
+        DeFiAudit.id == audit_id,
+        DeFiAudit.user_id == user_id
+    ).first()
+
+    if not audit:
+        raise HTTPException(status_code=404, detail="Audit not found")
+
+    _fail_if_timed_out(db, audit)
+
+    if audit.status in TERMINAL_STATUSES:
+        event = audit_event(audit)
+        publish_audit(audit)
+        return event
+
+    if audit.status == "processing":
+        # No progress events (e.g. Redis was unavailable): count what's persisted
+        transactions_processed = db.query(DeFiTransaction).filter(
+            DeFiTransaction.audit_id == audit_id
+        ).count()
+        return audit_event(
+            audit,
+            persisted=transactions_processed,
+            total_transactions=transactions_processed,
+            current_step=f"Processing transactions... ({transactions_processed} found)"
+        )
+
+    return audit_event(audit)
+
+
 @router.get("/audit/{audit_id}/status")
 @limiter.limit(get_rate_limit("read_only"))
 async def get_audit_status(
     request: Request,
     response: FastAPIResponse,
     audit_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get real-time audit processing status
 
-    Returns current progress for audits in 'processing' state.
-    Useful for frontend progress bars and status updates.
+    One Redis read: the audit pipeline publishes its progress there (see
+    app.services.audit_progress). Falls back to the database when Redis has
+    nothing for the audit. Prefer GET /audit/{audit_id}/events (SSE) over
+    polling this endpoint.
 
     Returns:
-        - status: processing, completed, failed
+        - status: pending, processing, completed, failed
+        - phase: queued, fetching, processing, completed, failed
+        - chain, chain_index, chains_total: Chain being scanned
+        - fetched, parsed, persisted: Transaction counts so far
         - progress: 0-100 percentage
         - current_step: Description of current operation
         - total_transactions: Transactions found so far
-        - estimated_time_remaining: Seconds (if available)
+        - eta_seconds: Estimated time remaining (if available)
     """
+    event = get_audit_progress(audit_id)
 
-    # Verify ownership
-    audit = db.query(DeFiAudit).filter(
-        DeFiAudit.id == audit_id,
-        DeFiAudit.user_id == current_user.id
-    ).first()
+    if event and not is_stale(event):
+        if event["user_id"] != current_user.id:
+            raise HTTPException(status_code=404, detail="Audit not found")
+        return _status_response(event)
 
-    if not audit:
-        raise HTTPException(status_code=404, detail="Audit not found")
+    return _status_response(_audit_status_from_db(db, audit_id, current_user.id))
 
-    # ✅ TIMEOUT CHECK: Mark audit as failed if stuck for > 1 hour
-    if audit.status in ["pending", "processing"]:
-        timeout_hours = 1
-        time_elapsed = datetime.utcnow() - audit.created_at
-        if time_elapsed.total_seconds() > timeout_hours * 3600:
-            logger.warning(f"Audit {audit.id} timed out after {time_elapsed.total_seconds() / 3600:.1f} hours")
-            audit.status = "failed"
-            audit.error_message = f"Audit timed out after {timeout_hours} hour(s). The Celery worker may be unavailable. Please try again or contact support."
-            audit.completed_at = datetime.utcnow()
-            db.commit()
-            db.refresh(audit)
-
-    # Calculate progress based on status
-    if audit.status == "completed":
-        return {
-            "audit_id": audit.id,
-            "status": "completed",
-            "progress": 100,
-            "current_step": "Audit completed",
-            "total_transactions": audit.total_transactions,
-            "completed_at": audit.completed_at.isoformat() if audit.completed_at else None
-        }
 
-    elif audit.status == "failed":
-        return {
-            "audit_id": audit.id,
-            "status": "failed",
-            "progress": 0,
-            "current_step": "Audit failed",
-            "error_message": audit.error_message,
-            "total_transactions": 0
-        }
+@router.get("/audit/{audit_id}/events")
+async def stream_audit_progress(
+    request: Request,
+    audit_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream audit progress (Server-Sent Events)
 
-    elif audit.status == "processing":
-        # Count transactions processed so far
-        transactions_processed = db.query(DeFiTransaction).filter(
-            DeFiTransaction.audit_id == audit_id
-        ).count()
+    Sends a "progress" event with the current status, then one per progress
+    update until the audit completes or fails (same fields as
+    GET /audit/{audit_id}/status). Comment lines keep the connection alive.
+    If Redis is unavailable, sends the current status once and closes: the
+    client should fall back to polling the status endpoint.
+    """
+    event = get_audit_progress(audit_id)
+    if event is None or is_stale(event):
+        event = _audit_status_from_db(db, audit_id, current_user.id)
+    elif event["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Audit not found")
 
-        # Estimate progress (rough estimate)
-        # Assume 10% for each chain scanned (if we knew which chain we're on)
-        # For now, just show 50% if processing
-        estimated_progress = min(50 + (transactions_processed // 10), 95)
-
-        return {
-            "audit_id": audit.id,
-            "status": "processing",
-            "progress": estimated_progress,
-            "current_step": f"Processing transactions... ({transactions_processed} found)",
-            "total_transactions": transactions_processed,
-            "chains": audit.chains,
-            "created_at": audit.created_at.isoformat()
-        }
+    # Don't hold a database connection for the lifetime of the stream
+    db.close()
 
-    else:
-        # Pending or unknown status
-        return {
-            "audit_id": audit.id,
-            "status": audit.status or "pending",
-            "progress": 0,
-            "current_step": "Queued for processing",
-            "total_transactions": 0
-        }
+    async def events():
+        if event["status"] in TERMINAL_STATUSES:
+            yield format_sse("progress", _status_response(event))
+            return
+
+        deadline = asyncio.get_running_loop().time() + AUDIT_TIMEOUT_HOURS * 3600
+        sent = False
+        try:
+            async for update in audit_progress_events(audit_id):
+                if await request.is_disconnected() or asyncio.get_running_loop().time() > deadline:
+                    return
+                if update is None:
+                    yield ": keepalive\n\n"
+                    continue
+
+                sent = True
+                yield format_sse("progress", _status_response(update))
+                if update["status"] in TERMINAL_STATUSES:
+                    return
+        except Exception as e:
+            logger.warning(f"Audit progress stream for audit {audit_id} interrupted: {e}")
+            if not sent:
+                yield format_sse("progress", _status_response(event))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/audit/{audit_id}/generate-cost-basis-lots")
 async def generate_cost_basis_lots_retroactively(
     audit_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -6,14 +6,20 @@ Provides comprehensive health checks for:
 - Database connectivity
 - Redis connectivity
 - Ollama availability
+
+Also serves /metrics (Prometheus format, see app.monitoring.profiler)
 """
 
-from fastapi import APIRouter, Depends, status as http_status
+from fastapi import APIRouter, Depends, Header, HTTPException, status as http_status
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from app.database import get_db
+from app.database import get_db, pool_stats
 from app.config import settings
+from app.monitoring.profiler import render_prometheus, render_pool_metrics
 from datetime import datetime
+from typing import Optional
+import hmac
 import redis
 import httpx
 import logging
@@ -130,6 +136,27 @@ async def liveness_check():
     }
 
 
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: Optional[str] = Header(None)):
+    """
+    Prometheus metrics
+
+    Per-route request counts and durations, with the SQL statements, Redis
+    commands and outbound HTTP calls they made, and database pool usage
+    (this process only).
+    Requires `Authorization: Bearer <METRICS_TOKEN>` when METRICS_TOKEN is set.
+    """
+    if settings.METRICS_TOKEN and not (
+        authorization and hmac.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}")
+    ):
+        raise HTTPException(status_code=http_status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+    return PlainTextResponse(
+        render_prometheus() + render_pool_metrics(pool_stats()),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
 # ========================================
 # Individual service checks
 # ========================================
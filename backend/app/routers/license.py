@@ -7,13 +7,16 @@ API routes for checking license status and usage quotas
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.user import User
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.license_service import LicenseService
+from app.services.usage_meter import UsageMeter
 from app.middleware import limiter, get_rate_limit
 from pydantic import BaseModel
 from typing import Optional
+import logging
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/license", tags=["License"])
 
 
@@ -52,7 +55,7 @@ class UsageResponse(BaseModel):
 async def get_license_usage(
     request: Request,
     response: Response,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -72,7 +75,12 @@ async def get_license_usage(
         raise HTTPException(status_code=404, detail="License not found")
 
     limits = license.get_limits()
-    remaining = license.get_remaining()
+    try:
+        usage = UsageMeter().current_usage(license)
+    except Exception as e:
+        logger.warning(f"Usage meter unavailable, reading usage from the database: {e}")
+        usage = license.get_usage()
+    remaining = {resource: max(0, limits[resource] - used) for resource, used in usage.items()}
 
     return UsageResponse(
         tier=license.tier.value,
@@ -80,10 +88,10 @@ async def get_license_usage(
         expires_at=license.expires_at.isoformat() if license.expires_at else None,
 
         # Current usage
-        simulations_used=license.simulations_used,
-        defi_audits_used=license.defi_audits_used,
-        pdf_exports_used=license.pdf_exports_used,
-        chat_messages_used=license.chat_messages_used,
+        simulations_used=usage["simulations"],
+        defi_audits_used=usage["defi_audits"],
+        pdf_exports_used=usage["pdf_exports"],
+        chat_messages_used=usage["chat_messages"],
 
         # Limits
         simulations_limit=limits["simulations"],
@@ -302,12 +302,13 @@ class CreateCryptoPaymentRequest(BaseModel):
 
 
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 
 @router.post("/create-payment")
 async def create_crypto_payment(
     payment_request: CreateCryptoPaymentRequest,
     db: Session = Depends(get_db),
-    user: User = Depends(get_current_user)
+    user: Principal = Depends(get_current_user)
 ):
     """
     Create a new crypto payment (requires authentication)
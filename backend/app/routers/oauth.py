@@ -13,6 +13,7 @@ from app.models.license import License
 from app.utils.security import create_access_token, create_refresh_token, hash_password
 from app.services.license_service import LicenseService
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from datetime import datetime, timezone, timedelta
 import os
 import logging
@@ -157,7 +158,7 @@ async def google_callback(
 @router.post("/google/link")
 async def link_google_account(
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -1,58 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.regulation import Regulation
+from app.database import get_db, get_async_read_sessions
 from app.models.country_analysis import CountryAnalysis
+from app.repositories import RegulationRepository
 from app.services.country_analysis_ai import CountryAnalysisAI
+from app.services.regulation_catalog import get_regulation_catalog
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
 import logging
 
 router = APIRouter(prefix="/regulations", tags=["Regulations"])
 logger = logging.getLogger(__name__)
 
 
-def extract_data_quality(regulation: Regulation) -> tuple[str, List[str]]:
-    """
-    Extract data quality and sources from regulation
-
-    Returns:
-        (quality_level, sources_list)
-    """
-    # Use existing data_quality and data_sources from DB if available
-    if regulation.data_quality:
-        quality = regulation.data_quality
-    else:
-        # Fallback: calculate from data
-        notes = regulation.notes or ""
-        high_quality_sources = ['PwC', 'Tax Foundation', 'KPMG', 'OECD', 'Koinly']
-        sources_from_notes = [s for s in high_quality_sources if s in notes]
-
-        # FIX: Check if CGT exists (including 0.0)
-        has_cgt = regulation.cgt_short_rate is not None
-        has_crypto = regulation.crypto_short_rate is not None
-        has_sources = len(sources_from_notes) > 0
-
-        if has_sources and (has_cgt or has_crypto):
-            quality = 'high' if len(sources_from_notes) >= 2 else 'medium'
-        elif has_cgt:
-            quality = 'medium'
-        elif not has_cgt and not has_crypto:
-            quality = 'low'
-        else:
-            quality = 'unknown'
-
-    # Use data_sources column if available, otherwise extract from notes
-    if regulation.data_sources:
-        sources = regulation.data_sources
-    else:
-        notes = regulation.notes or ""
-        high_quality_sources = ['PwC', 'Tax Foundation', 'KPMG', 'OECD', 'Koinly']
-        sources = [s for s in high_quality_sources if s in notes]
-
-    return quality, sources
-
-
 class RegulationResponse(BaseModel):
     country_code: str
     country_name: str
@@ -95,7 +57,8 @@ class RegulationResponse(BaseModel):
 
 @router.get("/", response_model=List[RegulationResponse])
 async def get_all_regulations(
-    db: Session = Depends(get_db),
+    request: Request,
+    sessions: async_sessionmaker = Depends(get_async_read_sessions),
     crypto_only: bool = False,
     reliable_only: bool = False,
     include_analysis: bool = False
@@ -103,6 +66,9 @@ async def get_all_regulations(
     """
     Get all country tax regulations
 
+    Served from the in-memory regulation catalog. Without analyses the body
+    is pre-serialized and carries an ETag (If-None-Match -> 304).
+
     Args:
         crypto_only: If True, only return countries with crypto-specific data
         reliable_only: If True, only return countries with verified CGT data from trusted sources
@@ -111,63 +77,26 @@ async def get_all_regulations(
     Returns:
         List of all regulations with optional AI analysis scores
     """
-    query = db.query(Regulation)
+    # In memory; a reload (version bump) reads the table off the event loop
+    catalog = await asyncio.to_thread(get_regulation_catalog)
 
-    if crypto_only:
-        query = query.filter(Regulation.crypto_short_rate.isnot(None))
+    if not include_analysis:
+        body, etag = catalog.serialized(crypto_only=crypto_only, reliable_only=reliable_only)
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
 
-    regulations = query.all()
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
 
-    # Get all analyses if requested
-    analyses_dict = {}
-    if include_analysis:
-        analyses = db.query(CountryAnalysis).all()
-        analyses_dict = {a.country_code: a for a in analyses}
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    analyses_dict = await RegulationRepository(sessions).analyses()
 
-    # Convert to response format
     result = []
-    for reg in regulations:
-        quality, sources = extract_data_quality(reg)
-
-        # Skip if reliable_only and quality is low/unknown
-        if reliable_only and quality in ['low', 'unknown']:
-            continue
-
-        response_data = {
-            "country_code": reg.country_code,
-            "country_name": reg.country_name,
-            "flag_emoji": reg.flag_emoji,
-            "cgt_short_rate": float(reg.cgt_short_rate),
-            "cgt_long_rate": float(reg.cgt_long_rate),
-            "crypto_short_rate": float(reg.crypto_short_rate) if reg.crypto_short_rate is not None else None,
-            "crypto_long_rate": float(reg.crypto_long_rate) if reg.crypto_long_rate is not None else None,
-            "crypto_notes": reg.crypto_notes,
-            "crypto_legal_status": reg.crypto_legal_status,
-            "staking_rate": float(reg.staking_rate) if reg.staking_rate is not None else None,
-            "mining_rate": float(reg.mining_rate) if reg.mining_rate is not None else None,
-            "holding_period_months": reg.holding_period_months,
-            "is_flat_tax": bool(reg.is_flat_tax) if reg.is_flat_tax is not None else None,
-            "is_progressive": bool(reg.is_progressive) if reg.is_progressive is not None else None,
-            "is_territorial": bool(reg.is_territorial) if reg.is_territorial is not None else None,
-            "crypto_specific": bool(reg.crypto_specific) if reg.crypto_specific is not None else None,
-            "long_term_discount_pct": float(reg.long_term_discount_pct) if reg.long_term_discount_pct is not None else None,
-            "exemption_threshold": float(reg.exemption_threshold) if reg.exemption_threshold is not None else None,
-            "exemption_threshold_currency": reg.exemption_threshold_currency,
-            "nft_treatment": reg.nft_treatment,
-            "residency_rule": reg.residency_rule,
-            "defi_reporting": reg.defi_reporting,
-            "penalties_max": reg.penalties_max,
-            "notes": reg.notes,
-            "updated_at": str(reg.updated_at) if reg.updated_at else None,
-            "source_url": reg.source_url,
-            "data_quality": quality,
-            "data_sources": sources if sources else None
-        }
-
-        # Add AI analysis if requested
-        if include_analysis and reg.country_code in analyses_dict:
-            analysis = analyses_dict[reg.country_code]
-            response_data["ai_analysis"] = analysis.to_dict()
+    for record in catalog.select(crypto_only=crypto_only, reliable_only=reliable_only):
+        response_data = dict(record.response)
+
+        if record.country_code in analyses_dict:
+            response_data["ai_analysis"] = analyses_dict[record.country_code].to_dict()
 
         result.append(RegulationResponse(**response_data))
 
@@ -178,7 +107,7 @@ async def get_all_regulations(
 async def get_regulation(
     country_code: str,
     include_analysis: bool = False,
-    db: Session = Depends(get_db)
+    sessions: async_sessionmaker = Depends(get_async_read_sessions)
 ):
     """
     Get tax regulation for a specific country
@@ -189,49 +118,16 @@ async def get_regulation(
 
     Returns crypto-specific rates when available
     """
-    regulation = db.query(Regulation).filter(
-        Regulation.country_code == country_code.upper()
-    ).first()
+    record = (await asyncio.to_thread(get_regulation_catalog)).get(country_code)
 
-    if not regulation:
+    if not record:
         raise HTTPException(status_code=404, detail=f"Country {country_code} not found")
 
-    quality, sources = extract_data_quality(regulation)
-
-    response_data = {
-        "country_code": regulation.country_code,
-        "country_name": regulation.country_name,
-        "flag_emoji": regulation.flag_emoji,
-        "cgt_short_rate": float(regulation.cgt_short_rate),
-        "cgt_long_rate": float(regulation.cgt_long_rate),
-        "crypto_short_rate": float(regulation.crypto_short_rate) if regulation.crypto_short_rate is not None else None,
-        "crypto_long_rate": float(regulation.crypto_long_rate) if regulation.crypto_long_rate is not None else None,
-        "crypto_notes": regulation.crypto_notes,
-        "crypto_legal_status": regulation.crypto_legal_status,
-        "staking_rate": float(regulation.staking_rate) if regulation.staking_rate is not None else None,
-        "mining_rate": float(regulation.mining_rate) if regulation.mining_rate is not None else None,
-        "holding_period_months": regulation.holding_period_months,
-        "is_flat_tax": bool(regulation.is_flat_tax) if regulation.is_flat_tax is not None else None,
-        "is_progressive": bool(regulation.is_progressive) if regulation.is_progressive is not None else None,
-        "is_territorial": bool(regulation.is_territorial) if regulation.is_territorial is not None else None,
-        "crypto_specific": bool(regulation.crypto_specific) if regulation.crypto_specific is not None else None,
-        "long_term_discount_pct": float(regulation.long_term_discount_pct) if regulation.long_term_discount_pct is not None else None,
-        "exemption_threshold": float(regulation.exemption_threshold) if regulation.exemption_threshold is not None else None,
-        "exemption_threshold_currency": regulation.exemption_threshold_currency,
-        "nft_treatment": regulation.nft_treatment,
-        "residency_rule": regulation.residency_rule,
-        "defi_reporting": regulation.defi_reporting,
-        "penalties_max": regulation.penalties_max,
-        "notes": regulation.notes,
-        "updated_at": str(regulation.updated_at) if regulation.updated_at else None,
-        "source_url": regulation.source_url,
-        "data_quality": quality,
-        "data_sources": sources if sources else None
-    }
+    response_data = dict(record.response)
 
     # Add AI analysis if requested
     if include_analysis:
-        analysis = db.query(CountryAnalysis).filter_by(country_code=country_code.upper()).first()
+        analysis = await RegulationRepository(sessions).analysis(country_code)
         if analysis:
             response_data["ai_analysis"] = analysis.to_dict()
 
@@ -281,8 +177,7 @@ async def get_country_analysis(
         country_code = country_code.upper()
 
         # Check if country exists
-        regulation = db.query(Regulation).filter_by(country_code=country_code).first()
-        if not regulation:
+        if country_code not in get_regulation_catalog(db):
             raise HTTPException(status_code=404, detail=f"Country {country_code} not found")
 
         # Check for existing analysis
@@ -337,12 +232,8 @@ async def batch_analyze_countries(
     ```
     """
     # Verify countries exist
-    existing_countries = db.query(Regulation.country_code).filter(
-        Regulation.country_code.in_([c.upper() for c in country_codes])
-    ).all()
-    existing_codes = [c[0] for c in existing_countries]
-
-    invalid_codes = [c for c in country_codes if c.upper() not in existing_codes]
+    catalog = get_regulation_catalog(db)
+    invalid_codes = [c for c in country_codes if c.upper() not in catalog]
     if invalid_codes:
         raise HTTPException(
             status_code=400,
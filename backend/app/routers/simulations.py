@@ -2,18 +2,35 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response as Fast
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models.user import User
 from app.models.simulation import Simulation
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.tax_simulator import TaxSimulator
-from app.services.pdf_generator import PDFGenerator
+from app.services.residency_comparison import get_comparison_engine
+from app.services.regulation_catalog import get_regulation_catalog
+from app.services.monte_carlo_simulation import (
+    SIMULATED_METHODS, CACHE_TTL as MC_CACHE_TTL, TASK_OWNER_PREFIX as MC_TASK_OWNER_PREFIX,
+    cache_key as mc_cache_key, lot_rows
+)
+from app.models.cost_basis import CostBasisLot, CostBasisMethod
+from app.dependencies.exchange_rate import get_redis_client
+from app.tasks.celery_app import celery_app
+from app.tasks.simulation_tasks import run_monte_carlo_simulation_task
+from app.services.pdf_generator import PDFGenerator, render_html_pdf
+from app.services.report_renderer import data_version, render_cached
 from app.middleware import limiter, get_rate_limit
 from app.dependencies.license_check import require_simulation, require_pdf_export
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
+from datetime import datetime
+from celery.result import AsyncResult
+import asyncio
+import json
+import logging
 import re
 
 router = APIRouter(prefix="/simulations", tags=["Simulations"])
+logger = logging.getLogger(__name__)
 
 
 class SimulationRequest(BaseModel):
@@ -143,13 +160,97 @@ class CompareResponse(BaseModel):
     recommendations: List[str] = []
 
 
+class Disposal(BaseModel):
+    gain: float = Field(..., ge=-1_000_000_000, le=1_000_000_000, description="Realized gain or loss (USD)")
+    holding_days: int = Field(..., ge=0, le=36_500, description="Days the asset was held")
+
+
+class GainScenario(BaseModel):
+    short_term_gains: float = Field(default=0, ge=0, le=1_000_000_000)
+    long_term_gains: float = Field(default=0, ge=0, le=1_000_000_000)
+
+
+class RankRequest(BaseModel):
+    current_country: Optional[str] = Field(None, min_length=2, max_length=2, description="Baseline for savings")
+    short_term_gains: float = Field(default=0, ge=0, le=1_000_000_000, description="Short-term capital gains (USD)")
+    long_term_gains: float = Field(default=0, ge=0, le=1_000_000_000, description="Long-term capital gains (USD)")
+    disposals: Optional[List[Disposal]] = Field(None, max_length=100_000, description="Actual disposals (replaces short/long gains)")
+    scenarios: Optional[List[GainScenario]] = Field(None, max_length=1_000, description="What-if gain scenarios")
+    apply_allowances: bool = Field(default=False, description="Apply long-term discounts and exemption thresholds")
+    territorial_exempt: bool = Field(default=False, description="Treat gains as foreign-sourced in territorial countries")
+    include_banned: bool = False
+    limit: int = Field(default=20, ge=1, le=250)
+
+    @field_validator('current_country')
+    @classmethod
+    def validate_current_country(cls, v: Optional[str]) -> Optional[str]:
+        """Validate country code format (uppercase, 2 letters)"""
+        if v is None:
+            return v
+        v = v.upper()
+        if not re.match(r'^[A-Z]{2}$', v):
+            raise ValueError('Country code must be 2 uppercase letters (ISO 3166-1 alpha-2)')
+        return v
+
+
+class ScenarioRanking(BaseModel):
+    short_term_gains: float
+    long_term_gains: float
+    current_tax: Optional[float] = None
+    best: List[dict]
+
+
+class RankResponse(BaseModel):
+    current: Optional[dict] = None
+    rankings: List[dict]
+    scenarios: List[ScenarioRanking] = []
+    countries_evaluated: int
+    tier_limit: int
+
+
+class MonteCarloRequest(BaseModel):
+    countries: List[str] = Field(..., min_length=2, max_length=20, description="Candidate jurisdictions")
+    n_paths: int = Field(default=5000, ge=100, le=50_000, description="Price paths to sample")
+    horizon_days: Optional[int] = Field(None, ge=1, le=1825, description="Days until the sale (default: year end)")
+    seed: int = Field(default=42, ge=0, description="Random generator seed (same inputs -> same result)")
+    sell_fraction: float = Field(default=1.0, gt=0, le=1, description="Share of each holding sold at the horizon")
+    spot_prices: Dict[str, float] = Field(default_factory=dict, description="Override current prices (USD)")
+    volatility: Dict[str, float] = Field(default_factory=dict, description="Annualized volatility per token")
+    price_ranges: Dict[str, List[float]] = Field(default_factory=dict, description="Token -> [low, high] price at the horizon")
+    correlation: float = Field(default=0.7, ge=0, le=1, description="Correlation of tokens with the market factor")
+    methods: Optional[List[CostBasisMethod]] = Field(None, description="Cost basis methods (default: all simulable)")
+    apply_allowances: bool = False
+    territorial_exempt: bool = False
+
+    @field_validator('countries')
+    @classmethod
+    def validate_countries(cls, v: List[str]) -> List[str]:
+        """Validate and normalize country codes"""
+        v = [country.upper() for country in v]
+        for country in v:
+            if not re.match(r'^[A-Z]{2}$', country):
+                raise ValueError(f'Invalid country code: {country}. Must be 2 uppercase letters')
+        if len(v) != len(set(v)):
+            raise ValueError('Duplicate countries')
+        return v
+
+    @field_validator('price_ranges')
+    @classmethod
+    def validate_price_ranges(cls, v: Dict[str, List[float]]) -> Dict[str, List[float]]:
+        """Each range is [low, high] with 0 <= low <= high"""
+        for token, bounds in v.items():
+            if len(bounds) != 2 or not 0 <= bounds[0] <= bounds[1]:
+                raise ValueError(f'Invalid price range for {token}: expected [low, high]')
+        return {token.upper(): bounds for token, bounds in v.items()}
+
+
 @router.post("/residency", response_model=SimulationResponse)
 @limiter.limit(get_rate_limit("simulations"))
 async def simulate_residency_change(
     request: Request,
     response: FastAPIResponse,
     simulation_request: SimulationRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     license_check = Depends(require_simulation),
     db: Session = Depends(get_db)
 ):
@@ -164,7 +265,7 @@ async def simulate_residency_change(
             - target_country (str): ISO 3166-1 alpha-2 code
             - short_term_gains (float): Short-term capital gains in USD (0-1B)
             - long_term_gains (float): Long-term capital gains in USD (0-1B)
-        current_user (User): Authenticated user from JWT token
+        current_user (Principal): Authenticated user from JWT token
         db (Session): Database session
 
     Returns:
@@ -238,13 +339,27 @@ async def simulate_residency_change(
     )
 
 
+def _comparison_country_limit(user: Principal) -> int:
+    """How many countries the user's tier may compare"""
+    from app.models.license import LicenseTier
+
+    max_countries = {
+        LicenseTier.FREE: 2,
+        LicenseTier.STARTER: 5,
+        LicenseTier.PRO: 999,  # Unlimited
+        LicenseTier.ENTERPRISE: 999
+    }
+
+    return max_countries.get(user.tier, 2)
+
+
 @router.post("/compare", response_model=CompareResponse)
 @limiter.limit(get_rate_limit("simulations"))
 async def compare_countries(
     request: Request,
     response: FastAPIResponse,
     compare_request: CompareRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     license_check = Depends(require_simulation),
     db: Session = Depends(get_db)
 ):
@@ -260,132 +375,69 @@ async def compare_countries(
         raise HTTPException(status_code=400, detail="At least 2 target countries required")
 
     # Check tier-based country limit
-    from app.services.license_service import LicenseService
-    from app.models.license import LicenseTier
-
-    license_service = LicenseService(db)
-    license = license_service.get_user_license(current_user.id)
-
-    max_countries = {
-        LicenseTier.FREE: 2,
-        LicenseTier.STARTER: 5,
-        LicenseTier.PRO: 999,  # Unlimited
-        LicenseTier.ENTERPRISE: 999
-    }
-
-    tier_limit = max_countries.get(license.tier, 2)
+    tier_limit = _comparison_country_limit(current_user)
 
     if len(compare_request.target_countries) > tier_limit:
         raise HTTPException(
             status_code=402,
             detail={
                 "error": "tier_limit_exceeded",
-                "message": f"Your {license.tier.value} plan allows comparing up to {tier_limit} countries. Upgrade to compare more.",
-                "current_tier": license.tier.value,
+                "message": f"Your {current_user.tier.value} plan allows comparing up to {tier_limit} countries. Upgrade to compare more.",
+                "current_tier": current_user.tier.value,
                 "tier_limit": tier_limit,
                 "requested": len(compare_request.target_countries),
                 "upgrade_url": "/pricing"
             }
         )
 
-    # Calculate current country tax
-    from app.models.regulation import Regulation
-    current_reg = db.query(Regulation).filter(
-        Regulation.country_code == compare_request.current_country
-    ).first()
+    # Tax in the current and every target country in one vectorized pass
+    # (crypto-specific rates if available, otherwise CGT rates)
+    engine = get_comparison_engine(db)
+    table = engine.rank(
+        compare_request.short_term_gains,
+        compare_request.long_term_gains,
+        current_country=compare_request.current_country,
+        countries=compare_request.target_countries
+    )
 
-    if not current_reg:
+    current = table["current"]
+    if not current:
         raise HTTPException(status_code=404, detail=f"Country {compare_request.current_country} not found")
 
-    # Calculate current tax using same logic as TaxSimulator
-    # Use crypto-specific rates if available, otherwise fall back to CGT rates
-    current_short_rate = float(current_reg.crypto_short_rate if current_reg.crypto_short_rate is not None else current_reg.cgt_short_rate)
-    current_long_rate = float(current_reg.crypto_long_rate if current_reg.crypto_long_rate is not None else current_reg.cgt_long_rate)
-
-    current_tax_short = compare_request.short_term_gains * current_short_rate
-    current_tax_long = compare_request.long_term_gains * current_long_rate
-    current_tax = current_tax_short + current_tax_long
-
-    # Calculate current effective rate
-    total_gains = compare_request.short_term_gains + compare_request.long_term_gains
-    current_effective_rate = (current_tax / total_gains * 100) if total_gains > 0 else 0
-
-    # Get AI analysis for current country
-    current_ai_analysis = None
-    if hasattr(current_reg, 'ai_analysis') and current_reg.ai_analysis:
-        current_ai_analysis = {
-            "crypto_score": current_reg.ai_analysis.get("crypto_score"),
-            "nomad_score": current_reg.ai_analysis.get("nomad_score"),
-            "overall_score": current_reg.ai_analysis.get("overall_score")
-        }
+    current_reg = engine.records[engine.index[current["country_code"]]]
+    current_tax = current["tax_amount"]
+    current_tax_short = current["short_term_tax"]
+    current_tax_long = current["long_term_tax"]
+    current_effective_rate = current["effective_rate"]
 
-    # Calculate tax for each target country
+    # Unknown and crypto-banned targets are left out of the ranking
     comparisons = []
-    for country_code in compare_request.target_countries:
-        try:
-            target_reg = db.query(Regulation).filter(
-                Regulation.country_code == country_code
-            ).first()
-
-            if not target_reg:
-                continue  # Skip invalid countries
-
-            # Skip countries where crypto is banned
-            if target_reg.crypto_legal_status == 'banned':
-                continue  # Silently skip banned countries from comparison
-
-            # Use crypto-specific rates if available, otherwise fall back to CGT rates
-            target_short_rate = float(target_reg.crypto_short_rate if target_reg.crypto_short_rate is not None else target_reg.cgt_short_rate)
-            target_long_rate = float(target_reg.crypto_long_rate if target_reg.crypto_long_rate is not None else target_reg.cgt_long_rate)
-
-            # Calculate target tax
-            target_tax_short = compare_request.short_term_gains * target_short_rate
-            target_tax_long = compare_request.long_term_gains * target_long_rate
-            target_tax = target_tax_short + target_tax_long
-
-            savings = current_tax - target_tax
-            savings_percent = (savings / current_tax * 100) if current_tax > 0 else 0
-            total_gains = compare_request.short_term_gains + compare_request.long_term_gains
-            effective_rate = (target_tax / total_gains * 100) if total_gains > 0 else 0
-
-            # Get AI analysis
-            ai_analysis = None
-            if hasattr(target_reg, 'ai_analysis') and target_reg.ai_analysis:
-                ai_analysis = {
-                    "crypto_score": target_reg.ai_analysis.get("crypto_score"),
-                    "nomad_score": target_reg.ai_analysis.get("nomad_score"),
-                    "overall_score": target_reg.ai_analysis.get("overall_score")
-                }
-
-            comparisons.append(CountryComparison(
-                country_code=country_code,
-                country_name=target_reg.country_name,
-                flag_emoji=target_reg.flag_emoji,
-                tax_amount=target_tax,
-                savings=savings,
-                savings_percent=savings_percent,
-                effective_rate=effective_rate,
-                # Tax breakdown
-                short_term_tax=target_tax_short,
-                long_term_tax=target_tax_long,
-                short_term_rate=target_short_rate * 100,  # Convert to percentage
-                long_term_rate=target_long_rate * 100,    # Convert to percentage
-                # AI Analysis
-                ai_analysis=ai_analysis,
-                # Tax metadata
-                holding_period_months=target_reg.holding_period_months,
-                is_flat_tax=target_reg.is_flat_tax,
-                is_progressive=target_reg.is_progressive,
-                is_territorial=target_reg.is_territorial,
-                exemption_threshold=target_reg.exemption_threshold,
-                exemption_threshold_currency=target_reg.exemption_threshold_currency,
-                crypto_legal_status=target_reg.crypto_legal_status,
-                source_url=target_reg.source_url,
-                crypto_notes=target_reg.crypto_notes
-            ))
-        except Exception as e:
-            print(f"Error processing {country_code}: {e}")
-            continue
+    for row in table["rankings"]:
+        target_reg = engine.records[engine.index[row["country_code"]]]
+        comparisons.append(CountryComparison(
+            country_code=row["country_code"],
+            country_name=target_reg.country_name,
+            flag_emoji=target_reg.flag_emoji,
+            tax_amount=row["tax_amount"],
+            savings=row["savings"],
+            savings_percent=row["savings_percent"],
+            effective_rate=row["effective_rate"],
+            # Tax breakdown
+            short_term_tax=row["short_term_tax"],
+            long_term_tax=row["long_term_tax"],
+            short_term_rate=row["short_term_rate"],
+            long_term_rate=row["long_term_rate"],
+            # Tax metadata
+            holding_period_months=target_reg.holding_period_months,
+            is_flat_tax=target_reg.is_flat_tax,
+            is_progressive=target_reg.is_progressive,
+            is_territorial=target_reg.is_territorial,
+            exemption_threshold=target_reg.exemption_threshold,
+            exemption_threshold_currency=target_reg.exemption_threshold_currency,
+            crypto_legal_status=target_reg.crypto_legal_status,
+            source_url=target_reg.source_url,
+            crypto_notes=target_reg.crypto_notes
+        ))
 
     # Sort by savings (highest savings first)
     comparisons.sort(key=lambda x: x.savings, reverse=True)
@@ -406,10 +458,9 @@ async def compare_countries(
         current_effective_rate=current_effective_rate,
         current_short_term_tax=current_tax_short,
         current_long_term_tax=current_tax_long,
-        current_short_term_rate=current_short_rate * 100,  # Convert to percentage
-        current_long_term_rate=current_long_rate * 100,    # Convert to percentage
+        current_short_term_rate=current["short_term_rate"],  # Percentage
+        current_long_term_rate=current["long_term_rate"],    # Percentage
         # Current country metadata
-        current_ai_analysis=current_ai_analysis,
         current_holding_period_months=current_reg.holding_period_months,
         current_is_flat_tax=current_reg.is_flat_tax,
         current_is_progressive=current_reg.is_progressive,
@@ -427,12 +478,238 @@ async def compare_countries(
     )
 
 
+@router.post("/rank", response_model=RankResponse)
+@limiter.limit(get_rate_limit("simulations"))
+async def rank_countries(
+    request: Request,
+    response: FastAPIResponse,
+    rank_request: RankRequest,
+    current_user: Principal = Depends(get_current_user),
+    license_check = Depends(require_simulation),
+    db: Session = Depends(get_db)
+):
+    """
+    Rank every jurisdiction by tax for a gains profile
+
+    The profile is either aggregate short/long-term gains or the actual
+    disposals (gain + days held), classified per country by its own holding
+    period. Optional what-if scenarios are evaluated in the same pass.
+    Rows returned are capped by the plan's country limit.
+
+    ⚠️ DISCLAIMER: This is NOT financial or legal advice.
+    Results may contain errors. Consult licensed professionals.
+    """
+    tier_limit = _comparison_country_limit(current_user)
+    limit = min(rank_request.limit, tier_limit)
+
+    engine = get_comparison_engine(db)
+    if rank_request.current_country and rank_request.current_country not in engine.index:
+        raise HTTPException(status_code=404, detail=f"Country {rank_request.current_country} not found")
+
+    options = {
+        "apply_allowances": rank_request.apply_allowances,
+        "territorial_exempt": rank_request.territorial_exempt
+    }
+    if rank_request.apply_allowances:
+        options["fx_per_usd"] = await _threshold_fx_rates(engine)
+
+    if rank_request.disposals:
+        short_gains, long_gains = engine.split_disposals(
+            [d.gain for d in rank_request.disposals],
+            [d.holding_days for d in rank_request.disposals]
+        )
+    else:
+        short_gains, long_gains = rank_request.short_term_gains, rank_request.long_term_gains
+
+    table = engine.rank(
+        short_gains, long_gains,
+        current_country=rank_request.current_country,
+        include_banned=rank_request.include_banned,
+        limit=limit,
+        **options
+    )
+
+    scenarios = []
+    if rank_request.scenarios:
+        scenarios = engine.rank_scenarios(
+            [sc.short_term_gains for sc in rank_request.scenarios],
+            [sc.long_term_gains for sc in rank_request.scenarios],
+            current_country=rank_request.current_country,
+            include_banned=rank_request.include_banned,
+            limit=limit,
+            **options
+        )
+
+    return RankResponse(
+        current=table["current"],
+        rankings=table["rankings"],
+        scenarios=scenarios,
+        countries_evaluated=len(engine),
+        tier_limit=tier_limit
+    )
+
+
+async def _threshold_fx_rates(engine) -> Dict[str, float]:
+    """USD -> currency rates for the exemption thresholds (missing ones are skipped)"""
+    currencies = sorted({c for c in engine.exemption_currency if c != "USD"})
+    if not currencies:
+        return {}
+
+    try:
+        from app.dependencies.exchange_rate import get_exchange_rate_service
+        service = get_exchange_rate_service()
+        try:
+            rates = await service.get_multi_currency_rates("USD", currencies)
+        finally:
+            await service.close()
+    except Exception as e:
+        logger.warning(f"Exchange rates unavailable, non-USD exemption thresholds ignored: {e}")
+        return {}
+
+    return {currency: float(rate) for currency, rate in rates.items() if rate}
+
+
+@router.post("/monte-carlo")
+@limiter.limit(get_rate_limit("simulations"))
+async def start_monte_carlo_simulation(
+    request: Request,
+    response: FastAPIResponse,
+    mc_request: MonteCarloRequest,
+    current_user: Principal = Depends(get_current_user),
+    license_check = Depends(require_simulation),
+    db: Session = Depends(get_db)
+):
+    """
+    Monte Carlo residency simulation over the user's open lots
+
+    Samples price paths at the horizon (seeded, offline), sells the lots under
+    each cost basis method and returns percentile tax outcomes per candidate
+    country. Runs as a background job; identical inputs are served from cache.
+
+    Returns:
+        {"status": "completed", "result": {...}} when cached, otherwise
+        {"status": "queued", "task_id": ...} (poll GET /simulations/monte-carlo/{task_id})
+
+    ⚠️ DISCLAIMER: This is NOT financial or legal advice.
+    Results may contain errors. Consult licensed professionals.
+    """
+    tier_limit = _comparison_country_limit(current_user)
+    if len(mc_request.countries) > tier_limit:
+        raise HTTPException(
+            status_code=402,
+            detail={
+                "error": "tier_limit_exceeded",
+                "message": f"Your {current_user.tier.value} plan allows comparing up to {tier_limit} countries. Upgrade to compare more.",
+                "current_tier": current_user.tier.value,
+                "tier_limit": tier_limit,
+                "requested": len(mc_request.countries),
+                "upgrade_url": "/pricing"
+            }
+        )
+
+    engine = get_comparison_engine(db)
+    unknown = [c for c in mc_request.countries if c not in engine.index]
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Countries not found: {', '.join(unknown)}")
+
+    lots = lot_rows(
+        db.query(CostBasisLot).filter(
+            CostBasisLot.user_id == current_user.id,
+            CostBasisLot.remaining_amount > 0
+        ).order_by(CostBasisLot.id).all()
+    )
+    if not lots:
+        raise HTTPException(status_code=400, detail="No open lots to simulate")
+
+    # Resolve spot prices up front so the job itself never touches the network
+    spot_prices = {token.upper(): price for token, price in mc_request.spot_prices.items()}
+    missing = sorted({lot["token"] for lot in lots} - set(spot_prices))
+    if missing:
+        from app.services.price_service import PriceService
+        fetched = await asyncio.to_thread(PriceService().get_current_prices_batch, missing)
+        spot_prices.update({token: float(price) for token, price in fetched.items() if price})
+
+    today = datetime.utcnow()
+    horizon_days = mc_request.horizon_days or max((datetime(today.year, 12, 31) - today).days, 1)
+
+    params = {
+        "countries": mc_request.countries,
+        "n_paths": mc_request.n_paths,
+        "horizon_days": horizon_days,
+        "seed": mc_request.seed,
+        "sell_fraction": mc_request.sell_fraction,
+        "spot_prices": spot_prices,
+        "volatility": {token.upper(): vol for token, vol in mc_request.volatility.items()},
+        "price_ranges": mc_request.price_ranges,
+        "correlation": mc_request.correlation,
+        "methods": [m.value for m in (mc_request.methods or SIMULATED_METHODS) if m in SIMULATED_METHODS],
+        "apply_allowances": mc_request.apply_allowances,
+        "territorial_exempt": mc_request.territorial_exempt,
+        # Same USD conversion of the exemption thresholds as the synchronous ranking
+        "fx_per_usd": await _threshold_fx_rates(engine) if mc_request.apply_allowances else {},
+        "as_of": today.date().isoformat()
+    }
+    result_key = mc_cache_key({
+        "params": params,
+        "lots": lots,
+        "regulations": get_regulation_catalog(db).serialized()[1]
+    })
+
+    redis_client = get_redis_client()
+    try:
+        cached = redis_client.get(result_key)
+    except Exception as e:
+        logger.warning(f"Monte Carlo cache unavailable: {e}")
+        cached = None
+    if cached:
+        return {"status": "completed", "cached": True, "result": json.loads(cached)}
+
+    task = run_monte_carlo_simulation_task.delay(params, lots, result_key)
+    try:
+        redis_client.setex(f"{MC_TASK_OWNER_PREFIX}:{task.id}", MC_CACHE_TTL, current_user.id)
+    except Exception as e:
+        logger.warning(f"Could not record Monte Carlo task owner: {e}")
+
+    return {"status": "queued", "task_id": task.id, "n_paths": params["n_paths"]}
+
+
+@router.get("/monte-carlo/{task_id}")
+async def get_monte_carlo_simulation(
+    task_id: str,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Progress / result of a Monte Carlo simulation job"""
+    try:
+        owner = get_redis_client().get(f"{MC_TASK_OWNER_PREFIX}:{task_id}")
+    except Exception as e:
+        logger.warning(f"Monte Carlo task owner lookup failed: {e}")
+        owner = None
+    if owner is None or int(owner) != current_user.id:
+        raise HTTPException(status_code=404, detail="Simulation job not found")
+
+    task = AsyncResult(task_id, app=celery_app)
+
+    if task.state == "SUCCESS":
+        return {"status": "completed", "result": task.result}
+    if task.state == "FAILURE":
+        return {"status": "failed", "error": str(task.result)}
+    if task.state == "PROGRESS":
+        meta = task.info or {}
+        total = meta.get("total") or 1
+        return {
+            "status": "running",
+            "progress": round(meta.get("current", 0) * 100 / total),
+            "message": meta.get("status")
+        }
+    return {"status": "queued" if task.state == "PENDING" else task.state.lower(), "progress": 0}
+
+
 @router.get("/history")
 @limiter.limit(get_rate_limit("read_only"))
 async def get_simulation_history(
     request: Request,
     response: FastAPIResponse,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get user's simulation history"""
@@ -453,7 +730,7 @@ async def get_simulation(
     request: Request,
     response: FastAPIResponse,
     simulation_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get specific simulation by ID"""
@@ -475,7 +752,7 @@ async def export_simulation_pdf(
     request: Request,
     response: FastAPIResponse,
     simulation_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     license_check = Depends(require_pdf_export),
     db: Session = Depends(get_db)
 ):
@@ -514,8 +791,15 @@ async def export_simulation_pdf(
             user_info=user_info
         )
 
-        # Convert to PDF
-        pdf_bytes = await PDFGenerator.html_to_pdf(html_content)
+        # Convert to PDF (render pool), or serve the copy of this simulation version
+        pdf_bytes = await render_cached(
+            "simulation_pdf",
+            simulation_id,
+            data_version(simulation_data, user_info),
+            "pdf",
+            render_html_pdf,
+            html_content
+        )
 
         # Generate filename
         filename = f"tax_simulation_{simulation.current_country}_to_{simulation.target_country}_{simulation_id}.pdf"
@@ -8,7 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from app.database import get_db
-from app.models.user import User
+from app.dependencies.exchange_rate import get_redis_client
 from app.models.cost_basis import CostBasisLot, UserCostBasisSettings
 from app.models.tax_opportunity import (
     TaxOpportunity,
@@ -17,19 +17,26 @@ from app.models.tax_opportunity import (
     OpportunityStatus
 )
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.dependencies import get_exchange_rate_service
 from app.dependencies.license_check import require_pro_tier
 from app.data.currency_mapping import get_currency_info
+from app.services.tax_optimizer import cached_analysis, compute_lot_metrics, lots_fingerprint
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
+import numpy as np
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tax-optimizer", tags=["Tax Optimizer"])
 
+# Opportunity scan of /analyze, cached like TaxOptimizer.analyze_portfolio
+OPPORTUNITY_SCAN_CACHE_PREFIX = "tax_opportunity_scan"
+
 
 # Helper function to get current exchange rate for user's jurisdiction
 async def get_user_exchange_rate(user_id: int, db: Session) -> tuple[Optional[str], Optional[str], Optional[float]]:
@@ -77,6 +84,169 @@ async def get_user_exchange_rate(user_id: int, db: Session) -> tuple[Optional[st
         return None, None, None
 
 
+async def _current_prices(tokens: List[str]) -> Dict[str, Optional[float]]:
+    """Current USD prices of tokens, one batched call (sync client, kept off the event loop)"""
+    from app.services.price_service import PriceService
+    price_service = PriceService()
+    try:
+        batch_prices = await asyncio.to_thread(price_service.get_current_prices_batch, tokens)
+    finally:
+        price_service.close()
+    return {token: float(batch_prices[token]) if batch_prices.get(token) else None for token in tokens}
+
+
+async def _scan_opportunities(
+    db: Session,
+    user_id: int,
+    audit_id: Optional[int],
+    settings: TaxOptimizationSettings,
+    short_term_rate: float,
+    long_term_rate: float,
+    current_time: datetime
+) -> Tuple[Dict[str, Optional[float]], Dict]:
+    """
+    Store new tax-loss harvesting / long-term wait opportunities for a user's lots
+
+    Returns:
+        (prices used, portfolio summary)
+    """
+    lots_query = db.query(CostBasisLot).filter(
+        CostBasisLot.user_id == user_id,
+        CostBasisLot.remaining_amount > 0
+    )
+
+    # Filter by audit_id if provided
+    if audit_id is not None:
+        lots_query = lots_query.filter(CostBasisLot.source_audit_id == audit_id)
+        logger.info(f"Analyzing tax opportunities for audit #{audit_id}")
+
+    lots = lots_query.all()
+    tax_year_end = datetime(current_time.year, 12, 31, 23, 59, 59)
+    opportunities = []
+
+    # One batched price fetch for every held token
+    prices = await _current_prices(sorted({lot.token.upper() for lot in lots}))
+
+    # Fallback to acquisition price if unavailable
+    current_prices = []
+    for lot in lots:
+        price = prices.get(lot.token.upper())
+        current_prices.append(price if price else float(lot.acquisition_price_usd))
+
+    metrics = compute_lot_metrics(lots, current_prices, required_holding_days=365, now=current_time)
+
+    harvest_savings = np.abs(metrics["unrealized"]) * short_term_rate
+    wait_savings = metrics["unrealized"] * (short_term_rate - long_term_rate)
+
+    # Active opportunities already on file, one query for all tokens
+    existing_keys = {
+        (token, chain, opportunity_type)
+        for token, chain, opportunity_type in db.query(
+            TaxOpportunity.token,
+            TaxOpportunity.chain,
+            TaxOpportunity.opportunity_type
+        ).filter(
+            TaxOpportunity.user_id == user_id,
+            TaxOpportunity.status == OpportunityStatus.ACTIVE
+        ).all()
+    }
+
+    for i, lot in enumerate(lots):
+        current_price = current_prices[i]
+        current_value = float(metrics["current_value"][i])
+        unrealized_gl = float(metrics["unrealized"][i])
+        unrealized_gl_percent = float(metrics["unrealized_percent"][i])
+
+        # Check for tax-loss harvesting opportunity
+        if unrealized_gl < 0 and settings.enable_tax_loss_harvesting:
+            # Loss exists - can harvest
+            potential_savings = float(harvest_savings[i])
+            key = (lot.token, lot.chain, OpportunityType.TAX_LOSS_HARVEST)
+
+            if potential_savings >= settings.min_opportunity_savings and key not in existing_keys:
+                existing_keys.add(key)
+                opp = TaxOpportunity(
+                    user_id=user_id,
+                    opportunity_type=OpportunityType.TAX_LOSS_HARVEST,
+                    status=OpportunityStatus.ACTIVE,
+                    token=lot.token,
+                    token_address=lot.token_address,
+                    chain=lot.chain,
+                    current_amount=lot.remaining_amount,
+                    current_price_usd=current_price,
+                    cost_basis_per_unit=lot.acquisition_price_usd,
+                    current_value_usd=current_value,
+                    unrealized_gain_loss=unrealized_gl,
+                    unrealized_gain_loss_percent=unrealized_gl_percent,
+                    potential_savings=potential_savings,
+                    tax_year=current_time.year,
+                    recommended_action=f"Sell {lot.remaining_amount:.4f} {lot.token} to harvest ${abs(unrealized_gl):,.2f} loss",
+                    action_description=(
+                        f"You have an unrealized loss of ${abs(unrealized_gl):,.2f} ({unrealized_gl_percent:.1f}%) on {lot.token}. "
+                        f"By selling now, you can offset up to ${potential_savings:,.2f} in gains from other assets. "
+                        f"You can repurchase after 30 days to avoid wash sale rules."
+                    ),
+                    deadline=tax_year_end,
+                    confidence_score=0.9,
+                    risk_level="low",
+                    related_lot_ids=str(lot.id),
+                    expires_at=tax_year_end
+                )
+                db.add(opp)
+                opportunities.append(opp)
+
+        # Check for long-term threshold opportunity
+        if not metrics["is_long_term"][i] and settings.enable_timing_optimization:
+            days_to_long_term = int(metrics["days_to_long_term"][i])
+
+            # Only show if close to threshold (within 60 days)
+            if days_to_long_term <= 60 and unrealized_gl > 0:
+                # Savings from waiting (short-term tax - long-term tax)
+                savings_by_waiting = float(wait_savings[i])
+                key = (lot.token, lot.chain, OpportunityType.LONG_TERM_WAIT)
+
+                if savings_by_waiting >= settings.min_opportunity_savings and key not in existing_keys:
+                    existing_keys.add(key)
+                    long_term_date = lot.acquisition_date + timedelta(days=365)
+                    opp = TaxOpportunity(
+                        user_id=user_id,
+                        opportunity_type=OpportunityType.LONG_TERM_WAIT,
+                        status=OpportunityStatus.ACTIVE,
+                        token=lot.token,
+                        token_address=lot.token_address,
+                        chain=lot.chain,
+                        current_amount=lot.remaining_amount,
+                        current_price_usd=current_price,
+                        cost_basis_per_unit=lot.acquisition_price_usd,
+                        current_value_usd=current_value,
+                        unrealized_gain_loss=unrealized_gl,
+                        unrealized_gain_loss_percent=unrealized_gl_percent,
+                        potential_savings=savings_by_waiting,
+                        tax_year=current_time.year,
+                        recommended_action=f"Wait {days_to_long_term} days before selling {lot.token}",
+                        action_description=(
+                            f"Your {lot.token} will qualify for long-term capital gains in {days_to_long_term} days "
+                            f"(on {long_term_date.strftime('%Y-%m-%d')}). By waiting, you'll save ${savings_by_waiting:,.2f} "
+                            f"in taxes ({short_term_rate*100:.0f}% vs {long_term_rate*100:.0f}% rate)."
+                        ),
+                        deadline=long_term_date,
+                        confidence_score=0.85,
+                        risk_level="low",
+                        related_lot_ids=str(lot.id),
+                        expires_at=long_term_date + timedelta(days=7)
+                    )
+                    db.add(opp)
+                    opportunities.append(opp)
+
+    db.commit()
+
+    return prices, {
+        "total_lots": len(lots),
+        "total_value_usd": float(metrics["current_value"].sum()),
+        "total_unrealized_gain_loss": float(metrics["unrealized"].sum())
+    }
+
+
 # Pydantic models
 class OpportunityResponse(BaseModel):
     id: int
@@ -134,7 +304,7 @@ class ExecuteOpportunityRequest(BaseModel):
 @router.get("/analyze", response_model=AnalysisResponse)
 async def analyze_tax_optimization(
     audit_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -156,14 +326,10 @@ async def analyze_tax_optimization(
     """
 
     # Check user's tier - FREE/STARTER get preview data
-    from app.services.license_service import LicenseService
     from app.models.license import LicenseTier
 
-    license_service = LicenseService(db)
-    license = license_service.get_user_license(current_user.id)
-
     # FREE/STARTER tier gets example data
-    if license.tier in [LicenseTier.FREE, LicenseTier.STARTER]:
+    if current_user.tier in [LicenseTier.FREE, LicenseTier.STARTER]:
         current_time = datetime.utcnow()
         return AnalysisResponse(
             total_opportunities=2,
@@ -231,20 +397,34 @@ async def analyze_tax_optimization(
             preview_mode_message="⚠️ PREVIEW DATA - This is example data to demonstrate features. Upgrade to PRO to see your real portfolio opportunities."
         )
 
-    # Get user's cost basis lots
-    lots_query = db.query(CostBasisLot).filter(
-        CostBasisLot.user_id == current_user.id,
-        CostBasisLot.remaining_amount > 0
+    # Get settings (defaults until the first analysis stores them)
+    settings = db.query(TaxOptimizationSettings).filter(
+        TaxOptimizationSettings.user_id == current_user.id
+    ).first() or TaxOptimizationSettings(
+        user_id=current_user.id,
+        enable_tax_loss_harvesting=True,
+        enable_timing_optimization=True,
+        min_opportunity_savings=100.0
     )
 
-    # Filter by audit_id if provided
-    if audit_id is not None:
-        lots_query = lots_query.filter(CostBasisLot.source_audit_id == audit_id)
-        logger.info(f"Analyzing tax opportunities for audit #{audit_id}")
+    # Tax rates (mock - should come from user settings or regulations)
+    short_term_rate = settings.capital_gains_rate_short or 0.37  # 37% federal
+    long_term_rate = settings.capital_gains_rate_long or 0.20  # 20% federal
 
-    lots = lots_query.all()
+    # The opportunity scan below is skipped while the lots, settings and
+    # prices are the same as on the last scan (opportunities are stored)
+    fingerprint = lots_fingerprint(
+        db,
+        current_user.id,
+        short_term_rate,
+        long_term_rate,
+        int(bool(settings.enable_tax_loss_harvesting)),
+        int(bool(settings.enable_timing_optimization)),
+        settings.min_opportunity_savings,
+        audit_id=audit_id
+    )
 
-    if not lots:
+    if fingerprint is None:
         return AnalysisResponse(
             total_opportunities=0,
             potential_tax_savings=0.0,
@@ -257,160 +437,23 @@ async def analyze_tax_optimization(
             recommendations=["Add cost basis lots to start tracking opportunities"]
         )
 
-    # Get or create settings
-    settings = db.query(TaxOptimizationSettings).filter(
-        TaxOptimizationSettings.user_id == current_user.id
-    ).first()
-
-    if not settings:
-        settings = TaxOptimizationSettings(
-            user_id=current_user.id,
-            enable_tax_loss_harvesting=True,
-            enable_timing_optimization=True,
-            min_opportunity_savings=100.0
-        )
+    if settings.id is None:
         db.add(settings)
         db.commit()
 
-    # Calculate opportunities
-    opportunities = []
-    total_value = 0.0
-    total_unrealized_gl = 0.0
-
-    # Tax rates (mock - should come from user settings or regulations)
-    short_term_rate = settings.capital_gains_rate_short or 0.37  # 37% federal
-    long_term_rate = settings.capital_gains_rate_long or 0.20  # 20% federal
-
     current_time = datetime.utcnow()
     tax_year_end = datetime(current_time.year, 12, 31, 23, 59, 59)
     days_until_year_end = (tax_year_end - current_time).days
 
-    # Get price service for real-time prices
-    from app.services.price_service import PriceService
-    price_service = PriceService()
-
-    # Cache prices per token to avoid repeated API calls
-    price_cache = {}
-
-    for lot in lots:
-        # Get current price (use cache to avoid repeated calls)
-        if lot.token not in price_cache:
-            current_price_decimal = price_service.get_current_price(lot.token)
-            if current_price_decimal:
-                price_cache[lot.token] = float(current_price_decimal)
-            else:
-                # Fallback to acquisition price if unavailable
-                price_cache[lot.token] = lot.acquisition_price_usd
-
-        current_price = price_cache[lot.token]
-        current_value = float(lot.remaining_amount) * float(current_price)
-        cost_basis = float(lot.remaining_amount) * float(lot.acquisition_price_usd)
-        unrealized_gl = current_value - cost_basis
-        unrealized_gl_percent = (unrealized_gl / cost_basis * 100) if cost_basis > 0 else 0
-
-        total_value += current_value
-        total_unrealized_gl += unrealized_gl
-
-        # Check for tax-loss harvesting opportunity
-        if unrealized_gl < 0 and settings.enable_tax_loss_harvesting:
-            # Loss exists - can harvest
-            potential_savings = abs(unrealized_gl) * short_term_rate
-
-            if potential_savings >= settings.min_opportunity_savings:
-                # Check if opportunity already exists
-                existing = db.query(TaxOpportunity).filter(
-                    TaxOpportunity.user_id == current_user.id,
-                    TaxOpportunity.token == lot.token,
-                    TaxOpportunity.chain == lot.chain,
-                    TaxOpportunity.status == OpportunityStatus.ACTIVE,
-                    TaxOpportunity.opportunity_type == OpportunityType.TAX_LOSS_HARVEST
-                ).first()
-
-                if not existing:
-                    opp = TaxOpportunity(
-                        user_id=current_user.id,
-                        opportunity_type=OpportunityType.TAX_LOSS_HARVEST,
-                        status=OpportunityStatus.ACTIVE,
-                        token=lot.token,
-                        token_address=lot.token_address,
-                        chain=lot.chain,
-                        current_amount=lot.remaining_amount,
-                        current_price_usd=current_price,
-                        cost_basis_per_unit=lot.acquisition_price_usd,
-                        current_value_usd=current_value,
-                        unrealized_gain_loss=unrealized_gl,
-                        unrealized_gain_loss_percent=unrealized_gl_percent,
-                        potential_savings=potential_savings,
-                        tax_year=current_time.year,
-                        recommended_action=f"Sell {lot.remaining_amount:.4f} {lot.token} to harvest ${abs(unrealized_gl):,.2f} loss",
-                        action_description=(
-                            f"You have an unrealized loss of ${abs(unrealized_gl):,.2f} ({unrealized_gl_percent:.1f}%) on {lot.token}. "
-                            f"By selling now, you can offset up to ${potential_savings:,.2f} in gains from other assets. "
-                            f"You can repurchase after 30 days to avoid wash sale rules."
-                        ),
-                        deadline=tax_year_end,
-                        confidence_score=0.9,
-                        risk_level="low",
-                        related_lot_ids=str(lot.id),
-                        expires_at=tax_year_end
-                    )
-                    db.add(opp)
-                    opportunities.append(opp)
-
-        # Check for long-term threshold opportunity
-        holding_period_days = (current_time - lot.acquisition_date).days
-        if holding_period_days < 365 and settings.enable_timing_optimization:
-            days_to_long_term = 365 - holding_period_days
-
-            # Only show if close to threshold (within 60 days)
-            if days_to_long_term <= 60 and unrealized_gl > 0:
-                # Calculate savings from waiting
-                short_term_tax = unrealized_gl * short_term_rate
-                long_term_tax = unrealized_gl * long_term_rate
-                savings_by_waiting = short_term_tax - long_term_tax
-
-                if savings_by_waiting >= settings.min_opportunity_savings:
-                    existing = db.query(TaxOpportunity).filter(
-                        TaxOpportunity.user_id == current_user.id,
-                        TaxOpportunity.token == lot.token,
-                        TaxOpportunity.chain == lot.chain,
-                        TaxOpportunity.status == OpportunityStatus.ACTIVE,
-                        TaxOpportunity.opportunity_type == OpportunityType.LONG_TERM_WAIT
-                    ).first()
-
-                    if not existing:
-                        long_term_date = lot.acquisition_date + timedelta(days=365)
-                        opp = TaxOpportunity(
-                            user_id=current_user.id,
-                            opportunity_type=OpportunityType.LONG_TERM_WAIT,
-                            status=OpportunityStatus.ACTIVE,
-                            token=lot.token,
-                            token_address=lot.token_address,
-                            chain=lot.chain,
-                            current_amount=lot.remaining_amount,
-                            current_price_usd=current_price,
-                            cost_basis_per_unit=lot.acquisition_price_usd,
-                            current_value_usd=current_value,
-                            unrealized_gain_loss=unrealized_gl,
-                            unrealized_gain_loss_percent=unrealized_gl_percent,
-                            potential_savings=savings_by_waiting,
-                            tax_year=current_time.year,
-                            recommended_action=f"Wait {days_to_long_term} days before selling {lot.token}",
-                            action_description=(
-                                f"Your {lot.token} will qualify for long-term capital gains in {days_to_long_term} days "
-                                f"(on {long_term_date.strftime('%Y-%m-%d')}). By waiting, you'll save ${savings_by_waiting:,.2f} "
-                                f"in taxes ({short_term_rate*100:.0f}% vs {long_term_rate*100:.0f}% rate)."
-                            ),
-                            deadline=long_term_date,
-                            confidence_score=0.85,
-                            risk_level="low",
-                            related_lot_ids=str(lot.id),
-                            expires_at=long_term_date + timedelta(days=7)
-                        )
-                        db.add(opp)
-                        opportunities.append(opp)
-
-    db.commit()
+    summary = await cached_analysis(
+        get_redis_client(),
+        f"{OPPORTUNITY_SCAN_CACHE_PREFIX}:{current_user.id}:{audit_id or 'all'}",
+        fingerprint,
+        _current_prices,
+        lambda: _scan_opportunities(
+            db, current_user.id, audit_id, settings, short_term_rate, long_term_rate, current_time
+        )
+    )
 
     # Get all active opportunities
     all_opportunities = db.query(TaxOpportunity).filter(
@@ -483,11 +526,11 @@ async def analyze_tax_optimization(
         exchange_rate=exchange_rate,
         opportunities=opportunities_list,
         portfolio_summary={
-            "total_lots": len(lots),
-            "total_value_usd": total_value,
-            "total_unrealized_gain_loss": total_unrealized_gl,
-            "total_value_local": float(total_value * exchange_rate) if exchange_rate else None,
-            "total_unrealized_gain_loss_local": float(total_unrealized_gl * exchange_rate) if exchange_rate else None
+            **summary,
+            "total_value_local": summary["total_value_usd"] * exchange_rate if exchange_rate else None,
+            "total_unrealized_gain_loss_local": (
+                summary["total_unrealized_gain_loss"] * exchange_rate if exchange_rate else None
+            )
         },
         recommendations=recommendations
     )
@@ -497,7 +540,7 @@ async def analyze_tax_optimization(
 async def get_tax_opportunities(
     opportunity_type: Optional[str] = None,
     status: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -507,14 +550,10 @@ async def get_tax_opportunities(
     """
 
     # Check user's tier - FREE/STARTER get preview data
-    from app.services.license_service import LicenseService
     from app.models.license import LicenseTier
 
-    license_service = LicenseService(db)
-    license = license_service.get_user_license(current_user.id)
-
     # FREE/STARTER tier gets example data
-    if license.tier in [LicenseTier.FREE, LicenseTier.STARTER]:
+    if current_user.tier in [LicenseTier.FREE, LicenseTier.STARTER]:
         current_time = datetime.utcnow()
         return [
             OpportunityResponse(
@@ -613,7 +652,7 @@ async def get_tax_opportunities(
 @router.post("/opportunities/{opportunity_id}/dismiss")
 async def dismiss_opportunity(
     opportunity_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Dismiss a tax opportunity"""
@@ -633,7 +672,7 @@ async def dismiss_opportunity(
 
 @router.get("/settings")
 async def get_tax_optimizer_settings(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get user's tax optimization settings"""
@@ -669,7 +708,7 @@ async def get_tax_optimizer_settings(
 @router.put("/settings")
 async def update_tax_optimizer_settings(
     settings_update: dict,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update user's tax optimization settings"""
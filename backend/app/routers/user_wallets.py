@@ -10,9 +10,9 @@ from typing import List, Optional
 from pydantic import BaseModel, validator
 from datetime import datetime
 from app.database import get_db
-from app.models.user import User
 from app.models.user_wallet import UserWallet
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 import html
 
 router = APIRouter(prefix="/wallets", tags=["User Wallets"])
@@ -116,7 +116,7 @@ class WalletResponse(BaseModel):
 async def list_wallets(
     chain: Optional[str] = None,
     active_only: bool = True,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -157,7 +157,7 @@ async def list_wallets(
 @router.post("", response_model=WalletResponse)
 async def add_wallet(
     request: WalletCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -230,7 +230,7 @@ async def add_wallet(
 @router.delete("/{wallet_id}")
 async def delete_wallet(
     wallet_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -265,7 +265,7 @@ async def delete_wallet(
 
 @router.get("/consolidated-portfolio")
 async def get_consolidated_portfolio(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -8,7 +8,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.models.user import User
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user_record
 from app.utils.security import hash_password, verify_password
 from pydantic import BaseModel, EmailStr
 from typing import Optional
@@ -53,7 +53,7 @@ class ProfileResponse(BaseModel):
 @router.put("/profile")
 async def update_profile(
     data: UpdateProfileRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
@@ -98,7 +98,7 @@ async def update_profile(
 @router.post("/change-password")
 async def change_password(
     data: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
@@ -134,7 +134,7 @@ async def change_password(
 @router.put("/preferences")
 async def update_preferences(
     data: UpdatePreferencesRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
@@ -174,7 +174,7 @@ async def update_preferences(
 @router.put("/notifications")
 async def update_notifications(
     data: UpdateNotificationsRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
@@ -213,7 +213,7 @@ async def update_notifications(
 
 @router.get("/profile")
 async def get_profile(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_record)
 ):
     """
     Get current user profile
@@ -233,7 +233,7 @@ async def get_profile(
 
 @router.delete("/account")
 async def delete_account(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_record),
     db: Session = Depends(get_db)
 ):
     """
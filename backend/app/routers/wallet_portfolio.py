@@ -6,21 +6,23 @@ Extends the basic wallet management from user_wallets.py
 """
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from sqlalchemy import desc
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_db, get_async_sessions
 from app.models.user_wallet import UserWallet
-from app.models.wallet_snapshot import WalletSnapshot
 from app.models.wallet_value_history import WalletValueHistory
+from app.repositories import WalletPortfolioRepository
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.services.wallet_portfolio_service import WalletPortfolioService
+from app.services.wallet_history_rollup import WalletHistoryRollupService
 from app.services.blockchain_detector import ChainDetector
 
+import asyncio
 import logging
 
 router = APIRouter(prefix="/wallet-portfolio", tags=["Wallet Portfolio"])
@@ -97,14 +99,17 @@ class WalletHistoryResponse(BaseModel):
     value_local: Optional[float] = None
     change_from_previous_usd: Optional[float] = None
     change_from_previous_percent: Optional[float] = None
+    min_value_usd: Optional[float] = None
+    max_value_usd: Optional[float] = None
 
 
 # ========== Endpoints ==========
 
 @router.get("/overview", response_model=ConsolidatedPortfolioResponse)
 async def get_portfolio_overview(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    sessions: async_sessionmaker = Depends(get_async_sessions)
 ):
     """
     Get consolidated portfolio overview across ALL wallets
@@ -114,29 +119,16 @@ async def get_portfolio_overview(
         - 24h changes
         - List of all wallets with their values
     """
-    import time
-    import logging
-    logger = logging.getLogger(__name__)
-
-    start_time = time.time()
-    logger.info(f"[WALLET_PORTFOLIO] User {current_user.id} - Starting portfolio fetch")
-
     service = WalletPortfolioService(db)
 
     try:
-        # Get consolidated portfolio
-        portfolio_start = time.time()
-        portfolio = await service.get_consolidated_portfolio(current_user.id)
-        portfolio_time = time.time() - portfolio_start
-        logger.info(f"[WALLET_PORTFOLIO] User {current_user.id} - Portfolio calc: {portfolio_time:.2f}s")
-
-        # Get 24h change (from most recent consolidated snapshot)
+        # Get consolidated portfolio, and the snapshot for the 24h change
+        # (most recent consolidated snapshot) at the same time
         yesterday = datetime.utcnow() - timedelta(hours=24)
-        previous_snapshot = db.query(WalletSnapshot).filter(
-            WalletSnapshot.user_id == current_user.id,
-            WalletSnapshot.wallet_id == None,  # Consolidated snapshot
-            WalletSnapshot.snapshot_date <= yesterday
-        ).order_by(desc(WalletSnapshot.snapshot_date)).first()
+        portfolio, previous_snapshot = await asyncio.gather(
+            service.get_consolidated_portfolio(current_user.id),
+            WalletPortfolioRepository(sessions).consolidated_snapshot_before(current_user.id, yesterday)
+        )
 
         change_24h_usd = None
         change_24h_percent = None
@@ -164,9 +156,6 @@ async def get_portfolio_overview(
                 last_updated=datetime.utcnow().isoformat()
             ))
 
-        total_time = time.time() - start_time
-        logger.info(f"[WALLET_PORTFOLIO] User {current_user.id} - TOTAL TIME: {total_time:.2f}s")
-
         return ConsolidatedPortfolioResponse(
             total_value_usd=float(portfolio["total_value_usd"]),
             total_cost_basis=float(portfolio["total_cost_basis"]),
@@ -188,7 +177,7 @@ async def get_portfolio_overview(
 @router.get("/{wallet_id}/portfolio", response_model=WalletDetailedPortfolioResponse)
 async def get_wallet_portfolio(
     wallet_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -198,20 +187,17 @@ async def get_wallet_portfolio(
         - Wallet summary (value, gains, etc.)
         - List of all token positions
     """
-    # Verify wallet ownership
-    wallet = db.query(UserWallet).filter(
-        UserWallet.id == wallet_id,
-        UserWallet.user_id == current_user.id
-    ).first()
-
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
-
     service = WalletPortfolioService(db)
 
     try:
-        # Calculate current portfolio
-        portfolio = await service.calculate_wallet_value(wallet_id, current_user.id)
+        # Calculate current portfolio (checks wallet ownership)
+        try:
+            portfolio = await service.calculate_wallet_value(wallet_id, current_user.id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Wallet not found")
+
+        # Loaded by the service: identity map hit, no query
+        wallet = db.get(UserWallet, wallet_id)
 
         # Get 24h change
         change_data = await service.calculate_24h_change(wallet_id, current_user.id)
@@ -243,6 +229,8 @@ async def get_wallet_portfolio(
             positions=positions
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting wallet portfolio: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to get wallet portfolio: {str(e)}")
@@ -251,15 +239,20 @@ async def get_wallet_portfolio(
 @router.get("/{wallet_id}/history")
 async def get_wallet_history(
     wallet_id: int,
-    period: str = "7d",  # 7d, 30d, 90d, 1y
-    current_user: User = Depends(get_current_user),
+    period: str = "7d",  # 7d, 30d, 90d, 1y, 3y, all
+    resolution: str = "auto",  # auto, hour, day, week
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get historical value data for a wallet
 
+    Served from pre-aggregated rollups, so long ranges cost the same as
+    short ones.
+
     Args:
-        period: Time period (7d, 30d, 90d, 1y)
+        period: Time period (7d, 30d, 90d, 1y, 3y, all)
+        resolution: Bucket size (auto picks the coarsest that still draws a useful chart)
 
     Returns:
         Array of historical data points
@@ -273,29 +266,36 @@ async def get_wallet_history(
     if not wallet:
         raise HTTPException(status_code=404, detail="Wallet not found")
 
+    if resolution not in ("auto", "hour", "day", "week"):
+        raise HTTPException(status_code=400, detail="Invalid resolution (auto, hour, day, week)")
+
     # Parse period
     PERIODS = {
         "7d": 7,
         "30d": 30,
         "90d": 90,
-        "1y": 365
+        "1y": 365,
+        "3y": 3 * 365,
+        "all": 20 * 365
     }
 
     days = PERIODS.get(period, 7)
     start_date = datetime.utcnow() - timedelta(days=days)
 
-    # Get snapshots
-    snapshots = db.query(WalletSnapshot).filter(
-        WalletSnapshot.wallet_id == wallet_id,
-        WalletSnapshot.snapshot_date >= start_date
-    ).order_by(WalletSnapshot.snapshot_date).all()
+    # Get rollup buckets (single tier, bounded row count)
+    used_resolution, buckets = WalletHistoryRollupService(db).get_history(
+        current_user.id,
+        wallet_id,
+        start_date,
+        resolution=resolution
+    )
 
     # Format response
     history = []
     previous_value = None
 
-    for snapshot in snapshots:
-        value_usd = float(snapshot.total_value_usd)
+    for bucket in buckets:
+        value_usd = float(bucket.close_value_usd)
 
         change_from_previous_usd = None
         change_from_previous_percent = None
@@ -305,11 +305,13 @@ async def get_wallet_history(
             change_from_previous_percent = (change_from_previous_usd / previous_value * 100) if previous_value > 0 else 0
 
         history.append(WalletHistoryResponse(
-            date=snapshot.snapshot_date.isoformat(),
+            date=bucket.bucket_start.isoformat(),
             value_usd=value_usd,
-            value_local=float(snapshot.total_value_local) if snapshot.total_value_local else None,
+            value_local=float(bucket.close_value_local) if bucket.close_value_local else None,
             change_from_previous_usd=change_from_previous_usd,
-            change_from_previous_percent=change_from_previous_percent
+            change_from_previous_percent=change_from_previous_percent,
+            min_value_usd=float(bucket.min_value_usd),
+            max_value_usd=float(bucket.max_value_usd)
         ))
 
         previous_value = value_usd
@@ -317,6 +319,7 @@ async def get_wallet_history(
     return {
         "wallet_id": wallet_id,
         "period": period,
+        "resolution": used_resolution,
         "data_points": len(history),
         "history": history
     }
@@ -325,7 +328,7 @@ async def get_wallet_history(
 @router.post("/sync")
 async def sync_all_wallets(
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -350,7 +353,7 @@ async def sync_all_wallets(
 async def sync_wallet(
     wallet_id: int,
     background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
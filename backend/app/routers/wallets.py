@@ -8,7 +8,6 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from app.database import get_db
-from app.models.user import User
 from app.models.wallet_group import (
     WalletGroup,
     WalletGroupMember,
@@ -18,6 +17,7 @@ from app.models.wallet_group import (
 )
 from app.models.cost_basis import CostBasisLot
 from app.routers.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.middleware import limiter, get_rate_limit
 from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict
@@ -214,7 +214,7 @@ class GroupPortfolioResponse(BaseModel):
 async def get_wallet_groups(
     request: Request,
     response: Response,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -260,7 +260,7 @@ async def create_wallet_group(
     request: Request,
     response: Response,
     group_request: CreateGroupRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -304,7 +304,7 @@ async def get_wallet_group(
     request: Request,
     response: Response,
     group_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific wallet group by ID"""
@@ -347,7 +347,7 @@ async def update_wallet_group(
     response: Response,
     group_id: int,
     update_data: UpdateGroupRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update a wallet group's name or description"""
@@ -376,7 +376,7 @@ async def delete_wallet_group(
     request: Request,
     response: Response,
     group_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a wallet group"""
@@ -407,7 +407,7 @@ async def add_wallet_to_group(
     response: Response,
     group_id: int,
     wallet_request: AddWalletRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Add a wallet address to a group"""
@@ -461,7 +461,7 @@ async def remove_wallet_from_group(
     response: Response,
     group_id: int,
     wallet_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Remove a wallet from a group"""
@@ -495,7 +495,7 @@ async def get_group_portfolio(
     request: Request,
     response: Response,
     group_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
@@ -530,7 +530,7 @@ async def get_inter_wallet_transfers(
     request: Request,
     response: Response,
     group_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
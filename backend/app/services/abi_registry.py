@@ -0,0 +1,304 @@
+"""
+ABI Registry
+
+Decodes EVM event logs and call data from a registry of signatures
+(app.data.abi_signatures: ERC20/721/1155, Uniswap V2/V3, Curve, Aave,
+Compound, Lido, 1inch, 0x, bridges, Seaport...).
+
+Everything that doesn't depend on the payload is done once, when a
+signature is registered: topic / selector hashing, parameter splitting
+(indexed vs data), and the eth_abi decoders of each parameter list. Decoding
+a log is then a dict lookup on (topic0, topic count) plus one precomputed
+decoder call - the topic count tells ERC20 and ERC721 Transfer events apart.
+
+Classification comes from the registry (each signature carries its protocol
+and activity), not from explorer-provided method names.
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from eth_abi.decoding import ContextFramesBytesIO, TupleDecoder
+from eth_abi.registry import registry as abi_types
+from eth_utils import keccak
+
+logger = logging.getLogger(__name__)
+
+
+# One parameter of a signature: "uint256 amount", "address indexed from", "(address,uint24)[] path"
+_PARAM = re.compile(r"^(?P<type>\(.*\)(?:\[\d*\])*|[a-z0-9\[\]]+)(?P<indexed>\s+indexed)?(?:\s+(?P<name>\w+))?$")
+
+# Types an indexed topic holds the value of (dynamic types are hashed into the topic)
+_STATIC_TOPIC_TYPE = re.compile(r"^(address|bool|u?int\d*|bytes\d+)$")
+
+
+@dataclass(frozen=True)
+class AbiParam:
+    type: str
+    name: str
+    indexed: bool = False
+
+
+def _split_top_level(params: str) -> List[str]:
+    """Split "a,(b,c),d" on the commas outside parentheses"""
+    parts, depth, current = [], 0, []
+    for char in params:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current))
+    return parts
+
+
+def parse_signature(signature: str) -> Tuple[str, List[AbiParam]]:
+    """
+    Name and parameters of a Solidity-style signature
+
+    Args:
+        signature: e.g. "Transfer(address indexed from, address indexed to, uint256 value)"
+
+    Returns:
+        (name, [AbiParam]); unnamed parameters are named by position (arg0, arg1...)
+
+    Raises:
+        ValueError: Malformed signature
+    """
+    name, _, params = signature.strip().partition("(")
+    if not name or not params.endswith(")"):
+        raise ValueError(f"Invalid ABI signature: {signature}")
+
+    parsed = []
+    for position, param in enumerate(_split_top_level(params[:-1])):
+        match = _PARAM.match(param.strip())
+        if not match:
+            raise ValueError(f"Invalid parameter '{param}' in ABI signature: {signature}")
+        parsed.append(AbiParam(
+            type=match["type"].replace(" ", ""),
+            name=match["name"] or f"arg{position}",
+            indexed=bool(match["indexed"])
+        ))
+    return name.strip(), parsed
+
+
+def canonical_signature(name: str, params: Iterable[AbiParam]) -> str:
+    """Signature that is hashed: "Transfer(address,address,uint256)" """
+    return f"{name}({','.join(param.type for param in params)})"
+
+
+def _tuple_decoder(types: List[str]) -> TupleDecoder:
+    return TupleDecoder(decoders=[abi_types.get_decoder(type_str, strict=False) for type_str in types])
+
+
+def _topic_decoder(type_str: str) -> Callable[[str], Any]:
+    """Converter of an indexed topic (hex string) to its value"""
+    if type_str == "address":
+        return lambda topic: "0x" + topic[-40:].lower()
+    if type_str.startswith("uint"):
+        return lambda topic: int(topic, 16)
+    if _STATIC_TOPIC_TYPE.match(type_str):
+        decoder = _tuple_decoder([type_str])
+        return lambda topic: decoder(ContextFramesBytesIO(bytes.fromhex(topic[2:])))[0]
+    # string, bytes, arrays, tuples: the topic is the keccak hash of the value
+    return lambda topic: topic
+
+
+def _hex_bytes(value: str) -> bytes:
+    return bytes.fromhex(value[2:] if value.startswith("0x") else value)
+
+
+class EventSpec:
+    """A registered event: topic, protocol/activity and precomputed decoders"""
+
+    __slots__ = ("name", "protocol", "activity", "signature", "topic", "topic_count",
+                 "topic_names", "topic_decoders", "data_names", "data_decoder")
+
+    def __init__(self, signature: str, protocol: str, activity: Optional[str]):
+        name, params = parse_signature(signature)
+        indexed = [param for param in params if param.indexed]
+        data = [param for param in params if not param.indexed]
+
+        self.name = name
+        self.protocol = protocol
+        self.activity = activity
+        self.signature = canonical_signature(name, params)
+        self.topic = "0x" + keccak(text=self.signature).hex()
+        self.topic_count = 1 + len(indexed)
+        self.topic_names = tuple(param.name for param in indexed)
+        self.topic_decoders = tuple(_topic_decoder(param.type) for param in indexed)
+        self.data_names = tuple(param.name for param in data)
+        self.data_decoder = _tuple_decoder([param.type for param in data]) if data else None
+
+    def decode_args(self, topics: List[str], data: str) -> Dict[str, Any]:
+        args = {
+            name: decode(topic)
+            for name, decode, topic in zip(self.topic_names, self.topic_decoders, topics[1:])
+        }
+        if self.data_decoder is not None:
+            args.update(zip(self.data_names, self.data_decoder(ContextFramesBytesIO(_hex_bytes(data)))))
+        return args
+
+
+class FunctionSpec:
+    """A registered function: selector, protocol/activity and precomputed decoder"""
+
+    __slots__ = ("name", "protocol", "activity", "signature", "selector", "arg_names", "decoder")
+
+    def __init__(self, signature: str, protocol: str, activity: Optional[str]):
+        name, params = parse_signature(signature)
+
+        self.name = name
+        self.protocol = protocol
+        self.activity = activity
+        self.signature = canonical_signature(name, params)
+        self.selector = "0x" + keccak(text=self.signature)[:4].hex()
+        self.arg_names = tuple(param.name for param in params)
+        self.decoder = _tuple_decoder([param.type for param in params]) if params else None
+
+    def decode_args(self, input_data: str) -> Dict[str, Any]:
+        if self.decoder is None:
+            return {}
+        return dict(zip(self.arg_names, self.decoder(ContextFramesBytesIO(_hex_bytes(input_data[10:])))))
+
+
+class AbiRegistry:
+    """Event topics and function selectors with their decoders"""
+
+    def __init__(self):
+        self.events: Dict[Tuple[str, int], EventSpec] = {}
+        self.functions: Dict[str, FunctionSpec] = {}
+
+    def register_event(self, signature: str, protocol: str, activity: Optional[str] = None) -> EventSpec:
+        spec = EventSpec(signature, protocol, activity)
+        # First registration wins (e.g. Aave V2 and V3 share Withdraw)
+        return self.events.setdefault((spec.topic, spec.topic_count), spec)
+
+    def register_function(self, signature: str, protocol: str, activity: Optional[str] = None) -> FunctionSpec:
+        spec = FunctionSpec(signature, protocol, activity)
+        return self.functions.setdefault(spec.selector, spec)
+
+    def load(self, events: Iterable[Tuple] = (), functions: Iterable[Tuple] = ()) -> "AbiRegistry":
+        """
+        Register (signature, protocol, activity) entries
+
+        Returns:
+            self
+        """
+        for entry in events:
+            self.register_event(*entry)
+        for entry in functions:
+            self.register_function(*entry)
+        return self
+
+    def event_spec(self, log: Dict) -> Optional[EventSpec]:
+        topics = log.get("topics")
+        if not topics:
+            return None
+        return self.events.get((topics[0].lower(), len(topics)))
+
+    def decode_log(self, log: Dict, decode_args: bool = True) -> Optional[Dict]:
+        """
+        Decode an event log
+
+        Args:
+            log: Receipt log (address, topics, data as hex strings)
+            decode_args: Also decode the parameters (not only identify the event)
+
+        Returns:
+            {"name", "protocol", "activity", "address", "args"} or None if the
+            event isn't registered or its data is malformed
+        """
+        spec = self.event_spec(log)
+        if spec is None:
+            return None
+
+        decoded = {
+            "name": spec.name,
+            "protocol": spec.protocol,
+            "activity": spec.activity,
+            "address": (log.get("address") or "").lower(),
+        }
+        if decode_args:
+            try:
+                decoded["args"] = spec.decode_args(log["topics"], log.get("data") or "0x")
+            except Exception as e:
+                logger.debug(f"Could not decode {spec.signature} log: {e}")
+                return None
+        return decoded
+
+    def decode_logs(self, logs: Iterable[Dict], decode_args: bool = True) -> List[Dict]:
+        """Decoded logs of a receipt (unknown events skipped)"""
+        decoded = []
+        for log in logs:
+            entry = self.decode_log(log, decode_args)
+            if entry is not None:
+                decoded.append(entry)
+        return decoded
+
+    def decode_receipts(self, receipts: Iterable[Optional[Dict]], decode_args: bool = True) -> List[List[Dict]]:
+        """
+        Decode the logs of many receipts in one pass
+
+        Args:
+            receipts: Receipts (None entries, e.g. failed fetches, give an empty list)
+            decode_args: Also decode the parameters
+
+        Returns:
+            Decoded logs per receipt, in the order of receipts
+        """
+        return [self.decode_logs(receipt.get("logs") or (), decode_args) if receipt else [] for receipt in receipts]
+
+    def decode_input(self, input_data: Optional[str], decode_args: bool = True) -> Optional[Dict]:
+        """
+        Decode transaction call data
+
+        Returns:
+            {"name", "protocol", "activity", "selector", "args"} or None if the
+            selector isn't registered or the arguments are malformed
+        """
+        if not input_data or len(input_data) < 10:
+            return None
+        spec = self.functions.get(input_data[:10].lower())
+        if spec is None:
+            return None
+
+        decoded = {
+            "name": spec.name,
+            "protocol": spec.protocol,
+            "activity": spec.activity,
+            "selector": spec.selector,
+        }
+        if decode_args:
+            try:
+                decoded["args"] = spec.decode_args(input_data)
+            except Exception as e:
+                logger.debug(f"Could not decode {spec.signature} call: {e}")
+                return None
+        return decoded
+
+
+_registry: Optional[AbiRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_abi_registry() -> AbiRegistry:
+    """Registry of app.data.abi_signatures (built once per process)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                from app.data.abi_signatures import EVENT_SIGNATURES, FUNCTION_SIGNATURES
+                _registry = AbiRegistry().load(EVENT_SIGNATURES, FUNCTION_SIGNATURES)
+                logger.info(
+                    f"🧩 ABI registry loaded: {len(_registry.events)} events, {len(_registry.functions)} functions"
+                )
+    return _registry
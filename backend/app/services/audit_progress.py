@@ -0,0 +1,264 @@
+"""
+DeFi Audit Progress
+
+The audit pipeline publishes structured progress events to Redis:
+- the latest event is kept under audit_progress:{audit_id} (status endpoint:
+  one GET, no database query)
+- every event is also published on audit_progress:{audit_id}:events
+  (pub/sub, streamed to the browser over SSE)
+
+Event fields:
+    audit_id, user_id, status (pending/processing/completed/failed), phase
+    (queued/fetching/processing/completed/failed), chain, chain_index,
+    chains_total, fetched, parsed, persisted, total_transactions, progress
+    (0-100), eta_seconds, current_step, updated_at
+    + completed_at / error_message for finished audits
+
+Redis errors never fail an audit: publishing is skipped and the status
+endpoint falls back to the database.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+KEY_PREFIX = "audit_progress"
+PROGRESS_TTL = 24 * 3600          # Finished audits are read from the database afterwards
+PUBLISH_INTERVAL = 1.0            # Seconds between two "processing" events of an audit
+STALE_AFTER = 3600                # Same 1 hour timeout as the audit endpoints
+FETCH_SHARE = 0.1                 # Share of a chain's progress bar for fetching its transactions
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def state_key(audit_id: int) -> str:
+    return f"{KEY_PREFIX}:{audit_id}"
+
+
+def channel(audit_id: int) -> str:
+    return f"{KEY_PREFIX}:{audit_id}:events"
+
+
+def _redis():
+    try:
+        from app.dependencies.exchange_rate import get_redis_client
+        return get_redis_client()
+    except Exception as e:
+        logger.warning(f"Redis unavailable for audit progress: {e}")
+        return None
+
+
+def publish_progress(event: Dict):
+    """Store an event as the audit's current state and publish it"""
+    redis_client = _redis()
+    if redis_client is None:
+        return
+
+    payload = json.dumps(event)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.set(state_key(event["audit_id"]), payload, ex=PROGRESS_TTL)
+        pipe.publish(channel(event["audit_id"]), payload)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not publish progress of audit {event['audit_id']}: {e}")
+
+
+def get_audit_progress(audit_id: int) -> Optional[Dict]:
+    """Latest progress event of an audit (None if unknown or Redis is unavailable)"""
+    redis_client = _redis()
+    if redis_client is None:
+        return None
+    try:
+        payload = redis_client.get(state_key(audit_id))
+    except Exception as e:
+        logger.warning(f"Could not read progress of audit {audit_id}: {e}")
+        return None
+    return json.loads(payload) if payload else None
+
+
+def is_stale(event: Dict) -> bool:
+    """Unfinished audit without news for STALE_AFTER seconds (worker lost?)"""
+    if event["status"] in TERMINAL_STATUSES:
+        return False
+    updated_at = datetime.fromisoformat(event["updated_at"])
+    return (datetime.utcnow() - updated_at).total_seconds() > STALE_AFTER
+
+
+def audit_event(audit, **fields) -> Dict:
+    """
+    Event describing an audit from its database row
+
+    Args:
+        audit: DeFiAudit
+        fields: Overrides (e.g. progress, current_step)
+    """
+    status = audit.status or "pending"
+    event = {
+        "audit_id": audit.id,
+        "user_id": audit.user_id,
+        "status": status,
+        "phase": "queued" if status == "pending" else status,
+        "chain": None,
+        "chain_index": 0,
+        "chains_total": len(audit.chains or []),
+        "fetched": 0,
+        "parsed": 0,
+        "persisted": 0,
+        "total_transactions": audit.total_transactions or 0,
+        "progress": 100 if status == "completed" else 0,
+        "eta_seconds": None,
+        "current_step": {
+            "pending": "Queued for processing",
+            "completed": "Audit completed",
+            "failed": "Audit failed",
+        }.get(status, "Processing transactions..."),
+        "updated_at": datetime.utcnow().isoformat()
+    }
+    if status == "completed":
+        event["completed_at"] = audit.completed_at.isoformat() if audit.completed_at else None
+    if status == "failed":
+        event["error_message"] = audit.error_message
+        event["total_transactions"] = 0
+    event.update(fields)
+    return event
+
+
+def publish_audit(audit, **fields):
+    """Publish an audit's state from its database row (queued, completed, failed)"""
+    publish_progress(audit_event(audit, **fields))
+
+
+class AuditProgress:
+    """
+    Progress of one audit run
+
+    Each chain gets an equal share of the progress bar: FETCH_SHARE of it
+    once its transactions are fetched, the rest as they are parsed and
+    persisted. The ETA extrapolates the elapsed time from that figure.
+
+    Phase changes are published right away, per-transaction updates at most
+    every PUBLISH_INTERVAL seconds.
+    """
+
+    def __init__(
+        self,
+        audit,
+        publish: Callable[[Dict], None] = publish_progress,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.audit = audit
+        self.chains: List[str] = list(audit.chains or [])
+        self.publish = publish
+        self.clock = clock
+        self.started = clock()
+        self.last_published = None
+
+        self.phase = "queued"
+        self.chain: Optional[str] = None
+        self.chain_index = 0
+        self.chain_fetched = 0
+        self.chain_parsed = 0
+        self.fetched = 0
+        self.parsed = 0
+        self.persisted = 0
+
+    def start_chain(self, chain: str):
+        """Fetching a chain's transactions"""
+        self.chain_index = self.chains.index(chain) if chain in self.chains else self.chain_index + 1
+        self.chain = chain
+        self.chain_fetched = 0
+        self.chain_parsed = 0
+        self.phase = "fetching"
+        self._publish(force=True)
+
+    def fetched_transactions(self, count: int):
+        """The chain's transactions are fetched, parsing them"""
+        self.chain_fetched = count
+        self.fetched += count
+        self.phase = "processing"
+        self._publish(force=True)
+
+    def transaction_processed(self, persisted: bool):
+        """One transaction parsed (and persisted unless it was skipped)"""
+        self.chain_parsed += 1
+        self.parsed += 1
+        self.persisted += bool(persisted)
+        self._publish()
+
+    def progress(self) -> int:
+        if not self.chains:
+            return 0
+        if self.phase == "fetching":
+            chain_done = 0.0
+        else:
+            parsed = self.chain_parsed / self.chain_fetched if self.chain_fetched else 1.0
+            chain_done = FETCH_SHARE + (1 - FETCH_SHARE) * parsed
+        percent = (self.chain_index + chain_done) / len(self.chains) * 100
+        return min(int(percent), 99)  # 100 = completed
+
+    def eta_seconds(self) -> Optional[int]:
+        done = self.progress() / 100
+        if done < 0.05:
+            return None  # Too early to extrapolate
+        elapsed = self.clock() - self.started
+        return int(elapsed * (1 - done) / done)
+
+    def current_step(self) -> str:
+        position = f"{self.chain_index + 1}/{len(self.chains)}"
+        if self.phase == "fetching":
+            return f"Fetching {self.chain} transactions (chain {position})"
+        return f"Processing {self.chain} transactions: {self.chain_parsed}/{self.chain_fetched} (chain {position})"
+
+    def event(self) -> Dict:
+        return audit_event(
+            self.audit,
+            status="processing",
+            phase=self.phase,
+            chain=self.chain,
+            chain_index=self.chain_index,
+            fetched=self.fetched,
+            parsed=self.parsed,
+            persisted=self.persisted,
+            total_transactions=self.persisted,
+            progress=self.progress(),
+            eta_seconds=self.eta_seconds(),
+            current_step=self.current_step()
+        )
+
+    def _publish(self, force: bool = False):
+        now = self.clock()
+        if not force and self.last_published is not None and now - self.last_published < PUBLISH_INTERVAL:
+            return
+        self.last_published = now
+        self.publish(self.event())
+
+
+async def audit_progress_events(audit_id: int, poll_timeout: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+    """
+    Current state of an audit, then every event published for it
+
+    Subscribes before reading the state, so no event is missed in between.
+    Yields None every poll_timeout seconds without events (keepalive).
+    Redis errors are raised.
+    """
+    from app.dependencies.exchange_rate import get_async_redis_client
+
+    redis_client = get_async_redis_client()
+    pubsub = redis_client.pubsub()
+    await pubsub.subscribe(channel(audit_id))
+    try:
+        payload = await redis_client.get(state_key(audit_id))
+        if payload:
+            yield json.loads(payload)
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=poll_timeout)
+            yield json.loads(message["data"]) if message else None
+    finally:
+        await pubsub.unsubscribe(channel(audit_id))
+        await pubsub.aclose()
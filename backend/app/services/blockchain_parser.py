@@ -16,6 +16,13 @@ from app.services.transaction_decoder import TransactionDecoder
 logger = logging.getLogger(__name__)
 
 
+# ABI registry activities that are DeFi transaction types as is (see TransactionType)
+DEFI_TRANSACTION_TYPES = {
+    "swap", "provide_liquidity", "remove_liquidity", "stake", "unstake",
+    "lend", "borrow", "repay", "claim_rewards",
+}
+
+
 class BlockchainParser:
     """
     Parse blockchain transactions from various chains
@@ -61,6 +68,8 @@ class BlockchainParser:
     }
 
     # Known DeFi protocol addresses (Ethereum mainnet examples)
+    # Not the protocol registry (app.services.protocol_registry): addresses
+    # synced from DeFiLlama aren't seen by this parser yet
     PROTOCOL_ADDRESSES = {
         # Uniswap V3
         "0x68b3465833fb72a70ecdf485e0e4c7bd8665fc45": {"name": "Uniswap V3 Router", "type": "dex"},
@@ -153,51 +162,6 @@ class BlockchainParser:
         "0xc1cba3fcea344f92d9239c08c0568f6f2f0ee452": {"name": "Seamless Protocol", "type": "lending"},
     }
 
-    # Method signatures for common DeFi operations
-    METHOD_SIGNATURES = {
-        # ERC20 Standard
-        "0xa9059cbb": "transfer",
-        "0x095ea7b3": "approve",
-        "0x23b872dd": "transferFrom",
-
-        # Uniswap V2
-        "0x38ed1739": "swapExactTokensForTokens",
-        "0x7ff36ab5": "swapExactETHForTokens",
-        "0x18cbafe5": "swapExactTokensForETH",
-        "0x5c11d795": "swapExactTokensForTokensSupportingFeeOnTransferTokens",
-        "0xfb3bdb41": "swapETHForExactTokens",
-        "0x8803dbee": "swapTokensForExactTokens",
-
-        # Uniswap V3
-        "0x04e45aaf": "exactInputSingle",
-        "0xb858183f": "exactInput",
-        "0xdb3e2198": "exactOutputSingle",
-        "0x09b81346": "exactOutput",
-
-        # Aave
-        "0xe8eda9df": "deposit",
-        "0x69328dec": "withdraw",
-        "0xa415bcad": "borrow",
-        "0x573ade81": "repay",
-
-        # Compound
-        "0xa0712d68": "mint",
-        "0xdb006a75": "redeem",
-        "0xc5ebeaec": "borrow",
-        "0x0e752702": "repay",
-
-        # Staking
-        "0xa694fc3a": "stake",
-        "0x2e1a7d4d": "withdraw",
-        "0x3d18b912": "getReward",
-
-        # Liquidity
-        "0xe8e33700": "addLiquidity",
-        "0xf305d719": "addLiquidityETH",
-        "0xbaa2abde": "removeLiquidity",
-        "0x02751cec": "removeLiquidityETH",
-    }
-
     def __init__(self, api_keys: Optional[Dict[str, str]] = None):
         """
         Initialize parser
@@ -369,55 +333,55 @@ class BlockchainParser:
                 missing_tokens_count = 0
                 enriched_count = 0
 
-                for tx in transactions:
-                    # Check if tokens are missing
-                    has_missing = False
-                    if not tx.get("token_in") or not tx.get("token_out"):
-                        has_missing = True
-
-                    if has_missing and tx.get("tx_hash") and tx.get("chain") == chain:
-                        missing_tokens_count += 1
-
-                        # Fetch transaction receipt with logs
-                        receipt = await self._fetch_transaction_receipt(tx["tx_hash"], chain)
-
-                        if receipt and receipt.get("logs"):
-                            # Parse Transfer events from logs
-                            log_tokens = self._parse_transfer_logs(receipt["logs"], wallet_address)
-
-                            # Update transaction with found tokens
-                            if log_tokens.get("token_in") and not tx.get("token_in"):
-                                tx["token_in"] = log_tokens["token_in"]
-                                tx["amount_in"] = log_tokens.get("amount_in", 0.0)
-                                enriched_count += 1
-
-                            if log_tokens.get("token_out") and not tx.get("token_out"):
-                                tx["token_out"] = log_tokens["token_out"]
-                                tx["amount_out"] = log_tokens.get("amount_out", 0.0)
-                                enriched_count += 1
-
-                            # Calculate USD values for newly identified tokens
-                            if log_tokens.get("token_in") and not tx.get("usd_value_in"):
-                                try:
-                                    price = self.price_service.get_historical_price(
-                                        token_symbol=log_tokens["token_in"],
-                                        timestamp=tx.get("timestamp")
-                                    )
-                                    if price and log_tokens.get("amount_in"):
-                                        tx["usd_value_in"] = float(log_tokens["amount_in"]) * float(price)
-                                except:
-                                    pass
-
-                            if log_tokens.get("token_out") and not tx.get("usd_value_out"):
-                                try:
-                                    price = self.price_service.get_historical_price(
-                                        token_symbol=log_tokens["token_out"],
-                                        timestamp=tx.get("timestamp")
-                                    )
-                                    if price and log_tokens.get("amount_out"):
-                                        tx["usd_value_out"] = float(log_tokens["amount_out"]) * float(price)
-                                except:
-                                    pass
+                missing = [
+                    tx for tx in transactions
+                    if (not tx.get("token_in") or not tx.get("token_out"))
+                    and tx.get("tx_hash") and tx.get("chain") == chain
+                ]
+                missing_tokens_count = len(missing)
+
+                # Fetch the receipts, then decode all their logs in one pass
+                receipts = [await self._fetch_transaction_receipt(tx["tx_hash"], chain) for tx in missing]
+                decoded_receipts = self.transaction_decoder.decode_receipts(receipts)
+
+                for tx, decoded_logs in zip(missing, decoded_receipts):
+                    if decoded_logs:
+                        # Token movements of the wallet (Transfer events)
+                        log_tokens = self._parse_transfer_logs(decoded_logs, wallet_address)
+
+                        # Update transaction with found tokens
+                        if log_tokens.get("token_in") and not tx.get("token_in"):
+                            tx["token_in"] = log_tokens["token_in"]
+                            tx["amount_in"] = log_tokens.get("amount_in", 0.0)
+                            enriched_count += 1
+
+                        if log_tokens.get("token_out") and not tx.get("token_out"):
+                            tx["token_out"] = log_tokens["token_out"]
+                            tx["amount_out"] = log_tokens.get("amount_out", 0.0)
+                            enriched_count += 1
+
+                        # Calculate USD values for newly identified tokens
+                        if log_tokens.get("token_in") and not tx.get("usd_value_in"):
+                            try:
+                                price = self.price_service.get_historical_price(
+                                    token_symbol=log_tokens["token_in"],
+                                    timestamp=tx.get("timestamp")
+                                )
+                                if price and log_tokens.get("amount_in"):
+                                    tx["usd_value_in"] = float(log_tokens["amount_in"]) * float(price)
+                            except:
+                                pass
+
+                        if log_tokens.get("token_out") and not tx.get("usd_value_out"):
+                            try:
+                                price = self.price_service.get_historical_price(
+                                    token_symbol=log_tokens["token_out"],
+                                    timestamp=tx.get("timestamp")
+                                )
+                                if price and log_tokens.get("amount_out"):
+                                    tx["usd_value_out"] = float(log_tokens["amount_out"]) * float(price)
+                            except:
+                                pass
 
                 print(f"[PARSER] ✅ Enriched {enriched_count} token fields from {missing_tokens_count} transactions with missing tokens")
 
@@ -517,9 +481,10 @@ class BlockchainParser:
         # Check if it's a known DeFi protocol
         protocol_info = self.PROTOCOL_ADDRESSES.get(to_address)
 
-        # Extract method signature (first 10 characters of input)
-        method_sig = input_data[:10] if len(input_data) >= 10 else None
-        method_name = self.METHOD_SIGNATURES.get(method_sig, "unknown")
+        # Decode the call from its selector (ABI registry)
+        function_info = self.transaction_decoder.decode_function(input_data)
+        method_name = function_info["name"] if function_info else "unknown"
+        activity = function_info["activity"] if function_info else None
 
         # Calculate USD values
         native_token = self.price_service.get_native_token(chain)
@@ -547,39 +512,34 @@ class BlockchainParser:
                 decimals=18
             )
 
-        # Decode transaction to extract token and amount data
+        # Extract token and amount data from the decoded call
         token_in = None
         token_out = None
         amount_in = None
         amount_out = None
 
-        if input_data and len(input_data) >= 10:
+        if function_info:
             try:
-                # Pass the full raw_tx dict to the decoder
-                decoded = self.transaction_decoder.decode_transaction(raw_tx)
-
-                if decoded and "error" not in decoded:
-                    operation = decoded.get("operation")
+                args = function_info["args"]
 
-                    if operation == "swap":
-                        token_in = decoded.get("token_in")
-                        token_out = decoded.get("token_out")
-                        amount_in = Decimal(str(decoded.get("amount_in", 0))) if decoded.get("amount_in") else None
-                        amount_out = Decimal(str(decoded.get("amount_out_min", 0))) if decoded.get("amount_out_min") else None
+                if activity == "swap" and args.get("path"):
+                    # Uniswap V2-style routers: path[0] is sold, path[-1] is bought
+                    token_in, amount_in = self._token_amount(args["path"][0], args.get("amountIn", args.get("amountInMax")))
+                    token_out, amount_out = self._token_amount(args["path"][-1], args.get("amountOutMin", args.get("amountOut")))
 
-                    elif operation == "transfer":
-                        # For ERC20 transfers
-                        token_symbol = decoded.get("token_symbol")
-                        if token_symbol:
-                            token_out = token_symbol
-                            amount_out = Decimal(str(decoded.get("amount", 0))) if decoded.get("amount") else None
+                elif activity == "transfer" and function_info["name"] == "transfer":
+                    # For ERC20 transfers, the contract called is the token
+                    token_out, amount_out = self._token_amount(to_address, args.get("amount"))
 
             except Exception as e:
                 logger.error(f"Error decoding transaction {tx_hash}: {e}")
 
         if protocol_info:
             # It's a known DeFi protocol
-            tx_type = self._determine_transaction_type(method_name, protocol_info["type"])
+            if activity in DEFI_TRANSACTION_TYPES:
+                tx_type = activity
+            else:
+                tx_type = self._determine_transaction_type(method_name, protocol_info["type"])
 
             return {
                 "tx_hash": tx_hash,
@@ -607,9 +567,9 @@ class BlockchainParser:
             tx_type = "transfer" if value != "0" else "contract_interaction"
 
             # Check if it's a token transfer (ERC20)
-            if method_sig == "0xa9059cbb":  # transfer(address,uint256)
+            if activity == "transfer":
                 tx_type = "token_transfer"
-            elif method_sig == "0x095ea7b3":  # approve(address,uint256)
+            elif activity == "approve":
                 tx_type = "token_approval"
 
             return {
@@ -1934,20 +1894,24 @@ class BlockchainParser:
 
         return None
 
-    def _parse_transfer_logs(self, logs: list, user_wallet: str) -> Dict[str, any]:
+    def _token_amount(self, token_address: str, amount_raw) -> Tuple[Optional[str], Optional[float]]:
+        """Symbol and decimal amount of a raw token amount (None, None for unknown tokens)"""
+        token_info = self.TOKEN_ADDRESSES.get((token_address or "").lower())
+        if not token_info or amount_raw is None:
+            return None, None
+        return token_info["symbol"], float(Decimal(amount_raw) / Decimal(10 ** token_info["decimals"]))
+
+    def _parse_transfer_logs(self, decoded_logs: list, user_wallet: str) -> Dict[str, any]:
         """
-        Parse ERC20 Transfer events from transaction logs
+        Token movements of the wallet from decoded ERC20 Transfer events
 
         Args:
-            logs: List of log entries from transaction receipt
-            user_wallet: User's wallet address (lowercase)
+            decoded_logs: Logs of a receipt decoded by the ABI registry
+            user_wallet: User's wallet address
 
         Returns:
             Dict with token_in, token_out, amount_in, amount_out
         """
-        # ERC20 Transfer event signature
-        TRANSFER_EVENT_SIG = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
-
         result = {
             "token_in": None,
             "token_out": None,
@@ -1955,48 +1919,26 @@ class BlockchainParser:
             "amount_out": None
         }
 
-        if not logs:
-            return result
+        user_wallet = user_wallet.lower()
 
-        for log in logs:
-            topics = log.get("topics", [])
-
-            # Check if it's a Transfer event
-            if not topics or topics[0] != TRANSFER_EVENT_SIG:
+        for log in decoded_logs:
+            # ERC20 Transfer only (ERC721 Transfer has one more indexed topic)
+            if log["name"] != "Transfer" or log["protocol"] != "erc20":
                 continue
 
-            # Topics: [signature, from, to]
-            if len(topics) < 3:
-                continue
-
-            from_address = "0x" + topics[1][-40:]  # Last 40 chars (20 bytes)
-            to_address = "0x" + topics[2][-40:]
-            token_address = log.get("address", "").lower()
-
-            # Decode amount from data field
-            data = log.get("data", "0x")
-            try:
-                amount_raw = int(data, 16)
-            except (ValueError, TypeError):
-                continue
-
-            # Check if token is in our mapping
-            token_info = self.TOKEN_ADDRESSES.get(token_address)
-            if not token_info:
+            args = log["args"]
+            token_symbol, amount = self._token_amount(log["address"], args["value"])
+            if not token_symbol:
                 # Unknown token, skip
                 continue
 
-            token_symbol = token_info["symbol"]
-            decimals = token_info["decimals"]
-            amount = float(Decimal(amount_raw) / Decimal(10 ** decimals))
-
             # Check if transfer involves user wallet
-            if to_address.lower() == user_wallet.lower():
+            if args["to"] == user_wallet:
                 # Incoming transfer
                 result["token_in"] = token_symbol
                 result["amount_in"] = amount
 
-            elif from_address.lower() == user_wallet.lower():
+            elif args["from"] == user_wallet:
                 # Outgoing transfer
                 result["token_out"] = token_symbol
                 result["amount_out"] = amount
@@ -18,6 +18,7 @@ import logging
 # Import legacy parser
 from app.services.blockchain_parser import BlockchainParser as LegacyParser
 from app.services.price_service import PriceService
+from app.services.protocol_registry import lookup_protocol
 
 logger = logging.getLogger(__name__)
 
@@ -347,8 +348,17 @@ class BlockchainParser:
             # Gas fee (Moralis provides this directly!)
             gas_fee_usd = float(tx.get('transaction_fee_usd', 0))
 
-            # Protocol name from to_address_label or category
-            protocol_name = tx.get('to_address_label') or self._detect_protocol_name(category)
+            # Protocol name from to_address_label, the protocol registry or category
+            protocol_name = tx.get('to_address_label')
+            if not protocol_name:
+                protocol = lookup_protocol(tx.get('to_address'), chain)
+                if protocol:
+                    protocol_name = protocol.name
+                    # DeFiLlama addresses are often the governance token: a plain
+                    # AAVE / UNI transfer is named after it but isn't a protocol interaction
+                    if protocol_type == 'other' and protocol.source != 'defillama':
+                        protocol_type = self._map_category_to_protocol_type(protocol.type)
+            protocol_name = protocol_name or self._detect_protocol_name(category)
 
             # Determine if prices are estimated
             # If we got USD value from Moralis directly, it's real-time accurate
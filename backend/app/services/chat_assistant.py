@@ -8,24 +8,61 @@ Features:
 - Simulation parameter extraction
 - Educational explanations
 - Step-by-step workflows
+- Streamed responses (stream_message)
+
+The system prompt is the site documentation (rendered once per regulation
+catalog) followed by the user's data (cached per user, see
+app.services.chat_context). Model calls are async so they don't block the
+event loop.
 
 Migration: Claude Haiku → Gemini Flash-Lite (13x faster, 91% cheaper)
 """
 
+import asyncio
 import json
 import logging
-from typing import List, Dict, Any
+import re
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from sqlalchemy.orm import Session
-from app.models.regulation import Regulation
+from app.services.chat_context import get_cached_sections, store_sections
+from app.services.country_matcher import get_country_matcher
+from app.services.regulation_catalog import RegulationCatalog, get_regulation_catalog
+from app.services.residency_comparison import get_comparison_engine
 from app.models.defi_protocol import DeFiAudit, DeFiTransaction
 from app.config import settings
-from sqlalchemy import desc
+from sqlalchemy import desc, func
 import google.generativeai as genai
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 logger = logging.getLogger(__name__)
 
 
+# Fallback response if the Gemini API fails
+FALLBACK_MESSAGE = (
+    "I'm having trouble connecting to the AI service right now. "
+    "However, I can still help! You can:\n"
+    "1. Visit /defi-audit to scan your wallet\n"
+    "2. Check /tax-optimizer for tax-loss harvesting opportunities\n"
+    "3. Go to /cost-basis to track your purchase lots\n"
+    "4. Browse /countries to compare tax jurisdictions\n"
+    "5. Run a simulation at /simulations\n\n"
+    "⚠️ Remember: This is general information only, not financial advice."
+)
+
+# Sent instead of "done" when the response breaks off mid-stream
+STREAM_INTERRUPTED_MESSAGE = "The AI response was interrupted. Please try again."
+
+# Gain amounts in chat messages
+AMOUNT_PATTERNS = [
+    re.compile(r'\$?(\d+[,.]?\d*)\s*k\b'),  # 50k
+    re.compile(r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)'),  # $50,000.00
+    re.compile(r'(\d{1,3}(?:,\d{3})+)'),  # 50,000
+]
+
+# (catalog, rendered documentation part of the system prompt)
+_static_prompt: Optional[Tuple[RegulationCatalog, str]] = None
+
+
 class ChatAssistant:
     def __init__(self, db: Session):
         self.db = db
@@ -69,33 +106,14 @@ class ChatAssistant:
             }
         """
 
-        # Build comprehensive system prompt with full site documentation
-        system_prompt = self._build_comprehensive_system_prompt(user_id)
+        # Context assembly may hit the DB (cache misses), keep it off the event loop
+        system_prompt = await asyncio.to_thread(self._build_comprehensive_system_prompt, user_id)
 
         try:
-            # Create model with system instruction (cached automatically by Gemini)
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config=self.generation_config,
-                safety_settings=self.safety_settings,
-                system_instruction=system_prompt  # This will be cached automatically
-            )
-
-            # Build conversation history for Gemini format
-            chat_history = []
-            if conversation_history:
-                for msg in conversation_history[-8:]:  # Last 8 messages
-                    role = "user" if msg["role"] == "user" else "model"
-                    chat_history.append({
-                        "role": role,
-                        "parts": [msg["content"]]
-                    })
-
-            # Start chat with history
-            chat = model.start_chat(history=chat_history)
+            chat = self._start_chat(system_prompt, conversation_history)
 
             # Send message (system_instruction is cached, not counted in tokens)
-            response = chat.send_message(message)
+            response = await chat.send_message_async(message)
 
             # Extract AI response
             ai_message = response.text.strip()
@@ -103,19 +121,87 @@ class ChatAssistant:
             logger.info(f"Gemini response generated: {len(ai_message)} chars")
 
         except Exception as e:
-            # Fallback response if Gemini API fails
-            ai_message = (
-                "I'm having trouble connecting to the AI service right now. "
-                "However, I can still help! You can:\n"
-                "1. Visit /defi-audit to scan your wallet\n"
-                "2. Check /tax-optimizer for tax-loss harvesting opportunities\n"
-                "3. Go to /cost-basis to track your purchase lots\n"
-                "4. Browse /countries to compare tax jurisdictions\n"
-                "5. Run a simulation at /simulations\n\n"
-                "⚠️ Remember: This is general information only, not financial advice."
-            )
+            ai_message = FALLBACK_MESSAGE
             logger.error(f"Gemini API Error: {e}")
 
+        return await asyncio.to_thread(
+            self._complete_response, user_id, message, ai_message, conversation_history
+        )
+
+    async def stream_message(
+        self,
+        user_id: int,
+        message: str,
+        conversation_history: List[Dict] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process user message and stream the AI response as it's generated
+
+        Yields:
+            {"type": "delta", "text": "..."} for each chunk of the response, then
+            {"type": "done", "message", "suggestions", "can_simulate", "simulation_params"},
+            or {"type": "error", "message"} if Gemini fails mid-stream (the
+            partial text isn't a reply and must not be saved as one)
+        """
+        system_prompt = await asyncio.to_thread(self._build_comprehensive_system_prompt, user_id)
+
+        parts = []
+        try:
+            chat = self._start_chat(system_prompt, conversation_history)
+            response = await chat.send_message_async(message, stream=True)
+
+            async for chunk in response:
+                text = chunk.text
+                if text:
+                    parts.append(text)
+                    yield {"type": "delta", "text": text}
+
+            logger.info(f"Gemini response streamed: {sum(len(p) for p in parts)} chars")
+
+        except Exception as e:
+            logger.error(f"Gemini API Error: {e}")
+            if parts:
+                yield {"type": "error", "message": STREAM_INTERRUPTED_MESSAGE}
+                return
+            parts.append(FALLBACK_MESSAGE)
+            yield {"type": "delta", "text": FALLBACK_MESSAGE}
+
+        result = await asyncio.to_thread(
+            self._complete_response, user_id, message, "".join(parts).strip(), conversation_history
+        )
+        yield {"type": "done", **result}
+
+    def _start_chat(self, system_prompt: str, conversation_history: Optional[List[Dict]]):
+        """Gemini chat session with the system prompt and recent history"""
+        # Create model with system instruction (cached automatically by Gemini)
+        model = genai.GenerativeModel(
+            model_name=self.model_name,
+            generation_config=self.generation_config,
+            safety_settings=self.safety_settings,
+            system_instruction=system_prompt  # This will be cached automatically
+        )
+
+        # Build conversation history for Gemini format
+        chat_history = []
+        if conversation_history:
+            for msg in conversation_history[-8:]:  # Last 8 messages
+                role = "user" if msg["role"] == "user" else "model"
+                chat_history.append({
+                    "role": role,
+                    "parts": [msg["content"]]
+                })
+
+        return model.start_chat(history=chat_history)
+
+    def _complete_response(
+        self,
+        user_id: int,
+        message: str,
+        ai_message: str,
+        conversation_history: Optional[List[Dict]]
+    ) -> Dict[str, Any]:
+        """Response payload: AI message + simulation params + suggestions"""
+
         # Extract simulation parameters
         can_simulate, sim_params = self._extract_simulation_params(
             message,
@@ -140,21 +226,49 @@ class ChatAssistant:
 
         This makes the AI an expert guide who knows EVERYTHING about the site
         Note: Gemini automatically caches long system instructions
+
+        The documentation part is identical for every user and rendered once
+        per regulation catalog; the user's data comes last, from the chat
+        context cache.
         """
+        return self._get_static_system_prompt() + self._build_user_prompt(
+            self._get_user_context_sections(user_id)
+        )
+
+    def _get_static_system_prompt(self) -> str:
+        """Site documentation + countries, rendered once per catalog version"""
+        global _static_prompt
+
+        catalog = get_regulation_catalog(self.db)
+        cached = _static_prompt
+        if cached is not None and cached[0] is catalog:
+            return cached[1]
+
+        prompt = self._render_static_system_prompt(catalog.all())
+        _static_prompt = (catalog, prompt)
+        return prompt
+
+    def _get_user_context_sections(self, user_id: int) -> Dict[str, str]:
+        """User's prompt sections, built from the DB only when not cached"""
+        builders = {
+            "license": self._get_user_license_context,
+            "defi": self._get_defi_context,
+            "cost_basis": self._get_cost_basis_context,
+            "tax_optimizer": self._get_tax_optimizer_context,
+        }
+
+        sections = get_cached_sections(user_id)
+        missing = {name: build(user_id) for name, build in builders.items() if name not in sections}
+        store_sections(user_id, missing)
+        sections.update(missing)
+        return sections
 
-        # Get all available countries
-        countries = self.db.query(Regulation).all()
+    def _render_static_system_prompt(self, countries) -> str:
         countries_info = "\n".join([
-            f"- {c.country_code} ({c.country_name}): Short-term CGT {float(c.cgt_short_rate)*100:.1f}%, Long-term {float(c.cgt_long_rate)*100:.1f}%"
+            f"- {c.country_code} ({c.country_name}): Short-term CGT {c.cgt_short_rate*100:.1f}%, Long-term {c.cgt_long_rate*100:.1f}%"
             for c in countries[:50]  # Limit to first 50 to save tokens
         ])
 
-        # Get user's personalized context
-        license_context = self._get_user_license_context(user_id)
-        defi_context = self._get_defi_context(user_id)
-        cost_basis_context = self._get_cost_basis_context(user_id)
-        tax_optimizer_context = self._get_tax_optimizer_context(user_id)
-
         return f"""You are the AI assistant for CryptoNomadHub, the most comprehensive crypto tax optimization platform for digital nomads worldwide.
 
 ═══════════════════════════════════════════════════════════════════════
@@ -1022,18 +1136,6 @@ PURPOSE: Recommended crypto products for digital nomads (carefully vetted partne
 - API reference (for developers)
 - Video tutorials
 
-═══════════════════════════════════════════════════════════════════════
-USER'S PERSONALIZED DATA (USE THIS IN YOUR RESPONSES!)
-═══════════════════════════════════════════════════════════════════════
-
-{license_context}
-
-{defi_context}
-
-{cost_basis_context}
-
-{tax_optimizer_context}
-
 ═══════════════════════════════════════════════════════════════════════
 HOW TO HELP USERS EFFECTIVELY
 ═══════════════════════════════════════════════════════════════════════
@@ -1128,6 +1230,24 @@ Check /tax-optimizer → It automatically finds these opportunities in your port
 
 ⚠️ Educational example only, not investment advice."
 
+"""
+
+    def _build_user_prompt(self, sections: Dict[str, str]) -> str:
+        """Per-user part of the system prompt (appended after the static part)"""
+
+        return f"""
+═══════════════════════════════════════════════════════════════════════
+USER'S PERSONALIZED DATA (USE THIS IN YOUR RESPONSES!)
+═══════════════════════════════════════════════════════════════════════
+
+{sections['license']}
+
+{sections['defi']}
+
+{sections['cost_basis']}
+
+{sections['tax_optimizer']}
+
 Now help this user with their question. Be helpful, specific, reference their data when available, and always include a disclaimer!
 """
 
@@ -1147,41 +1267,17 @@ Now help this user with their question. Be helpful, specific, reference their da
         - Gain amounts (from conversation or user's DeFi data)
         """
 
-        import re
-
         params = {}
-        combined_text = user_message.lower()
+        text = user_message
 
         # Add recent history context
         if history:
             for msg in history[-3:]:
-                combined_text += " " + msg.get("content", "").lower()
-
-        # Extract countries (look for country codes or names)
-        countries = self.db.query(Regulation).all()
-        country_map = {c.country_code.lower(): c.country_code for c in countries}
-        country_map.update({c.country_name.lower(): c.country_code for c in countries})
-
-        found_countries = []
-        country_positions = []
-        for country_key, country_code in country_map.items():
-            pos = combined_text.find(country_key)
-            if pos >= 0:
-                found_countries.append(country_code)
-                country_positions.append((pos, country_code))
-
-        # Sort by position in text
-        country_positions.sort(key=lambda x: x[0])
-        found_countries = [code for _, code in country_positions]
-
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_countries = []
-        for code in found_countries:
-            if code not in seen:
-                seen.add(code)
-                unique_countries.append(code)
-        found_countries = unique_countries
+                text += " " + msg.get("content", "")
+        combined_text = text.lower()
+
+        # Countries by first mention (names, aliases, localized names, codes)
+        found_countries = get_country_matcher(self.db).find(text)
 
         # Try to determine current vs target
         if len(found_countries) >= 2:
@@ -1194,15 +1290,9 @@ Now help this user with their question. Be helpful, specific, reference their da
                 params["current_country"] = found_countries[0]
 
         # Extract amounts
-        amount_patterns = [
-            r'\$?(\d+[,.]?\d*)\s*k\b',  # 50k
-            r'\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)',  # $50,000.00
-            r'(\d{1,3}(?:,\d{3})+)',  # 50,000
-        ]
-
         amounts = []
-        for pattern in amount_patterns:
-            matches = re.findall(pattern, combined_text)
+        for pattern in AMOUNT_PATTERNS:
+            matches = pattern.findall(combined_text)
             for match in matches:
                 clean = match.replace(',', '').replace('k', '000')
                 try:
@@ -1235,8 +1325,39 @@ Now help this user with their question. Be helpful, specific, reference their da
             ("target_country" in params and ("short_term_gains" in params or "long_term_gains" in params))
         )
 
+        if can_simulate and ("short_term_gains" in params or "long_term_gains" in params):
+            params["preview"] = self._simulation_preview(params)
+
         return can_simulate, params
 
+    def _simulation_preview(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Quick tax preview for extracted simulation params
+
+        Evaluates the gains against every country in one pass, so the chat can
+        show current vs target tax and the lowest-tax alternatives right away.
+        """
+        table = get_comparison_engine(self.db).rank(
+            params.get("short_term_gains", 0),
+            params.get("long_term_gains", 0),
+            current_country=params.get("current_country"),
+            include_banned=True
+        )
+
+        rows = {row["country_code"]: row for row in table["rankings"]}
+        target_row = rows.get(params.get("target_country"))
+        lowest = [row for row in table["rankings"] if row["crypto_legal_status"] != 'banned'][:3]
+
+        return {
+            "current_tax": table["current"]["tax_amount"] if table["current"] else None,
+            "target_tax": target_row["tax_amount"] if target_row else None,
+            "savings": target_row["savings"] if target_row else None,
+            "lowest_tax_countries": [
+                {"country_code": row["country_code"], "country_name": row["country_name"], "tax_amount": row["tax_amount"]}
+                for row in lowest
+            ]
+        }
+
     def _generate_suggestions(self, user_message: str, can_simulate: bool) -> List[str]:
         """Generate context-aware follow-up suggestions (tier-aware)"""
 
@@ -1309,24 +1430,25 @@ Tax Breakdown:
         """Get user's cost basis lots for context"""
         from app.models.cost_basis import CostBasisLot
 
-        lots = self.db.query(CostBasisLot).filter(
+        open_lots = self.db.query(CostBasisLot).filter(
             CostBasisLot.user_id == user_id,
             CostBasisLot.remaining_amount > 0
-        ).all()
+        )
+
+        # Aggregated in the DB instead of loading every lot
+        total_lots, total_cost_basis = open_lots.with_entities(
+            func.count(CostBasisLot.id),
+            func.sum(CostBasisLot.remaining_amount * CostBasisLot.acquisition_price_usd)
+        ).one()
 
-        if not lots:
+        if not total_lots:
             return "COST BASIS: No lots tracked yet. Suggest /cost-basis or running a DeFi audit first."
 
-        total_lots = len(lots)
-        tokens = set(lot.token for lot in lots)
+        tokens = {token for (token,) in open_lots.with_entities(CostBasisLot.token).distinct()}
 
         # Calculate approximate portfolio value
-        total_value = 0.0
-        total_cost_basis = 0.0
-        for lot in lots:
-            current_price = float(lot.acquisition_price_usd) * 1.1  # Mock 10% gain
-            total_value += float(lot.remaining_amount) * current_price
-            total_cost_basis += float(lot.remaining_amount) * float(lot.acquisition_price_usd)
+        total_cost_basis = float(total_cost_basis or 0)
+        total_value = total_cost_basis * 1.1  # Mock 10% gain
 
         unrealized_gl = total_value - total_cost_basis
 
@@ -1353,20 +1475,21 @@ Unrealized P&L: ${unrealized_gl:,.2f}
         tier = license.tier.value.upper()
         limits = license.get_limits()
         remaining = license.get_remaining()
+        usage = license.get_usage()
 
         # Calculate percentage used
-        sim_pct = (license.simulations_used / limits['simulations'] * 100) if limits['simulations'] < 999999 else 0
-        audit_pct = (license.defi_audits_used / limits['defi_audits'] * 100) if limits['defi_audits'] < 999999 else 0
-        chat_pct = (license.chat_messages_used / limits['chat_messages'] * 100) if limits['chat_messages'] < 999999 else 0
+        sim_pct = (usage['simulations'] / limits['simulations'] * 100) if limits['simulations'] < 999999 else 0
+        audit_pct = (usage['defi_audits'] / limits['defi_audits'] * 100) if limits['defi_audits'] < 999999 else 0
+        chat_pct = (usage['chat_messages'] / limits['chat_messages'] * 100) if limits['chat_messages'] < 999999 else 0
 
         # Determine if user is close to limits (>80%)
         warnings = []
         if sim_pct > 80:
-            warnings.append(f"⚠️ SIMULATIONS: {license.simulations_used}/{limits['simulations']} used ({sim_pct:.0f}%)")
+            warnings.append(f"⚠️ SIMULATIONS: {usage['simulations']}/{limits['simulations']} used ({sim_pct:.0f}%)")
         if audit_pct > 80:
-            warnings.append(f"⚠️ DEFI AUDITS: {license.defi_audits_used}/{limits['defi_audits']} used ({audit_pct:.0f}%)")
+            warnings.append(f"⚠️ DEFI AUDITS: {usage['defi_audits']}/{limits['defi_audits']} used ({audit_pct:.0f}%)")
         if chat_pct > 80:
-            warnings.append(f"⚠️ CHAT MESSAGES: {license.chat_messages_used}/{limits['chat_messages']} used ({chat_pct:.0f}%)")
+            warnings.append(f"⚠️ CHAT MESSAGES: {usage['chat_messages']}/{limits['chat_messages']} used ({chat_pct:.0f}%)")
 
         warnings_text = "\n".join(warnings) if warnings else "No limits close to exceeded."
 
@@ -1415,10 +1538,10 @@ Current Tier: {tier}
 Status: {license.status.value.upper()}
 
 Usage This Month:
-- Simulations: {license.simulations_used}/{limits['simulations']} ({remaining['simulations']} remaining)
-- DeFi Audits: {license.defi_audits_used}/{limits['defi_audits']} ({remaining['defi_audits']} remaining)
-- Chat Messages: {license.chat_messages_used}/{limits['chat_messages']} ({remaining['chat_messages']} remaining)
-- PDF Exports: {license.pdf_exports_used}/{limits['pdf_exports']} ({remaining['pdf_exports']} remaining)
+- Simulations: {usage['simulations']}/{limits['simulations']} ({remaining['simulations']} remaining)
+- DeFi Audits: {usage['defi_audits']}/{limits['defi_audits']} ({remaining['defi_audits']} remaining)
+- Chat Messages: {usage['chat_messages']}/{limits['chat_messages']} ({remaining['chat_messages']} remaining)
+- PDF Exports: {usage['pdf_exports']}/{limits['pdf_exports']} ({remaining['pdf_exports']} remaining)
 
 {warnings_text}
 
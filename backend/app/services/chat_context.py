@@ -0,0 +1,140 @@
+"""
+Chat Context Cache
+
+The chat assistant's system prompt has two parts:
+
+- A static part (site documentation + countries list) that only changes
+  with a deploy or a regulation catalog reload. It's rendered once per
+  process and catalog version (see ChatAssistant._get_static_system_prompt).
+- A per-user part (license, latest DeFi audit, cost basis lots, tax
+  optimizer opportunities), cached here in a Redis hash per user with one
+  field per section.
+
+Sections are invalidated from the ORM: a Session listener records which
+users' licenses, audits, lots or opportunities were written in a flush and
+drops those sections once the transaction commits. Chat message counters
+alone don't invalidate the license section (they change on every message);
+the TTL bounds how stale they get.
+
+Redis errors never break the chat: reads miss, writes and invalidations are
+skipped.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_PREFIX = "chat_context"
+CACHE_TTL = 15 * 60
+
+SECTIONS = ("license", "defi", "cost_basis", "tax_optimizer")
+
+# Table -> prompt section built from it
+TABLE_SECTIONS = {
+    "licenses": "license",
+    "defi_audits": "defi",
+    "cost_basis_lots": "cost_basis",
+    "tax_opportunities": "tax_optimizer",
+}
+
+# License columns whose changes alone don't invalidate the license section
+LICENSE_VOLATILE_COLUMNS = {"chat_messages_used", "updated_at"}
+
+_PENDING_KEY = "chat_context_invalidations"
+
+
+def cache_key(user_id: int) -> str:
+    return f"{CACHE_PREFIX}:{user_id}"
+
+
+def _redis():
+    from app.dependencies.exchange_rate import get_redis_client
+    return get_redis_client()
+
+
+def get_cached_sections(user_id: int) -> Dict[str, str]:
+    """Cached prompt sections of a user (missing sections are left out)"""
+    try:
+        cached = _redis().hgetall(cache_key(user_id))
+    except Exception as e:
+        logger.warning(f"Chat context cache read failed: {e}")
+        return {}
+    return {name: text for name, text in cached.items() if name in SECTIONS}
+
+
+def store_sections(user_id: int, sections: Dict[str, str]):
+    """Cache freshly built sections (the TTL restarts)"""
+    if not sections:
+        return
+    try:
+        pipe = _redis().pipeline()
+        pipe.hset(cache_key(user_id), mapping=sections)
+        pipe.expire(cache_key(user_id), CACHE_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Chat context cache write failed: {e}")
+
+
+def invalidate_chat_context(user_id: int, sections: Optional[Iterable[str]] = None):
+    """
+    Drop cached prompt sections of a user
+
+    Args:
+        user_id: User ID
+        sections: Sections to drop (default: all)
+    """
+    try:
+        if sections is None:
+            _redis().delete(cache_key(user_id))
+        else:
+            _redis().hdel(cache_key(user_id), *sections)
+    except Exception as e:
+        logger.warning(f"Chat context invalidation failed for user {user_id}: {e}")
+
+
+def _changed_section(instance, updated: bool) -> Optional[str]:
+    """Prompt section affected by a flushed instance, if any"""
+    section = TABLE_SECTIONS.get(getattr(instance, "__tablename__", None))
+    if section != "license" or not updated:
+        return section
+
+    changed = {attr.key for attr in inspect(instance).attrs if attr.history.has_changes()}
+    return section if changed - LICENSE_VOLATILE_COLUMNS else None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    # new/dirty/deleted and attribute history still reflect the flushed changes here
+    changes = [(instance, False) for instance in session.new]
+    changes += [(instance, True) for instance in session.dirty]
+    changes += [(instance, False) for instance in session.deleted]
+
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for instance, updated in changes:
+        section = _changed_section(instance, updated)
+        user_id = getattr(instance, "user_id", None)
+        if section and user_id:
+            pending.add((user_id, section))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    by_user: Dict[int, set] = {}
+    for user_id, section in pending:
+        by_user.setdefault(user_id, set()).add(section)
+    for user_id, sections in by_user.items():
+        invalidate_chat_context(user_id, sections)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
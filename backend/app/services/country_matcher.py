@@ -0,0 +1,183 @@
+"""
+Country Mention Matcher
+
+Finds the countries mentioned in chat messages ("moving from France to
+Portugal", "je vis en Allemagne", "UAE vs PT").
+
+Every country name of the regulation catalog, plus common English aliases
+and localized names (FR/ES/DE/PT/IT), is folded into ONE compiled regex
+laid out as a trie:
+
+    (?<![\\w.])(?:(?i:fr(?:an(?:ce|cia))|p(?:anama|ortugal))|FR|P(?:A|T))(?!\\w)
+
+At each position of the text the regex engine only follows the branch of
+the next character, so a scan costs about the same with 50 or 5,000 names
+(linear in message length). Names match case- and accent-insensitively;
+two-letter codes only match in uppercase, and codes that are also common
+words/acronyms (IT, AI, ID...) aren't matched as codes at all.
+
+The matcher is built once per regulation catalog (see get_country_matcher).
+"""
+
+import logging
+import re
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.regulation_catalog import RegulationCatalog, RegulationRecord, get_regulation_catalog
+
+logger = logging.getLogger(__name__)
+
+
+# Uppercase codes that usually aren't about the country in chat text
+AMBIGUOUS_CODES = {"AI", "AM", "ID", "IN", "IS", "IT", "ME", "MY", "NO", "PM", "PR", "TO", "TV"}
+
+# Alias / localized name -> country code (only used for countries in the catalog)
+COUNTRY_ALIASES: Dict[str, str] = {
+    # English aliases
+    "usa": "US", "u.s.": "US", "america": "US", "united states of america": "US",
+    "uk": "GB", "britain": "GB", "great britain": "GB", "england": "GB", "scotland": "GB", "wales": "GB",
+    "uae": "AE", "emirates": "AE", "dubai": "AE", "abu dhabi": "AE",
+    "holland": "NL", "czechia": "CZ", "turkiye": "TR", "korea": "KR", "south korea": "KR",
+    "hong kong": "HK", "puerto rico": "PR", "el salvador": "SV", "ivory coast": "CI",
+
+    # French
+    "etats-unis": "US", "etats unis": "US", "royaume-uni": "GB", "royaume uni": "GB", "angleterre": "GB",
+    "allemagne": "DE", "espagne": "ES", "italie": "IT", "suisse": "CH", "belgique": "BE",
+    "pays-bas": "NL", "pays bas": "NL", "autriche": "AT", "irlande": "IE", "grece": "GR",
+    "chypre": "CY", "malte": "MT", "pologne": "PL", "roumanie": "RO", "bulgarie": "BG",
+    "croatie": "HR", "slovenie": "SI", "estonie": "EE", "lettonie": "LV", "lituanie": "LT",
+    "danemark": "DK", "suede": "SE", "norvege": "NO", "finlande": "FI", "hongrie": "HU",
+    "republique tcheque": "CZ", "turquie": "TR", "georgie": "GE", "emirats arabes unis": "AE",
+    "emirats": "AE", "arabie saoudite": "SA", "bahrein": "BH", "thailande": "TH",
+    "singapour": "SG", "malaisie": "MY", "indonesie": "ID", "japon": "JP", "coree du sud": "KR",
+    "chine": "CN", "inde": "IN", "australie": "AU", "nouvelle-zelande": "NZ", "bresil": "BR",
+    "mexique": "MX", "argentine": "AR", "chili": "CL", "colombie": "CO", "perou": "PE",
+    "maroc": "MA", "tunisie": "TN", "algerie": "DZ", "egypte": "EG", "afrique du sud": "ZA",
+    "ile maurice": "MU", "maurice": "MU", "canada": "CA",
+
+    # Spanish
+    "estados unidos": "US", "reino unido": "GB", "alemania": "DE", "espana": "ES",
+    "francia": "FR", "suiza": "CH", "belgica": "BE", "paises bajos": "NL", "irlanda": "IE",
+    "grecia": "GR", "chipre": "CY", "polonia": "PL", "rumania": "RO", "hungria": "HU",
+    "suecia": "SE", "noruega": "NO", "dinamarca": "DK", "turquia": "TR",
+    "emiratos arabes unidos": "AE", "emiratos": "AE", "tailandia": "TH", "singapur": "SG",
+    "brasil": "BR", "mejico": "MX", "peru": "PE", "marruecos": "MA",
+    "sudafrica": "ZA",
+
+    # German
+    "vereinigte staaten": "US", "grossbritannien": "GB", "deutschland": "DE", "spanien": "ES",
+    "frankreich": "FR", "italien": "IT", "schweiz": "CH", "osterreich": "AT", "oesterreich": "AT",
+    "niederlande": "NL", "belgien": "BE", "griechenland": "GR", "zypern": "CY", "polen": "PL",
+    "tschechien": "CZ", "ungarn": "HU", "schweden": "SE", "norwegen": "NO",
+    "turkei": "TR", "vereinigte arabische emirate": "AE", "brasilien": "BR", "mexiko": "MX",
+    "sudafrika": "ZA",
+
+    # Portuguese / Italian
+    "estados unidos da america": "US", "alemanha": "DE", "espanha": "ES", "franca": "FR",
+    "suica": "CH", "holanda": "NL", "emirados arabes unidos": "AE", "stati uniti": "US",
+    "regno unito": "GB", "germania": "DE", "spagna": "ES", "svizzera": "CH", "paesi bassi": "NL",
+    "emirati arabi uniti": "AE", "portogallo": "PT",
+}
+
+
+def fold(text: str) -> str:
+    """Strip accents (Émirats -> Emirats), keeping case"""
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c)
+    )
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation of words, factored as a trie (longest match first)"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def render(node: Dict) -> str:
+        end = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            # Greedy optional group: longer names win, with backtracking to the shorter one
+            return body + "?" if len(branches) > 1 else "(?:" + body + ")?"
+        return body
+
+    return render(trie)
+
+
+class CountryMatcher:
+    """Precompiled matcher of country names, aliases and codes"""
+
+    def __init__(
+        self,
+        records: Iterable[RegulationRecord],
+        aliases: Optional[Mapping[str, str]] = COUNTRY_ALIASES
+    ):
+        records = list(records)
+        codes = {r.country_code.upper() for r in records}
+
+        names = {fold(r.country_name).lower(): r.country_code.upper() for r in records if r.country_name}
+        for alias, code in (aliases or {}).items():
+            if code in codes:
+                names.setdefault(fold(alias).lower(), code)
+        self.names = names
+        self.codes = {code for code in codes if code not in AMBIGUOUS_CODES}
+
+        alternatives = []
+        if names:
+            alternatives.append(f"(?i:{_trie_pattern(names)})")
+        if self.codes:
+            alternatives.append(_trie_pattern(self.codes))
+
+        # (?<![\w.]) / (?![\w]) instead of \b so names ending in "." (u.s.) still match
+        self.pattern = re.compile(r"(?<![\w.])(?:" + "|".join(alternatives) + r")(?!\w)") if alternatives else None
+
+    def __len__(self) -> int:
+        return len(self.names) + len(self.codes)
+
+    def finditer(self, text: str) -> Iterable[Tuple[int, str]]:
+        """(position, country_code) of every mention, in text order"""
+        if not self.pattern or not text:
+            return
+        for match in self.pattern.finditer(fold(text)):
+            token = match.group(0)
+            code = self.names.get(token.lower()) or token
+            yield match.start(), code
+
+    def find(self, text: str) -> List[str]:
+        """Countries mentioned in text, by first mention, without duplicates"""
+        found = []
+        for _, code in self.finditer(text):
+            if code not in found:
+                found.append(code)
+        return found
+
+
+_matcher: Optional[CountryMatcher] = None
+_matcher_catalog: Optional[RegulationCatalog] = None
+_matcher_lock = threading.Lock()
+
+
+def get_country_matcher(db: Optional[Session] = None) -> CountryMatcher:
+    """Matcher over the current regulation catalog (rebuilt when the catalog is reloaded)"""
+    global _matcher, _matcher_catalog
+
+    catalog = get_regulation_catalog(db)
+    if _matcher is not None and _matcher_catalog is catalog:
+        return _matcher
+
+    with _matcher_lock:
+        if _matcher is None or _matcher_catalog is not catalog:
+            _matcher = CountryMatcher(catalog.all())
+            _matcher_catalog = catalog
+            logger.debug(f"Country matcher built for {len(_matcher)} names and codes")
+        return _matcher
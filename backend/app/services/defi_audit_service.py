@@ -7,6 +7,7 @@ Orchestrates complete DeFi activity audit for users
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timedelta
 from decimal import Decimal
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.models.defi_protocol import (
     DeFiAudit, DeFiTransaction, DeFiProtocol,
@@ -14,14 +15,56 @@ from app.models.defi_protocol import (
 )
 from app.models.user import User
 from app.models.cost_basis import CostBasisLot, CostBasisDisposal
+from app.services.audit_progress import AuditProgress, publish_audit
 from app.services.blockchain_parser_adapter import BlockchainParser  # ✅ Moralis-powered adapter
 from app.services.defi_connectors import DeFiConnectorFactory
+import base64
+import binascii
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
 
+# Columns of a report transaction (raw_data, notes, ... aren't needed)
+REPORT_COLUMNS = (
+    DeFiTransaction.id,
+    DeFiTransaction.tx_hash,
+    DeFiTransaction.chain,
+    DeFiTransaction.timestamp,
+    DeFiTransaction.transaction_type,
+    DeFiTransaction.tax_category,
+    DeFiTransaction.token_in,
+    DeFiTransaction.amount_in,
+    DeFiTransaction.token_out,
+    DeFiTransaction.amount_out,
+    DeFiTransaction.usd_value_in,
+    DeFiTransaction.usd_value_out,
+    DeFiTransaction.gain_loss_usd,
+    DeFiTransaction.gas_fee_usd,
+    DeFiTransaction.protocol_fee_usd,
+)
+
+
+def encode_report_cursor(timestamp: datetime, tx_id: int) -> str:
+    """Opaque cursor pointing after a report transaction"""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{tx_id}".encode()).decode()
+
+
+def decode_report_cursor(cursor: str) -> tuple:
+    """
+    (timestamp, id) of a report cursor
+
+    Raises:
+        ValueError: Malformed cursor
+    """
+    try:
+        timestamp, tx_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(tx_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
 def convert_datetime_to_string(obj: Any) -> Any:
     """
     Recursively convert datetime objects to ISO format strings in dicts/lists
@@ -49,9 +92,18 @@ class DeFiAuditService:
     4. Generate comprehensive report
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, parser: Optional[BlockchainParser] = None):
+        """
+        Args:
+            db: Database session
+            parser: Shared blockchain parser (Celery workers reuse one per process)
+        """
         self.db = db
-        # Initialize blockchain parser with API keys
+        self.parser = parser or self.create_parser()
+
+    @staticmethod
+    def create_parser() -> BlockchainParser:
+        """Blockchain parser with the configured API keys"""
         # Single Etherscan API key works for 50+ EVM chains
         # Solana uses Helius API (primary) or Solscan (fallback)
         from app.config import settings
@@ -60,7 +112,7 @@ class DeFiAuditService:
             "solana": settings.SOLANA_API_KEY,
             "helius": settings.HELIUS_API_KEY or settings.SOLANA_API_KEY
         }
-        self.parser = BlockchainParser(api_keys=api_keys)
+        return BlockchainParser(api_keys=api_keys)
 
     async def create_audit(
         self,
@@ -128,12 +180,14 @@ class DeFiAuditService:
         logger.info(f"Date range: {audit.start_date} to {audit.end_date}")
 
         all_transactions = []
+        progress = AuditProgress(audit)
 
         # Scan each blockchain
         print(f"About to scan {len(audit.chains)} chains")
         for chain in audit.chains:
             print(f"Scanning chain: {chain}")
             logger.info(f"Scanning {chain} for wallet {wallet_address}")
+            progress.start_chain(chain)
 
             # Parse transactions
             print(f"Calling parser.parse_wallet_transactions...")
@@ -144,11 +198,13 @@ class DeFiAuditService:
                 end_date=audit.end_date
             )
             print(f"Parser returned {len(txs)} transactions")
+            progress.fetched_transactions(len(txs))
 
             # Categorize and save each transaction
             print(f"Processing {len(txs)} transactions for chain {chain}...")
             for tx in txs:
                 defi_tx = await self._process_transaction(tx, audit.id, audit.user_id, wallet_address)
+                progress.transaction_processed(persisted=defi_tx is not None)
                 if defi_tx:
                     all_transactions.append(defi_tx)
                     print(f"Transaction added: {tx.get('tx_hash')}")
@@ -188,6 +244,7 @@ class DeFiAuditService:
         audit.completed_at = datetime.utcnow()
 
         self.db.commit()
+        publish_audit(audit)
 
         logger.info(f"Audit {audit.id} completed: {len(all_transactions)} transactions processed")
 
@@ -642,32 +699,55 @@ class DeFiAuditService:
             }
         }
 
-    async def get_audit_report(self, audit_id: int, limit: int = 100, offset: int = 0) -> Optional[Dict]:
+    async def get_audit_report(
+        self,
+        audit_id: int,
+        limit: int = 100,
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> Optional[Dict]:
         """
-        Get complete audit report with pagination
+        Get complete audit report with paginated transactions
+
+        Transactions are paged newest first with a (timestamp, id) keyset
+        cursor, so every page is an index range scan on
+        idx_defi_tx_audit_ts_id however deep it is. Only the reported
+        columns are selected (no raw_data), with the protocol name joined in.
 
         Args:
             audit_id: Audit ID
             limit: Max transactions to return
-            offset: Pagination offset
+            offset: Pagination offset (legacy clients, ignored with a cursor)
+            cursor: next_cursor of the previous page
 
         Returns:
             Complete audit report dict with paginated transactions
+
+        Raises:
+            ValueError: Malformed cursor
         """
         audit = self.db.query(DeFiAudit).filter(DeFiAudit.id == audit_id).first()
 
         if not audit:
             return None
 
-        # Get total count first
-        total_transactions_count = self.db.query(DeFiTransaction).filter(
-            DeFiTransaction.audit_id == audit_id
-        ).count()
+        query = self.db.query(*REPORT_COLUMNS, DeFiProtocol.name.label("protocol_name")).outerjoin(
+            DeFiProtocol, DeFiTransaction.protocol_id == DeFiProtocol.id
+        ).filter(DeFiTransaction.audit_id == audit_id).order_by(
+            DeFiTransaction.timestamp.desc(), DeFiTransaction.id.desc()
+        )
+
+        if cursor:
+            timestamp, tx_id = decode_report_cursor(cursor)
+            query = query.filter(tuple_(DeFiTransaction.timestamp, DeFiTransaction.id) < (timestamp, tx_id))
+            offset = 0
+        elif offset:
+            query = query.offset(offset)
 
-        # Get paginated transactions
-        transactions = self.db.query(DeFiTransaction).filter(
-            DeFiTransaction.audit_id == audit_id
-        ).order_by(DeFiTransaction.timestamp.desc()).limit(limit).offset(offset).all()
+        # One extra row tells whether there is a next page
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
 
         return {
             "audit_id": audit.id,
@@ -688,19 +768,20 @@ class DeFiAuditService:
                 "ordinary_income": audit.ordinary_income
             },
             "protocols_used": audit.protocols_used,
-            "transactions": [self._serialize_transaction(tx) for tx in transactions],
+            "transactions": [self._serialize_transaction(row) for row in rows],
             "pagination": {
-                "total": total_transactions_count,
+                "total": audit.total_transactions or 0,  # Stored by the audit, not recounted
                 "limit": limit,
                 "offset": offset,
-                "returned": len(transactions),
-                "has_more": (offset + len(transactions)) < total_transactions_count
+                "returned": len(rows),
+                "has_more": has_more,
+                "next_cursor": encode_report_cursor(rows[-1].timestamp, rows[-1].id) if has_more else None
             },
             "recommendations": self._generate_recommendations(audit)
         }
 
-    def _serialize_transaction(self, tx: DeFiTransaction) -> Dict:
-        """Serialize transaction to dict"""
+    def _serialize_transaction(self, tx) -> Dict:
+        """Serialize a report row (REPORT_COLUMNS + protocol_name) to dict"""
         # Calculate transaction value (for volume calculations)
         # Use the maximum of in/out values, or the one that exists
         value_usd = 0.0
@@ -716,7 +797,7 @@ class DeFiAuditService:
             "tx_hash": tx.tx_hash,
             "chain": tx.chain,
             "timestamp": tx.timestamp.isoformat(),
-            "protocol": tx.protocol.name if tx.protocol else None,
+            "protocol": tx.protocol_name,
             "type": tx.transaction_type.value,
             "tax_category": tx.tax_category,
             "token_in": tx.token_in,
@@ -0,0 +1,233 @@
+"""
+EVM RPC Batch Reader
+
+Reads native and ERC20 balances for many wallets and many tokens in one
+HTTP round-trip per chain, for the plain-RPC fallback in
+MultiChainBalanceService.
+
+Strategy:
+1. Multicall3 aggregate3: getEthBalance + balanceOf packed into a few eth_calls,
+   all sent as one JSON-RPC batch payload.
+2. If Multicall3 isn't deployed (fresh dev chain, exotic L2), plain JSON-RPC
+   batch of eth_getBalance + eth_call(balanceOf).
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+
+import httpx
+from eth_abi import encode, decode
+
+logger = logging.getLogger(__name__)
+
+
+# Same address on 250+ chains (deterministic deployment)
+MULTICALL3_ADDRESS = "0xca11bde05977b3631167028862be2a173976ca11"
+
+# Function selectors
+SELECTOR_AGGREGATE3 = bytes.fromhex("82ad56cb")       # aggregate3((address,bool,bytes)[])
+SELECTOR_GET_ETH_BALANCE = bytes.fromhex("4d2301cc")  # getEthBalance(address)
+SELECTOR_BALANCE_OF = bytes.fromhex("70a08231")       # balanceOf(address)
+
+# Sub-calls per aggregate3 eth_call (keeps each call under node gas/response limits)
+MULTICALL_CHUNK_SIZE = 500
+
+# Requests per JSON-RPC batch payload (public endpoints cap batch size)
+RPC_BATCH_SIZE = 100
+
+
+class RpcError(Exception):
+    """JSON-RPC call returned an error"""
+
+
+class RpcBatchClient:
+    """Minimal async JSON-RPC client with batch support"""
+
+    def __init__(self, http_client: httpx.AsyncClient, rpc_url: str):
+        self.http_client = http_client
+        self.rpc_url = rpc_url
+
+    async def call(self, method: str, params: list) -> Any:
+        """Single JSON-RPC call (raises RpcError on error)"""
+        result = (await self.batch([(method, params)]))[0]
+        if isinstance(result, RpcError):
+            raise result
+        return result
+
+    async def batch(self, requests: List[Tuple[str, list]]) -> List[Any]:
+        """
+        Send requests as JSON-RPC batch payloads
+
+        Returns:
+            Results in request order; failed entries are RpcError instances
+        """
+        results: List[Any] = []
+
+        for offset in range(0, len(requests), RPC_BATCH_SIZE):
+            chunk = requests[offset:offset + RPC_BATCH_SIZE]
+            payload = [
+                {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+                for i, (method, params) in enumerate(chunk)
+            ]
+
+            response = await self.http_client.post(self.rpc_url, json=payload)
+            response.raise_for_status()
+            body = response.json()
+
+            # Some nodes answer a batch with a single error object
+            if isinstance(body, dict):
+                raise RpcError(body.get("error", body))
+
+            by_id = {item.get("id"): item for item in body}
+            for i in range(len(chunk)):
+                item = by_id.get(i)
+                if item is None:
+                    results.append(RpcError(f"Missing response for request {i}"))
+                elif "error" in item:
+                    results.append(RpcError(item["error"]))
+                else:
+                    results.append(item.get("result"))
+
+        return results
+
+
+def _address_arg(address: str) -> bytes:
+    return encode(["address"], [address.lower()])
+
+
+def encode_aggregate3(calls: List[Tuple[str, bytes]]) -> str:
+    """Encode aggregate3 calldata (allowFailure=True for every sub-call)"""
+    encoded = encode(
+        ["(address,bool,bytes)[]"],
+        [[(target.lower(), True, data) for target, data in calls]]
+    )
+    return "0x" + (SELECTOR_AGGREGATE3 + encoded).hex()
+
+
+def decode_aggregate3(result_hex: str) -> List[Optional[int]]:
+    """Decode aggregate3 return data as uint256 values (None for failed sub-calls)"""
+    raw = bytes.fromhex(result_hex[2:] if result_hex.startswith("0x") else result_hex)
+    (results,) = decode(["(bool,bytes)[]"], raw)
+
+    values = []
+    for success, data in results:
+        if success and len(data) >= 32:
+            values.append(int.from_bytes(data[:32], "big"))
+        else:
+            values.append(None)
+    return values
+
+
+class EvmBalanceReader:
+    """
+    Read native + ERC20 balances for many (wallet, token) pairs per chain
+
+    Results:
+        {wallet (lowercased): {"native": int, "tokens": {token (lowercased): int}}}
+        Raw integer amounts; unreadable values are omitted.
+    """
+
+    def __init__(self, client: RpcBatchClient, multicall_address: str = MULTICALL3_ADDRESS):
+        self.client = client
+        self.multicall_address = multicall_address
+
+    async def read_balances(
+        self,
+        wallets: List[str],
+        tokens: List[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Optional[int]]:
+        """
+        Returns:
+            (balances, block_number)
+        """
+        wallets = [w.lower() for w in wallets]
+        tokens = list(dict.fromkeys(t.lower() for t in tokens))
+
+        try:
+            return await self._read_with_multicall(wallets, tokens)
+        except RpcError as e:
+            logger.info(f"Multicall3 unavailable on {self.client.rpc_url} ({e}), using plain RPC batch")
+            return await self._read_with_plain_batch(wallets, tokens)
+
+    async def _read_with_multicall(
+        self,
+        wallets: List[str],
+        tokens: List[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Optional[int]]:
+        # (wallet, token or None for native) for every sub-call, in order
+        keys: List[Tuple[str, Optional[str]]] = []
+        calls: List[Tuple[str, bytes]] = []
+
+        for wallet in wallets:
+            arg = _address_arg(wallet)
+            keys.append((wallet, None))
+            calls.append((self.multicall_address, SELECTOR_GET_ETH_BALANCE + arg))
+            for token in tokens:
+                keys.append((wallet, token))
+                calls.append((token, SELECTOR_BALANCE_OF + arg))
+
+        requests = [("eth_blockNumber", [])]
+        for offset in range(0, len(calls), MULTICALL_CHUNK_SIZE):
+            calldata = encode_aggregate3(calls[offset:offset + MULTICALL_CHUNK_SIZE])
+            requests.append(("eth_call", [{"to": self.multicall_address, "data": calldata}, "latest"]))
+
+        responses = await self.client.batch(requests)
+        block_number = _parse_block_number(responses[0])
+
+        values: List[Optional[int]] = []
+        for response in responses[1:]:
+            if isinstance(response, RpcError):
+                raise response
+            if not response or response == "0x":
+                # No code at the Multicall3 address
+                raise RpcError("empty eth_call result")
+            values.extend(decode_aggregate3(response))
+
+        return _collect(keys, values), block_number
+
+    async def _read_with_plain_batch(
+        self,
+        wallets: List[str],
+        tokens: List[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Optional[int]]:
+        keys: List[Tuple[str, Optional[str]]] = []
+        requests: List[Tuple[str, list]] = [("eth_blockNumber", [])]
+
+        for wallet in wallets:
+            keys.append((wallet, None))
+            requests.append(("eth_getBalance", [wallet, "latest"]))
+            data = "0x" + (SELECTOR_BALANCE_OF + _address_arg(wallet)).hex()
+            for token in tokens:
+                keys.append((wallet, token))
+                requests.append(("eth_call", [{"to": token, "data": data}, "latest"]))
+
+        responses = await self.client.batch(requests)
+        block_number = _parse_block_number(responses[0])
+
+        values: List[Optional[int]] = []
+        for response in responses[1:]:
+            if isinstance(response, RpcError) or not response or response == "0x":
+                values.append(None)
+            else:
+                values.append(int(response[:66], 16))
+
+        return _collect(keys, values), block_number
+
+
+def _parse_block_number(response: Any) -> Optional[int]:
+    if isinstance(response, RpcError) or not response:
+        return None
+    return int(response, 16)
+
+
+def _collect(keys: List[Tuple[str, Optional[str]]], values: List[Optional[int]]) -> Dict[str, Dict[str, Any]]:
+    balances: Dict[str, Dict[str, Any]] = {}
+    for (wallet, token), value in zip(keys, values):
+        entry = balances.setdefault(wallet, {"native": None, "tokens": {}})
+        if value is None:
+            continue
+        if token is None:
+            entry["native"] = value
+        else:
+            entry["tokens"][token] = value
+    return balances
@@ -1,56 +1,233 @@
+"""
+Feature Flags
+
+Flag checks never touch the database. Every process evaluates them against
+an immutable in-memory snapshot of the feature_flags table:
+
+- The snapshot is loaded on first use and swapped atomically on reload, so
+  readers always see a consistent set of flags.
+- Admin changes call publish_flag_change() after committing. It reloads
+  this process' snapshot and publishes on the feature_flags:changed Redis
+  channel, and each API process reloads when it gets the message (see
+  listen_for_flag_changes, started with the app).
+- The listener also reloads every MAX_SNAPSHOT_AGE seconds, in case a
+  message was lost while it was reconnecting. Processes without a listener
+  (Celery workers, scripts) reload lazily once the snapshot is that old.
+
+Percentage rollouts put each user in a stable bucket (0-99): CRC32 of
+"{flag name}:{user id}" (see rollout_bucket), cheap and deterministic.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
 from sqlalchemy.orm import Session
 from app.models.feature_flag import FeatureFlag
-from app.models.user import User
-from typing import Optional
-import hashlib
+from app.models.user import UserRole
 
+logger = logging.getLogger(__name__)
 
-class FeatureFlagService:
-    """Service for feature flag management"""
 
-    def __init__(self, db: Session):
-        self.db = db
-        self._cache = {}
+CHANNEL = "feature_flags:changed"
 
-    async def is_enabled(
-        self,
-        feature_name: str,
-        user: Optional[User] = None,
-        country: Optional[str] = None
-    ) -> bool:
-        """Check if feature enabled for user/context"""
+# Reload the snapshot after this long even without a change message
+MAX_SNAPSHOT_AGE = 300
 
-        # Get flag from DB
-        flag = self.db.query(FeatureFlag).filter_by(name=feature_name).first()
+# Seconds between two listener (re)connection attempts
+RECONNECT_DELAY = 5
 
-        if not flag:
-            return False  # Default disabled
 
-        # Global enabled?
-        if flag.enabled_globally:
+def rollout_bucket(user_id: int, feature_name: str) -> int:
+    """Deterministic rollout bucket (0-99) of a user for a flag"""
+    return zlib.crc32(str(user_id).encode(), zlib.crc32(f"{feature_name}:".encode())) % 100
+
+
+@dataclass(frozen=True)
+class FlagRule:
+    """Rollout settings of one flag"""
+    name: str
+    enabled_globally: bool = False
+    beta_only: bool = False
+    rollout_percentage: int = 0
+    enabled_countries: frozenset = frozenset()
+    name_crc: int = 0             # CRC32 of "{name}:", the rollout hash continues from it
+
+    @classmethod
+    def from_model(cls, flag: FeatureFlag) -> "FlagRule":
+        return cls(
+            name=flag.name,
+            enabled_globally=bool(flag.enabled_globally),
+            beta_only=bool(flag.beta_only),
+            rollout_percentage=flag.rollout_percentage or 0,
+            enabled_countries=frozenset(flag.enabled_countries or ()),
+            name_crc=zlib.crc32(f"{flag.name}:".encode())
+        )
+
+    def evaluate(self, user=None, country: Optional[str] = None) -> bool:
+        """
+        Is the flag on for a user/context
+
+        Args:
+            user: Principal or User (id, role and beta_tester are read)
+            country: ISO country code
+        """
+        if self.enabled_globally:
             return True
 
-        # Beta users only?
-        if flag.beta_only and user:
-            if user.role.value == 'admin' or user.beta_tester:
+        if user is not None:
+            # Beta users only?
+            if self.beta_only and (
+                user.role in (UserRole.ADMIN, UserRole.BETA_TESTER) or getattr(user, "beta_tester", False)
+            ):
                 return True
 
-        # Percentage rollout (deterministic A/B testing)
-        if flag.rollout_percentage and user:
-            # Hash user ID + feature name for deterministic result
-            user_hash = int(
-                hashlib.md5(f"{user.id}{feature_name}".encode()).hexdigest(),
-                16
-            )
-            if (user_hash % 100) < flag.rollout_percentage:
+            # Percentage rollout (deterministic A/B testing)
+            if self.rollout_percentage and zlib.crc32(str(user.id).encode(), self.name_crc) % 100 < self.rollout_percentage:
                 return True
 
         # Country-specific?
-        if flag.enabled_countries and country:
-            if country in flag.enabled_countries:
-                return True
+        return country is not None and country in self.enabled_countries
+
+
+class FlagSnapshot:
+    """Immutable view of every flag, loaded at one point in time"""
+
+    def __init__(self, rules: Iterable[FlagRule]):
+        self.rules: Mapping[str, FlagRule] = MappingProxyType({rule.name: rule for rule in rules})
+        self.loaded_at = time.monotonic()
+
+    def is_enabled(self, feature_name: str, user=None, country: Optional[str] = None) -> bool:
+        rule = self.rules.get(feature_name)
+        return rule is not None and rule.evaluate(user, country)  # Unknown flags are off
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+
+_snapshot: Optional[FlagSnapshot] = None
+_listening = False
+_reload_lock = threading.Lock()
+
+
+def load_feature_flags(db: Optional[Session] = None) -> FlagSnapshot:
+    """
+    Load every flag into a new snapshot and make it the current one
+
+    Args:
+        db: Session to read with (a short-lived one is opened otherwise)
+    """
+    global _snapshot
 
-        return False
+    own_session = db is None
+    if own_session:
+        from app.database import SessionLocal
+        db = SessionLocal()
+
+    try:
+        snapshot = FlagSnapshot([FlagRule.from_model(flag) for flag in db.query(FeatureFlag).all()])
+    finally:
+        if own_session:
+            db.close()
+
+    # Atomic swap: readers holding the old snapshot keep a consistent view
+    _snapshot = snapshot
+    logger.info(f"🚩 Feature flags loaded: {len(snapshot)} flags")
+    return snapshot
+
+
+def get_flag_snapshot() -> FlagSnapshot:
+    """Current snapshot (loaded on first use, or when stale in processes without a listener)"""
+    snapshot = _snapshot
+    if snapshot is not None and (_listening or time.monotonic() - snapshot.loaded_at < MAX_SNAPSHOT_AGE):
+        return snapshot
+
+    with _reload_lock:
+        if _snapshot is not snapshot:
+            return _snapshot  # Another thread just reloaded
+        return load_feature_flags()
+
+
+def is_enabled(feature_name: str, user=None, country: Optional[str] = None) -> bool:
+    """Check if a feature is enabled for a user/context (no database query)"""
+    return get_flag_snapshot().is_enabled(feature_name, user, country)
+
+
+def publish_flag_change(feature_name: str, db: Optional[Session] = None):
+    """
+    Signal that a flag was created, updated or deleted (call after commit)
+
+    Reloads this process' snapshot right away; the other processes reload
+    when they receive the message.
+    """
+    load_feature_flags(db)
+
+    try:
+        from app.dependencies.exchange_rate import get_redis_client
+        get_redis_client().publish(CHANNEL, feature_name)
+    except Exception as e:
+        logger.warning(f"Could not publish feature flag change ({feature_name}): {e}")
+
+
+async def listen_for_flag_changes():
+    """Reload the snapshot on every change message (runs for the app's lifetime)"""
+    global _listening
+    from app.dependencies.exchange_rate import get_async_redis_client
+
+    while True:
+        redis_client = get_async_redis_client()
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(CHANNEL)
+            _listening = True
+            # Changes published before the subscription
+            await asyncio.to_thread(load_feature_flags)
+
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=MAX_SNAPSHOT_AGE)
+                if message:
+                    logger.info(f"🔄 Feature flag '{message['data']}' changed, reloading")
+                await asyncio.to_thread(load_feature_flags)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Feature flag listener disconnected: {e}")
+        finally:
+            _listening = False
+            try:
+                # Only the subscription: the client is shared (audit progress streams)
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+        await asyncio.sleep(RECONNECT_DELAY)
+
+
+def reset_feature_flags():
+    """Drop the in-process snapshot (next check reloads it)"""
+    global _snapshot
+    _snapshot = None
+
+
+class FeatureFlagService:
+    """Service for feature flag management"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    async def is_enabled(
+        self,
+        feature_name: str,
+        user=None,
+        country: Optional[str] = None
+    ) -> bool:
+        """Check if feature enabled for user/context (in-memory snapshot)"""
+        return is_enabled(feature_name, user, country)
 
     def create_flag(
         self,
@@ -69,6 +246,7 @@ class FeatureFlagService:
         self.db.add(flag)
         self.db.commit()
         self.db.refresh(flag)
+        publish_flag_change(name, self.db)
         return flag
 
     def update_flag(self, name: str, **updates) -> Optional[FeatureFlag]:
@@ -83,4 +261,5 @@ class FeatureFlagService:
 
         self.db.commit()
         self.db.refresh(flag)
+        publish_flag_change(name, self.db)
         return flag
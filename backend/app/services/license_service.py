@@ -3,13 +3,22 @@ License Service
 
 Manages user licenses, subscriptions, and usage limits
 Handles Paddle subscription lifecycle
+Usage quotas are metered in Redis (see app.services.usage_meter)
 """
 
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import Optional
-from app.models.license import License, LicenseTier, SubscriptionStatus
+from typing import List, Optional
+from app.models.license import (
+    License,
+    LicenseTier,
+    SubscriptionStatus,
+    billing_period_start,
+    next_billing_period_start,
+)
 from app.models.user import User
+from app.services.principal_cache import Principal
+from app.services.usage_meter import UsageMeter
 from app.config import settings
 import logging
 
@@ -102,6 +111,7 @@ class LicenseService:
 
         self.db.commit()
         self.db.refresh(license)
+        self._reset_usage_counters([user_id])
 
         logger.info(f"Upgraded user {user_id} to {tier.value} - Paddle subscription: {paddle_subscription_id}")
         return license
@@ -132,6 +142,7 @@ class LicenseService:
 
         self.db.commit()
         self.db.refresh(license)
+        self._reset_usage_counters([user_id])
 
         logger.warning(f"Downgraded user {user_id} to FREE - Reason: {reason}")
         return license
@@ -172,73 +183,123 @@ class LicenseService:
         logger.info(f"Updated subscription {paddle_subscription_id} status to {status.value}")
         return license
 
-    def check_and_increment_usage(self, user_id: int, resource: str) -> tuple[bool, Optional[str]]:
+    def check_and_increment_usage(
+        self,
+        user_id: int,
+        resource: str,
+        principal: Optional[Principal] = None
+    ) -> tuple[bool, Optional[str]]:
         """
         Check if user can use resource and increment usage counter
 
+        The counter is checked and incremented atomically in Redis (see
+        app.services.usage_meter); the database is only used to seed it, or
+        when Redis is unavailable.
+
         Args:
             user_id: User ID
             resource: Resource name ("simulations", "defi_audits", "pdf_exports", "chat_messages")
+            principal: Cached principal of the user (tier, status, limits);
+                       the license is loaded when not given
 
         Returns:
             Tuple of (allowed: bool, error_message: Optional[str])
         """
+        if principal is not None:
+            if not principal.has_license:
+                return False, "No license found"
+            tier, status, active, limits = (
+                principal.tier, principal.license_status, principal.license_active(), principal.limits
+            )
+        else:
+            license = self.get_user_license(user_id)
+            if not license:
+                return False, "No license found"
+            tier, status, active, limits = license.tier, license.status, license.is_active(), license.get_limits()
+
+        # Check if license is active
+        if not active:
+            return False, f"License is {status.value}. Please upgrade your plan."
+
+        limit = limits.get(resource, 0)
+        try:
+            allowed, _ = UsageMeter().try_increment(
+                user_id, resource, limit, seed=lambda: self._period_usage(user_id, resource)
+            )
+        except Exception as e:
+            logger.warning(f"Usage meter unavailable, counting {resource} in the database: {e}")
+            allowed = self._increment_in_db(user_id, resource)
+
+        if not allowed:
+            return False, self._quota_exceeded_message(tier, resource, limit)
+
+        return True, None
+
+    def _period_usage(self, user_id: int, resource: str) -> int:
+        """Usage of a resource this period according to the database"""
         license = self.get_user_license(user_id)
+        return license.get_usage()[resource] if license else 0
 
-        if not license:
-            return False, "No license found"
+    def _increment_in_db(self, user_id: int, resource: str) -> bool:
+        """Check and increment a counter on the (locked) License row"""
+        license = self.db.query(License).filter(License.user_id == user_id).with_for_update().first()
+
+        if not license or not license.can_use(resource):
+            self.db.rollback()
+            return False
 
-        # Check if license is active
-        if not license.is_active():
-            return False, f"License is {license.status.value}. Please upgrade your plan."
-
-        # Check if user has remaining quota
-        if not license.can_use(resource):
-            limits = license.get_limits()
-            limit = limits.get(resource, 0)
-
-            tier_names = {
-                LicenseTier.FREE: "FREE",
-                LicenseTier.STARTER: "STARTER ($15/month)",
-                LicenseTier.PRO: "PRO ($39/month)",
-                LicenseTier.ENTERPRISE: "ENTERPRISE (Custom)"
-            }
-
-            current_tier_name = tier_names.get(license.tier, license.tier.value)
-
-            # Personalized messages based on tier and resource
-            if license.tier == LicenseTier.FREE and resource == "chat_messages":
-                return False, (
-                    f"You've reached your {limit} FREE chat messages limit for this month. "
-                    f"Upgrade to STARTER ($15/mo) for 100 messages or PRO ($39/mo) for 500 messages. "
-                    f"Your limit resets on {license.usage_reset_at.strftime('%B')} 1st."
-                )
-            elif license.tier == LicenseTier.FREE and resource == "simulations":
-                return False, (
-                    f"You've used all {limit} FREE simulations for this month. "
-                    f"Upgrade to STARTER ($15/mo) for 50 simulations or PRO ($39/mo) for unlimited simulations."
-                )
-            elif license.tier == LicenseTier.FREE and resource == "defi_audits":
-                return False, (
-                    f"You've used all {limit} FREE DeFi audits for this month. "
-                    f"Upgrade to STARTER ($15/mo) for 15 audits or PRO ($39/mo) for 100 audits."
-                )
-            elif license.tier == LicenseTier.STARTER:
-                return False, (
-                    f"You've reached your STARTER limit for {resource.replace('_', ' ')} ({limit}/month). "
-                    f"Upgrade to PRO ($39/mo) for more resources (unlimited simulations, 100 audits, 500 chat messages)."
-                )
-            else:
-                return False, (
-                    f"You've reached your {resource.replace('_', ' ')} limit ({limit}/{license.usage_reset_at.strftime('%B')}). "
-                    f"Current plan: {current_tier_name}. Upgrade to get more!"
-                )
-
-        # Increment usage
         license.increment_usage(resource)
         self.db.commit()
+        return True
+
+    def _reset_usage_counters(self, user_ids: List[int]):
+        """Drop Redis counters after License usage was reset"""
+        try:
+            UsageMeter().reset(user_ids)
+        except Exception as e:
+            logger.warning(f"Could not reset usage counters of users {user_ids}: {e}")
+
+    @staticmethod
+    def _quota_exceeded_message(tier: LicenseTier, resource: str, limit: int) -> str:
+        """Personalized quota message for a tier and resource"""
+        tier_names = {
+            LicenseTier.FREE: "FREE",
+            LicenseTier.STARTER: "STARTER ($15/month)",
+            LicenseTier.PRO: "PRO ($39/month)",
+            LicenseTier.ENTERPRISE: "ENTERPRISE (Custom)"
+        }
 
-        return True, None
+        current_tier_name = tier_names.get(tier, tier.value)
+        period_month = billing_period_start().strftime('%B')
+        reset_month = next_billing_period_start(billing_period_start()).strftime('%B')
+
+        # Personalized messages based on tier and resource
+        if tier == LicenseTier.FREE and resource == "chat_messages":
+            return (
+                f"You've reached your {limit} FREE chat messages limit for this month. "
+                f"Upgrade to STARTER ($15/mo) for 100 messages or PRO ($39/mo) for 500 messages. "
+                f"Your limit resets on {reset_month} 1st."
+            )
+        elif tier == LicenseTier.FREE and resource == "simulations":
+            return (
+                f"You've used all {limit} FREE simulations for this month. "
+                f"Upgrade to STARTER ($15/mo) for 50 simulations or PRO ($39/mo) for unlimited simulations."
+            )
+        elif tier == LicenseTier.FREE and resource == "defi_audits":
+            return (
+                f"You've used all {limit} FREE DeFi audits for this month. "
+                f"Upgrade to STARTER ($15/mo) for 15 audits or PRO ($39/mo) for 100 audits."
+            )
+        elif tier == LicenseTier.STARTER:
+            return (
+                f"You've reached your STARTER limit for {resource.replace('_', ' ')} ({limit}/month). "
+                f"Upgrade to PRO ($39/mo) for more resources (unlimited simulations, 100 audits, 500 chat messages)."
+            )
+        else:
+            return (
+                f"You've reached your {resource.replace('_', ' ')} limit ({limit}/{period_month}). "
+                f"Current plan: {current_tier_name}. Upgrade to get more!"
+            )
 
     def reset_monthly_usage(self, user_id: int) -> License:
         """
@@ -252,30 +313,32 @@ class LicenseService:
             license.reset_usage()
             self.db.commit()
             self.db.refresh(license)
+            self._reset_usage_counters([user_id])
             logger.info(f"Reset monthly usage for user {user_id}")
 
         return license
 
     def reset_all_monthly_usage(self) -> int:
         """
-        Reset usage for ALL active licenses
+        Roll usage over to the new billing period
 
-        Called by cron job on the 1st of each month
+        Called by cron job on the 1st of each month. Counters are keyed by
+        period, so the new month starts from fresh Redis keys and License
+        rows from earlier periods read as 0 (License.get_usage): no row is
+        reset. The previous period's last increments are flushed.
 
         Returns:
-            Number of licenses reset
+            Number of licenses flushed for the previous period
         """
-        licenses = self.db.query(License).filter(
-            License.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING])
-        ).all()
+        previous_period = billing_period_start(billing_period_start() - timedelta(days=1))
 
-        count = 0
-        for license in licenses:
-            license.reset_usage()
-            count += 1
+        try:
+            count = UsageMeter().flush(self.db, previous_period)
+        except Exception as e:
+            logger.warning(f"Could not flush usage counters of {previous_period:%Y-%m}: {e}")
+            count = 0
 
-        self.db.commit()
-        logger.info(f"Reset monthly usage for {count} licenses")
+        logger.info(f"Usage rolled over to {billing_period_start():%Y-%m} ({count} licenses flushed for {previous_period:%Y-%m})")
         return count
 
     def get_tier_from_paddle_plan_id(self, paddle_plan_id: str) -> LicenseTier:
@@ -322,6 +385,7 @@ class LicenseService:
 
         self.db.commit()
         self.db.refresh(license)
+        self._reset_usage_counters([user_id])
 
         logger.info(f"Started {trial_days}-day trial for user {user_id} - Tier: {tier.value}")
         return license
@@ -353,4 +417,5 @@ class LicenseService:
             logger.info(f"Trial expired for user {license.user_id} - Downgraded to FREE")
 
         self.db.commit()
+        self._reset_usage_counters([license.user_id for license in expired_trials])
         return count
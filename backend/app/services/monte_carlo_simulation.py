@@ -0,0 +1,299 @@
+"""
+Monte Carlo Residency Simulation
+
+Answers "if prices end up around here, where should I be resident?" for a
+user's open lots.
+
+For every sampled price path (seeded NumPy generator, no network) the open
+lots are sold at the horizon, realized gains are computed under each cost
+basis method, and taxed in every candidate jurisdiction. The output is the
+distribution of tax outcomes (percentiles) per method and country, plus how
+often each country comes out cheapest.
+
+Everything that doesn't depend on prices is computed once: which lots each
+method sells, and which of them are long-term in each country. A batch of
+paths then reduces to two matrix products:
+
+    short_gains = prices @ short_qty - short_cost     (paths x countries)
+    long_gains  = prices @ long_qty  - long_cost
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.cost_basis import CostBasisMethod
+from app.services.residency_comparison import ResidencyComparisonEngine
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_PREFIX = "mc_simulation"
+CACHE_TTL = 24 * 3600
+
+# Celery task id -> owner (user_id), for the status endpoint
+TASK_OWNER_PREFIX = "mc_simulation_task"
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# Paths evaluated per batch (progress is reported between batches)
+PATH_BATCH_SIZE = 2000
+
+# Annualized volatility used when the request doesn't give one
+DEFAULT_VOLATILITY = 0.9
+TOKEN_VOLATILITY = {
+    "BTC": 0.6, "WBTC": 0.6,
+    "ETH": 0.75, "WETH": 0.75, "STETH": 0.75,
+    "SOL": 1.0,
+}
+STABLECOINS = {"USDC", "USDT", "DAI", "BUSD"}
+
+# SPECIFIC_ID needs a manual lot choice, it can't be simulated
+SIMULATED_METHODS = (
+    CostBasisMethod.FIFO,
+    CostBasisMethod.LIFO,
+    CostBasisMethod.HIFO,
+    CostBasisMethod.AVERAGE_COST,
+)
+
+
+def lot_rows(lots) -> List[Dict]:
+    """Open lots as plain rows (task payload and cache key input)"""
+    return [
+        {
+            "id": lot.id,
+            "token": lot.token.upper(),
+            "amount": float(lot.remaining_amount),
+            "cost": float(lot.acquisition_price_usd),
+            "acquired": lot.acquisition_date.isoformat()
+        }
+        for lot in lots
+        if lot.remaining_amount and float(lot.remaining_amount) > 0
+    ]
+
+
+def cache_key(params: Mapping) -> str:
+    """Redis key of a simulation result, derived from every input"""
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{CACHE_PREFIX}:{digest}"
+
+
+def default_volatility(token: str) -> float:
+    token = token.upper()
+    if token in STABLECOINS:
+        return 0.01
+    return TOKEN_VOLATILITY.get(token, DEFAULT_VOLATILITY)
+
+
+def sample_terminal_prices(
+    rng: np.random.Generator,
+    spot: np.ndarray,
+    volatility: np.ndarray,
+    horizon_days: int,
+    n_paths: int,
+    correlation: float = 0.7,
+    price_ranges: Optional[Mapping[int, Tuple[float, float]]] = None
+) -> np.ndarray:
+    """
+    Sample token prices at the horizon
+
+    Geometric Brownian motion with zero expected return and a single market
+    factor (each token's shock is `correlation` market + the rest
+    idiosyncratic). Tokens in price_ranges are drawn uniformly between the
+    given bounds instead.
+
+    Returns:
+        (n_paths x tokens) array
+    """
+    t = horizon_days / 365.0
+    market = rng.standard_normal((n_paths, 1))
+    own = rng.standard_normal((n_paths, len(spot)))
+    shocks = correlation * market + np.sqrt(1 - correlation ** 2) * own
+
+    prices = spot * np.exp(-0.5 * volatility ** 2 * t + volatility * np.sqrt(t) * shocks)
+
+    for index, (low, high) in (price_ranges or {}).items():
+        prices[:, index] = rng.uniform(low, high, n_paths)
+
+    return prices
+
+
+class MonteCarloTaxSimulation:
+    """Percentile tax outcomes per cost basis method and candidate country"""
+
+    def __init__(
+        self,
+        engine: ResidencyComparisonEngine,
+        lots: Sequence[Dict],
+        spot_prices: Mapping[str, float],
+        countries: Sequence[str],
+        horizon_days: int,
+        n_paths: int = 5000,
+        seed: int = 42,
+        sell_fraction: float = 1.0,
+        volatility: Optional[Mapping[str, float]] = None,
+        price_ranges: Optional[Mapping[str, Tuple[float, float]]] = None,
+        correlation: float = 0.7,
+        methods: Sequence[CostBasisMethod] = SIMULATED_METHODS,
+        now: Optional[datetime] = None,
+        **tax_options
+    ):
+        self.engine = engine
+        self.countries = [c for c in countries if c in engine.index]
+        self.columns = engine.positions(self.countries)
+        self.horizon_days = horizon_days
+        self.n_paths = n_paths
+        self.seed = seed
+        self.correlation = correlation
+        self.methods = list(methods)
+        self.tax_options = tax_options
+
+        # Tokens without a price can't be simulated
+        self.skipped_tokens = sorted({lot["token"] for lot in lots if not spot_prices.get(lot["token"])})
+        lots = [lot for lot in lots if spot_prices.get(lot["token"])]
+
+        self.tokens = sorted({lot["token"] for lot in lots})
+        token_index = {token: i for i, token in enumerate(self.tokens)}
+
+        self.spot = np.array([spot_prices[t] for t in self.tokens], dtype=float)
+        volatility = volatility or {}
+        self.volatility = np.array(
+            [volatility.get(t, default_volatility(t)) for t in self.tokens], dtype=float
+        )
+        self.price_ranges = {
+            token_index[t]: tuple(bounds) for t, bounds in (price_ranges or {}).items() if t in token_index
+        }
+
+        now = now or datetime.utcnow()
+        self.lot_token = np.array([token_index[lot["token"]] for lot in lots], dtype=np.int64)
+        self.lot_amount = np.array([lot["amount"] for lot in lots], dtype=float)
+        self.lot_cost = np.array([lot["cost"] for lot in lots], dtype=float)
+        self.lot_acquired = np.array(
+            [datetime.fromisoformat(lot["acquired"]).timestamp() for lot in lots], dtype=float
+        )
+        # Days held on the sale date (end of horizon)
+        self.lot_held_days = (
+            (now.timestamp() - self.lot_acquired) // 86400 + horizon_days
+        ).astype(np.int64)
+
+        self.sell_qty = np.bincount(self.lot_token, weights=self.lot_amount, minlength=len(self.tokens)) * sell_fraction
+
+    def _sold(self, method: CostBasisMethod) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Amount sold from each lot and its unit cost under a method
+
+        Returns:
+            (sold_amount, unit_cost), one value per lot
+        """
+        sold = np.zeros_like(self.lot_amount)
+        unit_cost = self.lot_cost.copy()
+
+        for t in range(len(self.tokens)):
+            lots = np.flatnonzero(self.lot_token == t)
+            if method == CostBasisMethod.LIFO:
+                order = lots[np.argsort(-self.lot_acquired[lots], kind="stable")]
+            elif method == CostBasisMethod.HIFO:
+                order = lots[np.argsort(-self.lot_cost[lots], kind="stable")]
+            else:
+                # FIFO, and lot order for AVERAGE_COST holding periods
+                order = lots[np.argsort(self.lot_acquired[lots], kind="stable")]
+
+            taken_before = np.cumsum(self.lot_amount[order]) - self.lot_amount[order]
+            sold[order] = np.clip(self.sell_qty[t] - taken_before, 0, self.lot_amount[order])
+
+            if method == CostBasisMethod.AVERAGE_COST:
+                amounts = self.lot_amount[lots]
+                unit_cost[lots] = (amounts * self.lot_cost[lots]).sum() / amounts.sum()
+
+        return sold, unit_cost
+
+    def _method_matrices(self, method: CostBasisMethod):
+        """Price-independent quantities/costs, split short/long per country"""
+        sold, unit_cost = self._sold(method)
+
+        # (lots x countries) long-term mask
+        is_long = (self.lot_held_days[:, None] >= self.engine.holding_days[None, :]).astype(float)
+
+        token_onehot = np.zeros((len(sold), len(self.tokens)))
+        token_onehot[np.arange(len(sold)), self.lot_token] = 1.0
+
+        long_qty = token_onehot.T @ (sold[:, None] * is_long)                      # tokens x countries
+        short_qty = (token_onehot.T @ sold)[:, None] - long_qty
+        long_cost = (sold * unit_cost) @ is_long                                     # countries
+        short_cost = (sold * unit_cost).sum() - long_cost
+
+        return short_qty, long_qty, short_cost, long_cost
+
+    def run(self, progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """
+        Run the simulation
+
+        Args:
+            progress: Called with (paths_done, paths_total) after each batch
+
+        Returns:
+            Result dict (JSON-serializable)
+        """
+        rng = np.random.default_rng(self.seed)
+        matrices = {method: self._method_matrices(method) for method in self.methods}
+
+        taxes = {method: np.empty((self.n_paths, len(self.columns))) for method in self.methods}
+        prices = np.empty((self.n_paths, len(self.tokens)))
+
+        for start in range(0, self.n_paths, PATH_BATCH_SIZE):
+            stop = min(start + PATH_BATCH_SIZE, self.n_paths)
+            batch_prices = sample_terminal_prices(
+                rng, self.spot, self.volatility, self.horizon_days, stop - start,
+                correlation=self.correlation, price_ranges=self.price_ranges
+            )
+            prices[start:stop] = batch_prices
+
+            for method, (short_qty, long_qty, short_cost, long_cost) in matrices.items():
+                short_tax, long_tax = self.engine.taxes(
+                    batch_prices @ short_qty - short_cost,
+                    batch_prices @ long_qty - long_cost,
+                    **self.tax_options
+                )
+                taxes[method][start:stop] = (short_tax + long_tax)[:, self.columns]
+
+            if progress:
+                progress(stop, self.n_paths)
+
+        return {
+            "n_paths": self.n_paths,
+            "seed": self.seed,
+            "horizon_days": self.horizon_days,
+            "percentiles": list(PERCENTILES),
+            "countries": self.countries,
+            "skipped_tokens": self.skipped_tokens,
+            "prices": {
+                token: self._distribution(prices[:, i]) for i, token in enumerate(self.tokens)
+            },
+            "methods": {method.value: self._summarize(taxes[method]) for method in self.methods}
+        }
+
+    def _distribution(self, values: np.ndarray) -> Dict[str, float]:
+        points = np.percentile(values, PERCENTILES)
+        summary = {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, points)}
+        summary["mean"] = round(float(values.mean()), 2)
+        return summary
+
+    def _summarize(self, taxes: np.ndarray) -> Dict:
+        """Per-country tax distribution + probability of being the cheapest"""
+        cheapest = np.bincount(np.argmin(taxes, axis=1), minlength=len(self.countries)) / self.n_paths
+        medians = np.median(taxes, axis=0)
+
+        return {
+            "countries": {
+                country: {
+                    **self._distribution(taxes[:, i]),
+                    "probability_lowest": round(float(cheapest[i]), 4)
+                }
+                for i, country in enumerate(self.countries)
+            },
+            "lowest_median_tax": self.countries[int(np.argmin(medians))] if self.countries else None
+        }
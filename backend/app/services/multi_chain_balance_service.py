@@ -6,22 +6,121 @@ Implements fallback strategy and rate limit handling.
 """
 
 import httpx
+import json
 import logging
+import time
 from typing import Dict, List, Optional, Tuple
 from decimal import Decimal
 import os
 from app.config import settings
 from app.services.blockchain_detector import ChainDetector, BlockchainType
+from app.services.evm_rpc_batch import EvmBalanceReader, RpcBatchClient, RpcError
 
 logger = logging.getLogger(__name__)
 
 
+# Average block time per chain (seconds), used to size the balance cache window
+BLOCK_TIMES = {
+    "ethereum": 12.0,
+    "polygon": 2.0,
+    "bsc": 3.0,
+    "arbitrum": 0.25,
+    "optimism": 2.0,
+    "base": 2.0,
+    "avalanche": 2.0,
+    "fantom": 1.0,
+    "solana": 0.4,
+    "bitcoin": 600.0,
+}
+
+# Balances are reused for this many blocks, clamped to [MIN, MAX] seconds
+BALANCE_CACHE_BLOCKS = 5
+BALANCE_CACHE_MIN_TTL = 15
+BALANCE_CACHE_MAX_TTL = 300
+
+BALANCE_CACHE_PREFIX = "wallet_balances"
+TOKEN_METADATA_PREFIX = "token_metadata"
+WALLET_TOKENS_PREFIX = "wallet_tokens"
+
+# Chains served by the provider APIs (anything else is read over plain RPC)
+ALCHEMY_NETWORKS = {
+    "ethereum": "eth-mainnet",
+    "polygon": "polygon-mainnet",
+    "arbitrum": "arb-mainnet",
+    "optimism": "opt-mainnet",
+    "base": "base-mainnet"
+}
+MORALIS_CHAINS = {
+    "ethereum": "eth",
+    "polygon": "polygon",
+    "bsc": "bsc",
+    "avalanche": "avalanche",
+    "fantom": "fantom",
+    "cronos": "cronos",
+    "arbitrum": "arbitrum",
+    "optimism": "optimism",
+    "base": "base",
+}
+
+# Major tokens always checked by the RPC fallback: address -> (symbol, name, decimals)
+KNOWN_TOKENS = {
+    "ethereum": {
+        "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48": ("USDC", "USD Coin", 6),
+        "0xdac17f958d2ee523a2206206994597c13d831ec7": ("USDT", "Tether USD", 6),
+        "0x6b175474e89094c44da98b954eedeac495271d0f": ("DAI", "Dai Stablecoin", 18),
+        "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2": ("WETH", "Wrapped Ether", 18),
+        "0x2260fac5e5542a773aa44fbcfedf7c193bc2c599": ("WBTC", "Wrapped BTC", 8),
+    },
+    "polygon": {
+        "0x3c499c542cef5e3811e1192ce70d8cc03d5c3359": ("USDC", "USD Coin", 6),
+        "0xc2132d05d31c914a87c6611c10748aeb04b58e8f": ("USDT", "Tether USD", 6),
+        "0x7ceb23fd6bc0add59e62ac25578270cff1b9f619": ("WETH", "Wrapped Ether", 18),
+    },
+    "arbitrum": {
+        "0xaf88d065e77c8cc2239327c5edb3a432268e5831": ("USDC", "USD Coin", 6),
+        "0xfd086bc7cd5c481dcc9c85ebe478a1c0b69fcbb9": ("USDT", "Tether USD", 6),
+        "0x82af49447d8a07e3bd95bd0d56f35241523fbab1": ("WETH", "Wrapped Ether", 18),
+    },
+    "optimism": {
+        "0x0b2c639c533813f4aa9d7837caf62653d097ff85": ("USDC", "USD Coin", 6),
+        "0x4200000000000000000000000000000000000006": ("WETH", "Wrapped Ether", 18),
+    },
+    "base": {
+        "0x833589fcd6edb6e08f4c7c32d4f71b54bda02913": ("USDC", "USD Coin", 6),
+        "0x4200000000000000000000000000000000000006": ("WETH", "Wrapped Ether", 18),
+    },
+    "bsc": {
+        "0x55d398326f99059ff775485246999027b3197955": ("USDT", "Tether USD", 18),
+        "0x8ac76a51cc950d9822d68b83fe1ad97b32cd580d": ("USDC", "USD Coin", 18),
+    },
+}
+
+
+def balance_cache_ttl(chain: str) -> int:
+    """Seconds a balance read stays valid for this chain"""
+    block_time = BLOCK_TIMES.get(chain.lower(), 12.0)
+    return int(min(BALANCE_CACHE_MAX_TTL, max(BALANCE_CACHE_MIN_TTL, block_time * BALANCE_CACHE_BLOCKS)))
+
+
 class MultiChainBalanceService:
     """Fetch balances from multiple blockchains"""
 
-    def __init__(self):
+    # Token metadata never changes: process-wide memo in front of Redis
+    _token_metadata_memo: Dict[Tuple[str, str], Dict[str, any]] = {}
+    _TOKEN_METADATA_MEMO_MAX = 50_000
+
+    def __init__(self, redis_client=None):
         self.http_client = httpx.AsyncClient(timeout=30.0)
 
+        # Redis for the shared balance cache and token metadata store
+        if redis_client is None:
+            try:
+                from app.dependencies.exchange_rate import get_redis_client
+                redis_client = get_redis_client()
+            except Exception as e:
+                logger.warning(f"Redis unavailable, balance cache disabled: {e}")
+        self.redis = redis_client
+
         # API keys
         self.moralis_key = settings.MORALIS_API_KEY
         self.alchemy_key = settings.ALCHEMY_API_KEY
@@ -33,14 +132,19 @@ class MultiChainBalanceService:
     async def get_wallet_balances(
         self,
         wallet_address: str,
-        chain: str
+        chain: str,
+        force_refresh: bool = False
     ) -> Dict[str, any]:
         """
         Get all token balances for a wallet on a specific chain
 
+        Reads within the chain's block window (see balance_cache_ttl) are
+        served from Redis without any upstream call.
+
         Args:
             wallet_address: Wallet address
             chain: Blockchain name
+            force_refresh: Bypass the balance cache
 
         Returns:
             {
@@ -54,22 +158,227 @@ class MultiChainBalanceService:
                         "balance": Decimal,
                         "balance_formatted": Decimal
                     }
-                ]
+                ],
+                "block_number": Optional[int],  # Block the balances were read at (EVM)
+                "fetched_at": float
             }
         """
+        if not force_refresh:
+            cached = self._get_cached_balances(wallet_address, chain)
+            if cached is not None:
+                return cached
+
         chain_info = ChainDetector.get_chain_info(chain)
         blockchain_type = chain_info.get("type")
 
         if blockchain_type == BlockchainType.EVM:
-            return await self._get_evm_balances(wallet_address, chain)
+            balances = await self._get_evm_balances(wallet_address, chain)
         elif blockchain_type == BlockchainType.SOLANA:
-            return await self._get_solana_balances(wallet_address)
+            balances = await self._get_solana_balances(wallet_address)
         elif blockchain_type == BlockchainType.BITCOIN:
-            return await self._get_bitcoin_balance(wallet_address)
+            balances = await self._get_bitcoin_balance(wallet_address)
         else:
             logger.error(f"Unsupported blockchain type: {blockchain_type}")
             return {"native_balance": Decimal("0"), "tokens": []}
 
+        return self._finish_balances(wallet_address, chain, balances, blockchain_type == BlockchainType.EVM)
+
+    async def get_wallet_balances_many(
+        self,
+        wallets: List[Tuple[str, str]],
+        force_refresh: bool = False
+    ) -> Dict[Tuple[str, str], Dict[str, any]]:
+        """
+        Balances of several wallets (e.g. every wallet of a user)
+
+        Cached reads first. EVM wallets of a chain with no provider API
+        (Alchemy / Moralis) are read together: one get_rpc_balances_many
+        round-trip per chain instead of one per wallet. The others go through
+        get_wallet_balances, concurrently.
+
+        Args:
+            wallets: (wallet_address, chain) pairs
+            force_refresh: Bypass the balance cache
+
+        Returns:
+            {(wallet_address, chain): get_wallet_balances() result}
+        """
+        import asyncio
+
+        results = {}
+        rpc_groups: Dict[str, List[str]] = {}
+        others = []
+
+        for wallet_address, chain in dict.fromkeys(wallets):
+            cached = None if force_refresh else self._get_cached_balances(wallet_address, chain)
+            if cached is not None:
+                results[(wallet_address, chain)] = cached
+            elif self._reads_over_rpc(chain):
+                rpc_groups.setdefault(chain, []).append(wallet_address)
+            else:
+                others.append((wallet_address, chain))
+
+        async def read_chain(chain: str, wallet_addresses: List[str]):
+            try:
+                balances = await self.get_rpc_balances_many(wallet_addresses, chain)
+            except Exception as e:
+                logger.error(f"RPC batch failed for {len(wallet_addresses)} wallets on {chain}: {e}")
+                # Not cached: an outage shouldn't pin an empty portfolio
+                balances = {
+                    wallet_address: {"native_balance": Decimal("0"), "tokens": [], "failed": True}
+                    for wallet_address in wallet_addresses
+                }
+            for wallet_address in wallet_addresses:
+                results[(wallet_address, chain)] = self._finish_balances(
+                    wallet_address, chain, balances[wallet_address], True
+                )
+
+        async def read_one(wallet_address: str, chain: str):
+            results[(wallet_address, chain)] = await self.get_wallet_balances(
+                wallet_address, chain, force_refresh=True
+            )
+
+        await asyncio.gather(
+            *(read_chain(chain, wallet_addresses) for chain, wallet_addresses in rpc_groups.items()),
+            *(read_one(wallet_address, chain) for wallet_address, chain in others)
+        )
+        return results
+
+    def _reads_over_rpc(self, chain: str) -> bool:
+        """True if EVM balances of the chain come from plain RPC (no provider API for it)"""
+        chain = chain.lower()
+        if ChainDetector.get_chain_info(chain).get("type") != BlockchainType.EVM:
+            return False
+        return not (self.alchemy_key and chain in ALCHEMY_NETWORKS) and not (self.moralis_key and chain in MORALIS_CHAINS)
+
+    def _finish_balances(
+        self,
+        wallet_address: str,
+        chain: str,
+        balances: Dict[str, any],
+        is_evm: bool
+    ) -> Dict[str, any]:
+        """Stamp a fresh read and cache it (failed reads aren't cached)"""
+        balances.setdefault("block_number", None)
+        balances["fetched_at"] = time.time()
+        if not balances.get("failed"):
+            self._set_cached_balances(wallet_address, chain, balances)
+            if is_evm:
+                self._remember_seen_tokens(chain, wallet_address, balances.get("tokens", []))
+        return balances
+
+    def invalidate_wallet_balances(self, wallet_address: str, chain: str) -> None:
+        """Drop the cached balances for a wallet (e.g. after a known transfer)"""
+        if self.redis is None:
+            return
+        try:
+            self.redis.delete(self._balance_cache_key(wallet_address, chain))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate balance cache: {e}")
+
+    # ========== Balance cache ==========
+
+    @staticmethod
+    def _balance_cache_key(wallet_address: str, chain: str) -> str:
+        return f"{BALANCE_CACHE_PREFIX}:{chain.lower()}:{wallet_address.lower()}"
+
+    def _get_cached_balances(self, wallet_address: str, chain: str) -> Optional[Dict[str, any]]:
+        if self.redis is None:
+            return None
+        try:
+            raw = self.redis.get(self._balance_cache_key(wallet_address, chain))
+        except Exception as e:
+            logger.warning(f"Balance cache read failed: {e}")
+            return None
+        if not raw:
+            return None
+
+        data = json.loads(raw)
+        data["native_balance"] = Decimal(data["native_balance"])
+        for token in data.get("tokens", []):
+            token["balance"] = Decimal(token["balance"])
+            token["balance_formatted"] = Decimal(token["balance_formatted"])
+        logger.debug(f"Balance cache hit for {wallet_address} on {chain} (block {data.get('block_number')})")
+        return data
+
+    def _set_cached_balances(self, wallet_address: str, chain: str, balances: Dict[str, any]) -> None:
+        if self.redis is None:
+            return
+        payload = {
+            "native_balance": str(balances["native_balance"]),
+            "tokens": [
+                {**token, "balance": str(token["balance"]), "balance_formatted": str(token["balance_formatted"])}
+                for token in balances.get("tokens", [])
+            ],
+            "block_number": balances.get("block_number"),
+            "fetched_at": balances.get("fetched_at"),
+        }
+        try:
+            self.redis.setex(
+                self._balance_cache_key(wallet_address, chain),
+                balance_cache_ttl(chain),
+                json.dumps(payload)
+            )
+        except Exception as e:
+            logger.warning(f"Balance cache write failed: {e}")
+
+    # ========== Token metadata store ==========
+
+    def _get_token_metadata_many(self, chain: str, token_addresses: List[str]) -> Dict[str, Dict[str, any]]:
+        """
+        Look up known token metadata (memo first, then one Redis HMGET)
+
+        Returns:
+            {lowercased token_address: {"symbol", "name", "decimals"}} for known tokens
+        """
+        chain = chain.lower()
+        found = {}
+        missing = []
+
+        for address in token_addresses:
+            address = address.lower()
+            memo = self._token_metadata_memo.get((chain, address))
+            if memo is not None:
+                found[address] = memo
+            else:
+                missing.append(address)
+
+        if missing and self.redis is not None:
+            try:
+                values = self.redis.hmget(f"{TOKEN_METADATA_PREFIX}:{chain}", missing)
+                for address, raw in zip(missing, values):
+                    if raw:
+                        metadata = json.loads(raw)
+                        found[address] = metadata
+                        self._memoize_token_metadata(chain, address, metadata)
+            except Exception as e:
+                logger.warning(f"Token metadata lookup failed: {e}")
+
+        return found
+
+    def _store_token_metadata_many(self, chain: str, metadata_by_address: Dict[str, Dict[str, any]]) -> None:
+        """Persist token metadata permanently (no TTL)"""
+        if not metadata_by_address:
+            return
+        chain = chain.lower()
+        mapping = {}
+        for address, metadata in metadata_by_address.items():
+            address = address.lower()
+            self._memoize_token_metadata(chain, address, metadata)
+            mapping[address] = json.dumps(metadata)
+
+        if self.redis is not None:
+            try:
+                self.redis.hset(f"{TOKEN_METADATA_PREFIX}:{chain}", mapping=mapping)
+            except Exception as e:
+                logger.warning(f"Token metadata store failed: {e}")
+
+    @classmethod
+    def _memoize_token_metadata(cls, chain: str, address: str, metadata: Dict[str, any]) -> None:
+        if len(cls._token_metadata_memo) >= cls._TOKEN_METADATA_MEMO_MAX:
+            cls._token_metadata_memo.clear()
+        cls._token_metadata_memo[(chain, address)] = metadata
+
     async def _get_evm_balances(
         self,
         wallet_address: str,
@@ -79,7 +388,7 @@ class MultiChainBalanceService:
 
         # ⚡ PERFORMANCE FIX: Try Alchemy FIRST (Moralis has 401 errors currently)
         # Alchemy is faster and more reliable for supported chains
-        if self.alchemy_key and chain in ["ethereum", "polygon", "arbitrum", "optimism", "base"]:
+        if self.alchemy_key and chain in ALCHEMY_NETWORKS:
             try:
                 return await self._get_alchemy_balances(wallet_address, chain)
             except Exception as e:
@@ -97,7 +406,8 @@ class MultiChainBalanceService:
             return await self._get_rpc_balances(wallet_address, chain)
         except Exception as e:
             logger.error(f"All methods failed for {chain}: {e}")
-            return {"native_balance": Decimal("0"), "tokens": []}
+            # Not cached: an outage shouldn't pin an empty portfolio
+            return {"native_balance": Decimal("0"), "tokens": [], "failed": True}
 
     async def _get_moralis_balances(
         self,
@@ -105,20 +415,6 @@ class MultiChainBalanceService:
         chain: str
     ) -> Dict[str, any]:
         """Fetch balances using Moralis API"""
-
-        # Moralis chain mapping
-        MORALIS_CHAINS = {
-            "ethereum": "eth",
-            "polygon": "polygon",
-            "bsc": "bsc",
-            "avalanche": "avalanche",
-            "fantom": "fantom",
-            "cronos": "cronos",
-            "arbitrum": "arbitrum",
-            "optimism": "optimism",
-            "base": "base",
-        }
-
         moralis_chain = MORALIS_CHAINS.get(chain.lower())
         if not moralis_chain:
             raise ValueError(f"Chain {chain} not supported by Moralis")
@@ -170,6 +466,13 @@ class MultiChainBalanceService:
                     "balance_formatted": balance_formatted
                 })
 
+        # Moralis returns metadata inline; keep it for the Alchemy path
+        self._store_token_metadata_many(chain, {
+            token["token_address"]: {"symbol": token["symbol"], "name": token["name"], "decimals": token["decimals"]}
+            for token in tokens
+            if token.get("token_address")
+        })
+
         return {
             "native_balance": native_balance,
             "tokens": tokens
@@ -181,23 +484,21 @@ class MultiChainBalanceService:
         chain: str
     ) -> Dict[str, any]:
         """Fetch balances using Alchemy API"""
-
-        ALCHEMY_NETWORKS = {
-            "ethereum": "eth-mainnet",
-            "polygon": "polygon-mainnet",
-            "arbitrum": "arb-mainnet",
-            "optimism": "opt-mainnet",
-            "base": "base-mainnet"
-        }
-
         network = ALCHEMY_NETWORKS.get(chain.lower())
         if not network:
             raise ValueError(f"Chain {chain} not supported by Alchemy")
 
         base_url = f"https://{network}.g.alchemy.com/v2/{self.alchemy_key}"
 
-        # ⚡ PERFORMANCE: Fetch native balance and token balances in PARALLEL
+        # ⚡ PERFORMANCE: Fetch block number, native balance and token balances in PARALLEL
         import asyncio
+        block_payload = {
+            "id": 1,
+            "jsonrpc": "2.0",
+            "method": "eth_blockNumber",
+            "params": []
+        }
+
         native_payload = {
             "id": 1,
             "jsonrpc": "2.0",
@@ -212,7 +513,8 @@ class MultiChainBalanceService:
             "params": [wallet_address]
         }
 
-        native_response, tokens_response = await asyncio.gather(
+        block_response, native_response, tokens_response = await asyncio.gather(
+            self.http_client.post(base_url, json=block_payload),
             self.http_client.post(base_url, json=native_payload),
             self.http_client.post(base_url, json=tokens_payload)
         )
@@ -223,6 +525,12 @@ class MultiChainBalanceService:
         native_result = native_response.json()
         tokens_result = tokens_response.json()
 
+        block_number = None
+        try:
+            block_number = int(block_response.json().get("result"), 16)
+        except Exception:
+            pass
+
         native_balance_hex = native_result.get("result", "0x0")
         native_balance = Decimal(int(native_balance_hex, 16)) / Decimal(10 ** 18)
 
@@ -233,18 +541,19 @@ class MultiChainBalanceService:
         tokens_with_balance = []
         for token_balance in token_balances:
             balance_hex = token_balance.get("tokenBalance")
-            if balance_hex and balance_hex != "0x0":
+            if balance_hex and int(balance_hex, 16) != 0:
                 tokens_with_balance.append({
                     "address": token_balance.get("contractAddress"),
                     "balance_hex": balance_hex
                 })
 
-        # ⚡ PERFORMANCE: Fetch ALL token metadata in PARALLEL (85 tokens in ~0.5s instead of 12s!)
-        async def fetch_token_metadata(token_data):
-            """Fetch metadata for a single token"""
-            token_address = token_data["address"]
-            balance_hex = token_data["balance_hex"]
+        # ⚡ PERFORMANCE: Token metadata never changes - only unknown tokens cost an API call
+        known_metadata = self._get_token_metadata_many(
+            chain, [token["address"] for token in tokens_with_balance]
+        )
 
+        async def fetch_token_metadata(token_address):
+            """Fetch metadata for a single token"""
             metadata_payload = {
                 "id": 1,
                 "jsonrpc": "2.0",
@@ -254,81 +563,221 @@ class MultiChainBalanceService:
 
             try:
                 metadata_response = await self.http_client.post(base_url, json=metadata_payload)
-                metadata = metadata_response.json().get("result", {})
+                metadata_response.raise_for_status()
+                body = metadata_response.json()
+
+                # JSON-RPC errors come back as HTTP 200: nothing to cache
+                if body.get("error") or not body.get("result"):
+                    logger.warning(f"No metadata for token {token_address}: {body.get('error')}")
+                    return None
+                metadata = body["result"]
 
                 # ⚡ FIX: Handle None decimals (API can return null)
                 decimals = metadata.get("decimals")
-                if decimals is None or decimals == "":
-                    decimals = 18  # Default for most ERC20 tokens
-                    logger.warning(f"Token {token_address} has no decimals, using default 18")
-                else:
-                    decimals = int(decimals)  # Ensure it's an integer
-
-                balance_raw = Decimal(int(balance_hex, 16))
-                balance_formatted = balance_raw / Decimal(10 ** decimals)
-
                 return {
-                    "token_address": token_address,
-                    "symbol": metadata.get("symbol", "UNKNOWN"),
-                    "name": metadata.get("name", "Unknown Token"),
-                    "decimals": decimals,
-                    "balance": balance_raw,
-                    "balance_formatted": balance_formatted
+                    "symbol": metadata.get("symbol") or "UNKNOWN",
+                    "name": metadata.get("name") or "Unknown Token",
+                    "decimals": None if decimals is None or decimals == "" else int(decimals)
                 }
             except Exception as e:
                 logger.warning(f"Failed to get metadata for token {token_address}: {e}")
                 return None
 
-        # Fetch ALL metadata in parallel
-        if tokens_with_balance:
-            import asyncio
-            metadata_tasks = [fetch_token_metadata(token) for token in tokens_with_balance]
-            metadata_results = await asyncio.gather(*metadata_tasks, return_exceptions=True)
-
-            # Filter out None results (failed fetches)
-            tokens = [result for result in metadata_results if result is not None and not isinstance(result, Exception)]
-
-            logger.info(f"⚡ Fetched metadata for {len(tokens)}/{len(tokens_with_balance)} tokens in parallel")
+        # Fetch missing metadata in parallel, then store it for good
+        unknown = [
+            token["address"] for token in tokens_with_balance
+            if token["address"].lower() not in known_metadata
+        ]
+        if unknown:
+            metadata_results = await asyncio.gather(
+                *[fetch_token_metadata(address) for address in unknown],
+                return_exceptions=True
+            )
+            fetched = {
+                address.lower(): metadata
+                for address, metadata in zip(unknown, metadata_results)
+                if metadata is not None and not isinstance(metadata, Exception)
+            }
+            # Only complete metadata is stored for good, a guessed 18 decimals
+            # is used for this view and fetched again next time
+            self._store_token_metadata_many(chain, {
+                address: metadata for address, metadata in fetched.items()
+                if metadata["decimals"] is not None
+            })
+            for address, metadata in fetched.items():
+                if metadata["decimals"] is None:
+                    logger.warning(f"Token {address} has no decimals, using default 18")
+                    metadata["decimals"] = 18  # Default for most ERC20 tokens
+            known_metadata.update(fetched)
+
+            logger.info(f"⚡ Fetched metadata for {len(fetched)}/{len(unknown)} new tokens ({len(tokens_with_balance) - len(unknown)} cached)")
+
+        for token in tokens_with_balance:
+            metadata = known_metadata.get(token["address"].lower())
+            if metadata is None:
+                continue
+
+            balance_raw = Decimal(int(token["balance_hex"], 16))
+            tokens.append({
+                "token_address": token["address"],
+                "symbol": metadata["symbol"],
+                "name": metadata["name"],
+                "decimals": metadata["decimals"],
+                "balance": balance_raw,
+                "balance_formatted": balance_raw / Decimal(10 ** metadata["decimals"])
+            })
 
         return {
             "native_balance": native_balance,
-            "tokens": tokens
+            "tokens": tokens,
+            "block_number": block_number
         }
 
+    def _get_rpc_url(self, chain: str) -> Optional[str]:
+        """
+        RPC endpoint for an EVM chain
+
+        EVM_RPC_URL_OVERRIDE points every EVM chain at one node, e.g. a
+        local anvil instance in tests or a private node in staging.
+        """
+        if settings.EVM_RPC_URL_OVERRIDE:
+            return settings.EVM_RPC_URL_OVERRIDE
+        return ChainDetector.get_chain_info(chain).get("rpc_url")
+
     async def _get_rpc_balances(
         self,
         wallet_address: str,
         chain: str
     ) -> Dict[str, any]:
         """Fetch balances using public RPC (fallback)"""
+        balances = await self.get_rpc_balances_many([wallet_address], chain)
+        return balances[wallet_address]
 
-        chain_info = ChainDetector.get_chain_info(chain)
-        rpc_url = chain_info.get("rpc_url")
+    async def get_rpc_balances_many(
+        self,
+        wallet_addresses: List[str],
+        chain: str
+    ) -> Dict[str, Dict[str, any]]:
+        """
+        Fetch native + ERC20 balances for several wallets via plain RPC
 
+        One HTTP round-trip per chain: Multicall3 aggregate3 calls packed in a
+        JSON-RPC batch (see EvmBalanceReader). Plain RPC can't discover
+        tokens, so this reads well-known tokens for the chain plus every
+        token previously seen in each wallet by Alchemy/Moralis.
+
+        Returns:
+            {wallet_address: get_wallet_balances()-shaped dict}
+        """
+        rpc_url = self._get_rpc_url(chain)
         if not rpc_url:
             raise ValueError(f"No RPC URL available for {chain}")
 
-        # Get native balance
-        payload = {
-            "jsonrpc": "2.0",
-            "method": "eth_getBalance",
-            "params": [wallet_address, "latest"],
-            "id": 1
-        }
+        chain = chain.lower()
+        known_tokens = KNOWN_TOKENS.get(chain, {})
+        seen_tokens = self._get_seen_tokens(chain, wallet_addresses)
+
+        token_addresses = set(known_tokens)
+        for tokens in seen_tokens.values():
+            token_addresses.update(tokens)
+
+        metadata = {address: dict(zip(("symbol", "name", "decimals"), info)) for address, info in known_tokens.items()}
+        metadata.update(self._get_token_metadata_many(
+            chain, [address for address in token_addresses if address not in metadata]
+        ))
+        # Without decimals the raw amount can't be formatted
+        token_addresses = [address for address in token_addresses if address in metadata]
+
+        reader = EvmBalanceReader(RpcBatchClient(self.http_client, rpc_url))
+        raw_balances, block_number = await reader.read_balances(wallet_addresses, token_addresses)
+
+        results = {}
+        for wallet_address in wallet_addresses:
+            raw = raw_balances.get(wallet_address.lower(), {"native": None, "tokens": {}})
+            if raw["native"] is None:
+                raise ValueError(f"RPC returned no native balance for {wallet_address} on {chain}")
+
+            tokens = []
+            for token_address, amount in raw["tokens"].items():
+                if amount <= 0:
+                    continue
+                info = metadata[token_address]
+                balance_raw = Decimal(amount)
+                tokens.append({
+                    "token_address": token_address,
+                    "symbol": info["symbol"],
+                    "name": info["name"],
+                    "decimals": info["decimals"],
+                    "balance": balance_raw,
+                    "balance_formatted": balance_raw / Decimal(10 ** info["decimals"])
+                })
 
-        response = await self.http_client.post(rpc_url, json=payload)
-        response.raise_for_status()
-        result = response.json()
+            results[wallet_address] = {
+                "native_balance": Decimal(raw["native"]) / Decimal(10 ** 18),
+                "tokens": tokens,
+                "block_number": block_number
+            }
 
-        balance_hex = result.get("result", "0x0")
-        native_balance = Decimal(int(balance_hex, 16)) / Decimal(10 ** 18)
+        return results
 
-        # Note: Can't easily get ERC20 tokens without contract addresses
-        # Would need to use an indexer or keep a list of known tokens
-        return {
-            "native_balance": native_balance,
-            "tokens": []  # RPC fallback doesn't support token discovery
-        }
+    async def get_state_fingerprint(
+        self,
+        wallet_address: str,
+        chain: str
+    ) -> Optional[str]:
+        """
+        Cheap fingerprint of a wallet's on-chain state (EVM only)
+
+        Uses the public RPC (nonce + native balance) so it doesn't consume
+        Alchemy/Moralis quota. Incoming ERC20 transfers don't change either
+        value, so callers must still force a full sync periodically.
+
+        Returns:
+            "<nonce>:<balance_wei>" or None if unsupported/unavailable
+        """
+        chain_info = ChainDetector.get_chain_info(chain)
+        rpc_url = self._get_rpc_url(chain)
+        if chain_info.get("type") != BlockchainType.EVM or not rpc_url:
+            return None
+
+        try:
+            nonce, balance = await RpcBatchClient(self.http_client, rpc_url).batch([
+                ("eth_getTransactionCount", [wallet_address, "latest"]),
+                ("eth_getBalance", [wallet_address, "latest"]),
+            ])
+            if isinstance(nonce, RpcError) or isinstance(balance, RpcError) or nonce is None or balance is None:
+                return None
+            return f"{int(nonce, 16)}:{int(balance, 16)}"
+        except Exception as e:
+            logger.warning(f"State fingerprint failed for {wallet_address} on {chain}: {e}")
+            return None
+
+    # ========== Tokens seen per wallet (for RPC fallback) ==========
+
+    @staticmethod
+    def _seen_tokens_key(chain: str, wallet_address: str) -> str:
+        return f"{WALLET_TOKENS_PREFIX}:{chain.lower()}:{wallet_address.lower()}"
+
+    def _remember_seen_tokens(self, chain: str, wallet_address: str, tokens: List[Dict[str, any]]) -> None:
+        addresses = [token["token_address"].lower() for token in tokens if token.get("token_address")]
+        if not addresses or self.redis is None:
+            return
+        try:
+            self.redis.sadd(self._seen_tokens_key(chain, wallet_address), *addresses)
+        except Exception as e:
+            logger.warning(f"Failed to record wallet tokens: {e}")
+
+    def _get_seen_tokens(self, chain: str, wallet_addresses: List[str]) -> Dict[str, set]:
+        if self.redis is None:
+            return {}
+        try:
+            pipe = self.redis.pipeline()
+            for wallet_address in wallet_addresses:
+                pipe.smembers(self._seen_tokens_key(chain, wallet_address))
+            return dict(zip(wallet_addresses, pipe.execute()))
+        except Exception as e:
+            logger.warning(f"Failed to read wallet tokens: {e}")
+            return {}
 
     async def _get_solana_balances(self, wallet_address: str) -> Dict[str, any]:
         """Fetch Solana balances"""
@@ -0,0 +1,628 @@
+"""
+Notification Fan-out
+
+Sends one notification to many recipients (monthly usage resets, tax data
+change alerts, admin broadcasts):
+
+- users are loaded in id-ordered batches, one query per batch, only the
+  columns needed
+- providers with a bulk API use it: a SendGrid mail/send request carries up
+  to 1000 personalizations (one per recipient, who don't see each other).
+  Twilio and webhooks have none, so they get one request per recipient
+- requests run concurrently under a per-provider limit (requests in flight
+  and requests per second), throttled and 5xx responses are retried
+- every delivery has an idempotency key derived from (notification key,
+  channel, user). Before sending, a batch claims its keys in
+  notification_deliveries: one INSERT ... ON CONFLICT DO NOTHING of
+  "pending" rows, and one conditional UPDATE taking back failed deliveries.
+  Only the claimed recipients are sent to, so a retried fan-out only
+  retries the failures and two concurrent runs of the same notification
+  never reach a user twice
+- results are written per batch with one bulk update of the claimed rows
+
+Provider base URLs come from settings (SENDGRID_API_URL, TWILIO_API_URL):
+point them to a local HTTP server, or pass a client on the stand-in of
+app.services.notification_standin, to load test offline.
+"""
+
+import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+import logging
+import weakref
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.notification_delivery import NotificationDelivery
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+# Users loaded, deduplicated and recorded together
+RECIPIENT_BATCH_SIZE = 1000
+
+# Batches being sent at the same time
+BATCHES_IN_FLIGHT = 4
+
+# SendGrid limit of personalizations per mail/send request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+SMS_MAX_LENGTH = 160
+
+# Attempts of a throttled (429) or failed (5xx) provider request
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5  # Seconds, doubled at each attempt (unless Retry-After says otherwise)
+
+# A "pending" delivery older than this was claimed by a run that died: claimable again
+PENDING_CLAIM_TIMEOUT = timedelta(minutes=15)
+
+# User column holding the address of each channel
+USER_ADDRESS_COLUMNS = {
+    "email": "email",
+    "sms": "phone_number",
+}
+
+
+@dataclass(frozen=True)
+class Recipient:
+    address: str                   # Email, phone number (E.164) or webhook URL
+    user_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class NotificationMessage:
+    subject: str
+    body: str
+    html: Optional[str] = None
+
+
+@dataclass
+class Delivery:
+    """Outcome of sending to one recipient"""
+    recipient: Recipient
+    success: bool
+    provider_message_id: Optional[str] = None
+    error: Optional[str] = None
+
+
+def idempotency_key(notification_key: str, channel: str, recipient: Recipient) -> str:
+    """Key of one delivery (the same notification never reaches a user twice on a channel)"""
+    identity = recipient.user_id if recipient.user_id is not None else recipient.address
+    return hashlib.sha256(f"{notification_key}|{channel}|{identity}".encode()).hexdigest()
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ProviderLimit:
+    """Requests in flight and requests per second allowed for one provider"""
+
+    def __init__(self, max_concurrency: int, requests_per_second: float):
+        self.max_concurrency = max_concurrency
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        if self.interval:
+            # Reserve the next start slot (no await in between: no lock needed)
+            now = asyncio.get_running_loop().time()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+            if start > now:
+                try:
+                    await asyncio.sleep(start - now)
+                except BaseException:
+                    self._semaphore.release()
+                    raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+class NotificationProvider(ABC):
+    """Sends a message to recipients of one channel, one request per recipient"""
+
+    channel: str = ""
+
+    def __init__(self, http_client: httpx.AsyncClient, limit: ProviderLimit):
+        self.http_client = http_client
+        self.limit = limit
+
+    @property
+    def configured(self) -> bool:
+        return True
+
+    async def deliver(self, recipients: Sequence[Recipient], message: NotificationMessage) -> List[Delivery]:
+        """
+        Send the message to every recipient (concurrently, within the provider limit)
+
+        Returns:
+            One Delivery per recipient, in order
+        """
+        if not self.configured:
+            logger.warning(f"{self.channel} provider not configured")
+            return [Delivery(recipient, False, error="Provider not configured") for recipient in recipients]
+        return list(await asyncio.gather(*(self._deliver_one(recipient, message) for recipient in recipients)))
+
+    @abstractmethod
+    async def _deliver_one(self, recipient: Recipient, message: NotificationMessage) -> Delivery:
+        """Send the message to one recipient"""
+
+    async def _post(self, url: str, **kwargs) -> httpx.Response:
+        """POST within the provider limit, retrying throttled (429) and 5xx responses"""
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            async with self.limit:
+                response = await self.http_client.post(url, **kwargs)
+            if attempt == MAX_ATTEMPTS or (response.status_code != 429 and response.status_code < 500):
+                return response
+            await asyncio.sleep(_retry_delay(response, attempt))
+        return response
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return RETRY_BACKOFF * 2 ** (attempt - 1)
+
+
+class EmailProvider(NotificationProvider):
+    """SendGrid mail/send: up to 1000 recipients per request"""
+
+    channel = "email"
+
+    def __init__(self, http_client: httpx.AsyncClient, limit: ProviderLimit):
+        super().__init__(http_client, limit)
+        self.url = f"{settings.SENDGRID_API_URL}/v3/mail/send"
+        self.api_key = settings.SENDGRID_API_KEY
+        self.from_email = settings.SENDGRID_FROM_EMAIL
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    async def deliver(self, recipients: Sequence[Recipient], message: NotificationMessage) -> List[Delivery]:
+        if not self.configured:
+            return await super().deliver(recipients, message)
+        chunks = list(_chunks(recipients, SENDGRID_MAX_PERSONALIZATIONS))
+        results = await asyncio.gather(*(self._deliver_chunk(chunk, message) for chunk in chunks))
+        return [delivery for chunk in results for delivery in chunk]
+
+    async def _deliver_one(self, recipient: Recipient, message: NotificationMessage) -> Delivery:
+        return (await self._deliver_chunk([recipient], message))[0]
+
+    async def _deliver_chunk(self, recipients: List[Recipient], message: NotificationMessage) -> List[Delivery]:
+        payload = {
+            "personalizations": [{"to": [{"email": recipient.address}]} for recipient in recipients],
+            "from": {"email": self.from_email},
+            "subject": message.subject,
+            "content": [{"type": "text/plain", "value": message.body}]
+        }
+        if message.html:
+            payload["content"].append({"type": "text/html", "value": message.html})
+
+        try:
+            response = await self._post(
+                self.url,
+                json=payload,
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+        except Exception as e:
+            logger.error(f"SendGrid request failed ({len(recipients)} recipients): {e}")
+            return [Delivery(recipient, False, error=str(e)) for recipient in recipients]
+
+        if response.status_code == 202:
+            message_id = response.headers.get("X-Message-Id")
+            return [Delivery(recipient, True, provider_message_id=message_id) for recipient in recipients]
+
+        error = f"SendGrid error: {response.status_code} - {response.text[:200]}"
+        logger.error(f"{error} ({len(recipients)} recipients)")
+        return [Delivery(recipient, False, error=error) for recipient in recipients]
+
+
+class SmsProvider(NotificationProvider):
+    """Twilio Messages API (no bulk endpoint: one request per recipient)"""
+
+    channel = "sms"
+
+    def __init__(self, http_client: httpx.AsyncClient, limit: ProviderLimit):
+        super().__init__(http_client, limit)
+        self.sid = settings.TWILIO_ACCOUNT_SID
+        self.token = settings.TWILIO_AUTH_TOKEN
+        self.from_number = settings.TWILIO_FROM_NUMBER
+        self.url = f"{settings.TWILIO_API_URL}/2010-04-01/Accounts/{self.sid}/Messages.json"
+
+    @property
+    def configured(self) -> bool:
+        return all([self.sid, self.token, self.from_number])
+
+    async def _deliver_one(self, recipient: Recipient, message: NotificationMessage) -> Delivery:
+        try:
+            response = await self._post(
+                self.url,
+                data={"From": self.from_number, "To": recipient.address, "Body": message.body[:SMS_MAX_LENGTH]},
+                auth=(self.sid, self.token)
+            )
+            if response.status_code == 201:
+                return Delivery(recipient, True, provider_message_id=response.json().get("sid"))
+            return Delivery(recipient, False, error=f"Twilio error: {response.status_code} - {response.text[:200]}")
+        except Exception as e:
+            return Delivery(recipient, False, error=str(e))
+
+
+class WebhookProvider(NotificationProvider):
+    """POST of the message as JSON to each recipient URL"""
+
+    channel = "webhook"
+
+    async def _deliver_one(self, recipient: Recipient, message: NotificationMessage) -> Delivery:
+        payload = {"subject": message.subject, "body": message.body, "user_id": recipient.user_id}
+        try:
+            response = await self._post(recipient.address, json=payload)
+            if 200 <= response.status_code < 300:
+                return Delivery(recipient, True)
+            return Delivery(recipient, False, error=f"Webhook error: {response.status_code}")
+        except Exception as e:
+            return Delivery(recipient, False, error=str(e))
+
+
+class NotificationFanout:
+    """Batched, concurrent, deduplicated sends of one notification"""
+
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        self.http_client = http_client or httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=50)
+        )
+        self.providers: Dict[str, NotificationProvider] = {
+            "email": EmailProvider(self.http_client, ProviderLimit(
+                settings.NOTIFICATION_EMAIL_CONCURRENCY, settings.NOTIFICATION_EMAIL_RATE)),
+            "sms": SmsProvider(self.http_client, ProviderLimit(
+                settings.NOTIFICATION_SMS_CONCURRENCY, settings.NOTIFICATION_SMS_RATE)),
+            "webhook": WebhookProvider(self.http_client, ProviderLimit(
+                settings.NOTIFICATION_WEBHOOK_CONCURRENCY, settings.NOTIFICATION_WEBHOOK_RATE)),
+        }
+
+    def _provider(self, channel: str) -> NotificationProvider:
+        if channel not in self.providers:
+            raise ValueError(f"Unsupported notification channel: {channel}")
+        return self.providers[channel]
+
+    async def send(
+        self,
+        db: Optional[Session],
+        recipients: Iterable[Recipient],
+        message: NotificationMessage,
+        channel: str,
+        notification_key: str,
+        batch_size: int = RECIPIENT_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Send a notification to recipients
+
+        Args:
+            db: Session to deduplicate and record deliveries with (None: no
+                idempotency, e.g. offline load tests)
+            recipients: Recipients (any iterable, consumed batch by batch)
+            message: Subject / body
+            channel: email, sms or webhook
+            notification_key: Identity of the notification, e.g. "usage_reset:2025-11"
+            batch_size: Recipients per batch
+
+        Returns:
+            {"success", "failed", "skipped"} counts (skipped: already sent,
+            or being sent by a concurrent run)
+
+        Raises:
+            ValueError: Unsupported channel
+        """
+        provider = self._provider(channel)
+        results = {"success": 0, "failed": 0, "skipped": 0}
+
+        await self._send_batches(db, provider, _chunks(recipients, batch_size), message, notification_key, results)
+
+        logger.info(
+            f"📣 {notification_key} ({channel}): {results['success']} sent, "
+            f"{results['failed']} failed, {results['skipped']} skipped"
+        )
+        return results
+
+    async def send_to_users(
+        self,
+        db: Session,
+        message: NotificationMessage,
+        channel: str,
+        notification_key: str,
+        user_ids: Optional[Iterable[int]] = None,
+        country_code: Optional[str] = None,
+        batch_size: int = RECIPIENT_BATCH_SIZE
+    ) -> Dict[str, int]:
+        """
+        Send a notification to users
+
+        Args:
+            db: Database session
+            message: Subject / body
+            channel: email or sms
+            notification_key: Identity of the notification
+            user_ids: Users to notify (default: every active user)
+            country_code: Only users of this country (ISO 2-letter code)
+            batch_size: Users per batch
+
+        Returns:
+            {"success", "failed", "skipped"} counts (failed includes unknown
+            users and users without an address on the channel, skipped
+            includes users who turned email notifications off)
+        """
+        provider = self._provider(channel)
+        results = {"success": 0, "failed": 0, "skipped": 0}
+
+        def recipient_batches():
+            for requested, users in _user_batches(db, channel, user_ids, country_code, batch_size):
+                recipients = []
+                for user in users:
+                    if channel == "email" and (user.notifications or {}).get("email_notifications") is False:
+                        results["skipped"] += 1
+                    elif user.address:
+                        recipients.append(Recipient(user.address, user.id))
+                    else:
+                        results["failed"] += 1
+                results["failed"] += requested - len(users)  # Unknown users
+                if recipients:
+                    yield recipients
+
+        await self._send_batches(db, provider, recipient_batches(), message, notification_key, results)
+
+        logger.info(
+            f"📣 {notification_key} ({channel}): {results['success']} sent, "
+            f"{results['failed']} failed, {results['skipped']} skipped"
+        )
+        return results
+
+    async def _send_batches(
+        self,
+        db: Optional[Session],
+        provider: NotificationProvider,
+        batches: Iterable[List[Recipient]],
+        message: NotificationMessage,
+        notification_key: str,
+        results: Dict[str, int]
+    ):
+        """
+        Send batches, BATCHES_IN_FLIGHT at a time
+
+        The next batch is loaded while the previous ones are being sent (the
+        provider limit still caps the requests).
+        """
+        async def run(batch):
+            for name, count in (await self._send_batch(db, provider, batch, message, notification_key)).items():
+                results[name] += count
+
+        in_flight = set()
+        try:
+            for batch in batches:
+                if len(in_flight) >= BATCHES_IN_FLIGHT:
+                    done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                in_flight.add(asyncio.create_task(run(batch)))
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def _send_batch(
+        self,
+        db: Optional[Session],
+        provider: NotificationProvider,
+        batch: List[Recipient],
+        message: NotificationMessage,
+        notification_key: str
+    ) -> Dict[str, int]:
+        """Claim, send and record one batch"""
+        keyed = {idempotency_key(notification_key, provider.channel, recipient): recipient for recipient in batch}
+
+        if db is not None:
+            claimed_ids = _claim_deliveries(db, notification_key, provider.channel, keyed)
+            claimed = [(key, recipient) for key, recipient in keyed.items() if key in claimed_ids]
+        else:
+            claimed = list(keyed.items())
+        deliveries = await provider.deliver([recipient for _, recipient in claimed], message) if claimed else []
+
+        if db is not None and deliveries:
+            _record_deliveries(
+                db, notification_key, provider.channel, [claimed_ids[key] for key, _ in claimed], deliveries
+            )
+
+        sent = sum(1 for delivery in deliveries if delivery.success)
+        return {"success": sent, "failed": len(deliveries) - sent, "skipped": len(batch) - len(claimed)}
+
+
+_shared_fanouts: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, NotificationFanout]" = weakref.WeakKeyDictionary()
+
+
+def get_shared_fanout() -> NotificationFanout:
+    """
+    Fan-out shared by every send of the process (one per event loop)
+
+    Concurrent sends share the per-provider limits instead of each getting
+    its own. Celery workers use get_notification_fanout (worker_runtime).
+    """
+    loop = asyncio.get_running_loop()
+    fanout = _shared_fanouts.get(loop)
+    if fanout is None:
+        fanout = _shared_fanouts[loop] = NotificationFanout()
+    return fanout
+
+
+@dataclass(frozen=True)
+class _NoAddress:
+    """User row of a channel without an address column"""
+    id: int
+    notifications: Optional[Dict]
+    address: None = None
+
+
+def _user_batches(
+    db: Session,
+    channel: str,
+    user_ids: Optional[Iterable[int]],
+    country_code: Optional[str],
+    batch_size: int
+) -> Iterator[Tuple[int, List]]:
+    """
+    Users to notify, batch by batch
+
+    Yields:
+        (users requested in the batch, rows with id / address / notifications)
+    """
+    column = getattr(User, USER_ADDRESS_COLUMNS.get(channel, ""), None)
+    address = column.label("address") if column is not None else None
+    columns = [User.id, User.notifications]
+    if address is not None:
+        columns.append(address)
+
+    def query():
+        statement = select(*columns).where(User.deleted_at.is_(None)).order_by(User.id)
+        if country_code:
+            statement = statement.where(User.current_country == country_code.upper())
+        return statement
+
+    def rows(statement):
+        result = db.execute(statement).all()
+        if address is None:
+            # No address column for the channel (e.g. SMS): nobody can be reached
+            return [_NoAddress(row.id, row.notifications) for row in result]
+        return result
+
+    if user_ids is not None:
+        for chunk in _chunks(sorted(set(user_ids)), batch_size):
+            yield len(chunk), rows(query().where(User.id.in_(chunk)))
+        return
+
+    last_id = 0
+    while True:
+        batch = rows(query().where(User.id > last_id).limit(batch_size))
+        if not batch:
+            return
+        yield len(batch), batch
+        last_id = batch[-1].id
+
+
+def _insert_ignoring_duplicates(db: Session):
+    """INSERT ... ON CONFLICT (idempotency_key) DO NOTHING for the session dialect"""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(NotificationDelivery).on_conflict_do_nothing(index_elements=["idempotency_key"])
+
+
+def _claim_deliveries(
+    db: Session,
+    notification_key: str,
+    channel: str,
+    keyed: Dict[str, Recipient]
+) -> Dict[str, int]:
+    """
+    Claim the deliveries of a batch before sending
+
+    New keys are inserted as "pending" (keys inserted by a concurrent run are
+    left alone), then failed deliveries and pending ones abandoned by a dead
+    run are taken back with a conditional update. The database decides who
+    wins a key, so each recipient is claimed by one run only.
+
+    Returns:
+        {idempotency key: delivery id} of the claimed recipients
+    """
+    now = datetime.utcnow()
+    try:
+        inserted = db.execute(
+            _insert_ignoring_duplicates(db).values([
+                {
+                    "idempotency_key": key,
+                    "notification_key": notification_key[:200],
+                    "channel": channel,
+                    "user_id": recipient.user_id,
+                    "recipient": recipient.address[:500],
+                    "status": "pending",
+                    "attempts": 1,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for key, recipient in keyed.items()
+            ]).returning(NotificationDelivery.idempotency_key, NotificationDelivery.id)
+        ).all()
+        claimed = {row.idempotency_key: row.id for row in inserted}
+
+        others = [key for key in keyed if key not in claimed]
+        if others:
+            retried = db.execute(
+                update(NotificationDelivery)
+                .where(
+                    NotificationDelivery.idempotency_key.in_(others),
+                    or_(
+                        NotificationDelivery.status == "failed",
+                        and_(
+                            NotificationDelivery.status == "pending",
+                            NotificationDelivery.updated_at < now - PENDING_CLAIM_TIMEOUT
+                        )
+                    )
+                )
+                .values(status="pending", attempts=NotificationDelivery.attempts + 1, updated_at=now)
+                .returning(NotificationDelivery.idempotency_key, NotificationDelivery.id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            claimed.update((row.idempotency_key, row.id) for row in retried)
+
+        db.commit()
+        return claimed
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _record_deliveries(
+    db: Session,
+    notification_key: str,
+    channel: str,
+    delivery_ids: List[int],
+    deliveries: List[Delivery]
+):
+    """Bulk update the claimed deliveries with their outcome"""
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": delivery_id,
+            "status": "sent" if delivery.success else "failed",
+            "provider_message_id": delivery.provider_message_id,
+            "error": delivery.error[:1000] if delivery.error else None,
+            "updated_at": now,
+        }
+        for delivery_id, delivery in zip(delivery_ids, deliveries)
+    ]
+
+    try:
+        db.execute(update(NotificationDelivery), rows)
+        db.commit()
+    except Exception as e:
+        # Sent anyway: the rows stay "pending" until PENDING_CLAIM_TIMEOUT
+        db.rollback()
+        logger.error(f"Could not record {len(deliveries)} {channel} deliveries of {notification_key}: {e}")
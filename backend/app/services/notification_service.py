@@ -14,15 +14,21 @@ Features:
 - Priority levels
 - Rate limiting
 - Delivery tracking
+
+Sends to many users (send_bulk_notification, tax data alerts) go through
+the batched, rate-limited and deduplicated fan-out of notification_fanout.
 """
 
 from typing import Optional, Dict, List
+import json
 import logging
 import httpx
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.models.user import User
+from app.models.admin_notification import AdminNotification, NotificationType
+from app.services.notification_fanout import NotificationFanout, NotificationMessage, get_shared_fanout
 
 logger = logging.getLogger(__name__)
 
@@ -35,15 +41,16 @@ class NotificationService:
     def __init__(self, db: Session):
         self.db = db
         self.http_client = httpx.AsyncClient(timeout=10.0)
+        self.fanout: Optional[NotificationFanout] = None  # Default: the process-wide fan-out
         
         # SendGrid configuration
-        self.sendgrid_api_key = getattr(settings, 'SENDGRID_API_KEY', None)
-        self.sendgrid_from = getattr(settings, 'SENDGRID_FROM_EMAIL', 'noreply@cryptonomadhub.com')
-        
+        self.sendgrid_api_key = settings.SENDGRID_API_KEY
+        self.sendgrid_from = settings.SENDGRID_FROM_EMAIL
+
         # Twilio configuration
-        self.twilio_sid = getattr(settings, 'TWILIO_ACCOUNT_SID', None)
-        self.twilio_token = getattr(settings, 'TWILIO_AUTH_TOKEN', None)
-        self.twilio_from = getattr(settings, 'TWILIO_FROM_NUMBER', None)
+        self.twilio_sid = settings.TWILIO_ACCOUNT_SID
+        self.twilio_token = settings.TWILIO_AUTH_TOKEN
+        self.twilio_from = settings.TWILIO_FROM_NUMBER
 
     async def notify_audit_complete(self, user_id: int, audit_id: int) -> bool:
         """
@@ -64,7 +71,7 @@ class NotificationService:
         # Prepare message
         subject = "Your DeFi Audit is Complete!"
         body = f"""
-Hi {user.username},
+Hi {_display_name(user)},
 
 Your DeFi audit (ID: {audit_id}) has been completed successfully.
 
@@ -125,7 +132,7 @@ CryptoNomadHub Team
             return False
 
         try:
-            url = "https://api.sendgrid.com/v3/mail/send"
+            url = f"{settings.SENDGRID_API_URL}/v3/mail/send"
             
             payload = {
                 "personalizations": [{
@@ -175,7 +182,7 @@ CryptoNomadHub Team
             return False
 
         try:
-            url = f"https://api.twilio.com/2010-04-01/Accounts/{self.twilio_sid}/Messages.json"
+            url = f"{settings.TWILIO_API_URL}/2010-04-01/Accounts/{self.twilio_sid}/Messages.json"
 
             data = {
                 "From": self.twilio_from,
@@ -248,7 +255,7 @@ CryptoNomadHub Team
 
         subject = f"Tax Optimization Alert: Save ${potential_savings:,.0f}"
         body = f"""
-Hi {user.username},
+Hi {_display_name(user)},
 
 We've identified tax optimization opportunities in your portfolio:
 
@@ -297,7 +304,7 @@ CryptoNomadHub Team
 
         subject = f"Wash Sale Alert: {token}"
         body = f"""
-Hi {user.username},
+Hi {_display_name(user)},
 
 We detected a potential wash sale violation for {token}.
 
@@ -344,7 +351,7 @@ CryptoNomadHub Team
 
         subject = f"Your {report_type.upper()} Tax Report is Ready"
         body = f"""
-Hi {user.username},
+Hi {_display_name(user)},
 
 Your {report_type} tax report has been generated and is ready for download.
 
@@ -373,40 +380,93 @@ CryptoNomadHub Team
         user_ids: List[int],
         subject: str,
         body: str,
+        notification_key: str,
         channel: str = "email"
     ) -> Dict[str, int]:
         """
         Send notification to multiple users
 
+        Users are loaded and sent to in batches, with the provider bulk API
+        where there is one, and deliveries are deduplicated: sending the same
+        notification again only reaches the users it failed for.
+
         Args:
             user_ids: List of user IDs
             subject: Message subject
             body: Message body
+            notification_key: Identity of this send, e.g. "broadcast:<id>"
+                (a new key for each broadcast, the same key to retry one)
             channel: Notification channel (email, sms)
 
         Returns:
-            Dict with success/failure counts
+            Dict with success/failed/skipped counts
         """
-        results = {"success": 0, "failed": 0}
-
-        for user_id in user_ids:
-            user = self.db.query(User).filter(User.id == user_id).first()
-            if not user:
-                results["failed"] += 1
-                continue
-
-            if channel == "email" and user.email:
-                sent = await self.send_email(user.email, subject, body)
-            elif channel == "sms" and hasattr(user, 'phone_number') and user.phone_number:
-                sent = await self.send_sms(user.phone_number, body[:160])
-            else:
-                results["failed"] += 1
-                continue
+        fanout = self.fanout or get_shared_fanout()
+        return await fanout.send_to_users(
+            self.db,
+            NotificationMessage(subject=subject, body=body),
+            channel,
+            notification_key,
+            user_ids=user_ids
+        )
+
+    def notify_tax_data_updated(
+        self,
+        country_code: str,
+        old_rate: Optional[float],
+        new_rate: Optional[float],
+        sources: List[str]
+    ) -> AdminNotification:
+        """
+        Record a capital gains tax rate change and alert the users of the country
+
+        The admin notification is stored right away, the user alert is sent
+        by the send_bulk_notification task.
+
+        Args:
+            country_code: ISO country code
+            old_rate: Previous CGT rate (fraction)
+            new_rate: New CGT rate (fraction)
+            sources: Data sources of the new rate
+
+        Returns:
+            The admin notification
+        """
+        old_label = f"{old_rate * 100:.1f}%" if old_rate is not None else "n/a"
+        new_label = f"{new_rate * 100:.1f}%" if new_rate is not None else "n/a"
+
+        notification = AdminNotification(
+            type=NotificationType.TAX_DATA_UPDATED,
+            title=f"Tax data updated: {country_code}",
+            message=f"Capital gains tax rate changed from {old_label} to {new_label} ({', '.join(sources)})",
+            country_code=country_code,
+            meta_data=json.dumps({"old_rate": old_rate, "new_rate": new_rate, "sources": sources})
+        )
+        self.db.add(notification)
+        self.db.commit()
+
+        try:
+            from app.tasks.notification_tasks import send_bulk_notification_task
+
+            send_bulk_notification_task.delay(
+                subject=f"Tax rate change in {country_code}",
+                body=f"""
+The capital gains tax rate of {country_code} changed from {old_label} to {new_label}.
+
+Your simulations for {country_code} may need to be re-run: {settings.FRONTEND_URL}/simulations
+
+Best regards,
+CryptoNomadHub Team
+""",
+                notification_key=f"tax_data_updated:{country_code}:{new_rate}",
+                country_code=country_code
+            )
+        except Exception as e:
+            logger.warning(f"Could not enqueue tax data alert for {country_code}: {e}")
+
+        return notification
 
-            if sent:
-                results["success"] += 1
-            else:
-                results["failed"] += 1
 
-        logger.info(f"Bulk notification: {results['success']} sent, {results['failed']} failed")
-        return results
+def _display_name(user: User) -> str:
+    """Name to greet a user with"""
+    return user.full_name or user.email.split('@')[0]
@@ -0,0 +1,72 @@
+"""
+Notification Provider Stand-in
+
+Local replacement of SendGrid, Twilio and webhook receivers to load test the
+notification fan-out offline: an httpx transport answering like the real
+APIs (202 + X-Message-Id, 201 + sid, 200), with optional latency and
+throttling, that counts what it received.
+
+    standin = ProviderStandIn(latency=0.05)
+    fanout = NotificationFanout(http_client=standin.client())
+    await fanout.send(None, recipients, message, "email", "load-test")
+    standin.recipients["email"]  # Recipients received
+"""
+
+import asyncio
+import json
+import uuid
+from collections import Counter
+from typing import Optional
+
+import httpx
+
+
+class ProviderStandIn:
+    """In-process SendGrid / Twilio / webhook endpoint"""
+
+    def __init__(self, latency: float = 0.0, throttle_every: int = 0):
+        """
+        Args:
+            latency: Seconds each request takes
+            throttle_every: Answer every Nth request with a 429 (0: never)
+        """
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.requests = Counter()     # Requests per channel (throttled ones included)
+        self.recipients = Counter()   # Recipients accepted per channel
+        self.throttled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._count = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self._count += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            path = request.url.path
+            channel = "email" if path.endswith("/v3/mail/send") else "sms" if path.endswith("/Messages.json") else "webhook"
+            self.requests[channel] += 1
+
+            if self.throttle_every and self._count % self.throttle_every == 0:
+                self.throttled += 1
+                return httpx.Response(429, headers={"Retry-After": "0"})
+
+            if channel == "email":
+                payload = json.loads(request.content)
+                self.recipients[channel] += sum(len(p["to"]) for p in payload["personalizations"])
+                return httpx.Response(202, headers={"X-Message-Id": uuid.uuid4().hex})
+
+            self.recipients[channel] += 1
+            if channel == "sms":
+                return httpx.Response(201, json={"sid": f"SM{uuid.uuid4().hex}"})
+            return httpx.Response(200)
+        finally:
+            self.in_flight -= 1
+
+    def client(self, timeout: Optional[float] = 10.0) -> httpx.AsyncClient:
+        """HTTP client whose requests are answered by the stand-in"""
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handle), timeout=timeout)
@@ -438,7 +438,7 @@ class PDFGenerator:
     @staticmethod
     async def html_to_pdf(html_content: str, output_path: Optional[str] = None) -> bytes:
         """
-        Convert HTML to PDF using WeasyPrint
+        Convert HTML to PDF using WeasyPrint (in the report render pool)
 
         Args:
             html_content: HTML string
@@ -447,23 +447,36 @@ class PDFGenerator:
         Returns:
             PDF as bytes
         """
-        try:
-            from weasyprint import HTML, CSS
-            from io import BytesIO
-
-            # Create PDF
-            pdf_file = BytesIO()
-            HTML(string=html_content).write_pdf(pdf_file)
-            pdf_bytes = pdf_file.getvalue()
-
-            # Save to file if path provided
-            if output_path:
-                with open(output_path, 'wb') as f:
-                    f.write(pdf_bytes)
-
-            return pdf_bytes
-
-        except ImportError:
-            raise Exception(
-                "WeasyPrint not installed. Run: pip install weasyprint"
-            )
+        from app.services.report_renderer import run_in_render_pool
+
+        pdf_bytes = await run_in_render_pool(render_html_pdf, html_content)
+
+        # Save to file if path provided
+        if output_path:
+            with open(output_path, 'wb') as f:
+                f.write(pdf_bytes)
+
+        return pdf_bytes
+
+
+def render_html_pdf(html_content: str) -> bytes:
+    """
+    Render HTML to PDF bytes (blocking - run it in the report render pool)
+
+    Args:
+        html_content: HTML string
+
+    Returns:
+        PDF as bytes
+    """
+    try:
+        from weasyprint import HTML
+        from io import BytesIO
+    except ImportError:
+        raise Exception(
+            "WeasyPrint not installed. Run: pip install weasyprint"
+        )
+
+    pdf_file = BytesIO()
+    HTML(string=html_content).write_pdf(pdf_file)
+    return pdf_file.getvalue()
@@ -0,0 +1,355 @@
+"""
+Principal Cache
+
+Authenticated requests only need a few facts about their user: id, email,
+role/beta flag, license tier/status and the tier's limits. get_current_user resolves
+them from the token subject (the user's email) through two cache levels
+instead of querying users + licenses on every request:
+
+- an in-process LRU (LOCAL_TTL seconds, LOCAL_MAX_ENTRIES subjects)
+- Redis, under principal:{subject} (PRINCIPAL_TTL seconds), shared by all
+  API processes
+
+and only on a miss from the database (one query joining the license).
+
+Entries are invalidated from the ORM: a Session listener records the users
+whose profile, role or license was written in a flush (profile updates,
+role changes, Paddle/NOWPayments webhooks through LicenseService) and drops
+their entries once the transaction commits. Usage counters don't invalidate
+anything: they aren't part of the principal. Other processes' LRU entries
+aren't reachable, LOCAL_TTL bounds how long they can lag.
+
+A load can race a commit: the principal is read, a webhook commits and
+invalidates, then the (stale) principal would be stored. Invalidation bumps a
+per-user generation (principal_gen:{user_id}) and a miss only stores what it
+loaded if that generation is unchanged since before the load (WATCH, so the
+check and the write are atomic).
+
+Redis errors never fail a request: reads miss, writes and invalidations are
+skipped.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Optional, Set
+
+from redis.exceptions import WatchError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models.license import License, LicenseTier, SubscriptionStatus
+from app.models.user import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_PREFIX = "principal"
+PRINCIPAL_TTL = 5 * 60
+LOCAL_TTL = 10
+LOCAL_MAX_ENTRIES = 1024
+
+# Columns a principal is built from (other columns don't invalidate it)
+USER_COLUMNS = {"id", "email", "role", "beta_tester", "email_verified", "current_country"}
+LICENSE_COLUMNS = {"user_id", "tier", "status", "expires_at"}
+
+_PENDING_KEY = "principal_invalidations"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user as seen by route dependencies"""
+    id: int
+    email: str
+    role: UserRole
+    beta_tester: bool = False
+    email_verified: bool = False
+    current_country: Optional[str] = None
+    tier: LicenseTier = LicenseTier.FREE
+    license_status: Optional[SubscriptionStatus] = None  # None = no license row
+    license_expires_at: Optional[datetime] = None
+    limits: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == UserRole.ADMIN
+
+    @property
+    def has_license(self) -> bool:
+        return self.license_status is not None
+
+    def license_active(self) -> bool:
+        """Same rule as License.is_active"""
+        if self.license_status not in (SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING):
+            return False
+        return not (self.license_expires_at and datetime.utcnow() > self.license_expires_at)
+
+    @classmethod
+    def from_models(cls, user: User, license: Optional[License]) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role or UserRole.USER,
+            beta_tester=bool(user.beta_tester),
+            email_verified=bool(user.email_verified),
+            current_country=user.current_country,
+            tier=license.tier if license else LicenseTier.FREE,
+            license_status=license.status if license else None,
+            license_expires_at=license.expires_at if license else None,
+            limits=license.get_limits() if license else {}
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["license_expires_at"] = self.license_expires_at.isoformat() if self.license_expires_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, payload: str) -> "Principal":
+        data = json.loads(payload)
+        return cls(
+            id=data["id"],
+            email=data["email"],
+            role=UserRole(data["role"]),
+            beta_tester=data.get("beta_tester", False),
+            email_verified=data["email_verified"],
+            current_country=data["current_country"],
+            tier=LicenseTier(data["tier"]),
+            license_status=SubscriptionStatus(data["license_status"]) if data["license_status"] else None,
+            license_expires_at=datetime.fromisoformat(data["license_expires_at"]) if data["license_expires_at"] else None,
+            limits=data["limits"]
+        )
+
+
+def cache_key(subject: str) -> str:
+    return f"{CACHE_PREFIX}:{subject}"
+
+
+def subject_key(user_id: int) -> str:
+    """Subject of a user id (licenses are invalidated by user id)"""
+    return f"{CACHE_PREFIX}_subject:{user_id}"
+
+
+def generation_key(user_id: int) -> str:
+    """Counter bumped on every invalidation of a user"""
+    return f"{CACHE_PREFIX}_gen:{user_id}"
+
+
+def _redis():
+    from app.dependencies.exchange_rate import get_redis_client
+    return get_redis_client()
+
+
+class LocalPrincipalCache:
+    """Thread-safe LRU of principals with a short TTL"""
+
+    def __init__(self, ttl: float = LOCAL_TTL, max_entries: int = LOCAL_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by discard: guards stores while Redis (and its per-user generation) is down
+        self.generation = 0
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if self.clock() >= expires_at:
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+
+    def set(self, subject: str, principal: Principal, generation: Optional[int] = None):
+        """Store a principal (skipped if generation is given and discard ran since)"""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[subject] = (self.clock() + self.ttl, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, subjects: Set[str] = frozenset(), user_ids: Set[int] = frozenset()):
+        with self._lock:
+            self.generation += 1
+            for subject, (_, principal) in list(self._entries.items()):
+                if subject in subjects or principal.id in user_ids:
+                    del self._entries[subject]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local_cache = LocalPrincipalCache()
+
+
+def _cached_principal(subject: str) -> Optional[Principal]:
+    principal = _local_cache.get(subject)
+    if principal is not None:
+        return principal
+
+    try:
+        payload = _redis().get(cache_key(subject))
+    except Exception as e:
+        logger.warning(f"Principal cache read failed: {e}")
+        return None
+    if not payload:
+        return None
+
+    principal = Principal.from_json(payload)
+    _local_cache.set(subject, principal)
+    return principal
+
+
+def _generation(user_id: int) -> tuple:
+    """(local, Redis) generation of a user, taken before loading its principal"""
+    try:
+        stored = _redis().get(generation_key(user_id))
+    except Exception as e:
+        logger.warning(f"Principal generation read failed: {e}")
+        stored = None
+    return _local_cache.generation, stored
+
+
+def _store_principal(subject: str, principal: Principal, generation: tuple):
+    """Cache a loaded principal unless the user was invalidated since generation was taken"""
+    local_generation, stored_generation = generation
+    try:
+        with _redis().pipeline() as pipe:
+            pipe.watch(generation_key(principal.id))
+            if pipe.get(generation_key(principal.id)) != stored_generation:
+                return
+            pipe.multi()
+            pipe.set(cache_key(subject), principal.to_json(), ex=PRINCIPAL_TTL)
+            pipe.set(subject_key(principal.id), subject, ex=PRINCIPAL_TTL)
+            pipe.execute()
+    except WatchError:
+        return
+    except Exception as e:
+        logger.warning(f"Principal cache write failed: {e}")
+    _local_cache.set(subject, principal, generation=local_generation)
+
+
+def load_principal(db: Session, subject: str) -> Optional[Principal]:
+    """Principal of a token subject from the database (None if the user doesn't exist)"""
+    row = db.query(User, License).outerjoin(
+        License, License.user_id == User.id
+    ).filter(User.email == subject).first()
+    if row is None:
+        return None
+    return Principal.from_models(*row)
+
+
+def get_principal(db: Session, subject: str) -> Optional[Principal]:
+    """
+    Principal of a token subject (LRU, then Redis, then the database)
+
+    Args:
+        db: Session, only queried on a cache miss
+        subject: Token "sub" claim (user email)
+
+    Returns:
+        Principal, or None for unknown users (not cached)
+    """
+    principal = _cached_principal(subject)
+    if principal is not None:
+        return principal
+
+    # The generation is per user: resolve the id, then load
+    user_id = db.query(User.id).filter(User.email == subject).scalar()
+    if user_id is None:
+        return None
+    generation = _generation(user_id)
+
+    principal = load_principal(db, subject)
+    if principal is not None and principal.id == user_id:
+        _store_principal(subject, principal, generation)
+    return principal
+
+
+def invalidate_principals(subjects: Set[str] = frozenset(), user_ids: Set[int] = frozenset()):
+    """
+    Drop cached principals
+
+    Args:
+        subjects: Token subjects (emails)
+        user_ids: User IDs (their subjects are looked up in Redis, their
+            generation is bumped so in-flight loads aren't stored)
+    """
+    subjects = set(subjects)
+    _local_cache.discard(subjects, set(user_ids))
+
+    try:
+        redis_client = _redis()
+        if user_ids:
+            subject_keys = [subject_key(user_id) for user_id in user_ids]
+            subjects.update(s for s in redis_client.mget(subject_keys) if s)
+        else:
+            subject_keys = []
+        keys = [cache_key(subject) for subject in subjects] + subject_keys
+        pipe = redis_client.pipeline(transaction=False)
+        if keys:
+            pipe.delete(*keys)
+        for user_id in user_ids:
+            pipe.incr(generation_key(user_id))
+            pipe.expire(generation_key(user_id), PRINCIPAL_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Principal invalidation failed: {e}")
+
+
+def clear_local_cache():
+    """Empty this process' LRU (tests, or after a fork)"""
+    _local_cache.clear()
+
+
+def _changed_columns(instance) -> Set[str]:
+    return {attr.key for attr in inspect(instance).attrs if attr.history.has_changes()}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_invalidations(session, flush_context):
+    # new/dirty/deleted and attribute history still reflect the flushed changes here
+    subjects, user_ids = session.info.setdefault(_PENDING_KEY, (set(), set()))
+
+    for instance in list(session.new) + list(session.deleted):
+        if isinstance(instance, User):
+            subjects.add(instance.email)
+            user_ids.add(instance.id)
+        elif isinstance(instance, License):
+            user_ids.add(instance.user_id)
+
+    for instance in session.dirty:
+        if isinstance(instance, User) and _changed_columns(instance) & USER_COLUMNS:
+            # Old and new email: both subjects may be cached
+            history = inspect(instance).attrs.email.history
+            subjects.update(e for e in (*history.deleted, *history.unchanged, *history.added) if e)
+            user_ids.add(instance.id)
+        elif isinstance(instance, License) and _changed_columns(instance) & LICENSE_COLUMNS:
+            user_ids.add(instance.user_id)
+
+    subjects.discard(None)
+    user_ids.discard(None)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and (pending[0] or pending[1]):
+        invalidate_principals(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -2,7 +2,8 @@
 Protocol Detector Service
 
 Auto-detects DeFi protocols from contract addresses and method signatures.
-Syncs with DeFiLlama protocols database for comprehensive coverage.
+Address lookups go to the in-memory protocol registry (built-in addresses +
+DeFiLlama protocols database, see protocol_registry).
 
 Features:
 - Auto-detection via method signatures
@@ -11,11 +12,18 @@ Features:
 - Protocol categorization (DEX, Lending, Yield, etc.)
 """
 
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 import httpx
 import logging
 from functools import lru_cache
-from app.config import settings
+from sqlalchemy.orm import Session
+from app.services.protocol_registry import (
+    ANY_CHAIN,
+    BUILTIN_PROTOCOLS,
+    get_protocol_registry,
+    lookup_protocol,
+    sync_defillama_protocols,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,64 +33,8 @@ class ProtocolDetector:
     Auto-detects DeFi protocols from transactions
     """
 
-    # Known protocol addresses (multi-chain)
-    KNOWN_PROTOCOLS = {
-        # Uniswap V2
-        "0x5c69bee701ef814a2b6a3edd4b1652cb9cc5aa6f": {"name": "Uniswap V2", "type": "dex", "version": "2"},
-        "0x7a250d5630b4cf539739df2c5dacb4c659f2488d": {"name": "Uniswap V2 Router", "type": "dex", "version": "2"},
-        
-        # Uniswap V3
-        "0x1f98431c8ad98523631ae4a59f267346ea31f984": {"name": "Uniswap V3", "type": "dex", "version": "3"},
-        "0xe592427a0aece92de3edee1f18e0157c05861564": {"name": "Uniswap V3 Router", "type": "dex", "version": "3"},
-        
-        # Sushiswap
-        "0xc0aee478e3658e2610c5f7a4a2e1777ce9e4f2ac": {"name": "Sushiswap", "type": "dex", "version": "1"},
-        "0xd9e1ce17f2641f24ae83637ab66a2cca9c378b9f": {"name": "Sushiswap Router", "type": "dex", "version": "1"},
-        
-        # Curve
-        "0xbebc44782c7db0a1a60cb6fe97d0b483032ff1c7": {"name": "Curve 3pool", "type": "dex", "version": "1"},
-        "0x8301ae4fc9c624d1d396cbdaa1ed877821d7c511": {"name": "Curve CRV/ETH", "type": "dex", "version": "1"},
-        
-        # Balancer
-        "0xba12222222228d8ba445958a75a0704d566bf2c8": {"name": "Balancer V2 Vault", "type": "dex", "version": "2"},
-        
-        # Aave V2
-        "0x7d2768de32b0b80b7a3454c06bdac94a69ddc7a9": {"name": "Aave V2 Lending Pool", "type": "lending", "version": "2"},
-        
-        # Aave V3
-        "0x87870bca3f3fd6335c3f4ce8392d69350b4fa4e2": {"name": "Aave V3 Pool", "type": "lending", "version": "3"},
-        
-        # Compound
-        "0x3d9819210a31b4961b30ef54be2aed79b9c9cd3b": {"name": "Compound Comptroller", "type": "lending", "version": "2"},
-        "0xc00e94cb662c3520282e6f5717214004a7f26888": {"name": "Compound COMP", "type": "lending", "version": "2"},
-        
-        # MakerDAO
-        "0x9759a6ac90977b93b58547b4a71c78317f391a28": {"name": "MakerDAO DSR", "type": "lending", "version": "1"},
-        
-        # Yearn
-        "0xba2e7fed597fd0e3e70f5130bcdbbfe06bb94fe1": {"name": "Yearn YFI Vault", "type": "yield", "version": "2"},
-        
-        # Lido
-        "0xae7ab96520de3a18e5e111b5eaab095312d7fe84": {"name": "Lido stETH", "type": "staking", "version": "1"},
-        
-        # Rocket Pool
-        "0xae78736cd615f374d3085123a210448e74fc6393": {"name": "Rocket Pool rETH", "type": "staking", "version": "1"},
-        
-        # 1inch
-        "0x1111111254fb6c44bac0bed2854e76f90643097d": {"name": "1inch V4 Router", "type": "aggregator", "version": "4"},
-        
-        # Paraswap
-        "0xdef171fe48cf0115b1d80b88dc8eab59176fee57": {"name": "Paraswap Router", "type": "aggregator", "version": "5"},
-        
-        # OpenSea
-        "0x00000000006c3852cbef3e08e8df289169ede581": {"name": "OpenSea Seaport", "type": "nft_marketplace", "version": "1"},
-        
-        # Blur
-        "0x000000000000ad05ccc4f10045630fb830b95127": {"name": "Blur Marketplace", "type": "nft_marketplace", "version": "1"},
-        
-        # Convex
-        "0xf403c135812408bfbe8713b5a23a04b3d48aae31": {"name": "Convex Booster", "type": "yield", "version": "1"},
-    }
+    # Known protocol addresses (multi-chain), see protocol_registry
+    KNOWN_PROTOCOLS = BUILTIN_PROTOCOLS
 
     # Method signature patterns for protocol detection
     METHOD_PATTERNS = {
@@ -113,12 +65,10 @@ class ProtocolDetector:
 
     def __init__(self):
         self.http_client = httpx.AsyncClient(timeout=10.0)
-        self._defillama_protocols = None
 
-    @lru_cache(maxsize=10000)
     def detect_protocol(self, contract_address: str, chain: str = "ethereum") -> Optional[Dict]:
         """
-        Detect protocol from contract address
+        Detect protocol from contract address (in-memory registry lookup)
 
         Args:
             contract_address: Contract address
@@ -127,21 +77,8 @@ class ProtocolDetector:
         Returns:
             Protocol info dict or None
         """
-        address_lower = contract_address.lower()
-
-        # Check known protocols
-        if address_lower in self.KNOWN_PROTOCOLS:
-            return self.KNOWN_PROTOCOLS[address_lower]
-
-        # Check DeFiLlama cache
-        if self._defillama_protocols:
-            for protocol in self._defillama_protocols:
-                if chain in protocol.get("chains", []):
-                    # Check if address matches any TVL source
-                    # This is simplified - real implementation would check TVL sources
-                    pass
-
-        return None
+        entry = lookup_protocol(contract_address, chain)
+        return entry.to_dict() if entry else None
 
     def detect_protocol_from_method(self, method_name: str) -> List[str]:
         """
@@ -153,60 +90,54 @@ class ProtocolDetector:
         Returns:
             List of possible protocol types
         """
-        method_lower = method_name.lower()
-
-        detected_types = []
-        for pattern, types in self.METHOD_PATTERNS.items():
-            if pattern.lower() in method_lower:
-                detected_types.extend(types)
+        return list(_method_protocol_types(method_name.lower()))
 
-        return list(set(detected_types))  # Remove duplicates
-
-    async def sync_defillama_protocols(self) -> int:
+    async def sync_defillama_protocols(self, db: Optional[Session] = None) -> int:
         """
-        Sync protocols from DeFiLlama API
+        Sync protocols from DeFiLlama API into the protocol registry
+
+        Args:
+            db: Session (a short-lived one is opened otherwise)
 
         Returns:
-            Number of protocols synced
+            Number of protocol addresses synced
         """
-        try:
-            response = await self.http_client.get("https://api.llama.fi/protocols")
-
-            if response.status_code != 200:
-                logger.error(f"Failed to fetch DeFiLlama protocols: {response.status_code}")
-                return 0
-
-            protocols = response.json()
-            self._defillama_protocols = protocols
+        own_session = db is None
+        if own_session:
+            from app.database import SessionLocal
+            db = SessionLocal()
 
-            logger.info(f"Synced {len(protocols)} protocols from DeFiLlama")
-
-            return len(protocols)
+        try:
+            return await sync_defillama_protocols(db, self.http_client)
 
         except Exception as e:
             logger.error(f"Failed to sync DeFiLlama protocols: {e}")
+            db.rollback()
             return 0
 
+        finally:
+            if own_session:
+                db.close()
+
     def get_protocol_info(self, protocol_name: str) -> Optional[Dict]:
         """
-        Get detailed protocol info from DeFiLlama
+        Get protocol info from the registry
 
         Args:
-            protocol_name: Protocol name (e.g., "uniswap")
+            protocol_name: Protocol name or DeFiLlama slug (e.g., "uniswap")
 
         Returns:
-            Protocol info or None
+            Protocol info (with every chain it has an address on) or None
         """
-        if not self._defillama_protocols:
+        entries = get_protocol_registry().find(protocol_name)
+        if not entries:
             return None
 
-        protocol_name_lower = protocol_name.lower()
-
-        for protocol in self._defillama_protocols:
-            if protocol.get("slug", "").lower() == protocol_name_lower:
-                return protocol
-
-        return None
+        info = entries[0].to_dict()
+        info.pop("chain", None)
+        info["chains"] = sorted({entry.chain for entry in entries if entry.chain != ANY_CHAIN})
+        info["addresses"] = {entry.chain: entry.address for entry in entries}
+        return info
 
     def categorize_activity(
         self,
@@ -305,3 +236,18 @@ class ProtocolDetector:
         }
 
         return category_map.get(protocol_type, "other")
+
+
+@lru_cache(maxsize=4096)
+def _method_protocol_types(method_lower: str) -> Tuple[str, ...]:
+    """Protocol types of a lowercase method name (patterns scanned once per distinct name)"""
+    detected_types = set()
+    for pattern, types in _METHOD_PATTERNS_LOWER:
+        if pattern in method_lower:
+            detected_types.update(types)
+    return tuple(detected_types)
+
+
+_METHOD_PATTERNS_LOWER = tuple(
+    (pattern.lower(), tuple(types)) for pattern, types in ProtocolDetector.METHOD_PATTERNS.items()
+)
@@ -0,0 +1,393 @@
+"""
+Protocol Registry
+
+Process-wide, read-only map of DeFi protocol contract addresses:
+
+- Built-in addresses (BUILTIN_PROTOCOLS), valid on any chain
+- The known_protocols table, synced daily from the DeFiLlama /protocols list
+  (sync_protocol_registry task)
+
+The registry indexes every entry by (chain, address) and by lowercase name /
+slug, so resolving a contract address is two dict lookups - no database, no
+HTTP. It is loaded when API and worker processes start, swapped atomically
+when this process syncs, and reloaded lazily every MAX_REGISTRY_AGE seconds
+so other processes pick up the daily sync.
+
+The DeFiLlama address of a protocol is often its governance token (AAVE,
+UNI...), not a contract users interact with: DeFiLlama entries name a
+transaction but don't change its protocol type (see ProtocolEntry.source).
+
+Users: ProtocolDetector and the Moralis adapter (blockchain_parser_adapter).
+The legacy audit parser (BlockchainParser.PROTOCOL_ADDRESSES) still uses its
+own hardcoded address map and doesn't see the registry.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import httpx
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from app.models.known_protocol import KnownProtocol
+
+logger = logging.getLogger(__name__)
+
+
+DEFILLAMA_PROTOCOLS_URL = "https://api.llama.fi/protocols"
+
+# Reload from the table after this long (the sync runs daily)
+MAX_REGISTRY_AGE = 3600
+
+# Rows missing from a sync are only deleted if it returned at least this share
+# of the synced rows (an empty or truncated DeFiLlama answer never wipes the table)
+MIN_PRUNE_RATIO = 0.5
+
+# Chain of built-in entries: they match an address on every chain
+ANY_CHAIN = "*"
+
+# Known protocol addresses (multi-chain)
+BUILTIN_PROTOCOLS = {
+    # Uniswap V2
+    "0x5c69bee701ef814a2b6a3edd4b1652cb9cc5aa6f": {"name": "Uniswap V2", "type": "dex", "version": "2"},
+    "0x7a250d5630b4cf539739df2c5dacb4c659f2488d": {"name": "Uniswap V2 Router", "type": "dex", "version": "2"},
+
+    # Uniswap V3
+    "0x1f98431c8ad98523631ae4a59f267346ea31f984": {"name": "Uniswap V3", "type": "dex", "version": "3"},
+    "0xe592427a0aece92de3edee1f18e0157c05861564": {"name": "Uniswap V3 Router", "type": "dex", "version": "3"},
+
+    # Sushiswap
+    "0xc0aee478e3658e2610c5f7a4a2e1777ce9e4f2ac": {"name": "Sushiswap", "type": "dex", "version": "1"},
+    "0xd9e1ce17f2641f24ae83637ab66a2cca9c378b9f": {"name": "Sushiswap Router", "type": "dex", "version": "1"},
+
+    # Curve
+    "0xbebc44782c7db0a1a60cb6fe97d0b483032ff1c7": {"name": "Curve 3pool", "type": "dex", "version": "1"},
+    "0x8301ae4fc9c624d1d396cbdaa1ed877821d7c511": {"name": "Curve CRV/ETH", "type": "dex", "version": "1"},
+
+    # Balancer
+    "0xba12222222228d8ba445958a75a0704d566bf2c8": {"name": "Balancer V2 Vault", "type": "dex", "version": "2"},
+
+    # Aave V2
+    "0x7d2768de32b0b80b7a3454c06bdac94a69ddc7a9": {"name": "Aave V2 Lending Pool", "type": "lending", "version": "2"},
+
+    # Aave V3
+    "0x87870bca3f3fd6335c3f4ce8392d69350b4fa4e2": {"name": "Aave V3 Pool", "type": "lending", "version": "3"},
+
+    # Compound
+    "0x3d9819210a31b4961b30ef54be2aed79b9c9cd3b": {"name": "Compound Comptroller", "type": "lending", "version": "2"},
+    "0xc00e94cb662c3520282e6f5717214004a7f26888": {"name": "Compound COMP", "type": "lending", "version": "2"},
+
+    # MakerDAO
+    "0x9759a6ac90977b93b58547b4a71c78317f391a28": {"name": "MakerDAO DSR", "type": "lending", "version": "1"},
+
+    # Yearn
+    "0xba2e7fed597fd0e3e70f5130bcdbbfe06bb94fe1": {"name": "Yearn YFI Vault", "type": "yield", "version": "2"},
+
+    # Lido
+    "0xae7ab96520de3a18e5e111b5eaab095312d7fe84": {"name": "Lido stETH", "type": "staking", "version": "1"},
+
+    # Rocket Pool
+    "0xae78736cd615f374d3085123a210448e74fc6393": {"name": "Rocket Pool rETH", "type": "staking", "version": "1"},
+
+    # 1inch
+    "0x1111111254fb6c44bac0bed2854e76f90643097d": {"name": "1inch V4 Router", "type": "aggregator", "version": "4"},
+
+    # Paraswap
+    "0xdef171fe48cf0115b1d80b88dc8eab59176fee57": {"name": "Paraswap Router", "type": "aggregator", "version": "5"},
+
+    # OpenSea
+    "0x00000000006c3852cbef3e08e8df289169ede581": {"name": "OpenSea Seaport", "type": "nft_marketplace", "version": "1"},
+
+    # Blur
+    "0x000000000000ad05ccc4f10045630fb830b95127": {"name": "Blur Marketplace", "type": "nft_marketplace", "version": "1"},
+
+    # Convex
+    "0xf403c135812408bfbe8713b5a23a04b3d48aae31": {"name": "Convex Booster", "type": "yield", "version": "1"},
+}
+
+# DeFiLlama chain names / address prefixes -> our chain names
+DEFILLAMA_CHAINS = {
+    "binance": "bsc",
+    "avax": "avalanche",
+    "xdai": "gnosis",
+    "op mainnet": "optimism",
+    "era": "zksync",
+    "zksync era": "zksync",
+    "polygon zkevm": "polygon_zkevm",
+    "multi-chain": "ethereum",  # Unprefixed addresses of multi-chain protocols are mainnet ones
+}
+
+# DeFiLlama categories -> protocol types (see ProtocolDetector.get_protocol_category)
+DEFILLAMA_CATEGORIES = {
+    "dexes": "dex",
+    "dexs": "dex",
+    "dex aggregator": "aggregator",
+    "lending": "lending",
+    "cdp": "lending",
+    "yield": "yield",
+    "yield aggregator": "yield",
+    "liquid staking": "staking",
+    "staking pool": "staking",
+    "restaking": "staking",
+    "liquid restaking": "staking",
+    "bridge": "bridge",
+    "cross chain": "bridge",
+    "derivatives": "derivatives",
+    "options": "options",
+    "insurance": "insurance",
+    "nft marketplace": "nft_marketplace",
+}
+
+
+def normalize_chain(chain: str) -> str:
+    """Our name of a DeFiLlama chain ("Ethereum" -> "ethereum", "Binance" -> "bsc")"""
+    chain = chain.strip().lower()
+    return DEFILLAMA_CHAINS.get(chain, chain.replace(" ", "_"))
+
+
+@dataclass(frozen=True)
+class ProtocolEntry:
+    """One protocol contract address"""
+    name: str
+    type: str
+    chain: str = ANY_CHAIN
+    address: str = ""
+    slug: Optional[str] = None
+    version: Optional[str] = None
+    source: str = "builtin"           # builtin, or the known_protocols source (defillama)
+
+    def to_dict(self) -> Dict:
+        """Protocol info dict (format of the former KNOWN_PROTOCOLS values)"""
+        info = {"name": self.name, "type": self.type}
+        if self.version:
+            info["version"] = self.version
+        if self.slug:
+            info["slug"] = self.slug
+        if self.chain != ANY_CHAIN:
+            info["chain"] = self.chain
+        return info
+
+
+class ProtocolRegistry:
+    """Immutable address and name indexes of every known protocol"""
+
+    def __init__(self, entries: Iterable[ProtocolEntry]):
+        by_address: Dict[Tuple[str, str], ProtocolEntry] = {}
+        by_name: Dict[str, List[ProtocolEntry]] = {}
+
+        for entry in entries:
+            # First entry wins: built-ins are listed before synced rows
+            by_address.setdefault((entry.chain, entry.address), entry)
+            for key in {entry.name.lower(), (entry.slug or "").lower()} - {""}:
+                by_name.setdefault(key, []).append(entry)
+
+        self.by_address: Mapping[Tuple[str, str], ProtocolEntry] = MappingProxyType(by_address)
+        self.by_name: Mapping[str, Tuple[ProtocolEntry, ...]] = MappingProxyType(
+            {key: tuple(matches) for key, matches in by_name.items()}
+        )
+        self.loaded_at = time.monotonic()
+
+    def lookup(self, address: Optional[str], chain: str = "ethereum") -> Optional[ProtocolEntry]:
+        """
+        Protocol of a contract address
+
+        Args:
+            address: Contract address (any case)
+            chain: Chain the address was seen on
+
+        Returns:
+            ProtocolEntry or None
+        """
+        if not address:
+            return None
+        address = address.lower()
+        return self.by_address.get((ANY_CHAIN, address)) or self.by_address.get((chain, address))
+
+    def find(self, name: str) -> Tuple[ProtocolEntry, ...]:
+        """Every address of a protocol, by name or DeFiLlama slug (any case)"""
+        return self.by_name.get(name.lower(), ())
+
+    def __len__(self) -> int:
+        return len(self.by_address)
+
+
+def builtin_entries() -> List[ProtocolEntry]:
+    return [
+        ProtocolEntry(name=info["name"], type=info["type"], address=address, version=info.get("version"))
+        for address, info in BUILTIN_PROTOCOLS.items()
+    ]
+
+
+_registry: Optional[ProtocolRegistry] = None
+_reload_lock = threading.Lock()
+
+
+def load_protocol_registry(db: Optional[Session] = None) -> ProtocolRegistry:
+    """
+    Load the built-in and synced protocols into a new registry and make it the current one
+
+    If the table can't be read, the registry holds the built-in protocols only.
+
+    Args:
+        db: Session to read with (a short-lived one is opened otherwise)
+    """
+    global _registry
+
+    own_session = db is None
+    if own_session:
+        from app.database import SessionLocal
+        db = SessionLocal()
+
+    entries = builtin_entries()
+    try:
+        rows = db.query(
+            KnownProtocol.chain, KnownProtocol.address, KnownProtocol.name,
+            KnownProtocol.slug, KnownProtocol.protocol_type, KnownProtocol.source
+        ).all()
+        entries.extend(
+            ProtocolEntry(
+                name=row.name, type=row.protocol_type, chain=row.chain, address=row.address,
+                slug=row.slug, source=row.source
+            )
+            for row in rows
+        )
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Known protocols not loaded, using built-in protocols only: {e}")
+    finally:
+        if own_session:
+            db.close()
+
+    # Atomic swap: readers holding the old registry keep a consistent view
+    registry = ProtocolRegistry(entries)
+    _registry = registry
+    logger.info(f"🗂️ Protocol registry loaded: {len(registry)} addresses")
+    return registry
+
+
+def get_protocol_registry() -> ProtocolRegistry:
+    """Current registry (loaded on first use, reloaded when older than MAX_REGISTRY_AGE)"""
+    registry = _registry
+    if registry is not None and time.monotonic() - registry.loaded_at < MAX_REGISTRY_AGE:
+        return registry
+
+    with _reload_lock:
+        if _registry is not registry:
+            return _registry  # Another thread just reloaded
+        return load_protocol_registry()
+
+
+def lookup_protocol(address: Optional[str], chain: str = "ethereum") -> Optional[ProtocolEntry]:
+    """Protocol of a contract address (in-memory lookup)"""
+    return get_protocol_registry().lookup(address, chain)
+
+
+def reset_protocol_registry():
+    """Drop the in-process registry (next lookup reloads it)"""
+    global _registry
+    _registry = None
+
+
+# ========== DeFiLlama sync ==========
+
+def parse_defillama_protocols(protocols: List[Dict]) -> Dict[Tuple[str, str], Dict]:
+    """
+    known_protocols rows of a DeFiLlama /protocols response
+
+    DeFiLlama gives one address per protocol: "0x..." on the protocol's main
+    chain, or "<chain>:0x..." on another one. Non-EVM addresses are skipped.
+
+    Returns:
+        {(chain, address): row}
+    """
+    rows = {}
+    for protocol in protocols:
+        address = (protocol.get("address") or "").strip().lower()
+        name = protocol.get("name")
+        if not address or not name:
+            continue
+
+        if ":" in address:
+            chain, address = address.split(":", 1)
+        else:
+            chain = protocol.get("chain") or "ethereum"
+        if not (address.startswith("0x") and len(address) == 42):
+            continue
+
+        chain = normalize_chain(chain)
+        rows.setdefault((chain, address), {
+            "chain": chain,
+            "address": address,
+            "name": name[:255],
+            "slug": protocol.get("slug"),
+            "protocol_type": DEFILLAMA_CATEGORIES.get((protocol.get("category") or "").lower(), "other"),
+            "source": "defillama",
+        })
+    return rows
+
+
+async def sync_defillama_protocols(db: Session, http_client: Optional[httpx.AsyncClient] = None) -> int:
+    """
+    Sync the known_protocols table with the DeFiLlama /protocols list, then reload the registry
+
+    Rows are inserted, updated or deleted in bulk; unchanged rows aren't written.
+    Missing rows aren't deleted when the list looks empty or truncated
+    (see MIN_PRUNE_RATIO).
+
+    Args:
+        db: Session (committed)
+        http_client: Shared HTTP client (a short-lived one is created otherwise)
+
+    Returns:
+        Number of protocol addresses synced
+    """
+    own_client = http_client is None
+    if own_client:
+        http_client = httpx.AsyncClient(timeout=30.0)
+
+    try:
+        response = await http_client.get(DEFILLAMA_PROTOCOLS_URL)
+        response.raise_for_status()
+        synced = parse_defillama_protocols(response.json())
+    finally:
+        if own_client:
+            await http_client.aclose()
+
+    existing = {
+        (row.chain, row.address): row
+        for row in db.query(KnownProtocol).filter(KnownProtocol.source == "defillama")
+    }
+
+    new_rows = [row for key, row in synced.items() if key not in existing]
+    changed_rows = [
+        {"id": existing[key].id, **row}
+        for key, row in synced.items()
+        if key in existing and any(getattr(existing[key], column) != value for column, value in row.items())
+    ]
+    removed_ids = [row.id for key, row in existing.items() if key not in synced]
+    if removed_ids and len(synced) < MIN_PRUNE_RATIO * len(existing):
+        logger.warning(
+            f"DeFiLlama returned {len(synced)} protocol addresses for {len(existing)} synced: "
+            f"keeping the {len(removed_ids)} missing ones"
+        )
+        removed_ids = []
+
+    if new_rows:
+        db.execute(insert(KnownProtocol), new_rows)
+    if changed_rows:
+        db.execute(update(KnownProtocol), changed_rows)
+    if removed_ids:
+        db.execute(delete(KnownProtocol).where(KnownProtocol.id.in_(removed_ids)))
+    db.commit()
+
+    logger.info(
+        f"✅ Synced {len(synced)} protocol addresses from DeFiLlama "
+        f"({len(new_rows)} new, {len(changed_rows)} updated, {len(removed_ids)} removed)"
+    )
+
+    load_protocol_registry(db)
+    return len(synced)
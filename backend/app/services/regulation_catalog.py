@@ -0,0 +1,405 @@
+"""
+Regulation Catalog
+
+Process-wide, read-only view of the `regulations` table.
+
+The table is small (~170 rows) and changes about once a week, but it is read
+on almost every simulation, comparison, optimizer run and chat message. The
+catalog loads every row once into immutable RegulationRecord objects (rates
+already converted to float, crypto/CGT fallback already resolved) and
+pre-serializes the /regulations/ list responses with their ETags.
+
+Writers call bump_regulation_version() after committing; readers compare the
+Redis version counter at most every VERSION_CHECK_SECONDS and swap in a fresh
+catalog when it changed. Without Redis the catalog is simply reloaded every
+MAX_CATALOG_AGE seconds.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.regulation import Regulation
+
+logger = logging.getLogger(__name__)
+
+
+VERSION_KEY = "regulations:version"
+
+# How often readers look at the Redis version counter
+VERSION_CHECK_SECONDS = 5
+
+# Reload anyway after this long (covers writers that don't bump, or no Redis)
+MAX_CATALOG_AGE = 3600
+
+# Sources recognised in free-text notes when data_sources is empty
+HIGH_QUALITY_SOURCES = ['PwC', 'Tax Foundation', 'KPMG', 'OECD', 'Koinly']
+
+
+def _float(value) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _bool(value) -> Optional[bool]:
+    return bool(value) if value is not None else None
+
+
+def extract_data_quality(regulation) -> Tuple[str, List[str]]:
+    """
+    Extract data quality and sources from regulation
+
+    Returns:
+        (quality_level, sources_list)
+    """
+    notes = regulation.notes or ""
+    sources_from_notes = [s for s in HIGH_QUALITY_SOURCES if s in notes]
+
+    # Use existing data_quality from DB if available
+    if regulation.data_quality:
+        quality = regulation.data_quality
+    else:
+        # Fallback: calculate from data (CGT of 0.0 counts as present)
+        has_cgt = regulation.cgt_short_rate is not None
+        has_crypto = regulation.crypto_short_rate is not None
+
+        if sources_from_notes and (has_cgt or has_crypto):
+            quality = 'high' if len(sources_from_notes) >= 2 else 'medium'
+        elif has_cgt:
+            quality = 'medium'
+        elif not has_cgt and not has_crypto:
+            quality = 'low'
+        else:
+            quality = 'unknown'
+
+    # Use data_sources column if available, otherwise extract from notes
+    sources = list(regulation.data_sources) if regulation.data_sources else sources_from_notes
+
+    return quality, sources
+
+
+@dataclass(frozen=True)
+class RegulationRecord:
+    """
+    Immutable copy of one Regulation row
+
+    Attribute names match the model, so records can be passed to helpers
+    written for Regulation (snapshots, confidence score, considerations...).
+    """
+    country_code: str
+    country_name: str
+    flag_emoji: Optional[str]
+    cgt_short_rate: float
+    cgt_long_rate: float
+    crypto_short_rate: Optional[float]
+    crypto_long_rate: Optional[float]
+    crypto_notes: Optional[str]
+    crypto_legal_status: Optional[str]
+    staking_rate: Optional[float]
+    mining_rate: Optional[float]
+    holding_period_months: Optional[int]
+    is_flat_tax: Optional[int]
+    is_progressive: Optional[int]
+    is_territorial: Optional[int]
+    crypto_specific: Optional[int]
+    long_term_discount_pct: Optional[float]
+    exemption_threshold: Optional[float]
+    exemption_threshold_currency: Optional[str]
+    nft_treatment: Optional[str]
+    residency_rule: Optional[str]
+    treaty_countries: Optional[Tuple[str, ...]]
+    defi_reporting: Optional[str]
+    penalties_max: Optional[str]
+    notes: Optional[str]
+    currency_code: Optional[str]
+    currency_name: Optional[str]
+    currency_symbol: Optional[str]
+    currency_tier: Optional[int]
+    uses_usd_directly: Optional[int]
+    recommended_exchange_source: Optional[str]
+    updated_at: Optional[datetime]
+    source_url: Optional[str]
+    data_sources: Optional[Tuple[str, ...]]
+    data_quality: Optional[str]
+
+    # Pre-resolved: crypto-specific rate if known, otherwise general CGT
+    short_rate: float = 0.0
+    long_rate: float = 0.0
+
+    # /regulations/ response fields (without ai_analysis)
+    response: Mapping = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def uses_crypto_rates(self) -> bool:
+        return self.crypto_short_rate is not None
+
+    @property
+    def is_stale(self) -> bool:
+        """Data older than 90 days"""
+        if not self.updated_at:
+            return True
+        return (datetime.now(self.updated_at.tzinfo) - self.updated_at).days > 90
+
+    @classmethod
+    def from_model(cls, regulation: Regulation) -> "RegulationRecord":
+        """Build a record from a Regulation row"""
+        cgt_short = float(regulation.cgt_short_rate)
+        cgt_long = float(regulation.cgt_long_rate)
+        crypto_short = _float(regulation.crypto_short_rate)
+        crypto_long = _float(regulation.crypto_long_rate)
+
+        quality, sources = extract_data_quality(regulation)
+
+        values = dict(
+            country_code=regulation.country_code,
+            country_name=regulation.country_name,
+            flag_emoji=regulation.flag_emoji,
+            cgt_short_rate=cgt_short,
+            cgt_long_rate=cgt_long,
+            crypto_short_rate=crypto_short,
+            crypto_long_rate=crypto_long,
+            crypto_notes=regulation.crypto_notes,
+            crypto_legal_status=regulation.crypto_legal_status,
+            staking_rate=_float(regulation.staking_rate),
+            mining_rate=_float(regulation.mining_rate),
+            holding_period_months=regulation.holding_period_months,
+            is_flat_tax=regulation.is_flat_tax,
+            is_progressive=regulation.is_progressive,
+            is_territorial=regulation.is_territorial,
+            crypto_specific=regulation.crypto_specific,
+            long_term_discount_pct=_float(regulation.long_term_discount_pct),
+            exemption_threshold=_float(regulation.exemption_threshold),
+            exemption_threshold_currency=regulation.exemption_threshold_currency,
+            nft_treatment=regulation.nft_treatment,
+            residency_rule=regulation.residency_rule,
+            treaty_countries=tuple(regulation.treaty_countries) if regulation.treaty_countries is not None else None,
+            defi_reporting=regulation.defi_reporting,
+            penalties_max=regulation.penalties_max,
+            notes=regulation.notes,
+            currency_code=regulation.currency_code,
+            currency_name=regulation.currency_name,
+            currency_symbol=regulation.currency_symbol,
+            currency_tier=regulation.currency_tier,
+            uses_usd_directly=regulation.uses_usd_directly,
+            recommended_exchange_source=regulation.recommended_exchange_source,
+            updated_at=regulation.updated_at,
+            source_url=regulation.source_url,
+            data_sources=tuple(regulation.data_sources) if regulation.data_sources is not None else None,
+            data_quality=regulation.data_quality,
+        )
+
+        response = {
+            "country_code": values["country_code"],
+            "country_name": values["country_name"],
+            "flag_emoji": values["flag_emoji"],
+            "cgt_short_rate": cgt_short,
+            "cgt_long_rate": cgt_long,
+            "crypto_short_rate": crypto_short,
+            "crypto_long_rate": crypto_long,
+            "crypto_notes": values["crypto_notes"],
+            "crypto_legal_status": values["crypto_legal_status"],
+            "staking_rate": values["staking_rate"],
+            "mining_rate": values["mining_rate"],
+            "holding_period_months": values["holding_period_months"],
+            "is_flat_tax": _bool(values["is_flat_tax"]),
+            "is_progressive": _bool(values["is_progressive"]),
+            "is_territorial": _bool(values["is_territorial"]),
+            "crypto_specific": _bool(values["crypto_specific"]),
+            "long_term_discount_pct": values["long_term_discount_pct"],
+            "exemption_threshold": values["exemption_threshold"],
+            "exemption_threshold_currency": values["exemption_threshold_currency"],
+            "nft_treatment": values["nft_treatment"],
+            "residency_rule": values["residency_rule"],
+            "defi_reporting": values["defi_reporting"],
+            "penalties_max": values["penalties_max"],
+            "notes": values["notes"],
+            "updated_at": str(values["updated_at"]) if values["updated_at"] else None,
+            "source_url": values["source_url"],
+            "data_quality": quality,
+            "data_sources": sources if sources else None,
+            "ai_analysis": None,
+        }
+
+        return cls(
+            **values,
+            short_rate=crypto_short if crypto_short is not None else cgt_short,
+            long_rate=crypto_long if crypto_long is not None else cgt_long,
+            response=MappingProxyType(response),
+        )
+
+
+class RegulationCatalog:
+    """Immutable country_code -> RegulationRecord map plus pre-serialized responses"""
+
+    def __init__(self, records: List[RegulationRecord], version: Optional[str] = None):
+        self.version = version
+        self.loaded_at = time.time()
+        self._records: Mapping[str, RegulationRecord] = MappingProxyType(
+            {record.country_code: record for record in records}
+        )
+
+        # Every /regulations/ list variant, serialized once per catalog version
+        self._bodies: Dict[Tuple[bool, bool], Tuple[bytes, str]] = {}
+        for crypto_only in (False, True):
+            for reliable_only in (False, True):
+                items = [
+                    dict(record.response)
+                    for record in self.select(crypto_only=crypto_only, reliable_only=reliable_only)
+                ]
+                body = json.dumps(items, separators=(",", ":"), ensure_ascii=False).encode()
+                etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                self._bodies[(crypto_only, reliable_only)] = (body, etag)
+
+    def get(self, country_code: Optional[str]) -> Optional[RegulationRecord]:
+        """Record for one country (ISO 2-letter code), or None"""
+        if not country_code:
+            return None
+        return self._records.get(country_code.upper())
+
+    def __contains__(self, country_code: str) -> bool:
+        return self.get(country_code) is not None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def all(self) -> List[RegulationRecord]:
+        """All records, in load order (by country code)"""
+        return list(self._records.values())
+
+    def select(self, crypto_only: bool = False, reliable_only: bool = False) -> List[RegulationRecord]:
+        """Records filtered like the /regulations/ list endpoint"""
+        records = self._records.values()
+        if crypto_only:
+            records = [r for r in records if r.crypto_short_rate is not None]
+        if reliable_only:
+            records = [r for r in records if r.response["data_quality"] not in ('low', 'unknown')]
+        return list(records)
+
+    def serialized(self, crypto_only: bool = False, reliable_only: bool = False) -> Tuple[bytes, str]:
+        """
+        Pre-serialized /regulations/ list response
+
+        Returns:
+            (json_body, etag)
+        """
+        return self._bodies[(bool(crypto_only), bool(reliable_only))]
+
+
+_catalog: Optional[RegulationCatalog] = None
+_last_version_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def _redis():
+    try:
+        from app.dependencies.exchange_rate import get_redis_client
+        return get_redis_client()
+    except Exception as e:
+        logger.warning(f"Redis unavailable for regulation catalog: {e}")
+        return None
+
+
+def _current_version() -> Optional[str]:
+    """Version counter in Redis (None if Redis is unavailable)"""
+    redis_client = _redis()
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.get(VERSION_KEY) or "0"
+    except Exception as e:
+        logger.warning(f"Could not read regulation catalog version: {e}")
+        return None
+
+
+def load_regulation_catalog(db: Optional[Session] = None) -> RegulationCatalog:
+    """
+    Load every regulation into a new catalog and make it the current one
+
+    Args:
+        db: Session to read with (a short-lived one is opened otherwise)
+    """
+    global _catalog, _last_version_check
+
+    version = _current_version()
+
+    own_session = db is None
+    if own_session:
+        from app.database import SessionLocal
+        db = SessionLocal()
+
+    try:
+        regulations = db.query(Regulation).order_by(Regulation.country_code).all()
+        catalog = RegulationCatalog([RegulationRecord.from_model(r) for r in regulations], version=version)
+    finally:
+        if own_session:
+            db.close()
+
+    # Atomic swap: readers holding the old catalog keep a consistent view
+    _catalog = catalog
+    _last_version_check = time.time()
+    logger.info(f"📚 Regulation catalog loaded: {len(catalog)} countries (version {version})")
+    return catalog
+
+
+def get_regulation_catalog(db: Optional[Session] = None) -> RegulationCatalog:
+    """
+    Current regulation catalog, reloaded when the Redis version changed
+
+    Args:
+        db: Session to reload with if a reload is needed
+    """
+    global _last_version_check
+
+    catalog = _catalog
+    now = time.time()
+
+    if catalog is not None and now - _last_version_check < VERSION_CHECK_SECONDS:
+        return catalog
+
+    with _reload_lock:
+        catalog = _catalog
+        if catalog is not None and now - _last_version_check < VERSION_CHECK_SECONDS:
+            return catalog  # Another thread just checked
+
+        if catalog is not None:
+            version = _current_version()
+            expired = now - catalog.loaded_at > MAX_CATALOG_AGE
+            if not expired and (version is None or version == catalog.version):
+                _last_version_check = now
+                return catalog
+            logger.info(f"🔄 Regulation catalog outdated ({catalog.version} -> {version}), reloading")
+
+        return load_regulation_catalog(db)
+
+
+def bump_regulation_version():
+    """
+    Signal that the regulations table changed (call after commit)
+
+    Every process reloads its catalog within VERSION_CHECK_SECONDS.
+    """
+    global _catalog
+
+    # This process doesn't wait for the next check
+    _catalog = None
+
+    redis_client = _redis()
+    if redis_client is None:
+        return
+    try:
+        redis_client.incr(VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Could not bump regulation catalog version: {e}")
+
+
+def reset_regulation_catalog():
+    """Drop the in-process catalog (next read reloads it)"""
+    global _catalog
+    _catalog = None
@@ -17,7 +17,7 @@ Features:
 - Multi-jurisdiction support
 """
 
-from .base_report import BaseReportGenerator
+from .base_report import BaseReportGenerator, RenderedReportMixin
 from .pdf_report import PDFReportGenerator
 from .csv_report import CSVReportGenerator
 from .excel_report import ExcelReportGenerator
@@ -26,6 +26,7 @@ from .factory import ReportGeneratorFactory
 
 __all__ = [
     "BaseReportGenerator",
+    "RenderedReportMixin",
     "PDFReportGenerator",
     "CSVReportGenerator",
     "ExcelReportGenerator",
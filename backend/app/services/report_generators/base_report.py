@@ -189,3 +189,47 @@ class BaseReportGenerator(ABC):
 
         jurisdiction_rates = rates.get(self.jurisdiction, rates["US"])
         return jurisdiction_rates["long_term"] if is_long_term else jurisdiction_rates["short_term"]
+
+
+class RenderedReportMixin(ABC):
+    """
+    Reports rendered in the report render pool (PDF, Excel)
+
+    Mix in before BaseReportGenerator and implement render.
+    """
+
+    # Report data keys the documents are built from
+    RENDER_KEYS = ("summary", "short_term", "long_term", "wash_sales")
+
+    async def render_in_pool(self, report_type: str, extension: str, data: Dict) -> bytes:
+        """
+        Render the report with self.render in the report render pool
+
+        The rendered file is cached by (report type, user / tax year /
+        jurisdiction, version of the report data).
+
+        Args:
+            report_type: e.g. "tax_report_pdf"
+            extension: File extension
+            data: Report data (see fetch_report_data)
+
+        Returns:
+            Report content as bytes
+        """
+        from app.services.report_renderer import data_version, render_cached
+
+        # Only what the document is built from (not the ORM disposals) is sent to the pool
+        payload = {key: data[key] for key in self.RENDER_KEYS}
+        return await render_cached(
+            report_type,
+            f"{self.user_id}-{self.tax_year}-{self.jurisdiction}",
+            data_version(payload),
+            extension,
+            self.render,
+            payload
+        )
+
+    @abstractmethod
+    def render(self, data: Dict) -> bytes:
+        """Build the document from report data (blocking, runs in the render pool)"""
+        pass
@@ -10,12 +10,12 @@ import logging
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
-from .base_report import BaseReportGenerator
+from .base_report import BaseReportGenerator, RenderedReportMixin
 
 logger = logging.getLogger(__name__)
 
 
-class ExcelReportGenerator(BaseReportGenerator):
+class ExcelReportGenerator(RenderedReportMixin, BaseReportGenerator):
     """
     Excel Report Generator
 
@@ -27,10 +27,14 @@ class ExcelReportGenerator(BaseReportGenerator):
     """
 
     async def generate(self, db, data: Optional[Dict] = None) -> bytes:
-        """Generate Excel workbook"""
+        """Generate Excel workbook (rendered in the report render pool)"""
         if data is None:
             data = await self.fetch_report_data(db)
 
+        return await self.render_in_pool("tax_report_xlsx", "xlsx", data)
+
+    def render(self, data: Dict) -> bytes:
+        """Build the workbook from report data"""
         wb = Workbook()
 
         # Remove default sheet
@@ -4,7 +4,7 @@ PDF Report Generator
 Generate comprehensive tax reports in PDF format using ReportLab.
 """
 
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 import io
 import logging
@@ -14,12 +14,12 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
-from .base_report import BaseReportGenerator
+from .base_report import BaseReportGenerator, RenderedReportMixin
 
 logger = logging.getLogger(__name__)
 
 
-class PDFReportGenerator(BaseReportGenerator):
+class PDFReportGenerator(RenderedReportMixin, BaseReportGenerator):
     """
     PDF Tax Report Generator
 
@@ -32,10 +32,14 @@ class PDFReportGenerator(BaseReportGenerator):
     """
 
     async def generate(self, db, data: Optional[Dict] = None) -> bytes:
-        """Generate PDF report"""
+        """Generate PDF report (rendered in the report render pool)"""
         if data is None:
             data = await self.fetch_report_data(db)
 
+        return await self.render_in_pool("tax_report_pdf", "pdf", data)
+
+    def render(self, data: Dict) -> bytes:
+        """Build the report from report data"""
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter)
         story = []
@@ -0,0 +1,198 @@
+"""
+Report Renderer
+
+Runs PDF / Excel rendering off the event loop and caches the results.
+
+WeasyPrint, ReportLab and openpyxl are CPU-bound and hold the GIL: a large
+audit PDF rendered inside an async handler blocks every other request of
+the worker for seconds. Rendering functions are run in a bounded process
+pool instead (REPORT_RENDER_WORKERS processes, recycled after a number of
+documents so renderer memory doesn't grow forever).
+
+Rendered documents are stored on disk keyed by (report type, entity id, data
+version), the version being a hash of the data the document is built from,
+so a repeat download is a file read and a changed entity renders a new copy.
+Concurrent requests for the same document share one render.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Documents rendered by a pool process before it is replaced
+MAX_RENDERS_PER_WORKER = 50
+
+
+def data_version(*parts: Any) -> str:
+    """
+    Version of the data a document is rendered from
+
+    Args:
+        parts: JSON-serializable values (dates, Decimals... are stringified)
+
+    Returns:
+        16 hex chars hash, stable across processes
+    """
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class ReportCache:
+    """
+    On-disk cache of rendered documents
+
+    Layout:
+        {report_type}/{entity_id}/{version}.{extension}
+
+    Only the latest version of an entity is kept: storing a version removes
+    the older ones.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.REPORT_CACHE_DIR
+
+    def _entity_dir(self, report_type: str, entity_id: Any) -> str:
+        return os.path.join(self.directory, report_type, str(entity_id))
+
+    def _path(self, report_type: str, entity_id: Any, version: str, extension: str) -> str:
+        return os.path.join(self._entity_dir(report_type, entity_id), f"{version}.{extension}")
+
+    def get(self, report_type: str, entity_id: Any, version: str, extension: str) -> Optional[bytes]:
+        """Cached document, or None"""
+        try:
+            with open(self._path(report_type, entity_id, version, extension), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, report_type: str, entity_id: Any, version: str, extension: str, content: bytes):
+        """Store a document (temp file + rename so readers never see a partial file)"""
+        entity_dir = self._entity_dir(report_type, entity_id)
+        os.makedirs(entity_dir, exist_ok=True)
+
+        path = self._path(report_type, entity_id, version, extension)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        # Drop the previous versions of the entity
+        for name in os.listdir(entity_dir):
+            if name != os.path.basename(path) and not name.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(entity_dir, name))
+                except OSError:
+                    pass
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_inflight: Dict[tuple, asyncio.Future] = {}
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """Process pool of the renderers (started on first use)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a process that runs an event loop and DB pools isn't safe
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.REPORT_RENDER_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    max_tasks_per_child=MAX_RENDERS_PER_WORKER
+                )
+                logger.info(f"🖨️ Report render pool started ({settings.REPORT_RENDER_WORKERS} workers)")
+    return _pool
+
+
+def shutdown_render_pool():
+    """Stop the render pool (app shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def run_in_render_pool(render: Callable[..., bytes], *args) -> bytes:
+    """
+    Run a rendering function in the process pool
+
+    Args:
+        render: Picklable callable (module-level function or method of a
+            picklable object) returning the document bytes
+        args: Its arguments (picklable)
+
+    Returns:
+        Document bytes
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_render_pool(), render, *args)
+
+
+async def render_cached(
+    report_type: str,
+    entity_id: Any,
+    version: str,
+    extension: str,
+    render: Callable[..., bytes],
+    *args,
+    cache: Optional[ReportCache] = None
+) -> bytes:
+    """
+    Cached document, rendered in the process pool on a miss
+
+    Args:
+        report_type: e.g. "defi_audit_pdf"
+        entity_id: Id of the rendered entity
+        version: Data version (see data_version)
+        extension: File extension ("pdf", "xlsx")
+        render: Rendering function (see run_in_render_pool)
+        args: Its arguments
+        cache: Cache to use (default: REPORT_CACHE_DIR)
+
+    Returns:
+        Document bytes
+    """
+    cache = cache or ReportCache()
+    content = cache.get(report_type, entity_id, version, extension)
+    if content is not None:
+        logger.debug(f"📄 {report_type} {entity_id} served from cache")
+        return content
+
+    key = (cache.directory, report_type, str(entity_id), version, extension)
+    pending = _inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    pending = asyncio.get_running_loop().create_future()
+    _inflight[key] = pending
+    try:
+        content = await run_in_render_pool(render, *args)
+        try:
+            cache.put(report_type, entity_id, version, extension, content)
+        except OSError as e:
+            # Serve the document anyway, it'll be rendered again next time
+            logger.warning(f"Could not cache {report_type} {entity_id}: {e}")
+        pending.set_result(content)
+        return content
+    except Exception as e:
+        pending.set_exception(e)
+        pending.exception()  # Retrieved: no warning when nobody else was waiting
+        raise
+    finally:
+        _inflight.pop(key, None)
+        if not pending.done():
+            pending.cancel()  # Request cancelled mid-render
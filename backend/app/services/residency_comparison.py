@@ -0,0 +1,308 @@
+"""
+Residency Comparison Engine
+
+Evaluates a gains profile against every jurisdiction of the regulation
+catalog at once.
+
+The catalog is laid out as NumPy arrays (one slot per country: short/long
+rates, holding period, exemption threshold, long-term discount, territorial
+and banned flags), so a set of disposals or a batch of what-if gain scenarios
+is taxed in all countries with a few array operations instead of a Python
+loop per country.
+
+Tax model (per country):
+    - Disposals are long-term when held at least the country's holding
+      period (holding_period_months * 30 days, 365 when unknown).
+    - short_tax = short_gains * short_rate, long_tax = long_gains * long_rate
+      (crypto-specific rates when known, general CGT otherwise).
+    - With apply_allowances, the long-term discount reduces taxable long
+      gains (only where the stored long rate equals the short rate, i.e. the
+      discount isn't already folded into the rate) and the exemption
+      threshold is deducted from total gains, pro rata.
+    - With territorial_exempt, territorial countries don't tax the gains
+      (treated as foreign-sourced).
+    - Net losses are never taxed negatively.
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.services.regulation_catalog import RegulationCatalog, RegulationRecord, get_regulation_catalog
+
+logger = logging.getLogger(__name__)
+
+
+# Holding period assumed when a country doesn't specify one
+DEFAULT_HOLDING_DAYS = 365
+
+
+class ResidencyComparisonEngine:
+    """Vectorized tax evaluation over every country of a catalog"""
+
+    def __init__(self, records: Sequence[RegulationRecord]):
+        self.records = list(records)
+        self.codes = [r.country_code for r in self.records]
+        self.index = {code: i for i, code in enumerate(self.codes)}
+
+        self.short_rate = np.array([r.short_rate for r in self.records], dtype=float)
+        self.long_rate = np.array([r.long_rate for r in self.records], dtype=float)
+        self.holding_days = np.array(
+            [r.holding_period_months * 30 if r.holding_period_months else DEFAULT_HOLDING_DAYS for r in self.records],
+            dtype=np.int64
+        )
+        self.exemption_threshold = np.array([r.exemption_threshold or 0.0 for r in self.records], dtype=float)
+        self.exemption_currency = [(r.exemption_threshold_currency or "USD").upper() for r in self.records]
+        self.long_term_discount = np.array(
+            [(r.long_term_discount_pct or 0.0) / 100 for r in self.records], dtype=float
+        )
+        self.is_territorial = np.array([bool(r.is_territorial) for r in self.records], dtype=bool)
+        self.is_banned = np.array([r.crypto_legal_status == 'banned' for r in self.records], dtype=bool)
+
+        # Discount only where the long-term rate doesn't already include it
+        self._discount = np.where(self.long_rate == self.short_rate, self.long_term_discount, 0.0)
+
+    @classmethod
+    def from_catalog(cls, catalog: RegulationCatalog) -> "ResidencyComparisonEngine":
+        return cls(catalog.all())
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def positions(self, country_codes: Iterable[str]) -> np.ndarray:
+        """Array positions of the given countries (unknown codes are dropped)"""
+        return np.array(
+            [self.index[c.upper()] for c in country_codes if c and c.upper() in self.index],
+            dtype=np.int64
+        )
+
+    def _exemption_usd(self, fx_per_usd: Optional[Mapping[str, float]]) -> np.ndarray:
+        """Exemption thresholds in USD (thresholds in unconvertible currencies count as 0)"""
+        fx = {"USD": 1.0}
+        fx.update({k.upper(): float(v) for k, v in (fx_per_usd or {}).items() if v})
+        rates = np.array([fx.get(currency, np.nan) for currency in self.exemption_currency], dtype=float)
+        return np.nan_to_num(self.exemption_threshold / rates, nan=0.0)
+
+    def split_disposals(self, gains: Sequence[float], holding_days: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify disposals per country by holding period
+
+        Args:
+            gains: Realized gain (or loss) of each disposal, USD
+            holding_days: Days each disposed asset was held
+
+        Returns:
+            (short_gains, long_gains), one value per country
+        """
+        gains = np.asarray(gains, dtype=float)
+        held = np.asarray(holding_days, dtype=np.int64)
+
+        # (disposals x countries) long-term mask, reduced by a matrix product
+        is_long = held[:, None] >= self.holding_days[None, :]
+        long_gains = gains @ is_long
+        short_gains = gains.sum() - long_gains
+        return short_gains, long_gains
+
+    def taxes(
+        self,
+        short_gains,
+        long_gains,
+        apply_allowances: bool = False,
+        territorial_exempt: bool = False,
+        fx_per_usd: Optional[Mapping[str, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Short- and long-term tax in every country
+
+        Args:
+            short_gains: Scalar, per-country array, or (scenarios x countries) array
+            long_gains: Same shapes as short_gains
+            apply_allowances: Apply long-term discounts and exemption thresholds
+            territorial_exempt: No tax in territorial countries
+            fx_per_usd: Units of currency per USD, to convert exemption thresholds
+
+        Returns:
+            (short_tax, long_tax), broadcast to (..., countries)
+        """
+        short_gains = np.maximum(np.asarray(short_gains, dtype=float), 0.0)
+        long_gains = np.maximum(np.asarray(long_gains, dtype=float), 0.0)
+        short_gains, long_gains = np.broadcast_arrays(
+            short_gains, long_gains, np.empty(len(self.codes))
+        )[:2]
+
+        if apply_allowances:
+            long_gains = long_gains * (1 - self._discount)
+
+            total = short_gains + long_gains
+            taxable_share = np.ones_like(total)
+            np.divide(
+                np.maximum(total - self._exemption_usd(fx_per_usd), 0.0), total,
+                out=taxable_share, where=total > 0
+            )
+            short_gains = short_gains * taxable_share
+            long_gains = long_gains * taxable_share
+
+        short_tax = short_gains * self.short_rate
+        long_tax = long_gains * self.long_rate
+
+        if territorial_exempt:
+            short_tax = np.where(self.is_territorial, 0.0, short_tax)
+            long_tax = np.where(self.is_territorial, 0.0, long_tax)
+
+        return short_tax, long_tax
+
+    def scenario_taxes(
+        self,
+        short_gains: Sequence[float],
+        long_gains: Sequence[float],
+        **options
+    ) -> np.ndarray:
+        """
+        Total tax of many what-if scenarios in every country
+
+        Returns:
+            (scenarios x countries) array
+        """
+        short_tax, long_tax = self.taxes(
+            np.asarray(short_gains, dtype=float)[:, None],
+            np.asarray(long_gains, dtype=float)[:, None],
+            **options
+        )
+        return short_tax + long_tax
+
+    def _candidates(self, countries: Optional[Iterable[str]], include_banned: bool) -> np.ndarray:
+        candidates = np.arange(len(self.codes)) if countries is None else self.positions(countries)
+        if not include_banned:
+            candidates = candidates[~self.is_banned[candidates]]
+        return candidates
+
+    def rank(
+        self,
+        short_gains,
+        long_gains,
+        current_country: Optional[str] = None,
+        countries: Optional[Iterable[str]] = None,
+        include_banned: bool = False,
+        limit: Optional[int] = None,
+        **options
+    ) -> Dict:
+        """
+        Ranked comparison table (lowest tax first)
+
+        Args:
+            short_gains: Scalar or per-country array (see split_disposals)
+            long_gains: Scalar or per-country array
+            current_country: Baseline for savings
+            countries: Restrict to these countries (default: all)
+            include_banned: Keep countries where crypto is banned
+            limit: Max rows
+            **options: apply_allowances, territorial_exempt, fx_per_usd
+
+        Returns:
+            {"current": row or None, "rankings": [row, ...]}
+        """
+        short_gains = np.broadcast_to(np.asarray(short_gains, dtype=float), (len(self.codes),))
+        long_gains = np.broadcast_to(np.asarray(long_gains, dtype=float), (len(self.codes),))
+        short_tax, long_tax = self.taxes(short_gains, long_gains, **options)
+        total_tax = short_tax + long_tax
+        total_gains = short_gains + long_gains
+
+        effective_rate = np.zeros_like(total_tax)
+        np.divide(total_tax * 100, total_gains, out=effective_rate, where=total_gains > 0)
+
+        current_pos = self.index.get(current_country.upper()) if current_country else None
+        current_tax = float(total_tax[current_pos]) if current_pos is not None else None
+
+        candidates = self._candidates(countries, include_banned)
+        order = candidates[np.argsort(total_tax[candidates], kind="stable")]
+        if limit is not None:
+            order = order[:limit]
+
+        def row(i: int) -> Dict:
+            record = self.records[i]
+            tax = float(total_tax[i])
+            savings = (current_tax - tax) if current_tax is not None else None
+            return {
+                "country_code": record.country_code,
+                "country_name": record.country_name,
+                "flag_emoji": record.flag_emoji,
+                "short_term_gains": float(short_gains[i]),
+                "long_term_gains": float(long_gains[i]),
+                "short_term_tax": float(short_tax[i]),
+                "long_term_tax": float(long_tax[i]),
+                "tax_amount": tax,
+                "effective_rate": float(effective_rate[i]),
+                "short_term_rate": float(self.short_rate[i]) * 100,
+                "long_term_rate": float(self.long_rate[i]) * 100,
+                "savings": savings,
+                "savings_percent": (savings / current_tax * 100) if current_tax else (0.0 if savings is not None else None),
+                "holding_period_months": record.holding_period_months,
+                "is_territorial": bool(self.is_territorial[i]),
+                "crypto_legal_status": record.crypto_legal_status
+            }
+
+        return {
+            "current": row(current_pos) if current_pos is not None else None,
+            "rankings": [row(int(i)) for i in order]
+        }
+
+    def rank_scenarios(
+        self,
+        short_gains: Sequence[float],
+        long_gains: Sequence[float],
+        current_country: Optional[str] = None,
+        countries: Optional[Iterable[str]] = None,
+        include_banned: bool = False,
+        limit: int = 10,
+        **options
+    ) -> List[Dict]:
+        """
+        Lowest-tax countries for each what-if scenario
+
+        Returns:
+            [{"short_term_gains", "long_term_gains", "current_tax",
+              "best": [{"country_code", "tax_amount"}, ...]}, ...]
+        """
+        taxes = self.scenario_taxes(short_gains, long_gains, **options)
+        candidates = self._candidates(countries, include_banned)
+        current_pos = self.index.get(current_country.upper()) if current_country else None
+
+        # Best `limit` countries of every scenario at once
+        order = candidates[np.argsort(taxes[:, candidates], axis=1, kind="stable")[:, :limit]]
+
+        return [
+            {
+                "short_term_gains": float(short_gains[s]),
+                "long_term_gains": float(long_gains[s]),
+                "current_tax": float(taxes[s, current_pos]) if current_pos is not None else None,
+                "best": [
+                    {"country_code": self.codes[i], "tax_amount": float(taxes[s, i])}
+                    for i in order[s]
+                ]
+            }
+            for s in range(len(taxes))
+        ]
+
+
+_engine: Optional[ResidencyComparisonEngine] = None
+_engine_catalog: Optional[RegulationCatalog] = None
+_engine_lock = threading.Lock()
+
+
+def get_comparison_engine(db: Optional[Session] = None) -> ResidencyComparisonEngine:
+    """Engine over the current regulation catalog (rebuilt when the catalog is reloaded)"""
+    global _engine, _engine_catalog
+
+    catalog = get_regulation_catalog(db)
+    if _engine is not None and _engine_catalog is catalog:
+        return _engine
+
+    with _engine_lock:
+        if _engine is None or _engine_catalog is not catalog:
+            _engine = ResidencyComparisonEngine.from_catalog(catalog)
+            _engine_catalog = catalog
+            logger.debug(f"Residency comparison engine built for {len(_engine)} countries")
+        return _engine
@@ -0,0 +1,259 @@
+"""
+Sync Budget Service
+
+Shared per-provider API budget for background wallet syncs.
+
+Each upstream provider (Alchemy, Moralis, Etherscan, public RPC...) gets a
+token bucket stored in Redis, so every Celery worker draws from the same
+quota. The nightly scheduler uses the cost estimates below to plan dispatch
+times that fill the budget without bursting past it, and the sync task
+acquires tokens before hitting the network.
+"""
+
+import logging
+import math
+import time
+from typing import Dict, Optional
+
+from app.config import settings
+from app.services.blockchain_detector import ChainDetector, BlockchainType
+
+logger = logging.getLogger(__name__)
+
+
+# Sustained request budget per provider (requests/second) and burst capacity.
+# Kept below the published plan limits to leave headroom for interactive
+# portfolio views, which share the same API keys.
+PROVIDER_QUOTAS = {
+    "alchemy": {"rate": 20.0, "burst": 200},     # Free tier: ~25 req/s (330 CU/s)
+    "moralis": {"rate": 10.0, "burst": 100},     # Starter: 40k CU/day, bursty
+    "etherscan": {"rate": 4.0, "burst": 20},     # 5 calls/s per key
+    "coingecko": {"rate": 0.4, "burst": 10},     # Free API: ~30 calls/min
+    "helius": {"rate": 8.0, "burst": 50},
+    "blockcypher": {"rate": 2.0, "burst": 10},
+    "rpc": {"rate": 10.0, "burst": 50},          # Public RPC endpoints
+}
+
+# Chains served by Alchemy in MultiChainBalanceService._get_evm_balances
+ALCHEMY_CHAINS = {"ethereum", "polygon", "arbitrum", "optimism", "base"}
+
+# Average token count assumed for wallets never synced before
+DEFAULT_TOKEN_ESTIMATE = 10
+
+# Atomic refill + take. Returns {granted (0/1), seconds until `cost` is available}
+_TOKEN_BUCKET_SCRIPT = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local granted = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    granted = 1
+else
+    wait = (cost - tokens) / rate
+end
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', key, math.ceil(burst / rate) + 60)
+return {granted, tostring(wait)}
+"""
+
+
+def get_balance_provider(chain: str) -> str:
+    """
+    Provider that MultiChainBalanceService will hit first for this chain
+
+    Mirrors the fallback order in MultiChainBalanceService.get_wallet_balances.
+    """
+    chain = chain.lower()
+    blockchain_type = ChainDetector.get_chain_info(chain).get("type")
+
+    if blockchain_type == BlockchainType.EVM:
+        if settings.ALCHEMY_API_KEY and chain in ALCHEMY_CHAINS:
+            return "alchemy"
+        if settings.MORALIS_API_KEY:
+            return "moralis"
+        return "rpc"
+    if blockchain_type == BlockchainType.SOLANA:
+        return "helius" if settings.HELIUS_API_KEY else "rpc"
+    if blockchain_type == BlockchainType.BITCOIN:
+        return "blockcypher"
+    return "rpc"
+
+
+def estimate_sync_cost(chain: str, token_count: Optional[int] = None) -> Dict[str, int]:
+    """
+    Estimate upstream API calls for one wallet snapshot
+
+    Args:
+        chain: Wallet chain
+        token_count: Tokens held at last sync (None = never synced)
+
+    Returns:
+        {provider: request_count}
+    """
+    provider = get_balance_provider(chain)
+
+    if provider == "alchemy":
+        # eth_blockNumber + eth_getBalance + alchemy_getTokenBalances; token
+        # metadata is stored permanently, so only new wallets pay per token
+        balance_calls = 3 + (DEFAULT_TOKEN_ESTIMATE if token_count is None else 0)
+    elif provider in ("moralis", "helius"):
+        # Native + token list endpoints
+        balance_calls = 2
+    else:
+        balance_calls = 1
+
+    cost = {provider: balance_calls}
+    # Prices for all held tokens come from one batched CoinGecko call
+    cost["coingecko"] = cost.get("coingecko", 0) + 1
+    return cost
+
+
+def estimate_state_check_cost(chain: str) -> Dict[str, int]:
+    """Estimate calls for the cheap on-chain change check (nonce + native balance)"""
+    blockchain_type = ChainDetector.get_chain_info(chain).get("type")
+    if blockchain_type != BlockchainType.EVM:
+        return {}
+    return {"rpc": 2}
+
+
+class ApiBudget:
+    """
+    Redis token buckets shared by all workers
+
+    Fails open when Redis is unavailable: syncs still run, they just lose
+    cross-worker coordination.
+    """
+
+    KEY_PREFIX = "api_budget"
+
+    def __init__(self, redis_client=None, quotas: Optional[Dict[str, Dict[str, float]]] = None):
+        if redis_client is None:
+            try:
+                from app.dependencies.exchange_rate import get_redis_client
+                redis_client = get_redis_client()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for API budget, running unthrottled: {e}")
+                redis_client = None
+
+        self.redis = redis_client
+        self.quotas = quotas or PROVIDER_QUOTAS
+        self._script = None
+        if self.redis is not None:
+            try:
+                self._script = self.redis.register_script(_TOKEN_BUCKET_SCRIPT)
+            except Exception as e:
+                logger.warning(f"Failed to register API budget script: {e}")
+                self.redis = None
+
+    def rate(self, provider: str) -> float:
+        return float(self.quotas.get(provider, PROVIDER_QUOTAS["rpc"])["rate"])
+
+    def burst(self, provider: str) -> float:
+        return float(self.quotas.get(provider, PROVIDER_QUOTAS["rpc"])["burst"])
+
+    def try_acquire(self, provider: str, cost: int) -> float:
+        """
+        Take `cost` tokens from a provider bucket
+
+        Returns:
+            0.0 if granted, otherwise seconds to wait before retrying
+        """
+        if self.redis is None or cost <= 0:
+            return 0.0
+
+        # Oversized requests (e.g. a wallet with 500 tokens) would never fit
+        # the bucket, so cap them at burst size; they still drain it fully.
+        cost = min(cost, self.burst(provider))
+
+        try:
+            granted, wait = self._script(
+                keys=[f"{self.KEY_PREFIX}:{provider}"],
+                args=[self.rate(provider), self.burst(provider), cost, time.time()],
+            )
+            return 0.0 if int(granted) == 1 else float(wait)
+        except Exception as e:
+            logger.warning(f"API budget check failed for {provider}, allowing: {e}")
+            return 0.0
+
+    def try_acquire_all(self, costs: Dict[str, int]) -> float:
+        """
+        Acquire budget for several providers
+
+        Not transactional across providers: on a partial failure the tokens
+        already taken are simply spent, which errs on the side of caution.
+
+        Returns:
+            0.0 if every provider granted, otherwise the longest wait
+        """
+        longest_wait = 0.0
+        for provider, cost in costs.items():
+            wait = self.try_acquire(provider, cost)
+            longest_wait = max(longest_wait, wait)
+        return longest_wait
+
+
+class DispatchPlanner:
+    """
+    Assign countdowns so planned work fills each provider budget
+
+    Offline version of the Redis bucket (GCRA): keeps a theoretical arrival
+    time per provider and admits a reservation once it fits within the burst
+    allowance. A wallet is dispatched once all of its providers have budget,
+    so cheap wallets are not held back behind expensive ones on other APIs.
+    """
+
+    def __init__(self, budget: ApiBudget, window_seconds: int, utilization: float = 0.8):
+        self.budget = budget
+        self.window_seconds = window_seconds
+        self.utilization = utilization
+        self._tat: Dict[str, float] = {}
+
+    def reserve(self, costs: Dict[str, int]) -> Optional[int]:
+        """
+        Reserve budget for one sync
+
+        Returns:
+            Countdown in seconds, or None if the work doesn't fit the window
+        """
+        start = 0.0
+        for provider, cost in costs.items():
+            rate = self.budget.rate(provider) * self.utilization
+            cost = min(cost, self.budget.burst(provider))
+            earliest = self._tat.get(provider, 0.0) + (cost - self.budget.burst(provider)) / rate
+            start = max(start, earliest)
+
+        if start > self.window_seconds:
+            return None
+
+        for provider, cost in costs.items():
+            rate = self.budget.rate(provider) * self.utilization
+            cost = min(cost, self.budget.burst(provider))
+            self._tat[provider] = max(self._tat.get(provider, 0.0), start) + cost / rate
+
+        return int(math.ceil(start))
+
+
+def sync_priority(staleness_hours: float, value_usd: float) -> float:
+    """
+    Priority score for a wallet sync (higher runs first)
+
+    Staleness dominates after a day or two; value breaks ties so large
+    portfolios are refreshed early in the window.
+    """
+    return staleness_hours / 24.0 + math.log10(1.0 + max(value_usd, 0.0))
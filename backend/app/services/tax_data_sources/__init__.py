@@ -7,6 +7,9 @@ Data sources for tax information:
 - OECD API (members data - needs migration)
 - KPMG PDF (127 countries)
 - Koinly (crypto-specific rates)
+
+Full-dataset sources (KPMG, PwC, Tax Foundation) go through source_snapshot:
+fetched and parsed once per sync run, revalidated against a copy on disk.
 """
 
 from .worldbank_client import WorldBankClient, fetch_worldbank_tax_data
@@ -15,6 +18,7 @@ from .oecd_client import OECDClient, fetch_oecd_tax_rates
 from .kpmg_scraper import KPMGScraper, fetch_kpmg_rate
 from .koinly_crypto_scraper import KoinlyCryptoScraper, fetch_crypto_rate
 from .pwc_scraper import PwCScraper, fetch_pwc_rate
+from .source_snapshot import SnapshotStore, SourceSnapshot
 from .aggregator import TaxDataAggregator
 
 __all__ = [
@@ -25,6 +29,8 @@ __all__ = [
     'KoinlyCryptoScraper',
     'PwCScraper',
     'TaxDataAggregator',
+    'SnapshotStore',
+    'SourceSnapshot',
     'fetch_worldbank_tax_data',
     'fetch_taxfoundation_rate',
     'fetch_oecd_tax_rates',
@@ -9,8 +9,10 @@ Combines data from multiple free sources:
 Intelligently merges and validates data
 """
 
+import asyncio
 import logging
-from typing import Dict, Optional, List
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
 
@@ -20,13 +22,30 @@ from .oecd_client import OECDClient
 from .kpmg_scraper import KPMGScraper
 from .koinly_crypto_scraper import KoinlyCryptoScraper
 from .pwc_scraper import PwCScraper
+from .source_snapshot import SnapshotStore, SourceSnapshot
+from .source_health import SourceHealthTracker
 from app.models.regulation import Regulation
 from app.services.notification_service import NotificationService
 from app.services.regulation_history import RegulationHistoryService
+from app.services.regulation_catalog import bump_regulation_version
 
 logger = logging.getLogger(__name__)
 
 
+# Per-call timeout (seconds) for each source
+SOURCE_TIMEOUTS = {
+    'tax_foundation': 20.0,
+    'pwc': 20.0,
+    'kpmg': 90.0,  # PDF download + parse
+    'world_bank': 10.0,
+    'oecd': 10.0,
+    'koinly': 10.0,
+}
+
+# Sources read from a full-dataset snapshot (see source_snapshot.py)
+SNAPSHOT_SOURCES = ('tax_foundation', 'kpmg', 'pwc')
+
+
 class TaxDataAggregator:
     """
     Aggregates tax data from multiple free sources
@@ -37,14 +56,22 @@ class TaxDataAggregator:
     3. World Bank (macro data)
     """
 
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        store: Optional[SnapshotStore] = None,
+        health: Optional[SourceHealthTracker] = None
+    ):
         self.db = db
+        self.store = store or SnapshotStore()
+        self.health = health or SourceHealthTracker()
+        self._snapshots: Optional[Dict[str, Optional[SourceSnapshot]]] = None
         self.wb_client = WorldBankClient()
-        self.tf_scraper = TaxFoundationScraper()
+        self.tf_scraper = TaxFoundationScraper(self.store)
         self.oecd_client = OECDClient()
-        self.kpmg_scraper = KPMGScraper()
+        self.kpmg_scraper = KPMGScraper(self.store)
         self.koinly_scraper = KoinlyCryptoScraper()
-        self.pwc_scraper = PwCScraper()
+        self.pwc_scraper = PwCScraper(self.store)
         self.notifier = NotificationService(db)
 
     async def close(self):
@@ -56,10 +83,91 @@ class TaxDataAggregator:
         await self.koinly_scraper.close()
         await self.pwc_scraper.close()
 
+    async def load_snapshots(self) -> Dict[str, Optional[SourceSnapshot]]:
+        """
+        Fetch and parse the full-dataset sources (Tax Foundation, KPMG, PwC)
+        once for this aggregator's lifetime
+
+        Per-country lookups in fetch_country_data are dictionary hits afterwards.
+        A source that is down (open circuit, timeout, failed download) is served
+        from its last good snapshot on disk.
+        """
+        scrapers = {
+            'tax_foundation': self.tf_scraper,
+            'kpmg': self.kpmg_scraper,
+            'pwc': self.pwc_scraper,
+        }
+        fetched = await asyncio.gather(*(
+            self._load_snapshot(name, scrapers[name]) for name in SNAPSHOT_SOURCES
+        ))
+
+        snapshots = {}
+        for name, snapshot in zip(SNAPSHOT_SOURCES, fetched):
+            if snapshot:
+                stale = " (stale)" if snapshot.stale else ""
+                logger.info(f"📚 {name} snapshot: {len(snapshot)} countries (sha256 {snapshot.content_hash[:12]}){stale}")
+            snapshots[name] = snapshot
+
+        self._snapshots = snapshots
+        return snapshots
+
+    async def _load_snapshot(self, source: str, scraper: Any) -> Optional[SourceSnapshot]:
+        """Load one source snapshot through its circuit breaker"""
+        if self.health.is_open(source):
+            logger.info(f"⏭️ {source} circuit open, using stored snapshot")
+            return await scraper.get_snapshot(offline=True)
+
+        started = time.monotonic()
+        try:
+            snapshot = await asyncio.wait_for(scraper.get_snapshot(), timeout=SOURCE_TIMEOUTS[source])
+            if snapshot is None or snapshot.stale:
+                raise RuntimeError("document unavailable")
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            self.health.record_failure(source, time.monotonic() - started, error)
+            logger.warning(f"{source} snapshot failed ({error}), using stored snapshot")
+            return await scraper.get_snapshot(offline=True)
+
+        self.health.record_success(source, time.monotonic() - started)
+        return snapshot
+
+    async def _call_source(
+        self,
+        source: str,
+        country_code: str,
+        call: Callable[[], Awaitable[Optional[Dict]]]
+    ) -> Optional[Dict]:
+        """
+        Call a per-country source with timeout and circuit breaker
+
+        Falls back to the source's last good record for the country when the
+        circuit is open or the call fails.
+        """
+        if self.health.is_open(source):
+            logger.debug(f"⏭️ {source} circuit open, skipping {country_code}")
+            return self.health.get_last_good(source, country_code)
+
+        started = time.monotonic()
+        try:
+            data = await asyncio.wait_for(call(), timeout=SOURCE_TIMEOUTS[source])
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            self.health.record_failure(source, time.monotonic() - started, error)
+            logger.warning(f"{source} fetch failed for {country_code}: {error}")
+            return self.health.get_last_good(source, country_code)
+
+        self.health.record_success(source, time.monotonic() - started)
+        if data:
+            self.health.save_last_good(source, country_code, data)
+        return data
+
     async def fetch_country_data(self, country_code: str) -> Dict:
         """
         Fetch data for a country from all sources
 
+        Snapshot sources are dictionary lookups; World Bank, OECD and Koinly
+        are fetched concurrently.
+
         Returns:
             {
                 'country_code': 'FR',
@@ -77,60 +185,33 @@ class TaxDataAggregator:
         country_code = country_code.upper()
         sources = {}
 
-        # Fetch from Tax Foundation (best for CGT)
-        try:
-            tf_data = await self.tf_scraper.get_country_rate(country_code)
-            if tf_data:
-                sources['tax_foundation'] = tf_data
-                logger.info(f"✓ Tax Foundation data found for {country_code}")
-        except Exception as e:
-            logger.warning(f"Tax Foundation fetch failed for {country_code}: {e}")
-
-        # Fetch from World Bank
-        try:
-            wb_data = await self.wb_client.get_tax_data(country_code)
-            if wb_data:
-                sources['world_bank'] = wb_data
-                logger.info(f"✓ World Bank data found for {country_code}")
-        except Exception as e:
-            logger.warning(f"World Bank fetch failed for {country_code}: {e}")
-
-        # Fetch from OECD (if member)
-        try:
-            if await self.oecd_client.is_oecd_member(country_code):
-                oecd_data = await self.oecd_client.get_tax_rates(country_code)
-                if oecd_data:
-                    sources['oecd'] = oecd_data
-                    logger.info(f"✓ OECD data found for {country_code}")
-        except Exception as e:
-            logger.warning(f"OECD fetch failed for {country_code}: {e}")
-
-        # Fetch from KPMG (127 countries)
-        try:
-            kpmg_data = await self.kpmg_scraper.get_country_rate(country_code)
-            if kpmg_data:
-                sources['kpmg'] = kpmg_data
-                logger.info(f"✓ KPMG data found for {country_code}")
-        except Exception as e:
-            logger.warning(f"KPMG fetch failed for {country_code}: {e}")
+        if self._snapshots is None:
+            await self.load_snapshots()
 
-        # Fetch from Koinly (crypto-specific)
-        try:
-            koinly_data = await self.koinly_scraper.get_country_crypto_rate(country_code)
-            if koinly_data:
-                sources['koinly'] = koinly_data
-                logger.info(f"✓ Koinly crypto data found for {country_code}")
-        except Exception as e:
-            logger.warning(f"Koinly fetch failed for {country_code}: {e}")
+        # Tax Foundation (best for CGT), KPMG (127 countries), PwC (148 territories)
+        for name in SNAPSHOT_SOURCES:
+            snapshot = self._snapshots.get(name)
+            data = snapshot.get(country_code) if snapshot else None
+            if data:
+                sources[name] = data
+                logger.info(f"✓ {name} data found for {country_code}")
 
-        # Fetch from PwC (148 territories)
-        try:
-            pwc_data = await self.pwc_scraper.get_country_rate(country_code)
-            if pwc_data:
-                sources['pwc'] = pwc_data
-                logger.info(f"✓ PwC data found for {country_code}")
-        except Exception as e:
-            logger.warning(f"PwC fetch failed for {country_code}: {e}")
+        # Per-country sources, concurrently
+        calls = {
+            'world_bank': lambda: self.wb_client.get_tax_data(country_code),
+        }
+        if await self.oecd_client.is_oecd_member(country_code):
+            calls['oecd'] = lambda: self.oecd_client.get_tax_rates(country_code)
+        if country_code in self.koinly_scraper.COUNTRY_GUIDES:
+            calls['koinly'] = lambda: self.koinly_scraper.get_country_crypto_rate(country_code)
+
+        fetched = await asyncio.gather(*(
+            self._call_source(name, country_code, call) for name, call in calls.items()
+        ))
+        for name, data in zip(calls, fetched):
+            if data:
+                sources[name] = data
+                logger.info(f"✓ {name} data found for {country_code}")
 
         # Merge data
         merged = self._merge_sources(country_code, sources)
@@ -284,10 +365,14 @@ class TaxDataAggregator:
 
         return min(score, 1.0)
 
-    async def update_database(self, country_code: str) -> Dict:
+    async def update_database(self, country_code: str, regulation: Optional[Regulation] = None) -> Dict:
         """
         Fetch and update database for a country
 
+        Args:
+            country_code: ISO 2-letter code
+            regulation: Already-loaded Regulation row (skips the lookup query)
+
         Returns status dict
         """
         try:
@@ -304,9 +389,10 @@ class TaxDataAggregator:
             merged = result['merged']
 
             # Get existing regulation or create new one
-            regulation = self.db.query(Regulation).filter(
-                Regulation.country_code == country_code
-            ).first()
+            if regulation is None:
+                regulation = self.db.query(Regulation).filter(
+                    Regulation.country_code == country_code
+                ).first()
 
             is_new_country = False
             if not regulation:
@@ -403,6 +489,7 @@ class TaxDataAggregator:
                     regulation.data_quality = merged['data_quality']
 
                     self.db.commit()
+                    bump_regulation_version()
 
                     # Create notification if CGT changed
                     if cgt_changed:
@@ -458,8 +545,11 @@ class TaxDataAggregator:
 
         logger.info(f"Starting sync for {len(regulations)} countries")
 
+        # Download/parse each full-dataset source once for the whole run
+        await self.load_snapshots()
+
         for reg in regulations:
-            result = await self.update_database(reg.country_code)
+            result = await self.update_database(reg.country_code, regulation=reg)
             results.append(result)
 
             if result['success'] and result.get('action') == 'updated':
@@ -467,6 +557,14 @@ class TaxDataAggregator:
 
         return results
 
+    def get_source_health(self) -> Dict:
+        """Recorded health of every source (no network calls)"""
+        sources = ('tax_foundation', 'world_bank', 'oecd', 'kpmg', 'koinly', 'pwc')
+        return {
+            'sources': {name: self.health.get_health(name) for name in sources},
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
     async def test_all_sources(self) -> Dict:
         """Test connectivity to all sources"""
         return {
@@ -11,8 +11,10 @@ import httpx
 import pdfplumber
 import re
 import io
+import asyncio
 from typing import Optional, Dict, List
 import logging
+from .source_snapshot import SnapshotStore, SourceSnapshot, build_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -121,11 +123,14 @@ class KPMGScraper:
         "Vatican City": "VA",
     }
 
-    def __init__(self):
+    def __init__(self, store: Optional[SnapshotStore] = None):
         self.client = httpx.AsyncClient(
             timeout=60.0,
             headers={"User-Agent": "Mozilla/5.0 (compatible; NomadCryptoHub/1.0)"}
         )
+        self.store = store or SnapshotStore()
+        self._snapshot: Optional[SourceSnapshot] = None
+        self._snapshot_lock = asyncio.Lock()
 
     async def close(self):
         """Close HTTP client"""
@@ -257,6 +262,24 @@ class KPMGScraper:
 
         return None
 
+    async def get_snapshot(self, offline: bool = False) -> Optional[SourceSnapshot]:
+        """
+        Parsed PDF for this scraper's lifetime (one sync run)
+
+        The PDF is downloaded at most once (conditional GET against the copy
+        on disk) and only parsed when its content changed.
+
+        Args:
+            offline: Use the stored copy only (source known to be down)
+        """
+        async with self._snapshot_lock:
+            if self._snapshot is None:
+                self._snapshot = await build_snapshot(
+                    self.store, self.client, "kpmg", self.PDF_URL, self.extract_country_data,
+                    offline=offline
+                )
+        return self._snapshot
+
     async def get_all_countries(self) -> Dict[str, Dict]:
         """
         Get capital gains tax data for all countries
@@ -269,22 +292,12 @@ class KPMGScraper:
             }
         """
         try:
-            # Download PDF
-            pdf_bytes = await self.download_pdf()
-
-            if not pdf_bytes:
+            snapshot = await self.get_snapshot()
+            if not snapshot:
                 return {}
 
-            # Extract data
-            countries_list = self.extract_country_data(pdf_bytes)
-
-            # Convert to dict
-            countries_dict = {}
-            for country in countries_list:
-                countries_dict[country['country_code']] = country
-
-            logger.info(f"KPMG scraper found {len(countries_dict)} countries")
-            return countries_dict
+            logger.info(f"KPMG scraper found {len(snapshot)} countries")
+            return dict(snapshot.countries)
 
         except Exception as e:
             logger.error(f"Error in KPMG get_all_countries: {e}")
@@ -292,8 +305,8 @@ class KPMGScraper:
 
     async def get_country_rate(self, country_code: str) -> Optional[Dict]:
         """Get CGT rate for specific country"""
-        all_countries = await self.get_all_countries()
-        return all_countries.get(country_code.upper())
+        snapshot = await self.get_snapshot()
+        return snapshot.get(country_code) if snapshot else None
 
     async def test_connection(self) -> bool:
         """Test if KPMG PDF is accessible"""
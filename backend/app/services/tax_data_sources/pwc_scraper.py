@@ -10,9 +10,11 @@ Coverage: 148 territories worldwide with official tax data
 import httpx
 from bs4 import BeautifulSoup
 from typing import Optional, Dict, List
+import asyncio
 import logging
 import re
 from .pwc_country_mapping import PWC_COUNTRY_MAPPING
+from .source_snapshot import SnapshotStore, SourceSnapshot, build_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -26,11 +28,14 @@ class PwCScraper:
     # Use complete mapping from pwc_country_mapping.py (148 territories)
     COUNTRY_MAPPING = PWC_COUNTRY_MAPPING
 
-    def __init__(self):
+    def __init__(self, store: Optional[SnapshotStore] = None):
         self.client = httpx.AsyncClient(
             timeout=30.0,
             headers={"User-Agent": "Mozilla/5.0 (compatible; NomadCryptoHub/1.0)"}
         )
+        self.store = store or SnapshotStore()
+        self._snapshot: Optional[SourceSnapshot] = None
+        self._snapshot_lock = asyncio.Lock()
 
     async def close(self):
         """Close HTTP client"""
@@ -53,11 +58,28 @@ class PwCScraper:
             }, ...]
         """
         try:
-            logger.info(f"Fetching PwC CGT rates from {self.CGT_CHART_URL}")
-            response = await self.client.get(self.CGT_CHART_URL)
-            response.raise_for_status()
+            snapshot = await self.get_snapshot()
+            return list(snapshot.countries.values()) if snapshot else []
 
-            soup = BeautifulSoup(response.text, 'lxml')
+        except Exception as e:
+            logger.error(f"Error scraping PwC CGT rates: {e}")
+            return []
+
+    async def get_snapshot(self, offline: bool = False) -> Optional[SourceSnapshot]:
+        """Parsed CGT chart, fetched at most once per scraper lifetime (one sync run)"""
+        async with self._snapshot_lock:
+            if self._snapshot is None:
+                logger.info(f"Fetching PwC CGT rates from {self.CGT_CHART_URL}")
+                self._snapshot = await build_snapshot(
+                    self.store, self.client, "pwc", self.CGT_CHART_URL, self.parse_cgt_chart,
+                    offline=offline
+                )
+        return self._snapshot
+
+    def parse_cgt_chart(self, html: bytes) -> List[Dict]:
+        """Parse the PwC CGT quick chart into one record per mapped country"""
+        try:
+            soup = BeautifulSoup(html, 'lxml')
 
             # Find the main table
             table = soup.find('table', {'class': 'table'}) or soup.find('table')
@@ -117,7 +139,7 @@ class PwCScraper:
             return results
 
         except Exception as e:
-            logger.error(f"Error scraping PwC CGT rates: {e}")
+            logger.error(f"Error parsing PwC CGT rates: {e}")
             return []
 
     def _parse_rate(self, rate_text: str) -> tuple[Optional[float], str]:
@@ -188,13 +210,8 @@ class PwCScraper:
                 'year': 2025
             }
         """
-        all_rates = await self.get_all_cgt_rates()
-
-        for rate_data in all_rates:
-            if rate_data['country_code'] == country_code.upper():
-                return rate_data
-
-        return None
+        snapshot = await self.get_snapshot()
+        return snapshot.get(country_code) if snapshot else None
 
     async def test_connection(self) -> Dict:
         """Test PwC scraper connectivity"""
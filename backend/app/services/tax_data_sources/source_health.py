@@ -0,0 +1,189 @@
+"""
+Tax Source Health
+
+Per-source circuit breakers, latency / success tracking and last-good
+records for the tax data aggregator.
+
+State lives in Redis so the admin endpoints (API process) see what the sync
+runs (Celery workers) observed. Fails open: without Redis every source is
+treated as closed and nothing is recorded.
+"""
+
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Consecutive failures that open a source's circuit
+FAILURE_THRESHOLD = 3
+
+# How long an open circuit skips the source before letting a call through again
+OPEN_SECONDS = 300
+
+# Weight of the newest sample in the moving latency average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Last good per-country records (used while a source is down)
+LAST_GOOD_TTL = 90 * 24 * 3600
+
+HEALTH_KEY_PREFIX = "tax_source_health"
+LAST_GOOD_KEY_PREFIX = "tax_source_last_good"
+
+
+class SourceHealthTracker:
+    """Circuit breaker + health stats per tax data source"""
+
+    def __init__(self, redis_client=None):
+        if redis_client is None:
+            try:
+                from app.dependencies.exchange_rate import get_redis_client
+                redis_client = get_redis_client()
+            except Exception as e:
+                logger.warning(f"Redis unavailable for source health, circuits disabled: {e}")
+                redis_client = None
+
+        self.redis = redis_client
+
+    def _key(self, source: str) -> str:
+        return f"{HEALTH_KEY_PREFIX}:{source}"
+
+    def is_open(self, source: str, now: Optional[float] = None) -> bool:
+        """True while the source's circuit is open (calls should be skipped)"""
+        if self.redis is None:
+            return False
+
+        try:
+            opened_until = self.redis.hget(self._key(source), "opened_until")
+        except Exception as e:
+            logger.warning(f"Source health read failed for {source}: {e}")
+            return False
+
+        return bool(opened_until) and float(opened_until) > (now or time.time())
+
+    def record_success(self, source: str, latency: float):
+        """Record a successful call (closes the circuit)"""
+        self._record(source, latency, success=True)
+
+    def record_failure(self, source: str, latency: float, error: str):
+        """Record a failed call (opens the circuit after FAILURE_THRESHOLD in a row)"""
+        self._record(source, latency, success=False, error=error)
+
+    def _record(self, source: str, latency: float, success: bool, error: Optional[str] = None):
+        if self.redis is None:
+            return
+
+        key = self._key(source)
+        now = time.time()
+
+        try:
+            stats = self.redis.hgetall(key) or {}
+            avg = stats.get("avg_latency_ms")
+            latency_ms = latency * 1000
+            avg = latency_ms if avg is None else (
+                LATENCY_EWMA_ALPHA * latency_ms + (1 - LATENCY_EWMA_ALPHA) * float(avg)
+            )
+
+            pipe = self.redis.pipeline()
+            pipe.hset(key, mapping={
+                "last_latency_ms": round(latency_ms, 1),
+                "avg_latency_ms": round(avg, 1),
+                "last_checked_at": datetime.utcnow().isoformat()
+            })
+
+            if success:
+                pipe.hincrby(key, "successes", 1)
+                pipe.hset(key, mapping={
+                    "consecutive_failures": 0,
+                    "opened_until": 0,
+                    "last_success_at": datetime.utcnow().isoformat()
+                })
+            else:
+                consecutive = int(stats.get("consecutive_failures") or 0) + 1
+                pipe.hincrby(key, "failures", 1)
+                pipe.hset(key, mapping={
+                    "consecutive_failures": consecutive,
+                    "last_error": (error or "")[:200]
+                })
+                if consecutive >= FAILURE_THRESHOLD:
+                    pipe.hset(key, "opened_until", now + OPEN_SECONDS)
+                    if consecutive == FAILURE_THRESHOLD:
+                        logger.warning(f"⚡ Circuit opened for {source} after {consecutive} failures: {error}")
+
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Source health write failed for {source}: {e}")
+
+    def get_health(self, source: str, now: Optional[float] = None) -> Dict:
+        """
+        Recorded health of one source
+
+        Returns:
+            {
+                'status': 'healthy' | 'degraded' | 'down' | 'unknown',
+                'success_rate': 0.97,
+                'avg_latency_ms': 812.4,
+                ...
+            }
+        """
+        stats = {}
+        if self.redis is not None:
+            try:
+                stats = self.redis.hgetall(self._key(source)) or {}
+            except Exception as e:
+                logger.warning(f"Source health read failed for {source}: {e}")
+
+        successes = int(stats.get("successes") or 0)
+        failures = int(stats.get("failures") or 0)
+        total = successes + failures
+        opened_until = float(stats.get("opened_until") or 0)
+        now = now or time.time()
+
+        if total == 0:
+            status = "unknown"
+        elif opened_until > now:
+            status = "down"
+        elif int(stats.get("consecutive_failures") or 0) > 0:
+            status = "degraded"
+        else:
+            status = "healthy"
+
+        return {
+            "status": status,
+            "success_rate": round(successes / total, 3) if total else None,
+            "successes": successes,
+            "failures": failures,
+            "avg_latency_ms": float(stats["avg_latency_ms"]) if stats.get("avg_latency_ms") else None,
+            "last_latency_ms": float(stats["last_latency_ms"]) if stats.get("last_latency_ms") else None,
+            "last_success_at": stats.get("last_success_at"),
+            "last_checked_at": stats.get("last_checked_at"),
+            "last_error": stats.get("last_error") or None,
+            "circuit_open_until": datetime.utcfromtimestamp(opened_until).isoformat() if opened_until > now else None
+        }
+
+    def save_last_good(self, source: str, country_code: str, data: Dict):
+        """Remember the latest good record of a source for a country"""
+        if self.redis is None:
+            return
+        try:
+            self.redis.setex(
+                f"{LAST_GOOD_KEY_PREFIX}:{source}:{country_code}",
+                LAST_GOOD_TTL,
+                json.dumps(data, default=str)
+            )
+        except Exception as e:
+            logger.warning(f"Could not store last good {source} record for {country_code}: {e}")
+
+    def get_last_good(self, source: str, country_code: str) -> Optional[Dict]:
+        """Latest good record of a source for a country, if any"""
+        if self.redis is None:
+            return None
+        try:
+            cached = self.redis.get(f"{LAST_GOOD_KEY_PREFIX}:{source}:{country_code}")
+        except Exception as e:
+            logger.warning(f"Could not read last good {source} record for {country_code}: {e}")
+            return None
+        return json.loads(cached) if cached else None
@@ -0,0 +1,226 @@
+"""
+Tax Source Snapshots
+
+Fetch-once, parse-once layer for the full-dataset tax sources (KPMG PDF,
+PwC quick chart, Tax Foundation table).
+
+Each scraper downloads and parses its whole document at most once per sync
+run into an immutable SourceSnapshot (country_code -> record). Raw documents
+are kept on disk with their ETag / Last-Modified, so the next run revalidates
+with a conditional GET, and parsed records are stored next to them keyed by
+content hash, so an unchanged document is never re-parsed.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SourceSnapshot:
+    """Parsed dataset of one source document"""
+    source: str
+    url: str
+    content_hash: str
+    fetched_at: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    countries: Mapping[str, Dict] = field(default_factory=dict)
+    stale: bool = False  # Served from the stored copy without reaching the source
+
+    def get(self, country_code: str) -> Optional[Dict]:
+        """Record for one country (ISO 2-letter code), or None"""
+        return self.countries.get(country_code.upper())
+
+    def __len__(self) -> int:
+        return len(self.countries)
+
+
+class SnapshotStore:
+    """
+    On-disk store of raw source documents and their parsed records
+
+    Layout (per source):
+        {source}.body                 raw document
+        {source}.meta.json            url, etag, last_modified, content_hash, fetched_at
+        {source}.{hash[:16]}.json     parsed records for that document version
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.TAX_SOURCE_SNAPSHOT_DIR
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_meta(self, source: str) -> Optional[Dict]:
+        try:
+            with open(self._path(f"{source}.meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_atomic(self, name: str, data: bytes):
+        """Write via temp file + rename so readers never see a partial file"""
+        path = self._path(name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    async def fetch(
+        self,
+        client: httpx.AsyncClient,
+        source: str,
+        url: str,
+        offline: bool = False
+    ) -> Optional[Dict]:
+        """
+        Fetch a source document, revalidating the stored copy
+
+        Args:
+            client: HTTP client of the scraper
+            source: Source name (file prefix)
+            url: Document URL
+            offline: Only return the stored copy (source known to be down)
+
+        Returns:
+            {"body": bytes, "meta": {...}, "stale": bool} or None if unavailable
+            (the stored copy is returned, stale, when the download fails)
+        """
+        meta = self._read_meta(source)
+        body = None
+        if meta and meta.get("url") == url:
+            try:
+                with open(self._path(f"{source}.body"), "rb") as f:
+                    body = f.read()
+            except OSError:
+                body = None
+
+        if offline:
+            return {"body": body, "meta": meta, "stale": True} if body is not None else None
+
+        headers = {}
+        if body is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = await client.get(url, headers=headers)
+
+            if response.status_code == 304 and body is not None:
+                logger.info(f"📄 {source}: not modified since {meta.get('fetched_at')}")
+                return {"body": body, "meta": meta, "stale": False}
+
+            response.raise_for_status()
+
+        except Exception as e:
+            if body is not None:
+                logger.warning(f"{source}: download failed ({e}), using stored copy from {meta.get('fetched_at')}")
+                return {"body": body, "meta": meta, "stale": True}
+            logger.error(f"{source}: download failed and no stored copy: {e}")
+            return None
+
+        body = response.content
+        meta = {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_hash": hashlib.sha256(body).hexdigest(),
+            "fetched_at": datetime.utcnow().isoformat()
+        }
+
+        try:
+            self._write_atomic(f"{source}.body", body)
+            self._write_atomic(f"{source}.meta.json", json.dumps(meta).encode())
+        except OSError as e:
+            logger.warning(f"{source}: could not store snapshot on disk: {e}")
+
+        logger.info(f"📥 {source}: downloaded {len(body) / 1024:.0f} KB")
+        return {"body": body, "meta": meta, "stale": False}
+
+    def load_parsed(self, source: str, content_hash: str) -> Optional[Dict[str, Dict]]:
+        """Parsed records for a document version, if already parsed"""
+        try:
+            with open(self._path(f"{source}.{content_hash[:16]}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_parsed(self, source: str, content_hash: str, countries: Dict[str, Dict]):
+        """Store parsed records, dropping those of older document versions"""
+        name = f"{source}.{content_hash[:16]}.json"
+        try:
+            self._write_atomic(name, json.dumps(countries).encode())
+            for existing in os.listdir(self.directory):
+                if existing.startswith(f"{source}.") and existing.endswith(".json") \
+                        and existing not in (name, f"{source}.meta.json"):
+                    os.remove(self._path(existing))
+        except OSError as e:
+            logger.warning(f"{source}: could not store parsed snapshot: {e}")
+
+
+async def build_snapshot(
+    store: SnapshotStore,
+    client: httpx.AsyncClient,
+    source: str,
+    url: str,
+    parse: Callable[[bytes], List[Dict]],
+    offline: bool = False
+) -> Optional[SourceSnapshot]:
+    """
+    Fetch (or revalidate) a document and parse it into a snapshot
+
+    Args:
+        store: Snapshot store
+        client: HTTP client of the scraper
+        source: Source name
+        url: Document URL
+        parse: Document bytes -> list of records with a 'country_code' key
+        offline: Build from the stored copy only
+
+    Returns:
+        SourceSnapshot, or None if the document is unavailable
+    """
+    fetched = await store.fetch(client, source, url, offline=offline)
+    if not fetched:
+        return None
+
+    meta = fetched["meta"]
+    content_hash = meta["content_hash"]
+
+    countries = store.load_parsed(source, content_hash)
+    if countries is None:
+        countries = {}
+        # Parsing (PDF especially) is CPU-bound, keep it off the event loop
+        for record in await asyncio.to_thread(parse, fetched["body"]):
+            countries[record["country_code"]] = record
+        if countries:
+            store.save_parsed(source, content_hash, countries)
+    else:
+        logger.info(f"{source}: reusing parsed snapshot {content_hash[:16]}")
+
+    return SourceSnapshot(
+        source=source,
+        url=url,
+        content_hash=content_hash,
+        fetched_at=meta.get("fetched_at"),
+        etag=meta.get("etag"),
+        last_modified=meta.get("last_modified"),
+        countries=MappingProxyType(countries),
+        stale=fetched["stale"]
+    )
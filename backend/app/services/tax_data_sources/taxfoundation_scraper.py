@@ -8,8 +8,10 @@ https://taxfoundation.org/data/
 import httpx
 from bs4 import BeautifulSoup
 from typing import Optional, Dict, List
+import asyncio
 import logging
 import re
+from .source_snapshot import SnapshotStore, SourceSnapshot, build_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -72,13 +74,16 @@ class TaxFoundationScraper:
         "Croatia": "HR",
     }
 
-    def __init__(self):
+    def __init__(self, store: Optional[SnapshotStore] = None):
         self.client = httpx.AsyncClient(
             timeout=30.0,
             headers={
                 "User-Agent": "Mozilla/5.0 (compatible; NomadCryptoHub/1.0)"
             }
         )
+        self.store = store or SnapshotStore()
+        self._snapshot: Optional[SourceSnapshot] = None
+        self._snapshot_lock = asyncio.Lock()
 
     async def close(self):
         """Close HTTP client"""
@@ -91,12 +96,28 @@ class TaxFoundationScraper:
         Returns list of {country_code, country_name, cgt_rate, year, source}
         """
         try:
-            logger.info("Scraping Tax Foundation Europe data")
+            snapshot = await self.get_snapshot()
+            return list(snapshot.countries.values()) if snapshot else []
 
-            response = await self.client.get(self.URLS["europe"])
-            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Error scraping Tax Foundation Europe: {e}")
+            return []
 
-            soup = BeautifulSoup(response.text, 'lxml')
+    async def get_snapshot(self, offline: bool = False) -> Optional[SourceSnapshot]:
+        """Parsed Europe table, fetched at most once per scraper lifetime (one sync run)"""
+        async with self._snapshot_lock:
+            if self._snapshot is None:
+                logger.info("Scraping Tax Foundation Europe data")
+                self._snapshot = await build_snapshot(
+                    self.store, self.client, "taxfoundation_europe", self.URLS["europe"], self.parse_europe_table,
+                    offline=offline
+                )
+        return self._snapshot
+
+    def parse_europe_table(self, html: bytes) -> List[Dict]:
+        """Parse the Tax Foundation Europe CGT table"""
+        try:
+            soup = BeautifulSoup(html, 'lxml')
 
             # Find the data table
             table = soup.find('table')
@@ -136,7 +157,7 @@ class TaxFoundationScraper:
             return results
 
         except Exception as e:
-            logger.error(f"Error scraping Tax Foundation Europe: {e}")
+            logger.error(f"Error parsing Tax Foundation Europe: {e}")
             return []
 
     async def get_country_rate(self, country_code: str) -> Optional[Dict]:
@@ -156,12 +177,11 @@ class TaxFoundationScraper:
             }
         """
         try:
-            # First try Europe data
-            europe_data = await self.scrape_europe_rates()
-
-            for country in europe_data:
-                if country["country_code"] == country_code.upper():
-                    return country
+            # Europe data (the only table scraped so far)
+            snapshot = await self.get_snapshot()
+            country = snapshot.get(country_code) if snapshot else None
+            if country:
+                return country
 
             logger.warning(f"Country {country_code} not found in Tax Foundation data")
             return None
@@ -14,16 +14,19 @@ Features:
 - Multi-lot optimization
 """
 
-from typing import List, Dict, Optional, Tuple
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func
 from app.models.cost_basis import CostBasisLot, UserCostBasisSettings
-from app.models.regulation import Regulation
+from app.services.regulation_catalog import get_regulation_catalog
 from app.models.user import User
 from app.services.enhanced_price_service import EnhancedPriceService
+from app.services.price_service import PriceService
 from app.config import settings
+import numpy as np
+import asyncio
 import redis
 import json
 import logging
@@ -31,6 +34,177 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Per-user analysis cache (invalidated early by lot changes or price moves)
+ANALYSIS_CACHE_PREFIX = "tax_analysis"
+ANALYSIS_CACHE_TTL = 6 * 3600
+
+# Relative price move of any held token that invalidates a cached analysis
+PRICE_MOVE_THRESHOLD = 0.02
+
+
+def _price_key(token: str, chain: str) -> str:
+    return f"{token.upper()}:{chain}"
+
+
+def prices_moved(
+    cached: Dict[str, Optional[float]],
+    current: Dict[str, Optional[float]],
+    threshold: float = PRICE_MOVE_THRESHOLD
+) -> bool:
+    """True if any price appeared, disappeared or moved more than `threshold`"""
+    for key, old in cached.items():
+        new = current.get(key)
+        if old is None or new is None:
+            if old != new:
+                return True
+            continue
+        if old == 0:
+            if new != 0:
+                return True
+            continue
+        if abs(new - old) / abs(old) > threshold:
+            return True
+    return False
+
+
+def lots_fingerprint(db: Session, user_id: int, *extra, audit_id: Optional[int] = None) -> Optional[str]:
+    """
+    Cheap summary of a user's active lots (one aggregate query)
+
+    Changes whenever a lot is added, disposed or edited. Also includes the
+    current date (holding periods roll over daily) and `extra` (settings the
+    analysis depends on).
+
+    Args:
+        db: Database session
+        user_id: User ID
+        extra: Other values the cached result depends on
+        audit_id: Only the lots of this DeFi audit
+
+    Returns:
+        Fingerprint, None when the user has no active lots
+    """
+    query = db.query(
+        func.count(CostBasisLot.id),
+        func.max(CostBasisLot.id),
+        func.max(CostBasisLot.updated_at),
+        func.sum(CostBasisLot.remaining_amount)
+    ).filter(
+        CostBasisLot.user_id == user_id,
+        CostBasisLot.remaining_amount > 0
+    )
+    if audit_id is not None:
+        query = query.filter(CostBasisLot.source_audit_id == audit_id)
+    count, max_id, last_updated, total_remaining = query.one()
+
+    if not count:
+        return None
+
+    return ":".join(str(part) for part in (
+        count,
+        max_id,
+        last_updated.isoformat() if last_updated else "",
+        total_remaining,
+        datetime.utcnow().date().isoformat(),
+        *extra
+    ))
+
+
+async def cached_analysis(
+    redis_client,
+    cache_key: str,
+    fingerprint: str,
+    get_prices: Callable[[List[str]], Awaitable[Dict[str, Optional[float]]]],
+    analyze: Callable[[], Awaitable[Tuple[Dict[str, Optional[float]], Dict]]]
+) -> Dict:
+    """
+    Analysis result, cached while the lots are unchanged and prices haven't moved
+
+    The cached result is reused while `fingerprint` (see lots_fingerprint) is
+    the same and no price it was computed from moved more than
+    PRICE_MOVE_THRESHOLD.
+
+    Args:
+        redis_client: Sync Redis client (None: no cache)
+        cache_key: Key of the cached result, e.g. "tax_analysis:42"
+        fingerprint: Fingerprint of the analyzed lots
+        get_prices: Current prices for price keys (same keys as analyze's prices)
+        analyze: Runs the analysis, returns (prices used, JSON-serializable result)
+
+    Returns:
+        Analysis result
+    """
+    cached = None
+    if redis_client is not None:
+        try:
+            cached = redis_client.get(cache_key)
+        except Exception as e:
+            logger.warning(f"Tax analysis cache read failed: {e}")
+
+    if cached:
+        cached = json.loads(cached)
+        if cached.get("fingerprint") == fingerprint:
+            current_prices = await get_prices(list(cached["prices"]))
+            if not prices_moved(cached["prices"], current_prices):
+                logger.debug(f"Tax analysis cache hit ({cache_key})")
+                return cached["result"]
+
+    prices, result = await analyze()
+
+    if redis_client is not None:
+        payload = {"fingerprint": fingerprint, "prices": prices, "result": result}
+        try:
+            redis_client.setex(cache_key, ANALYSIS_CACHE_TTL, json.dumps(payload))
+        except Exception as e:
+            logger.warning(f"Tax analysis cache write failed: {e}")
+
+    return result
+
+
+def compute_lot_metrics(
+    lots: List[CostBasisLot],
+    current_prices: List[float],
+    required_holding_days: int,
+    now: Optional[datetime] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Per-lot unrealized gain and holding period math over whole arrays
+
+    Args:
+        lots: Lots to evaluate
+        current_prices: Current USD price for each lot (same order)
+        required_holding_days: Days held for long-term treatment
+        now: Reference time (default: now)
+
+    Returns:
+        Dict of arrays (one entry per lot): cost_basis, current_value,
+        unrealized, unrealized_percent, holding_days, days_to_long_term, is_long_term
+    """
+    now = now or datetime.utcnow()
+
+    amounts = np.array([float(lot.remaining_amount) for lot in lots], dtype=float)
+    acquisition_prices = np.array([float(lot.acquisition_price_usd) for lot in lots], dtype=float)
+    prices = np.array(current_prices, dtype=float)
+    holding_days = np.array([(now - lot.acquisition_date).days for lot in lots], dtype=np.int64)
+
+    cost_basis = amounts * acquisition_prices
+    current_value = amounts * prices
+    unrealized = current_value - cost_basis
+
+    unrealized_percent = np.zeros_like(unrealized)
+    np.divide(unrealized * 100, cost_basis, out=unrealized_percent, where=cost_basis > 0)
+
+    return {
+        "cost_basis": cost_basis,
+        "current_value": current_value,
+        "unrealized": unrealized,
+        "unrealized_percent": unrealized_percent,
+        "holding_days": holding_days,
+        "days_to_long_term": required_holding_days - holding_days,
+        "is_long_term": holding_days >= required_holding_days
+    }
+
+
 class TaxOptimizer:
     """
     Tax Optimization Service
@@ -86,6 +260,9 @@ class TaxOptimizer:
         """
         Comprehensive portfolio analysis for tax optimization
 
+        Served from a per-user cache while the user's lots are unchanged and
+        no held token has moved more than PRICE_MOVE_THRESHOLD since the cached run.
+
         Returns:
             Dict with:
             - unrealized_gains: Total unrealized gains
@@ -96,6 +273,31 @@ class TaxOptimizer:
         """
         logger.info(f"Analyzing portfolio for user {self.user_id}")
 
+        fingerprint = lots_fingerprint(
+            self.db,
+            self.user_id,
+            self.settings.tax_jurisdiction or "US",
+            int(bool(self.settings.apply_wash_sale_rule))
+        )
+        if fingerprint is None:
+            return {
+                "unrealized_gains": 0.0,
+                "unrealized_losses": 0.0,
+                "loss_harvesting_opportunities": [],
+                "total_potential_savings": 0.0,
+                "short_term_to_long_term": []
+            }
+
+        return await cached_analysis(
+            self.redis_client,
+            f"{ANALYSIS_CACHE_PREFIX}:{self.user_id}",
+            fingerprint,
+            self._get_current_prices,
+            self._analyze
+        )
+
+    async def _analyze(self) -> Tuple[Dict[str, Optional[float]], Dict]:
+        """Uncached analysis: (prices used, result)"""
         # Get all active lots
         lots = self.db.query(CostBasisLot).filter(
             and_(
@@ -104,20 +306,15 @@ class TaxOptimizer:
             )
         ).all()
 
-        if not lots:
-            return {
-                "unrealized_gains": 0.0,
-                "unrealized_losses": 0.0,
-                "loss_harvesting_opportunities": [],
-                "total_potential_savings": 0.0,
-                "short_term_to_long_term": []
-            }
+        # One price fetch for every held token
+        price_keys = list(dict.fromkeys(_price_key(lot.token, lot.chain) for lot in lots))
+        prices = await self._get_current_prices(price_keys)
 
         # Calculate unrealized gains/losses
-        unrealized_data = await self._calculate_unrealized(lots)
+        unrealized_data = self._calculate_unrealized(lots, prices)
 
         # Find loss harvesting opportunities
-        loss_harvest_ops = await self._find_loss_harvesting(unrealized_data["lots_with_unrealized"])
+        loss_harvest_ops = self._find_loss_harvesting(unrealized_data["lots_with_unrealized"])
 
         # Find lots approaching long-term status
         short_to_long = self._find_short_term_to_long_term(lots)
@@ -125,7 +322,7 @@ class TaxOptimizer:
         # Calculate total potential tax savings
         total_savings = self._calculate_total_savings(loss_harvest_ops)
 
-        return {
+        result = {
             "unrealized_gains": unrealized_data["total_gains"],
             "unrealized_losses": abs(unrealized_data["total_losses"]),
             "loss_harvesting_opportunities": loss_harvest_ops,
@@ -134,61 +331,91 @@ class TaxOptimizer:
             "analysis_date": datetime.utcnow().isoformat()
         }
 
-    async def _calculate_unrealized(self, lots: List[CostBasisLot]) -> Dict:
-        """Calculate unrealized gains/losses for all lots"""
-        total_gains = 0.0
-        total_losses = 0.0
-        lots_with_unrealized = []
+        return prices, result
+
+    async def _get_current_prices(self, price_keys: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Current prices for many tokens
+
+        One batched CoinGecko call (PriceService, run off the event loop),
+        then per-chain lookups only for tokens the batch can't map.
+
+        Args:
+            price_keys: "TOKEN:chain" keys (see _price_key)
+
+        Returns:
+            Dict mapping price key to USD price (None if unavailable)
+        """
+        symbols = list(dict.fromkeys(key.split(":", 1)[0] for key in price_keys))
+
+        batch_service = PriceService()
+        try:
+            batch = await asyncio.to_thread(batch_service.get_current_prices_batch, symbols)
+        finally:
+            batch_service.close()
+
+        prices = {}
+        missing = []
+        for key in price_keys:
+            price = batch.get(key.split(":", 1)[0])
+            if price is None:
+                missing.append(key)
+            else:
+                prices[key] = float(price)
+
+        if missing:
+            fallback = await asyncio.gather(*(
+                self.price_service.get_current_price(*key.split(":", 1))
+                for key in missing
+            ))
+            prices.update(zip(missing, fallback))
+
+        return prices
 
+    def _calculate_unrealized(self, lots: List[CostBasisLot], prices: Dict[str, Optional[float]]) -> Dict:
+        """Calculate unrealized gains/losses for all lots"""
         # Get holding period requirement for this jurisdiction
         required_holding_days = self._get_holding_period_days()
 
+        priced_lots = []
         for lot in lots:
-            # Get current price
-            current_price = await self.price_service.get_current_price(lot.token, lot.chain)
-
-            if not current_price:
+            if prices.get(_price_key(lot.token, lot.chain)) is None:
                 logger.warning(f"Could not get current price for {lot.token}")
                 continue
+            priced_lots.append(lot)
 
-            # Calculate unrealized
-            cost_basis = float(lot.remaining_amount) * float(lot.acquisition_price_usd)
-            current_value = float(lot.remaining_amount) * float(current_price)
-            unrealized = current_value - cost_basis
-            unrealized_percent = (unrealized / cost_basis * 100) if cost_basis > 0 else 0
+        if not priced_lots:
+            return {"total_gains": 0.0, "total_losses": 0.0, "lots_with_unrealized": []}
 
-            holding_period_days = (datetime.utcnow() - lot.acquisition_date).days
+        current_prices = [prices[_price_key(lot.token, lot.chain)] for lot in priced_lots]
+        metrics = compute_lot_metrics(priced_lots, current_prices, required_holding_days)
 
-            lot_data = {
+        lots_with_unrealized = []
+        for i, lot in enumerate(priced_lots):
+            lots_with_unrealized.append({
                 "lot_id": lot.id,
                 "token": lot.token,
                 "chain": lot.chain,
-                "amount": lot.remaining_amount,
-                "acquisition_price": lot.acquisition_price_usd,
-                "current_price": current_price,
-                "cost_basis": cost_basis,
-                "current_value": current_value,
-                "unrealized_gain_loss": unrealized,
-                "unrealized_percent": unrealized_percent,
+                "amount": float(lot.remaining_amount),
+                "acquisition_price": float(lot.acquisition_price_usd),
+                "current_price": current_prices[i],
+                "cost_basis": float(metrics["cost_basis"][i]),
+                "current_value": float(metrics["current_value"][i]),
+                "unrealized_gain_loss": float(metrics["unrealized"][i]),
+                "unrealized_percent": float(metrics["unrealized_percent"][i]),
                 "acquisition_date": lot.acquisition_date.isoformat(),
-                "holding_period_days": holding_period_days,
-                "is_long_term": holding_period_days >= required_holding_days
-            }
-
-            lots_with_unrealized.append(lot_data)
-
-            if unrealized > 0:
-                total_gains += unrealized
-            else:
-                total_losses += unrealized
+                "holding_period_days": int(metrics["holding_days"][i]),
+                "is_long_term": bool(metrics["is_long_term"][i])
+            })
 
+        unrealized = metrics["unrealized"]
         return {
-            "total_gains": total_gains,
-            "total_losses": total_losses,
+            "total_gains": float(unrealized[unrealized > 0].sum()),
+            "total_losses": float(unrealized[unrealized <= 0].sum()),
             "lots_with_unrealized": lots_with_unrealized
         }
 
-    async def _find_loss_harvesting(self, lots_data: List[Dict]) -> List[Dict]:
+    def _find_loss_harvesting(self, lots_data: List[Dict]) -> List[Dict]:
         """
         Find tax loss harvesting opportunities
 
@@ -197,30 +424,24 @@ class TaxOptimizer:
         - Selling would result in tax benefit
         - No wash sale violation if sold
         """
-        opportunities = []
+        losing = [lot for lot in lots_data if lot["unrealized_gain_loss"] < 0]
+        if not losing:
+            return []
 
         # Get tax rate based on jurisdiction
         tax_rates = self._get_tax_rates()
 
-        for lot_data in lots_data:
-            if lot_data["unrealized_gain_loss"] >= 0:
-                continue  # Only interested in losses
-
-            # Calculate tax savings
-            loss_amount = abs(lot_data["unrealized_gain_loss"])
-            
-            if lot_data["is_long_term"]:
-                tax_rate = tax_rates["long_term"]
-            else:
-                tax_rate = tax_rates["short_term"]
+        loss_amounts = np.abs(np.array([lot["unrealized_gain_loss"] for lot in losing], dtype=float))
+        is_long_term = np.array([lot["is_long_term"] for lot in losing], dtype=bool)
+        tax_savings = loss_amounts * np.where(is_long_term, tax_rates["long_term"], tax_rates["short_term"])
 
-            tax_savings = loss_amount * tax_rate
+        # Recent purchases of every token in one query
+        recent_purchases = self._get_recent_purchase_counts()
 
-            # Check for potential wash sale violation
-            wash_sale_warning = await self._check_wash_sale_risk(
-                lot_data["token"],
-                lot_data["chain"]
-            )
+        opportunities = []
+        for i, lot_data in enumerate(losing):
+            loss_amount = float(loss_amounts[i])
+            savings = float(tax_savings[i])
 
             opportunities.append({
                 "lot_id": lot_data["lot_id"],
@@ -228,15 +449,18 @@ class TaxOptimizer:
                 "chain": lot_data["chain"],
                 "amount": lot_data["amount"],
                 "unrealized_loss": loss_amount,
-                "tax_savings": tax_savings,
+                "tax_savings": savings,
                 "holding_period_days": lot_data["holding_period_days"],
                 "is_long_term": lot_data["is_long_term"],
                 "current_price": lot_data["current_price"],
                 "cost_basis": lot_data["cost_basis"],
                 "action": "sell",
-                "priority": "high" if tax_savings > 1000 else "medium" if tax_savings > 100 else "low",
-                "wash_sale_warning": wash_sale_warning,
-                "notes": f"Selling would generate ${loss_amount:.2f} loss, saving ${tax_savings:.2f} in taxes"
+                "priority": "high" if savings > 1000 else "medium" if savings > 100 else "low",
+                "wash_sale_warning": self._wash_sale_warning(
+                    lot_data["token"],
+                    recent_purchases.get((lot_data["token"], lot_data["chain"]), 0)
+                ),
+                "notes": f"Selling would generate ${loss_amount:.2f} loss, saving ${savings:.2f} in taxes"
             })
 
         # Sort by tax savings (highest first)
@@ -265,7 +489,7 @@ class TaxOptimizer:
                     "lot_id": lot.id,
                     "token": lot.token,
                     "chain": lot.chain,
-                    "amount": lot.remaining_amount,
+                    "amount": float(lot.remaining_amount),
                     "acquisition_date": lot.acquisition_date.isoformat(),
                     "holding_days": holding_days,
                     "days_to_long_term": days_to_long_term,
@@ -278,29 +502,33 @@ class TaxOptimizer:
 
         return approaching_long_term
 
-    async def _check_wash_sale_risk(self, token: str, chain: str) -> Optional[str]:
+    def _get_recent_purchase_counts(self) -> Dict[Tuple[str, str], int]:
         """
-        Check if selling would trigger wash sale rule
+        Count purchases inside the wash sale window, per (token, chain)
 
-        Returns warning message if risk detected
+        Returns an empty dict when the wash sale rule doesn't apply.
         """
         if not self.settings.apply_wash_sale_rule:
-            return None
+            return {}
 
-        # Check for recent purchases (within 30 days)
-        recent_date = datetime.utcnow() - timedelta(days=30)
+        recent_date = datetime.utcnow() - timedelta(days=self.settings.wash_sale_days or 30)
 
-        recent_purchases = self.db.query(CostBasisLot).filter(
-            and_(
-                CostBasisLot.user_id == self.user_id,
-                CostBasisLot.token == token,
-                CostBasisLot.chain == chain,
-                CostBasisLot.acquisition_date >= recent_date
-            )
-        ).count()
+        rows = self.db.query(
+            CostBasisLot.token,
+            CostBasisLot.chain,
+            func.count(CostBasisLot.id)
+        ).filter(
+            CostBasisLot.user_id == self.user_id,
+            CostBasisLot.acquisition_date >= recent_date
+        ).group_by(CostBasisLot.token, CostBasisLot.chain).all()
+
+        return {(token, chain): count for token, chain, count in rows}
 
+    def _wash_sale_warning(self, token: str, recent_purchases: int) -> Optional[str]:
+        """Warning message if selling would trigger wash sale rule"""
         if recent_purchases > 0:
-            return f"Warning: {recent_purchases} purchase(s) of {token} in last 30 days. Selling at loss may trigger wash sale rule."
+            days = self.settings.wash_sale_days or 30
+            return f"Warning: {recent_purchases} purchase(s) of {token} in last {days} days. Selling at loss may trigger wash sale rule."
 
         return None
 
@@ -313,10 +541,7 @@ class TaxOptimizer:
         """
         jurisdiction = self.settings.tax_jurisdiction or "US"
 
-        # Query regulation from database
-        regulation = self.db.query(Regulation).filter(
-            Regulation.country_code == jurisdiction
-        ).first()
+        regulation = get_regulation_catalog(self.db).get(jurisdiction)
 
         if regulation and regulation.holding_period_months:
             # Convert months to days (approximate)
@@ -330,55 +555,33 @@ class TaxOptimizer:
 
     def _get_tax_rates(self) -> Dict[str, float]:
         """
-        Get tax rates from database based on jurisdiction
-
-        Uses Redis cache to avoid repeated DB queries (1 hour TTL)
+        Get tax rates from the regulation catalog based on jurisdiction
 
         Returns dict with short_term and long_term rates
         Uses crypto-specific rates if available, otherwise falls back to general CGT rates
         """
         jurisdiction = self.settings.tax_jurisdiction or "US"
-        cache_key = f"tax_rates:{jurisdiction}"
+        catalog = get_regulation_catalog(self.db)
 
-        # Try Redis cache first
-        cached = self.redis_client.get(cache_key)
-        if cached:
-            logger.debug(f"Redis cache hit for tax rates: {jurisdiction}")
-            return json.loads(cached)
-
-        # Query regulation from database
-        regulation = self.db.query(Regulation).filter(
-            Regulation.country_code == jurisdiction
-        ).first()
+        regulation = catalog.get(jurisdiction)
 
         if not regulation:
             logger.warning(f"No regulation found for jurisdiction '{jurisdiction}', defaulting to US rates")
             # Try to get US rates as fallback
-            regulation = self.db.query(Regulation).filter(
-                Regulation.country_code == "US"
-            ).first()
+            regulation = catalog.get("US")
 
         if not regulation:
             # Ultimate fallback - hardcoded US rates
             logger.error("No regulations found in database, using hardcoded US rates")
             return {"short_term": 0.37, "long_term": 0.20}
 
-        # Use crypto-specific rates if available, otherwise fall back to general CGT rates
-        short_rate = float(regulation.crypto_short_rate) if regulation.crypto_short_rate is not None else float(regulation.cgt_short_rate)
-        long_rate = float(regulation.crypto_long_rate) if regulation.crypto_long_rate is not None else float(regulation.cgt_long_rate)
-
-        logger.debug(f"Using tax rates for {jurisdiction}: short={short_rate}, long={long_rate}")
+        logger.debug(f"Using tax rates for {jurisdiction}: short={regulation.short_rate}, long={regulation.long_rate}")
 
-        rates = {
-            "short_term": short_rate,
-            "long_term": long_rate
+        return {
+            "short_term": regulation.short_rate,
+            "long_term": regulation.long_rate
         }
 
-        # Cache for 1 hour (3600 seconds)
-        self.redis_client.setex(cache_key, 3600, json.dumps(rates))
-
-        return rates
-
     def _calculate_total_savings(self, opportunities: List[Dict]) -> float:
         """Calculate total potential tax savings from all opportunities"""
         return sum(op["tax_savings"] for op in opportunities)
@@ -1,7 +1,8 @@
 from sqlalchemy.orm import Session
-from app.models.regulation import Regulation, RegulationHistory
+from app.models.regulation import RegulationHistory
 from app.models.simulation import Simulation
 from app.services.regulation_history import RegulationHistoryService
+from app.services.regulation_catalog import RegulationRecord, get_regulation_catalog
 from app.utils.tax_calculator import calculate_tax, calculate_savings, calculate_confidence_score
 from dataclasses import dataclass
 from typing import List, Dict
@@ -52,13 +53,10 @@ class TaxSimulator:
         Returns: (result, explanation)
         """
 
-        # Get current regulations
-        reg_current = self.db.query(Regulation).filter_by(
-            country_code=current_country
-        ).first()
-        reg_target = self.db.query(Regulation).filter_by(
-            country_code=target_country
-        ).first()
+        # Get current regulations (in-memory catalog, no queries)
+        catalog = get_regulation_catalog(self.db)
+        reg_current = catalog.get(current_country)
+        reg_target = catalog.get(target_country)
 
         if not reg_current or not reg_target:
             raise ValueError(f"Regulations not found for {current_country} or {target_country}")
@@ -73,16 +71,16 @@ class TaxSimulator:
 
         # Calculate taxes using crypto-specific rates if available, otherwise fallback to general CGT
         # Current country
-        current_short_rate = float(reg_current.crypto_short_rate) if reg_current.crypto_short_rate is not None else float(reg_current.cgt_short_rate)
-        current_long_rate = float(reg_current.crypto_long_rate) if reg_current.crypto_long_rate is not None else float(reg_current.cgt_long_rate)
+        current_short_rate = reg_current.short_rate
+        current_long_rate = reg_current.long_rate
 
         current_tax_short = short_term_gains * current_short_rate
         current_tax_long = long_term_gains * current_long_rate
         current_tax = current_tax_short + current_tax_long
 
         # Target country
-        target_short_rate = float(reg_target.crypto_short_rate) if reg_target.crypto_short_rate is not None else float(reg_target.cgt_short_rate)
-        target_long_rate = float(reg_target.crypto_long_rate) if reg_target.crypto_long_rate is not None else float(reg_target.cgt_long_rate)
+        target_short_rate = reg_target.short_rate
+        target_long_rate = reg_target.long_rate
 
         target_tax_short = short_term_gains * target_short_rate
         target_tax_long = long_term_gains * target_long_rate
@@ -138,10 +136,10 @@ class TaxSimulator:
         """Generate step-by-step explanation (Explain Decision)"""
 
         # Get actual rates used (crypto-specific if available, otherwise general CGT)
-        current_short_rate = float(reg_current.crypto_short_rate) if reg_current.crypto_short_rate is not None else float(reg_current.cgt_short_rate)
-        current_long_rate = float(reg_current.crypto_long_rate) if reg_current.crypto_long_rate is not None else float(reg_current.cgt_long_rate)
-        target_short_rate = float(reg_target.crypto_short_rate) if reg_target.crypto_short_rate is not None else float(reg_target.cgt_short_rate)
-        target_long_rate = float(reg_target.crypto_long_rate) if reg_target.crypto_long_rate is not None else float(reg_target.cgt_long_rate)
+        current_short_rate = reg_current.short_rate
+        current_long_rate = reg_current.long_rate
+        target_short_rate = reg_target.short_rate
+        target_long_rate = reg_target.long_rate
 
         current_uses_crypto = reg_current.crypto_short_rate is not None
         target_uses_crypto = reg_target.crypto_short_rate is not None
@@ -306,8 +304,8 @@ class TaxSimulator:
         self,
         user_id: int,
         result: SimulationResult,
-        reg_current: Regulation,
-        reg_target: Regulation,
+        reg_current: RegulationRecord,
+        reg_target: RegulationRecord,
         capital_gains: float
     ):
         """Save simulation with COMPLETE regulation snapshots for legal compliance"""
@@ -1,51 +1,44 @@
 """
 Transaction Decoder Service
 
-Decodes EVM transaction logs and extracts DeFi activity details.
-Supports 50+ event signatures from major protocols.
+Decodes EVM transaction inputs and logs and extracts DeFi activity details.
+Signatures come from the ABI registry (see abi_registry and
+app.data.abi_signatures), so protocol and activity don't depend on
+explorer-provided method names.
 """
 
-from typing import Optional, Dict, List, Any
-from eth_abi import decode
-from web3 import Web3
+from typing import Optional, Dict, List, Any, Iterable
 import logging
 
+from app.services.abi_registry import AbiRegistry, get_abi_registry
+
 logger = logging.getLogger(__name__)
 
 
+# Token movements and bookkeeping events: they don't tell what the transaction does
+GENERIC_ACTIVITIES = {None, "transfer", "approve"}
+
+
 class TransactionDecoder:
     """Decodes EVM transaction logs and inputs"""
 
-    # Common event signatures (keccak256 hash)
-    EVENT_SIGNATURES = {
-        # Uniswap V2 Swap
-        "0xd78ad95fa46c994b6551d0da85fc275fe613ce37657fb8d5e3d130840159d822": {
-            "name": "Swap", "protocol": "uniswap_v2",
-            "types": ["address", "uint256", "uint256", "uint256", "uint256", "address"],
-            "params": ["sender", "amount0In", "amount1In", "amount0Out", "amount1Out", "to"]
-        },
-        # ERC20 Transfer
-        "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef": {
-            "name": "Transfer", "protocol": "erc20",
-            "types": ["address", "address", "uint256"],
-            "params": ["from", "to", "value"]
-        },
-    }
-
-    FUNCTION_SELECTORS = {
-        "0x38ed1739": {"name": "swapExactTokensForTokens", "protocol": "uniswap_v2"},
-        "0xe8e33700": {"name": "addLiquidity", "protocol": "uniswap_v2"},
-    }
-
-    def __init__(self):
-        self.w3 = Web3()
+    def __init__(self, registry: Optional[AbiRegistry] = None):
+        self.registry = registry or get_abi_registry()
 
     def decode_transaction(self, tx: Dict[str, Any]) -> Optional[Dict]:
-        """Decode transaction and extract DeFi activity"""
+        """
+        Decode transaction and extract DeFi activity
+
+        Args:
+            tx: Transaction with "input" and optionally receipt "logs"
+
+        Returns:
+            {"function", "logs", "protocol", "activity_type"} or None if
+            nothing in it is registered
+        """
         try:
-            function_info = self._decode_function(tx.get("input", ""))
-            decoded_logs = [self._decode_log(log) for log in tx.get("logs", [])]
-            decoded_logs = [l for l in decoded_logs if l]
+            function_info = self.decode_function(tx.get("input", ""))
+            decoded_logs = self.registry.decode_logs(tx.get("logs") or ())
 
             if not function_info and not decoded_logs:
                 return None
@@ -60,43 +53,32 @@ class TransactionDecoder:
             logger.error(f"Failed to decode transaction: {e}")
             return None
 
-    def _decode_function(self, input_data: str) -> Optional[Dict]:
-        """Decode function call"""
-        if not input_data or len(input_data) < 10:
-            return None
-        selector = input_data[:10]
-        if selector in self.FUNCTION_SELECTORS:
-            return {**self.FUNCTION_SELECTORS[selector], "selector": selector}
-        return None
-
-    def _decode_log(self, log: Dict) -> Optional[Dict]:
-        """Decode event log"""
-        if not log.get("topics"):
-            return None
-        topic0 = log["topics"][0]
-        if topic0 not in self.EVENT_SIGNATURES:
-            return None
-        event_sig = self.EVENT_SIGNATURES[topic0]
-        return {
-            "name": event_sig["name"],
-            "protocol": event_sig["protocol"],
-            "address": log.get("address")
-        }
+    def decode_function(self, input_data: Optional[str], decode_args: bool = True) -> Optional[Dict]:
+        """Decode function call ({"name", "protocol", "activity", "selector", "args"})"""
+        return self.registry.decode_input(input_data, decode_args)
+
+    def decode_receipts(self, receipts: Iterable[Optional[Dict]]) -> List[List[Dict]]:
+        """Decode the logs of a batch of receipts (one list of decoded logs per receipt)"""
+        return self.registry.decode_receipts(receipts)
 
     def _determine_protocol(self, function_info, logs):
         """Determine protocol"""
         if function_info:
-            return function_info.get("protocol", "unknown")
+            return function_info["protocol"]
+        for log in logs:
+            if log["activity"] not in GENERIC_ACTIVITIES:
+                return log["protocol"]
         if logs:
-            return logs[0].get("protocol", "unknown")
+            return logs[0]["protocol"]
         return "unknown"
 
     def _determine_activity_type(self, function_info, logs):
-        """Determine activity type"""
-        if function_info:
-            name = function_info.get("name", "").lower()
-            if "swap" in name:
-                return "swap"
-            if "add" in name:
-                return "add_liquidity"
+        """Determine activity type (the call's, else the first meaningful event's)"""
+        if function_info and function_info["activity"]:
+            return function_info["activity"]
+        for log in logs:
+            if log["activity"] not in GENERIC_ACTIVITIES:
+                return log["activity"]
+        if any(log["activity"] == "transfer" for log in logs):
+            return "transfer"
         return "unknown"
@@ -0,0 +1,210 @@
+"""
+Usage Meter
+
+License quotas (simulations, DeFi audits, PDF exports, chat messages) are
+metered with Redis counters instead of a License row update per request:
+
+- usage:{period}:{user_id}:{resource} holds the user's usage for a monthly
+  billing period (period = "YYYY-MM"). A Lua script checks it against the
+  tier limit and increments it atomically, so concurrent requests can't
+  overshoot the quota.
+- A counter missing from Redis (first use in the period, eviction) is
+  seeded from the License row before the check.
+- Incremented users are tracked in the usage:{period}:dirty set and
+  flush() writes their counters back to the licenses table in bulk
+  (flush_usage_counters task, every minute).
+
+A new period simply uses new keys: rolling over is a key rotation, License
+rows keep their last counters and License.get_usage() reads them as 0 once
+the period they were reset in is over. Old keys expire after COUNTER_TTL.
+
+When Redis is unavailable, LicenseService falls back to counting in the
+database (row lock). Flushes never lower a database counter below what
+that fallback recorded.
+"""
+
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.license import (
+    USAGE_RESOURCES,
+    License,
+    billing_period_start,
+    next_billing_period_start,
+)
+from app.services.chat_context import LICENSE_VOLATILE_COLUMNS, invalidate_chat_context
+
+logger = logging.getLogger(__name__)
+
+
+KEY_PREFIX = "usage"
+COUNTER_TTL = 40 * 24 * 3600   # Longer than a period, so the rotation can flush the previous one
+FLUSH_BATCH = 500              # Users per flush query
+
+# Check-and-increment against the limit
+#   KEYS: counter, dirty set
+#   ARGV: limit, seed (-1 = unknown), ttl, user id, amount
+# Returns {allowed (1/0, -1 = counter missing and no seed), usage}
+CHECK_AND_INCREMENT = """
+local used = redis.call('GET', KEYS[1])
+if not used then
+    if tonumber(ARGV[2]) < 0 then
+        return {-1, 0}
+    end
+    used = tonumber(ARGV[2])
+    redis.call('SET', KEYS[1], used, 'EX', ARGV[3])
+else
+    used = tonumber(used)
+end
+
+local amount = tonumber(ARGV[5])
+if used + amount > tonumber(ARGV[1]) then
+    return {0, used}
+end
+
+used = redis.call('INCRBY', KEYS[1], amount)
+redis.call('SADD', KEYS[2], ARGV[4])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return {1, used}
+"""
+
+
+def period_id(period_start: datetime) -> str:
+    return period_start.strftime("%Y-%m")
+
+
+def counter_key(period: str, user_id: int, resource: str) -> str:
+    return f"{KEY_PREFIX}:{period}:{user_id}:{resource}"
+
+
+def dirty_key(period: str) -> str:
+    return f"{KEY_PREFIX}:{period}:dirty"
+
+
+def _redis():
+    from app.dependencies.exchange_rate import get_redis_client
+    return get_redis_client()
+
+
+class UsageMeter:
+    """Redis usage counters of the current billing period"""
+
+    def __init__(self, redis_client=None):
+        self.redis = redis_client if redis_client is not None else _redis()
+        self._check_and_increment = self.redis.register_script(CHECK_AND_INCREMENT)
+
+    def try_increment(
+        self,
+        user_id: int,
+        resource: str,
+        limit: int,
+        seed: Callable[[], int],
+        amount: int = 1
+    ) -> Tuple[bool, int]:
+        """
+        Increment a usage counter unless it would exceed the limit
+
+        Args:
+            user_id: User ID
+            resource: "simulations", "defi_audits", "pdf_exports", "chat_messages"
+            limit: Tier limit for the period
+            seed: Usage recorded in the database (only called when the
+                  counter isn't in Redis yet)
+            amount: Increment
+
+        Returns:
+            (allowed, usage after the call). Redis errors are raised.
+        """
+        period = period_id(billing_period_start())
+        keys = [counter_key(period, user_id, resource), dirty_key(period)]
+
+        allowed, used = self._check_and_increment(keys=keys, args=[limit, -1, COUNTER_TTL, user_id, amount])
+        if allowed == -1:
+            allowed, used = self._check_and_increment(
+                keys=keys, args=[limit, seed(), COUNTER_TTL, user_id, amount]
+            )
+        return allowed == 1, int(used)
+
+    def current_usage(self, license: License) -> Dict[str, int]:
+        """A license's usage this period, including increments not flushed yet"""
+        usage = license.get_usage()
+        period = period_id(billing_period_start())
+        values = self.redis.mget([counter_key(period, license.user_id, resource) for resource in USAGE_RESOURCES])
+        for resource, value in zip(USAGE_RESOURCES, values):
+            if value is not None:
+                usage[resource] = max(usage[resource], int(value))
+        return usage
+
+    def reset(self, user_ids: Iterable[int]):
+        """Drop the current period's counters of users whose License usage was reset"""
+        user_ids = list(user_ids)
+        if not user_ids:
+            return
+        period = period_id(billing_period_start())
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.delete(*[counter_key(period, user_id, resource) for user_id in user_ids for resource in USAGE_RESOURCES])
+        pipe.srem(dirty_key(period), *user_ids)
+        pipe.execute()
+
+    def flush(self, db: Session, period_start: Optional[datetime] = None) -> int:
+        """
+        Write the counters of users incremented since the last flush to their licenses
+
+        Args:
+            db: Session (committed per batch)
+            period_start: Period to flush (default: the current one)
+
+        Returns:
+            Number of licenses updated
+        """
+        period_start = period_start or billing_period_start()
+        dirty = dirty_key(period_id(period_start))
+        flushed = 0
+
+        while True:
+            members = self.redis.spop(dirty, FLUSH_BATCH)
+            if not members:
+                return flushed
+            try:
+                flushed += self._write_counters(db, period_start, [int(member) for member in members])
+            except Exception:
+                db.rollback()
+                self.redis.sadd(dirty, *members)  # Retried by the next flush
+                raise
+
+    def _write_counters(self, db: Session, period_start: datetime, user_ids: List[int]) -> int:
+        period = period_id(period_start)
+        pairs = [(user_id, resource) for user_id in user_ids for resource in USAGE_RESOURCES]
+        counters = dict(zip(pairs, self.redis.mget([counter_key(period, *pair) for pair in pairs])))
+
+        next_period = next_billing_period_start(period_start)
+        rows = []
+        changed_users = []
+        for license in db.query(License).filter(License.user_id.in_(user_ids)):
+            if license.usage_reset_at and license.usage_reset_at >= next_period:
+                continue  # Already reset for a later period
+
+            usage = license.get_usage(period_start)
+            row = {"id": license.id}
+            for resource in USAGE_RESOURCES:
+                value = counters[(license.user_id, resource)]
+                row[f"{resource}_used"] = max(usage[resource], int(value)) if value is not None else usage[resource]
+            if license.usage_reset_at is None or license.usage_reset_at < period_start:
+                row["usage_reset_at"] = period_start
+            rows.append(row)
+
+            if any(row[column] != getattr(license, column) for column in row if column not in LICENSE_VOLATILE_COLUMNS):
+                changed_users.append(license.user_id)
+
+        if rows:
+            # Bulk UPDATE by primary key: no flush, so the ORM invalidation listeners don't run
+            db.execute(update(License), rows)
+        db.commit()
+
+        for user_id in changed_users:
+            invalidate_chat_context(user_id, ["license"])
+        return len(rows)
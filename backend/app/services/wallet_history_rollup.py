@@ -0,0 +1,283 @@
+"""
+Wallet History Rollup Service
+
+Keeps wallet value history bounded: raw points for a recent window, plus
+hourly / daily / weekly aggregates (open, min, max, close) that are updated
+as points are written. History queries are answered from the coarsest tier
+that still gives the requested resolution.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+from decimal import Decimal
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session
+
+from app.models.wallet_snapshot import WalletSnapshot
+from app.models.wallet_value_history import WalletValueHistory
+from app.models.wallet_value_rollup import WalletValueRollup
+
+logger = logging.getLogger(__name__)
+
+
+# Tiers from finest to coarsest: (resolution, bucket size, retention)
+# Weekly buckets are never pruned (~52 rows per wallet per year).
+ROLLUP_TIERS = [
+    ("hour", timedelta(hours=1), timedelta(days=90)),
+    ("day", timedelta(days=1), timedelta(days=3 * 365)),
+    ("week", timedelta(weeks=1), None),
+]
+
+# Raw rows kept after they've been folded into the tiers.
+# calculate_24h_change only looks back 24h; snapshots keep positions for 90 days.
+RAW_HISTORY_RETENTION = timedelta(days=30)
+RAW_SNAPSHOT_RETENTION = timedelta(days=90)
+
+# "auto" resolution picks the coarsest tier giving at least this many points
+MIN_CHART_POINTS = 30
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    """Start of the bucket containing `timestamp` (weeks start on Monday)"""
+    if resolution == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if resolution == "day":
+        return day
+    if resolution == "week":
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown resolution: {resolution}")
+
+
+def pick_resolution(start: datetime, end: datetime, now: Optional[datetime] = None) -> str:
+    """
+    Coarsest tier whose retention covers `start` and that still gives
+    MIN_CHART_POINTS buckets over [start, end]
+    """
+    now = now or datetime.utcnow()
+    available = [
+        (resolution, size)
+        for resolution, size, retention in ROLLUP_TIERS
+        if retention is None or now - start <= retention
+    ]
+
+    chosen = available[0][0]
+    for resolution, size in available:
+        if (end - start) / size >= MIN_CHART_POINTS:
+            chosen = resolution
+    return chosen
+
+
+class WalletHistoryRollupService:
+    """Maintain and query downsampled wallet value history"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_point(
+        self,
+        user_id: int,
+        wallet_id: Optional[int],
+        timestamp: datetime,
+        value_usd: Decimal,
+        value_local: Optional[Decimal] = None,
+        local_currency: Optional[str] = None,
+        commit: bool = True,
+        _pending: Optional[Dict[tuple, WalletValueRollup]] = None
+    ) -> None:
+        """
+        Fold one raw value point into every rollup tier
+
+        Args:
+            user_id: User ID
+            wallet_id: Wallet ID (None = consolidated)
+            timestamp: Time of the value point
+            value_usd: Portfolio value in USD
+            value_local: Value in the user's local currency, if known
+            local_currency: Local currency code
+            commit: Commit the session (False when the caller batches writes)
+            _pending: Buckets added but not flushed yet (batch writers)
+        """
+        value_usd = Decimal(str(value_usd or 0))
+        if value_local is not None:
+            value_local = Decimal(str(value_local))
+
+        for resolution, _, _ in ROLLUP_TIERS:
+            start = bucket_start(timestamp, resolution)
+            key = (user_id, wallet_id, resolution, start)
+
+            bucket = _pending.get(key) if _pending is not None else None
+            if bucket is None:
+                bucket = self.db.query(WalletValueRollup).filter(
+                    WalletValueRollup.user_id == user_id,
+                    WalletValueRollup.wallet_id == wallet_id,
+                    WalletValueRollup.resolution == resolution,
+                    WalletValueRollup.bucket_start == start
+                ).first()
+
+            if bucket is None:
+                bucket = WalletValueRollup(
+                    user_id=user_id,
+                    wallet_id=wallet_id,
+                    resolution=resolution,
+                    bucket_start=start,
+                    open_value_usd=value_usd,
+                    min_value_usd=value_usd,
+                    max_value_usd=value_usd,
+                    close_value_usd=value_usd,
+                    close_value_local=value_local,
+                    local_currency=local_currency,
+                    first_at=timestamp,
+                    last_at=timestamp,
+                    sample_count=1
+                )
+                self.db.add(bucket)
+                if _pending is not None:
+                    _pending[key] = bucket
+                continue
+
+            bucket.min_value_usd = min(Decimal(bucket.min_value_usd), value_usd)
+            bucket.max_value_usd = max(Decimal(bucket.max_value_usd), value_usd)
+            bucket.sample_count = (bucket.sample_count or 0) + 1
+
+            # Points can arrive out of order (backfill, retried tasks)
+            if timestamp < bucket.first_at:
+                bucket.first_at = timestamp
+                bucket.open_value_usd = value_usd
+            if timestamp >= bucket.last_at:
+                bucket.last_at = timestamp
+                bucket.close_value_usd = value_usd
+                if value_local is not None:
+                    bucket.close_value_local = value_local
+                    bucket.local_currency = local_currency
+
+        if commit:
+            self.db.commit()
+
+    def get_history(
+        self,
+        user_id: int,
+        wallet_id: Optional[int],
+        start: datetime,
+        end: Optional[datetime] = None,
+        resolution: str = "auto"
+    ) -> Tuple[str, List[WalletValueRollup]]:
+        """
+        Read wallet history from a single rollup tier
+
+        Args:
+            user_id: User ID
+            wallet_id: Wallet ID (None = consolidated)
+            start: Range start
+            end: Range end (default: now)
+            resolution: hour, day, week or auto
+
+        Returns:
+            (resolution used, buckets ordered by time)
+        """
+        end = end or datetime.utcnow()
+        if resolution == "auto":
+            resolution = pick_resolution(start, end)
+
+        buckets = self.db.query(WalletValueRollup).filter(
+            WalletValueRollup.user_id == user_id,
+            WalletValueRollup.wallet_id == wallet_id,
+            WalletValueRollup.resolution == resolution,
+            WalletValueRollup.bucket_start >= bucket_start(start, resolution),
+            WalletValueRollup.bucket_start <= end
+        ).order_by(WalletValueRollup.bucket_start).all()
+
+        return resolution, buckets
+
+    def backfill(self, batch_size: int = 5000) -> Dict[str, int]:
+        """
+        Build rollups from existing raw rows
+
+        Refuses to run on a non-empty rollup table (points would be counted twice).
+
+        Returns:
+            Number of raw rows folded in per source
+        """
+        if self.db.query(WalletValueRollup.id).first() is not None:
+            raise ValueError("Rollups already exist; backfill only runs on an empty table")
+
+        counts = {"snapshots": 0, "history": 0}
+        pending = {}
+
+        snapshots = self.db.query(
+            WalletSnapshot.user_id,
+            WalletSnapshot.wallet_id,
+            WalletSnapshot.snapshot_date,
+            WalletSnapshot.total_value_usd,
+            WalletSnapshot.total_value_local,
+            WalletSnapshot.local_currency
+        ).order_by(WalletSnapshot.id).yield_per(batch_size)
+
+        for user_id, wallet_id, timestamp, value_usd, value_local, currency in snapshots:
+            self.record_point(
+                user_id, wallet_id, timestamp, value_usd, value_local, currency,
+                commit=False, _pending=pending
+            )
+            counts["snapshots"] += 1
+            if counts["snapshots"] % batch_size == 0:
+                self.db.flush()
+                pending.clear()
+
+        history = self.db.query(
+            WalletValueHistory.user_id,
+            WalletValueHistory.wallet_id,
+            WalletValueHistory.timestamp,
+            WalletValueHistory.total_value_usd,
+            WalletValueHistory.total_value_local,
+            WalletValueHistory.local_currency
+        ).order_by(WalletValueHistory.id).yield_per(batch_size)
+
+        for user_id, wallet_id, timestamp, value_usd, value_local, currency in history:
+            self.record_point(
+                user_id, wallet_id, timestamp, value_usd, value_local, currency,
+                commit=False, _pending=pending
+            )
+            counts["history"] += 1
+            if counts["history"] % batch_size == 0:
+                self.db.flush()
+                pending.clear()
+
+        self.db.commit()
+        return counts
+
+    def apply_retention(
+        self,
+        now: Optional[datetime] = None,
+        snapshot_retention: timedelta = RAW_SNAPSHOT_RETENTION
+    ) -> Dict[str, int]:
+        """
+        Delete raw rows and rollup buckets past their retention window
+
+        Args:
+            now: Reference time (default: now)
+            snapshot_retention: How long to keep raw WalletSnapshot rows
+
+        Returns:
+            Rows deleted per table/tier
+        """
+        now = now or datetime.utcnow()
+        deleted = {}
+
+        deleted["wallet_value_history"] = self.db.query(WalletValueHistory).filter(
+            WalletValueHistory.timestamp < now - RAW_HISTORY_RETENTION
+        ).delete(synchronize_session=False)
+
+        deleted["wallet_snapshots"] = self.db.query(WalletSnapshot).filter(
+            WalletSnapshot.snapshot_date < now - snapshot_retention
+        ).delete(synchronize_session=False)
+
+        for resolution, _, retention in ROLLUP_TIERS:
+            if retention is None:
+                continue
+            deleted[f"rollup_{resolution}"] = self.db.query(WalletValueRollup).filter(
+                WalletValueRollup.resolution == resolution,
+                WalletValueRollup.bucket_start < now - retention
+            ).delete(synchronize_session=False)
+
+        self.db.commit()
+        return deleted
@@ -9,7 +9,7 @@ from typing import Dict, List, Optional
 from decimal import Decimal
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
+from sqlalchemy import desc, and_, func
 
 from app.models.user_wallet import UserWallet
 from app.models.wallet_snapshot import WalletSnapshot
@@ -18,6 +18,7 @@ from app.models.cost_basis import CostBasisLot, UserCostBasisSettings
 from app.models.regulation import Regulation
 from app.services.multi_chain_balance_service import MultiChainBalanceService
 from app.services.price_service import PriceService
+from app.services.wallet_history_rollup import WalletHistoryRollupService
 from app.dependencies.exchange_rate import get_exchange_rate_service
 
 logger = logging.getLogger(__name__)
@@ -26,15 +27,29 @@ logger = logging.getLogger(__name__)
 class WalletPortfolioService:
     """Service for wallet portfolio calculations and tracking"""
 
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        balance_service: Optional[MultiChainBalanceService] = None,
+        price_service: Optional[PriceService] = None,
+        exchange_rate_service=None
+    ):
+        """
+        Args:
+            db: Database session
+            balance_service, price_service, exchange_rate_service: Shared
+                clients (Celery workers reuse one of each per process)
+        """
         self.db = db
-        self.balance_service = MultiChainBalanceService()
-        self.price_service = PriceService()
+        self.balance_service = balance_service or MultiChainBalanceService()
+        self.price_service = price_service or PriceService()
+        self.exchange_rate_service = exchange_rate_service
 
     async def calculate_wallet_value(
         self,
         wallet_id: int,
-        user_id: int
+        user_id: int,
+        balances: Optional[Dict[str, any]] = None
     ) -> Dict[str, any]:
         """
         Calculate current value of a wallet
@@ -42,6 +57,7 @@ class WalletPortfolioService:
         Args:
             wallet_id: Wallet ID
             user_id: User ID
+            balances: Known balances (skips the on-chain fetch, prices are still refreshed)
 
         Returns:
             {
@@ -66,13 +82,14 @@ class WalletPortfolioService:
             raise ValueError(f"Wallet {wallet_id} not found")
 
         # Get on-chain balances
-        balance_start = time.time()
-        balances = await self.balance_service.get_wallet_balances(
-            wallet.wallet_address,
-            wallet.chain
-        )
-        balance_time = time.time() - balance_start
-        logger.warning(f"⚡ [PERF] Wallet {wallet_id} - Balance fetch: {balance_time:.2f}s")
+        if balances is None:
+            balance_start = time.time()
+            balances = await self.balance_service.get_wallet_balances(
+                wallet.wallet_address,
+                wallet.chain
+            )
+            balance_time = time.time() - balance_start
+            logger.warning(f"⚡ [PERF] Wallet {wallet_id} - Balance fetch: {balance_time:.2f}s")
 
         # ⚡ PERFORMANCE: Collect all tokens first, then batch fetch prices
         positions = []
@@ -179,7 +196,8 @@ class WalletPortfolioService:
         self,
         wallet_id: int,
         user_id: int,
-        snapshot_date: Optional[datetime] = None
+        snapshot_date: Optional[datetime] = None,
+        balances: Optional[Dict[str, any]] = None
     ) -> WalletSnapshot:
         """
         Create a wallet snapshot
@@ -188,6 +206,7 @@ class WalletPortfolioService:
             wallet_id: Wallet ID
             user_id: User ID
             snapshot_date: Date for snapshot (default: now)
+            balances: Known balances (e.g. unchanged since last snapshot)
 
         Returns:
             WalletSnapshot instance
@@ -196,7 +215,7 @@ class WalletPortfolioService:
             snapshot_date = datetime.utcnow()
 
         # Calculate current value
-        portfolio = await self.calculate_wallet_value(wallet_id, user_id)
+        portfolio = await self.calculate_wallet_value(wallet_id, user_id, balances=balances)
 
         # Get currency info
         local_currency_data = await self._get_local_currency_data(user_id)
@@ -220,6 +239,10 @@ class WalletPortfolioService:
         self.db.commit()
         self.db.refresh(snapshot)
 
+        WalletHistoryRollupService(self.db).record_point(
+            user_id, wallet_id, snapshot_date, portfolio["total_value_usd"]
+        )
+
         logger.info(f"Created snapshot for wallet {wallet_id}: ${portfolio['total_value_usd']}")
 
         return snapshot
@@ -227,7 +250,8 @@ class WalletPortfolioService:
     async def calculate_24h_change(
         self,
         wallet_id: int,
-        user_id: int
+        user_id: int,
+        current_value: Optional[Decimal] = None
     ) -> Dict[str, any]:
         """
         Calculate 24h change for a wallet
@@ -235,6 +259,7 @@ class WalletPortfolioService:
         Args:
             wallet_id: Wallet ID
             user_id: User ID
+            current_value: Value just computed by the caller (skips re-fetching balances)
 
         Returns:
             {
@@ -245,8 +270,9 @@ class WalletPortfolioService:
             }
         """
         # Get current value
-        current_portfolio = await self.calculate_wallet_value(wallet_id, user_id)
-        current_value = current_portfolio["total_value_usd"]
+        if current_value is None:
+            current_portfolio = await self.calculate_wallet_value(wallet_id, user_id)
+            current_value = current_portfolio["total_value_usd"]
 
         # Get snapshot from 24h ago
         yesterday = datetime.utcnow() - timedelta(hours=24)
@@ -311,23 +337,92 @@ class WalletPortfolioService:
                 "total_chains": 0
             }
 
-        total_value_usd = Decimal("0")
-        total_cost_basis = Decimal("0")
-        wallets_data = []
-        all_positions = {}  # {token_symbol: aggregated_data}
-        chains_set = set()
-
         # ⚡ PERFORMANCE: Calculate ALL wallets in PARALLEL instead of sequential loop
         import asyncio
         parallel_start = time.time()
+        # One balance round-trip per chain for wallets read over plain RPC
+        balances = await self.balance_service.get_wallet_balances_many(
+            [(wallet.wallet_address, wallet.chain) for wallet in wallets]
+        )
         wallet_tasks = [
-            self.calculate_wallet_value(wallet.id, user_id)
+            self.calculate_wallet_value(
+                wallet.id,
+                user_id,
+                balances=balances[(wallet.wallet_address, wallet.chain)]
+            )
             for wallet in wallets
         ]
         wallet_portfolios = await asyncio.gather(*wallet_tasks, return_exceptions=True)
         parallel_time = time.time() - parallel_start
         logger.warning(f"⚡ [PERF] User {user_id} - Parallel wallet calculations: {parallel_time:.2f}s")
 
+        consolidated = self._consolidate(wallets, wallet_portfolios)
+
+        total_time = time.time() - start_time
+        logger.warning(f"⚡ [PERF] User {user_id} - TOTAL consolidated portfolio time: {total_time:.2f}s")
+
+        return consolidated
+
+    def consolidate_snapshots(self, user_id: int) -> Dict[str, any]:
+        """
+        Consolidated portfolio built from the latest snapshot of each wallet
+
+        No balance or price fetch: used by the nightly consolidated snapshot,
+        right after the sync tasks wrote the per-wallet snapshots (within the
+        provider budgets, unchanged wallets re-priced only).
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Same shape as get_consolidated_portfolio (wallets without any
+            snapshot are left out)
+        """
+        wallets = self.db.query(UserWallet).filter(
+            UserWallet.user_id == user_id,
+            UserWallet.is_active == True
+        ).all()
+
+        latest = {}
+        if wallets:
+            latest_dates = self.db.query(
+                WalletSnapshot.wallet_id,
+                func.max(WalletSnapshot.snapshot_date).label("snapshot_date")
+            ).filter(
+                WalletSnapshot.wallet_id.in_([wallet.id for wallet in wallets])
+            ).group_by(WalletSnapshot.wallet_id).subquery()
+
+            snapshots = self.db.query(WalletSnapshot).join(
+                latest_dates,
+                and_(
+                    WalletSnapshot.wallet_id == latest_dates.c.wallet_id,
+                    WalletSnapshot.snapshot_date == latest_dates.c.snapshot_date
+                )
+            ).all()
+            latest = {snapshot.wallet_id: snapshot for snapshot in snapshots}
+
+        synced = [wallet for wallet in wallets if wallet.id in latest]
+        wallet_portfolios = [
+            {
+                "total_value_usd": Decimal(str(latest[wallet.id].total_value_usd)),
+                "total_cost_basis": Decimal(str(latest[wallet.id].total_cost_basis)),
+                "total_unrealized_gain_loss": Decimal(str(latest[wallet.id].total_unrealized_gain_loss)),
+                "positions": latest[wallet.id].positions or []
+            }
+            for wallet in synced
+        ]
+
+        return self._consolidate(synced, wallet_portfolios)
+
+    @staticmethod
+    def _consolidate(wallets: List[UserWallet], wallet_portfolios: List) -> Dict[str, any]:
+        """Aggregate wallet portfolios (exceptions: wallets left out)"""
+        total_value_usd = Decimal("0")
+        total_cost_basis = Decimal("0")
+        wallets_data = []
+        all_positions = {}  # {token_symbol: aggregated_data}
+        chains_set = set()
+
         for wallet, wallet_portfolio in zip(wallets, wallet_portfolios):
             # Skip failed wallets
             if isinstance(wallet_portfolio, Exception):
@@ -392,9 +487,6 @@ class WalletPortfolioService:
             else Decimal("0")
         )
 
-        total_time = time.time() - start_time
-        logger.warning(f"⚡ [PERF] User {user_id} - TOTAL consolidated portfolio time: {total_time:.2f}s")
-
         return {
             "total_value_usd": total_value_usd,
             "total_cost_basis": total_cost_basis,
@@ -408,6 +500,30 @@ class WalletPortfolioService:
 
     # Helper methods
 
+    @staticmethod
+    def balances_from_positions(positions: List[Dict[str, any]]) -> Dict[str, any]:
+        """
+        Rebuild a get_wallet_balances() result from snapshot positions
+
+        Used to re-price a wallet whose on-chain state hasn't changed
+        without calling the balance providers again.
+        """
+        native_balance = Decimal("0")
+        tokens = []
+
+        for position in positions or []:
+            amount = Decimal(str(position.get("amount", 0)))
+            if position.get("token_address") is None:
+                native_balance += amount
+            else:
+                tokens.append({
+                    "token_address": position.get("token_address"),
+                    "symbol": position.get("token"),
+                    "balance_formatted": amount
+                })
+
+        return {"native_balance": native_balance, "tokens": tokens}
+
     async def _get_token_price(self, symbol: str) -> Decimal:
         """Get current token price in USD"""
         try:
@@ -480,7 +596,7 @@ class WalletPortfolioService:
             }
 
         try:
-            exchange_service = get_exchange_rate_service()
+            exchange_service = self.exchange_rate_service or get_exchange_rate_service()
             rate, source = await exchange_service.get_exchange_rate(
                 from_currency="USD",
                 to_currency=regulation.currency_code
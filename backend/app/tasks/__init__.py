@@ -4,6 +4,13 @@ Celery tasks package
 
 from .celery_app import celery_app
 from .tax_sync_tasks import sync_all_tax_data_task, sync_countries_task
+from .simulation_tasks import run_monte_carlo_simulation_task
+from .notification_tasks import send_bulk_notification_task
+
+# Invalidates cached chat context when tasks write audits, lots or licenses
+import app.services.chat_context  # noqa: F401
+# Invalidates cached principals when tasks change licenses (e.g. expired trials)
+import app.services.principal_cache  # noqa: F401
 
 # Import wallet tasks to register them with Celery
 try:
@@ -13,6 +20,7 @@ try:
         'celery_app',
         'sync_all_tax_data_task',
         'sync_countries_task',
+        'run_monte_carlo_simulation_task',
         'sync_wallet_snapshot',
         'create_consolidated_snapshot',
         'process_defi_audit_task',
@@ -26,8 +34,9 @@ except ImportError as e:
             'celery_app',
             'sync_all_tax_data_task',
             'sync_countries_task',
+        'run_monte_carlo_simulation_task',
             'process_defi_audit_task',
             'cleanup_old_audits_task'
         ]
     except ImportError:
-        __all__ = ['celery_app', 'sync_all_tax_data_task', 'sync_countries_task']
+        __all__ = ['celery_app', 'sync_all_tax_data_task', 'sync_countries_task', 'run_monte_carlo_simulation_task']
@@ -4,6 +4,7 @@ Celery application configuration
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 import os
 import ssl
 
@@ -58,13 +59,25 @@ celery_app.conf.beat_schedule = {
         'schedule': crontab(hour=7, minute=0),  # Daily 7 AM
     },
 
+    # Sync DeFi protocol addresses from DeFiLlama (every day at 4 AM UTC)
+    'daily-protocol-registry-sync': {
+        'task': 'sync_protocol_registry',
+        'schedule': crontab(hour=4, minute=0),  # Daily 4 AM
+    },
+
     # License management tasks
-    # Reset monthly usage (1st of month at 00:00 UTC)
+    # Roll usage over to the new period (1st of month at 00:00 UTC)
     'reset-usage-monthly': {
         'task': 'reset_monthly_usage',
         'schedule': crontab(day_of_month='1', hour='0', minute='0'),
     },
 
+    # Flush Redis usage counters to the licenses table (every minute)
+    'flush-usage-counters': {
+        'task': 'flush_usage_counters',
+        'schedule': crontab(minute='*'),
+    },
+
     # Check expired trials (daily at 01:00 UTC)
     'check-trials-daily': {
         'task': 'check_expired_trials',
@@ -84,7 +97,7 @@ celery_app.conf.beat_schedule = {
         'schedule': crontab(hour='0', minute='0'),  # Daily 00:00 UTC
     },
 
-    # Cleanup old snapshots (weekly on Monday at 02:00 UTC)
+    # Wallet history retention: prune raw snapshots/history, keep rollups (weekly on Monday at 02:00 UTC)
     'cleanup-old-snapshots': {
         'task': 'cleanup_old_snapshots',
         'schedule': crontab(hour='2', minute='0', day_of_week=1),  # Monday 2 AM
@@ -93,3 +106,30 @@ celery_app.conf.beat_schedule = {
 
 # Auto-discover tasks
 celery_app.autodiscover_tasks(['app.tasks'])
+
+
+@worker_process_init.connect
+def _reset_db_pools(**kwargs):
+    """Prefork children must not reuse the parent's pooled connections"""
+    from app.database import dispose_engines
+    dispose_engines()
+
+
+@worker_process_init.connect
+def _load_protocol_registry(**kwargs):
+    """Address -> protocol map shared by every task of the process"""
+    from app.services.protocol_registry import load_protocol_registry
+    load_protocol_registry()
+
+
+@worker_process_init.connect
+def _start_worker_runtime(**kwargs):
+    """One event loop and shared HTTP/Redis clients per worker process"""
+    from app.tasks.worker_runtime import start_worker_runtime
+    start_worker_runtime()
+
+
+@worker_process_shutdown.connect
+def _stop_worker_runtime(**kwargs):
+    from app.tasks.worker_runtime import stop_worker_runtime
+    stop_worker_runtime()
@@ -6,8 +6,10 @@ Processes blockchain scans in background to avoid HTTP timeouts
 from celery import Task
 from sqlalchemy.orm import Session
 from app.tasks.celery_app import celery_app
+from app.tasks.worker_runtime import run_async, get_blockchain_parser
 from app.database import SessionLocal
 from app.services.defi_audit_service import DeFiAuditService
+from app.services.audit_progress import publish_audit
 from app.models.defi_protocol import DeFiAudit
 import logging
 from datetime import datetime
@@ -55,18 +57,9 @@ def process_defi_audit_task(self, audit_id: int, wallet_address: str):
         audit.status = "processing"
         db.commit()
 
-        # Process audit
-        service = DeFiAuditService(db)
-
-        # Use synchronous version since Celery doesn't support async
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            loop.run_until_complete(service._process_audit(audit, wallet_address))
-        finally:
-            loop.close()
+        # Process audit on the worker's event loop, with its shared parser
+        service = DeFiAuditService(db, parser=get_blockchain_parser())
+        run_async(service._process_audit(audit, wallet_address))
 
         logger.info(f"Audit {audit_id} processing completed successfully")
 
@@ -86,6 +79,7 @@ def process_defi_audit_task(self, audit_id: int, wallet_address: str):
                 audit.status = "failed"
                 audit.error_message = str(e)
                 db.commit()
+                publish_audit(audit)
         except Exception as db_error:
             logger.error(f"Failed to update audit status: {db_error}")
 
@@ -6,15 +6,15 @@ Background processing for DeFi audits, transaction parsing, and cost basis calcu
 
 from celery import Task
 from app.tasks.celery_app import celery_app
-from app.database import get_db
+from app.database import get_db, get_batch_session
 from app.models.defi_protocol import DeFiAudit
 from app.services.defi_audit_service import DeFiAuditService
 from app.services.cost_basis_calculator import CostBasisCalculator
 from app.services.notification_service import NotificationService
+from app.tasks.worker_runtime import run_async, get_blockchain_parser
 from sqlalchemy.orm import Session
 from datetime import datetime
 import logging
-import asyncio
 
 logger = logging.getLogger(__name__)
 
@@ -138,7 +138,7 @@ def process_defi_audit_task(self, audit_id: int, wallet_address: str):
         self.db.commit()
 
         # Initialize services
-        defi_service = DeFiAuditService(self.db)
+        defi_service = DeFiAuditService(self.db, parser=get_blockchain_parser())
         cost_basis_calc = CostBasisCalculator(self.db, audit.user_id)
 
         # Progress tracking
@@ -157,7 +157,7 @@ def process_defi_audit_task(self, audit_id: int, wallet_address: str):
 
         # Run async operations
         all_transactions = []
-        asyncio.run(_run_audit_async())
+        run_async(_run_audit_async())
 
         # Calculate summary statistics
         self.update_state(
@@ -247,7 +247,7 @@ def sync_cost_basis_from_exchange_task(user_id: int, exchange: str, api_key: str
         cost_basis_calc = CostBasisCalculator(db, user_id)
 
         # Run async imports
-        asyncio.run(_import_trades_async())
+        run_async(_import_trades_async())
 
         logger.info(f"Imported {len(trades)} trades from {exchange} for user {user_id}")
 
@@ -280,7 +280,7 @@ def calculate_tax_optimization_task(user_id: int):
         optimizer = TaxOptimizer(db, user_id)
 
         # Run async analysis
-        suggestions = asyncio.run(_analyze_async())
+        suggestions = run_async(_analyze_async())
 
         logger.info(f"Generated {len(suggestions['trades_suggested'])} tax optimization suggestions for user {user_id}")
 
@@ -289,3 +289,30 @@ def calculate_tax_optimization_task(user_id: int):
     except Exception as e:
         logger.error(f"Tax optimization failed for user {user_id}: {e}")
         raise
+
+
+@celery_app.task(name="sync_protocol_registry")
+def sync_protocol_registry_task():
+    """
+    Sync the known_protocols table from DeFiLlama
+
+    Scheduled to run daily at 04:00 UTC. Workers and API processes reload
+    their protocol registry within MAX_REGISTRY_AGE.
+
+    Returns:
+        Dict with the number of protocol addresses synced
+    """
+    from app.services.protocol_registry import sync_defillama_protocols
+
+    db = get_batch_session()
+    try:
+        count = run_async(sync_defillama_protocols(db))
+        return {"status": "success", "protocols_synced": count}
+
+    except Exception as e:
+        logger.error(f"❌ Failed to sync protocol registry: {e}")
+        db.rollback()
+        return {"status": "error", "message": str(e)}
+
+    finally:
+        db.close()
@@ -2,12 +2,13 @@
 License Tasks for Celery
 
 Cron jobs for license management:
-- Reset monthly usage (runs on 1st of each month)
+- Roll usage over to the new period (runs on 1st of each month)
+- Flush Redis usage counters to the licenses table (runs every minute)
 - Check and expire trials (runs daily)
 """
 
 from celery import shared_task
-from app.database import SessionLocal
+from app.database import SessionLocal, get_batch_session
 from app.services.license_service import LicenseService
 import logging
 
@@ -17,7 +18,7 @@ logger = logging.getLogger(__name__)
 @shared_task(name="reset_monthly_usage")
 def reset_monthly_usage():
     """
-    Reset usage counters for all active licenses
+    Roll usage counters over to the new billing period
 
     Scheduled to run on the 1st of each month at 00:00 UTC
 
@@ -34,8 +35,10 @@ def reset_monthly_usage():
         license_service = LicenseService(db)
         count = license_service.reset_all_monthly_usage()
 
-        logger.info(f"✅ Successfully reset usage for {count} licenses")
-        return {"status": "success", "licenses_reset": count}
+        logger.info(f"✅ Usage rolled over ({count} licenses flushed for the previous period)")
+
+        _notify_usage_reset()
+        return {"status": "success", "licenses_flushed": count}
 
     except Exception as e:
         logger.error(f"❌ Failed to reset monthly usage: {e}")
@@ -45,6 +48,57 @@ def reset_monthly_usage():
         db.close()
 
 
+def _notify_usage_reset():
+    """Tell every user their monthly quotas are available again (fan-out task)"""
+    from app.config import settings
+    from app.models.license import billing_period_start
+    from app.tasks.notification_tasks import send_bulk_notification_task
+
+    period = billing_period_start()
+    try:
+        send_bulk_notification_task.delay(
+            subject=f"Your {period:%B} usage has been reset",
+            body=(
+                f"Your monthly usage quotas have been reset for {period:%B %Y}.\n\n"
+                f"See your plan and usage: {settings.FRONTEND_URL}/settings\n\n"
+                "Best regards,\nCryptoNomadHub Team"
+            ),
+            notification_key=f"usage_reset:{period:%Y-%m}"
+        )
+    except Exception as e:
+        logger.warning(f"Could not enqueue usage reset notifications: {e}")
+
+
+@shared_task(name="flush_usage_counters")
+def flush_usage_counters():
+    """
+    Write Redis usage counters incremented since the last run to the licenses table
+
+    Scheduled to run every minute
+
+    Celery Beat schedule:
+        'flush-usage-counters': {
+            'task': 'flush_usage_counters',
+            'schedule': crontab(minute='*'),
+        }
+    """
+    from app.services.usage_meter import UsageMeter
+
+    db = get_batch_session()
+    try:
+        count = UsageMeter().flush(db)
+        if count:
+            logger.info(f"✅ Flushed usage counters of {count} licenses")
+        return {"status": "success", "licenses_flushed": count}
+
+    except Exception as e:
+        logger.error(f"❌ Failed to flush usage counters: {e}")
+        return {"status": "error", "message": str(e)}
+
+    finally:
+        db.close()
+
+
 @shared_task(name="check_expired_trials")
 def check_expired_trials():
     """
@@ -109,14 +163,14 @@ def send_usage_warning_emails():
 
         for license in licenses:
             limits = license.get_limits()
-            remaining = license.get_remaining()
+            usage = license.get_usage()
 
             # Check if user is approaching limits for any resource
             for resource, limit in limits.items():
                 if limit == 0 or limit > 99999:  # Skip disabled or unlimited resources
                     continue
 
-                used = getattr(license, f"{resource}_used", 0)
+                used = usage.get(resource, 0)
                 usage_percent = (used / limit) * 100 if limit > 0 else 0
 
                 # Send warning if approaching limit (80%, 90%, or 100%)
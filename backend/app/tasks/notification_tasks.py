@@ -0,0 +1,63 @@
+"""
+Notification Tasks
+
+Fan-out of one notification to many users (see app.services.notification_fanout).
+"""
+
+from typing import List, Optional
+import logging
+
+from app.tasks.celery_app import celery_app
+from app.database import get_batch_session
+from app.tasks.worker_runtime import run_async, get_notification_fanout
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="send_bulk_notification")
+def send_bulk_notification_task(
+    subject: str,
+    body: str,
+    notification_key: str,
+    channel: str = "email",
+    user_ids: Optional[List[int]] = None,
+    country_code: Optional[str] = None
+):
+    """
+    Send a notification to users
+
+    Safe to retry or enqueue twice: deliveries are deduplicated on
+    (notification_key, channel, user).
+
+    Args:
+        subject: Message subject
+        body: Message body
+        notification_key: Identity of the notification, e.g. "usage_reset:2025-11"
+        channel: email or sms
+        user_ids: Users to notify (default: every active user)
+        country_code: Only users of this country
+
+    Returns:
+        Dict with success / failed / skipped counts
+    """
+    from app.services.notification_fanout import NotificationMessage
+
+    db = get_batch_session()
+    try:
+        results = run_async(get_notification_fanout().send_to_users(
+            db,
+            NotificationMessage(subject=subject, body=body),
+            channel,
+            notification_key,
+            user_ids=user_ids,
+            country_code=country_code
+        ))
+        return {"status": "success", **results}
+
+    except Exception as e:
+        logger.error(f"❌ Failed to send {notification_key} notification: {e}")
+        db.rollback()
+        return {"status": "error", "message": str(e)}
+
+    finally:
+        db.close()
@@ -0,0 +1,76 @@
+"""
+Simulation Background Tasks
+
+Monte Carlo residency simulations (thousands of price paths x cost basis
+methods x candidate countries) run here instead of in the request.
+"""
+
+import json
+import logging
+
+from app.tasks.celery_app import celery_app
+from app.models.cost_basis import CostBasisMethod
+from app.services.monte_carlo_simulation import MonteCarloTaxSimulation, CACHE_TTL
+from app.services.residency_comparison import get_comparison_engine
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(bind=True, name="run_monte_carlo_simulation")
+def run_monte_carlo_simulation_task(self, params: dict, lots: list, result_key: str):
+    """
+    Run a Monte Carlo residency simulation and cache its result
+
+    Args:
+        params: Simulation inputs (see MonteCarloRequest), with spot prices resolved
+        lots: Open lots as rows (monte_carlo_simulation.lot_rows)
+        result_key: Redis key the result is cached under
+
+    Progress states:
+    - PROGRESS meta: {"current": paths_done, "total": n_paths, "status": ...}
+    """
+    def report(done: int, total: int):
+        self.update_state(
+            state="PROGRESS",
+            meta={
+                "current": done,
+                "total": total,
+                "status": f"Simulated {done:,}/{total:,} price paths"
+            }
+        )
+
+    try:
+        simulation = MonteCarloTaxSimulation(
+            get_comparison_engine(),
+            lots,
+            spot_prices=params["spot_prices"],
+            countries=params["countries"],
+            horizon_days=params["horizon_days"],
+            n_paths=params["n_paths"],
+            seed=params["seed"],
+            sell_fraction=params["sell_fraction"],
+            volatility=params.get("volatility"),
+            price_ranges=params.get("price_ranges"),
+            correlation=params["correlation"],
+            methods=[CostBasisMethod(m) for m in params["methods"]],
+            apply_allowances=params["apply_allowances"],
+            territorial_exempt=params["territorial_exempt"],
+            fx_per_usd=params.get("fx_per_usd")
+        )
+        result = simulation.run(progress=report)
+
+    except Exception as e:
+        logger.error(f"Monte Carlo simulation failed: {e}")
+        raise
+
+    try:
+        from app.dependencies.exchange_rate import get_redis_client
+        get_redis_client().setex(result_key, CACHE_TTL, json.dumps(result))
+    except Exception as e:
+        logger.warning(f"Could not cache Monte Carlo result: {e}")
+
+    logger.info(
+        f"✅ Monte Carlo simulation done: {result['n_paths']} paths, "
+        f"{len(result['countries'])} countries, {len(result['methods'])} methods"
+    )
+    return result
@@ -3,12 +3,13 @@ Tax data synchronization Celery tasks
 """
 
 from celery import shared_task
-from app.database import SessionLocal
+from app.database import SessionLocal, get_batch_session
 from app.services.tax_data_sources import TaxDataAggregator
 from app.services.tax_data_monitor import TaxDataMonitor
+from app.services.regulation_catalog import bump_regulation_version
 from app.models.regulation import Regulation
+from app.tasks.worker_runtime import run_async
 import logging
-import asyncio
 from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
@@ -22,12 +23,12 @@ def sync_all_tax_data_task():
     """
     logger.info("Starting weekly tax data sync task")
 
-    db = SessionLocal()
+    db = get_batch_session()
     try:
         # Run async sync
         aggregator = TaxDataAggregator(db)
-        results = asyncio.run(aggregator.sync_all_countries())
-        asyncio.run(aggregator.close())
+        results = run_async(aggregator.sync_all_countries())
+        run_async(aggregator.close())
 
         # Log results
         updated = len([r for r in results if r.get('action') == 'updated'])
@@ -70,10 +71,10 @@ def sync_countries_task(country_codes: list):
         results = []
 
         for country_code in country_codes:
-            result = asyncio.run(aggregator.update_database(country_code))
+            result = run_async(aggregator.update_database(country_code))
             results.append(result)
 
-        asyncio.run(aggregator.close())
+        run_async(aggregator.close())
 
         updated = len([r for r in results if r.get('action') == 'updated'])
         failed = len([r for r in results if not r.get('success')])
@@ -124,13 +125,13 @@ def check_urgent_updates_task():
 
             for country in urgent_countries:
                 country_code = country['country_code']
-                result = asyncio.run(aggregator.update_database(country_code))
+                result = run_async(aggregator.update_database(country_code))
                 results.append(result)
 
                 if result.get('action') == 'updated':
                     logger.info(f"Auto-updated urgent country {country_code}")
 
-            asyncio.run(aggregator.close())
+            run_async(aggregator.close())
 
             return {
                 'status': 'completed',
@@ -170,8 +171,8 @@ def test_sources_task():
     db = SessionLocal()
     try:
         aggregator = TaxDataAggregator(db)
-        results = asyncio.run(aggregator.test_all_sources())
-        asyncio.run(aggregator.close())
+        results = run_async(aggregator.test_all_sources())
+        run_async(aggregator.close())
 
         all_working = all([v for k, v in results.items() if k != 'timestamp'])
 
@@ -248,6 +249,9 @@ def enrich_scraper_data_task():
 
         logger.info(f"Enrichment completed: {enriched} countries enriched")
 
+        if enriched:
+            bump_regulation_version()
+
         return {
             'status': 'completed',
             'total': len(countries_to_enrich),
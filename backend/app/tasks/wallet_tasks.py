@@ -9,18 +9,49 @@ import logging
 from datetime import datetime, timedelta
 from decimal import Decimal
 from sqlalchemy.orm import Session
+from sqlalchemy import func, and_
+from celery.exceptions import Retry
+import math
 import random
 
 from app.tasks.celery_app import celery_app
+from app.tasks.worker_runtime import (
+    run_async,
+    get_balance_service,
+    get_exchange_rate_service,
+    get_price_service,
+)
 from app.database import SessionLocal
 from app.models.user_wallet import UserWallet
 from app.models.user import User
 from app.models.wallet_snapshot import WalletSnapshot
 from app.models.wallet_value_history import WalletValueHistory
 from app.services.wallet_portfolio_service import WalletPortfolioService
+from app.services.wallet_history_rollup import WalletHistoryRollupService
+from app.services.sync_budget import (
+    ApiBudget,
+    DispatchPlanner,
+    estimate_sync_cost,
+    estimate_state_check_cost,
+    sync_priority,
+)
 
 logger = logging.getLogger(__name__)
 
+# Nightly sync window (00:00-03:00 UTC, before the weekly tax sync)
+SYNC_WINDOW_SECONDS = 3 * 3600
+
+# Consolidated snapshot runs this long after the user's last wallet sync
+CONSOLIDATION_DELAY_SECONDS = 300
+
+# Wallets never synced rank as if this stale
+MAX_STALENESS_HOURS = 7 * 24
+
+# Force a full balance fetch at least this often, even if the state looks unchanged
+FULL_SYNC_INTERVAL_SECONDS = 7 * 24 * 3600
+
+WALLET_STATE_KEY_PREFIX = "wallet_state"
+
 
 def get_db():
     """Get database session"""
@@ -31,44 +62,142 @@ def get_db():
         db.close()
 
 
+def _portfolio_service(db: Session) -> WalletPortfolioService:
+    """Portfolio service on the worker's shared HTTP/Redis clients"""
+    return WalletPortfolioService(
+        db,
+        balance_service=get_balance_service(),
+        price_service=get_price_service(),
+        exchange_rate_service=get_exchange_rate_service()
+    )
+
+
+def _retry_countdown(wait_seconds: float) -> int:
+    """Retry delay for an exhausted budget, jittered so retries don't stampede"""
+    return int(math.ceil(wait_seconds)) + random.randint(1, 30)
+
+
+def _redis_get(redis_client, key: str):
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"Redis get failed for {key}: {e}")
+        return None
+
+
+def _redis_set(redis_client, key: str, value: str, ttl: int):
+    if redis_client is None:
+        return
+    try:
+        redis_client.setex(key, ttl, value)
+    except Exception as e:
+        logger.warning(f"Redis set failed for {key}: {e}")
+
+
 @celery_app.task(name="schedule_daily_wallet_syncs")
 def schedule_daily_wallet_syncs():
     """
-    Schedule wallet syncs for all users (staggered over 1 hour)
+    Schedule wallet syncs for all active wallets within the provider budget
 
     Runs daily at 00:00 UTC.
-    Staggers syncs to avoid API rate limits.
+    Each wallet's API cost is estimated from its chain and last token count,
+    wallets are ordered by staleness and value, and countdowns are assigned
+    so the shared per-provider budgets are filled without being exceeded.
+    Wallets that don't fit in the sync window are left for the next run
+    (they'll rank higher then since they're staler).
     """
     db = next(get_db())
 
     try:
-        # Get all users with active wallets
-        users_with_wallets = db.query(User).join(UserWallet).filter(
+        # Latest snapshot per wallet (value + token count drive priority and cost)
+        latest = db.query(
+            WalletSnapshot.wallet_id,
+            func.max(WalletSnapshot.snapshot_date).label("latest_date")
+        ).filter(
+            WalletSnapshot.wallet_id.isnot(None)
+        ).group_by(WalletSnapshot.wallet_id).subquery()
+
+        rows = db.query(
+            UserWallet,
+            WalletSnapshot.snapshot_date,
+            WalletSnapshot.total_value_usd,
+            WalletSnapshot.total_tokens
+        ).outerjoin(
+            latest, latest.c.wallet_id == UserWallet.id
+        ).outerjoin(
+            WalletSnapshot,
+            and_(
+                WalletSnapshot.wallet_id == latest.c.wallet_id,
+                WalletSnapshot.snapshot_date == latest.c.latest_date
+            )
+        ).filter(
             UserWallet.is_active == True
-        ).distinct().all()
+        ).all()
 
-        total_users = len(users_with_wallets)
-        logger.info(f"Scheduling wallet syncs for {total_users} users")
+        logger.info(f"Scheduling wallet syncs for {len(rows)} wallets")
 
-        if total_users == 0:
-            logger.info("No users with wallets to sync")
+        if not rows:
+            logger.info("No wallets to sync")
             return
 
-        # Stagger over 1 hour (3600 seconds)
-        delay_increment = 3600 / total_users
+        now = datetime.utcnow()
+        candidates = {}
+        for wallet, snapshot_date, value_usd, total_tokens in rows:
+            # Duplicate rows are possible if two snapshots share a timestamp
+            if wallet.id in candidates:
+                continue
 
-        for i, user in enumerate(users_with_wallets):
-            delay_seconds = int(i * delay_increment)
+            last_sync = wallet.last_sync_date or snapshot_date
+            staleness_hours = (now - last_sync).total_seconds() / 3600 if last_sync else MAX_STALENESS_HOURS
+            staleness_hours = min(staleness_hours, MAX_STALENESS_HOURS)
+
+            cost = estimate_sync_cost(wallet.chain, total_tokens if snapshot_date else None)
+            if snapshot_date:
+                # Unchanged wallets are re-priced after a cheap state check
+                for provider, calls in estimate_state_check_cost(wallet.chain).items():
+                    cost[provider] = cost.get(provider, 0) + calls
+
+            candidates[wallet.id] = {
+                "wallet_id": wallet.id,
+                "user_id": wallet.user_id,
+                "cost": cost,
+                "priority": sync_priority(staleness_hours, float(value_usd or 0))
+            }
+
+        planner = DispatchPlanner(ApiBudget(), window_seconds=SYNC_WINDOW_SECONDS)
+        user_last_countdown = {}
+        deferred = 0
+
+        for candidate in sorted(candidates.values(), key=lambda c: c["priority"], reverse=True):
+            countdown = planner.reserve(candidate["cost"])
+            if countdown is None:
+                deferred += 1
+                continue
 
-            # Schedule with delay
-            sync_user_wallets.apply_async(
-                args=[user.id],
-                countdown=delay_seconds
+            sync_wallet_snapshot.apply_async(
+                args=[candidate["wallet_id"], candidate["user_id"]],
+                countdown=countdown
             )
 
-            logger.debug(f"Scheduled sync for user {user.id} in {delay_seconds}s")
+            user_id = candidate["user_id"]
+            user_last_countdown[user_id] = max(user_last_countdown.get(user_id, 0), countdown)
 
-        logger.info(f"✅ Scheduled {total_users} wallet syncs (staggered over 1h)")
+            logger.debug(f"Scheduled sync for wallet {candidate['wallet_id']} in {countdown}s")
+
+        # Consolidated snapshot once the user's last wallet should be done
+        for user_id, countdown in user_last_countdown.items():
+            create_consolidated_snapshot.apply_async(
+                args=[user_id],
+                countdown=countdown + CONSOLIDATION_DELAY_SECONDS
+            )
+
+        scheduled = len(candidates) - deferred
+        logger.info(
+            f"✅ Scheduled {scheduled} wallet syncs for {len(user_last_countdown)} users "
+            f"({deferred} deferred to next run, budget window {SYNC_WINDOW_SECONDS // 3600}h)"
+        )
 
     except Exception as e:
         logger.error(f"Error scheduling wallet syncs: {e}", exc_info=True)
@@ -110,11 +239,16 @@ def sync_user_wallets(user_id: int):
         db.close()
 
 
-@celery_app.task(name="sync_wallet_snapshot")
-def sync_wallet_snapshot(wallet_id: int, user_id: int):
+@celery_app.task(bind=True, name="sync_wallet_snapshot", max_retries=10)
+def sync_wallet_snapshot(self, wallet_id: int, user_id: int):
     """
     Create a snapshot for a specific wallet
 
+    Draws from the shared API budget before calling providers and retries
+    later when the budget is exhausted. If the wallet's on-chain state is
+    unchanged since the last full sync, the previous positions are re-priced
+    instead of fetching balances again.
+
     Args:
         wallet_id: Wallet ID
         user_id: User ID
@@ -133,18 +267,68 @@ def sync_wallet_snapshot(wallet_id: int, user_id: int):
             logger.info(f"Snapshot already exists for wallet {wallet_id} today")
             return
 
+        wallet = db.query(UserWallet).filter(
+            UserWallet.id == wallet_id,
+            UserWallet.user_id == user_id
+        ).first()
+
+        if not wallet:
+            logger.warning(f"Wallet {wallet_id} not found for user {user_id}")
+            return
+
+        previous = db.query(WalletSnapshot).filter(
+            WalletSnapshot.wallet_id == wallet_id
+        ).order_by(WalletSnapshot.snapshot_date.desc()).first()
+
+        budget = ApiBudget()
+        redis_client = budget.redis
+        state_key = f"{WALLET_STATE_KEY_PREFIX}:{wallet_id}"
+
+        # Cheap on-chain check first (only useful if we have positions to re-price)
+        check_state = previous is not None and previous.positions is not None
+        if check_state:
+            wait = budget.try_acquire_all(estimate_state_check_cost(wallet.chain))
+            if wait > 0:
+                raise self.retry(countdown=_retry_countdown(wait))
+
+        service = _portfolio_service(db)
+
+        fingerprint = run_async(
+            service.balance_service.get_state_fingerprint(wallet.wallet_address, wallet.chain)
+        ) if check_state else None
+        stored_fingerprint = _redis_get(redis_client, state_key) if fingerprint else None
+        unchanged = fingerprint is not None and fingerprint == stored_fingerprint
+
+        if unchanged:
+            balances = WalletPortfolioService.balances_from_positions(previous.positions)
+            cost = {"coingecko": 1}
+        else:
+            balances = None
+            cost = estimate_sync_cost(wallet.chain, previous.total_tokens if previous else None)
+
+        wait = budget.try_acquire_all(cost)
+        if wait > 0:
+            raise self.retry(countdown=_retry_countdown(wait))
+
         # Create snapshot
-        service = WalletPortfolioService(db)
+        snapshot = run_async(service.create_snapshot(wallet_id, user_id, balances=balances))
 
-        # Run async function in sync context
-        import asyncio
-        snapshot = asyncio.run(service.create_snapshot(wallet_id, user_id))
+        if unchanged:
+            logger.info(f"✅ Re-priced unchanged wallet {wallet_id}: ${snapshot.total_value_usd}")
+        else:
+            logger.info(f"✅ Created snapshot for wallet {wallet_id}: ${snapshot.total_value_usd}")
+            if fingerprint:
+                # Expires to force a periodic full sync (ERC20 receipts don't change the fingerprint)
+                _redis_set(redis_client, state_key, fingerprint, FULL_SYNC_INTERVAL_SECONDS)
 
-        logger.info(f"✅ Created snapshot for wallet {wallet_id}: ${snapshot.total_value_usd}")
+        wallet.last_sync_date = datetime.utcnow()
+        db.commit()
 
         # Create value history entry
-        create_value_history_entry.delay(wallet_id, user_id)
+        create_value_history_entry.delay(wallet_id, user_id, float(snapshot.total_value_usd))
 
+    except Retry:
+        raise
     except Exception as e:
         logger.error(f"Error creating snapshot for wallet {wallet_id}: {e}", exc_info=True)
     finally:
@@ -156,6 +340,9 @@ def create_consolidated_snapshot(user_id: int):
     """
     Create a consolidated snapshot for all user wallets
 
+    Built from the wallet snapshots the sync tasks just wrote: no balance or
+    price fetch outside the provider budgets.
+
     Args:
         user_id: User ID
     """
@@ -174,14 +361,13 @@ def create_consolidated_snapshot(user_id: int):
             logger.info(f"Consolidated snapshot already exists for user {user_id} today")
             return
 
-        # Calculate consolidated portfolio
-        service = WalletPortfolioService(db)
+        # Sum the latest wallet snapshots
+        service = _portfolio_service(db)
 
-        import asyncio
-        portfolio = asyncio.run(service.get_consolidated_portfolio(user_id))
+        portfolio = service.consolidate_snapshots(user_id)
 
         # Get currency data
-        local_currency_data = asyncio.run(service._get_local_currency_data(user_id))
+        local_currency_data = run_async(service._get_local_currency_data(user_id))
 
         # Create consolidated snapshot
         snapshot = WalletSnapshot(
@@ -201,6 +387,8 @@ def create_consolidated_snapshot(user_id: int):
         db.add(snapshot)
         db.commit()
 
+        WalletHistoryRollupService(db).record_point(user_id, None, today, portfolio["total_value_usd"])
+
         logger.info(f"✅ Created consolidated snapshot for user {user_id}: ${portfolio['total_value_usd']}")
 
     except Exception as e:
@@ -210,24 +398,26 @@ def create_consolidated_snapshot(user_id: int):
 
 
 @celery_app.task(name="create_value_history_entry")
-def create_value_history_entry(wallet_id: int, user_id: int):
+def create_value_history_entry(wallet_id: int, user_id: int, current_value_usd: float = None):
     """
     Create a value history entry for 24h change tracking
 
     Args:
         wallet_id: Wallet ID
         user_id: User ID
+        current_value_usd: Value from the snapshot just taken (avoids a second balance fetch)
     """
     db = next(get_db())
 
     try:
-        service = WalletPortfolioService(db)
+        service = _portfolio_service(db)
 
-        import asyncio
-        change_data = asyncio.run(service.calculate_24h_change(wallet_id, user_id))
+        current_value = Decimal(str(current_value_usd)) if current_value_usd is not None else None
+
+        change_data = run_async(service.calculate_24h_change(wallet_id, user_id, current_value=current_value))
 
         # Get local currency data
-        local_currency_data = asyncio.run(service._get_local_currency_data(user_id))
+        local_currency_data = run_async(service._get_local_currency_data(user_id))
 
         # Create history entry
         history = WalletValueHistory(
@@ -246,6 +436,15 @@ def create_value_history_entry(wallet_id: int, user_id: int):
         db.add(history)
         db.commit()
 
+        WalletHistoryRollupService(db).record_point(
+            user_id,
+            wallet_id,
+            history.timestamp,
+            history.total_value_usd,
+            history.total_value_local,
+            history.local_currency
+        )
+
         # Check for alerts (if change > 5%)
         if abs(float(change_data["change_24h_percent"])) >= 5.0:
             send_wallet_alert.delay(wallet_id, user_id, float(change_data["change_24h_percent"]))
@@ -289,26 +488,47 @@ def send_wallet_alert(wallet_id: int, user_id: int, change_percent: float):
 @celery_app.task(name="cleanup_old_snapshots")
 def cleanup_old_snapshots(days_to_keep: int = 90):
     """
-    Cleanup old wallet snapshots to save space
+    Apply retention to wallet value history
+
+    Raw snapshots and value history points are pruned once they're older
+    than their window; their values live on in the hourly/daily/weekly
+    rollups (which have their own, longer retention).
 
     Args:
-        days_to_keep: Number of days to keep (default: 90)
+        days_to_keep: Number of days of raw snapshots to keep (default: 90)
     """
     db = next(get_db())
 
     try:
-        cutoff_date = datetime.utcnow() - timedelta(days=days_to_keep)
+        deleted = WalletHistoryRollupService(db).apply_retention(
+            snapshot_retention=timedelta(days=days_to_keep)
+        )
 
-        deleted = db.query(WalletSnapshot).filter(
-            WalletSnapshot.snapshot_date < cutoff_date
-        ).delete()
+        logger.info(f"🧹 Wallet history retention applied: {deleted}")
+
+    except Exception as e:
+        logger.error(f"Error cleaning up snapshots: {e}", exc_info=True)
+        db.rollback()
+    finally:
+        db.close()
 
-        db.commit()
 
-        logger.info(f"🧹 Cleaned up {deleted} old wallet snapshots (older than {days_to_keep} days)")
+@celery_app.task(name="backfill_wallet_rollups")
+def backfill_wallet_rollups():
+    """
+    One-off: build wallet value rollups from existing raw history
+
+    Run once after deploying rollups, before the next retention pass.
+    """
+    db = next(get_db())
+
+    try:
+        counts = WalletHistoryRollupService(db).backfill()
+        logger.info(f"✅ Backfilled wallet rollups: {counts}")
+        return counts
 
     except Exception as e:
-        logger.error(f"Error cleaning up snapshots: {e}", exc_info=True)
+        logger.error(f"Error backfilling wallet rollups: {e}", exc_info=True)
         db.rollback()
     finally:
         db.close()
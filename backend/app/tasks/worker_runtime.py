@@ -0,0 +1,176 @@
+"""
+Worker async runtime
+
+Celery tasks are synchronous, but most of our services are async. Instead of
+an asyncio.run() (new event loop) per call, each worker process keeps:
+- one event loop, running in a background thread, that every task submits
+  its coroutines to (run_async)
+- shared service instances with pooled HTTP/Redis connections
+  (PriceService, MultiChainBalanceService, BlockchainParser,
+  ExchangeRateService, NotificationFanout), created once and reused by
+  every task
+
+Both are set up at worker_process_init (see celery_app) and torn down at
+worker_process_shutdown. They are also created lazily on first use, so
+tasks run eagerly or from a shell behave the same. A fork (prefork pool)
+gets a fresh runtime: threads and connections don't survive it.
+
+The async clients are bound to the runtime loop: only use the shared
+services from coroutines passed to run_async.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds to wait for clients to close at shutdown
+SHUTDOWN_TIMEOUT = 10
+
+
+class WorkerRuntime:
+    """Event loop thread and shared clients of one worker process"""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name="worker-async-runtime", daemon=True)
+        self.thread.start()
+        self.services: Dict[str, Any] = {}
+        self._services_lock = threading.Lock()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the runtime loop and wait for its result"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Timeout, or Celery's soft time limit raised in the calling thread
+            future.cancel()
+            raise
+
+    def service(self, name: str, factory):
+        """Shared instance of a service (created on first use)"""
+        with self._services_lock:
+            if name not in self.services:
+                self.services[name] = factory()
+            return self.services[name]
+
+    def close(self):
+        """Close the shared clients and stop the loop"""
+        async def _close_clients():
+            for name, service in list(self.services.items()):
+                try:
+                    await _close_service(service)
+                except Exception as e:
+                    logger.warning(f"Could not close worker {name}: {e}")
+
+        if self.loop.is_running():
+            try:
+                self.run(_close_clients(), timeout=SHUTDOWN_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Worker runtime shutdown incomplete: {e}")
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(SHUTDOWN_TIMEOUT)
+        self.services.clear()
+
+
+async def _close_service(service):
+    """Close the HTTP clients of a shared service"""
+    for attr in ("http_client", "client"):
+        client = getattr(service, attr, None)
+        if client is None:
+            continue
+        if hasattr(client, "aclose"):
+            await client.aclose()
+        elif hasattr(client, "close"):
+            client.close()
+
+    # BlockchainParser adapter: its price service and legacy parser
+    for attr in ("price_service", "legacy_parser"):
+        nested = getattr(service, attr, None)
+        if nested is not None:
+            await _close_service(nested)
+
+
+_runtime: Optional[WorkerRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> WorkerRuntime:
+    """Runtime of this process (a new one after a fork)"""
+    global _runtime
+    runtime = _runtime
+    if runtime is not None and runtime.pid == os.getpid():
+        return runtime
+
+    with _runtime_lock:
+        if _runtime is None or _runtime.pid != os.getpid():
+            _runtime = WorkerRuntime()
+        return _runtime
+
+
+def run_async(coro: Awaitable, timeout: Optional[float] = None) -> Any:
+    """Run a coroutine from a task on the worker's persistent event loop"""
+    return get_runtime().run(coro, timeout)
+
+
+# ========== Shared services ==========
+
+def get_price_service():
+    from app.services.price_service import PriceService
+    return get_runtime().service("price_service", PriceService)
+
+
+def get_balance_service():
+    from app.services.multi_chain_balance_service import MultiChainBalanceService
+    return get_runtime().service("balance_service", MultiChainBalanceService)
+
+
+def get_blockchain_parser():
+    from app.services.defi_audit_service import DeFiAuditService
+    return get_runtime().service("blockchain_parser", DeFiAuditService.create_parser)
+
+
+def get_exchange_rate_service():
+    from app.dependencies.exchange_rate import get_exchange_rate_service as create_exchange_rate_service
+    return get_runtime().service("exchange_rate_service", create_exchange_rate_service)
+
+
+def get_notification_fanout():
+    from app.services.notification_fanout import NotificationFanout
+    return get_runtime().service("notification_fanout", NotificationFanout)
+
+
+def start_worker_runtime():
+    """Start the loop and create the shared clients (worker_process_init)"""
+    runtime = get_runtime()
+    for name, getter in (
+        ("price service", get_price_service),
+        ("balance service", get_balance_service),
+        ("blockchain parser", get_blockchain_parser),
+        ("exchange rate service", get_exchange_rate_service),
+    ):
+        try:
+            getter()
+        except Exception as e:
+            # Created again on first use
+            logger.warning(f"Could not warm up worker {name}: {e}")
+    logger.info(f"⚙️ Worker runtime ready (pid {runtime.pid}, {len(runtime.services)} shared clients)")
+
+
+def stop_worker_runtime():
+    """Close the shared clients and stop the loop (worker_process_shutdown)"""
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None and runtime.pid == os.getpid():
+        runtime.close()
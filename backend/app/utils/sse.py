@@ -0,0 +1,11 @@
+"""
+Server-Sent Events helpers
+"""
+
+import json
+from typing import Dict
+
+
+def format_sse(event: str, data: Dict) -> str:
+    """Format a Server-Sent Event (JSON data)"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
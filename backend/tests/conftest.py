@@ -7,10 +7,11 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
-from app.database import Base, get_db
+from app.database import Base, get_db, get_read_db
 from app.main import app
 from app.models.user import User
 from app.models.regulation import Regulation
+from app.services.regulation_catalog import reset_regulation_catalog
 from app.utils.security import hash_password
 from datetime import datetime
 from decimal import Decimal
@@ -42,6 +43,9 @@ def db():
     User.__table__.create(bind=engine, checkfirst=True)
     Simulation.__table__.create(bind=engine, checkfirst=True)
 
+    # The regulation catalog is process-wide: each test reloads it from its own rows
+    reset_regulation_catalog()
+
     db = TestingSessionLocal()
     try:
         yield db
@@ -64,6 +68,7 @@ def client(db):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
@@ -110,3 +115,50 @@ def auth_headers(client, test_user):
 # NOTE: Regulation fixtures commented out because ARRAY type is incompatible with SQLite
 # Integration tests that need regulations should use a real PostgreSQL database
 # or mock the regulation service responses directly
+
+
+@pytest.fixture(scope="session")
+def anvil_rpc_url():
+    """
+    Local EVM node (Foundry's anvil) for RPC tests.
+
+    Skips when anvil isn't installed. Point the app at it with
+    EVM_RPC_URL_OVERRIDE to exercise the RPC fallback end to end.
+
+    Returns:
+        str: JSON-RPC URL of the running node
+    """
+    import shutil
+    import socket
+    import subprocess
+    import time
+    import httpx
+
+    if shutil.which("anvil") is None:
+        pytest.skip("anvil not installed (https://book.getfoundry.sh)")
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    process = subprocess.Popen(
+        ["anvil", "--port", str(port), "--silent"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    try:
+        for _ in range(50):
+            try:
+                httpx.post(url, json={"jsonrpc": "2.0", "id": 1, "method": "eth_chainId", "params": []}, timeout=1.0)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        else:
+            pytest.skip("anvil did not start")
+
+        yield url
+    finally:
+        process.terminate()
+        process.wait(timeout=5)
@@ -0,0 +1,147 @@
+"""
+Unit tests for the ABI registry decoder
+"""
+
+import random
+import time
+
+import pytest
+from eth_abi import encode
+from eth_utils import keccak
+from app.services.abi_registry import get_abi_registry
+from app.services.blockchain_parser import BlockchainParser
+from app.services.transaction_decoder import TransactionDecoder
+
+WALLET = "0x" + "ab" * 20
+POOL = "0x" + "cd" * 20
+USDC = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+WETH = "0xc02aaa39c83d3d2b7a8e1b5c5b5f5b5b5b5b5b5b"
+AAVE_POOL = "0x87870bca3f3fd6335c3f4ce8392d69350b4fa4e2"
+BAYC = "0xbc4ca0eda7647a8ab7c2061c2e118a18a936f13d"
+
+
+def _topic(signature):
+    return "0x" + keccak(text=signature).hex()
+
+
+def _word(value):
+    if isinstance(value, str):
+        return "0x" + value[2:].rjust(64, "0")
+    return "0x" + format(value, "064x")
+
+
+def _log(address, signature, indexed=(), types=(), values=()):
+    return {
+        "address": address,
+        "topics": [_topic(signature)] + [_word(value) for value in indexed],
+        "data": "0x" + encode(list(types), list(values)).hex(),
+    }
+
+
+def _call(signature, types, values):
+    return "0x" + keccak(text=signature)[:4].hex() + encode(types, values).hex()
+
+
+def _erc20_transfer(token, sender, recipient, value):
+    return _log(token, "Transfer(address,address,uint256)", [sender, recipient], ["uint256"], [value])
+
+
+def _swap_receipt(rng):
+    """Uniswap V3 swap: 2 transfers + pool Swap"""
+    amount_in, amount_out = rng.randint(1, 10**12), rng.randint(1, 10**18)
+    return {"logs": [
+        _erc20_transfer(USDC, WALLET, POOL, amount_in),
+        _erc20_transfer(WETH, POOL, WALLET, amount_out),
+        _log(POOL, "Swap(address,address,int256,int256,uint160,uint128,int24)", [WALLET, WALLET],
+             ["int256", "int256", "uint160", "uint128", "int24"],
+             [amount_in, -amount_out, 2**96, 10**18, -201234]),
+    ]}
+
+
+def _supply_receipt(rng):
+    """Aave V3 supply: transfer, aToken mint transfer, Supply"""
+    amount = rng.randint(1, 10**12)
+    return {"logs": [
+        _erc20_transfer(USDC, WALLET, AAVE_POOL, amount),
+        _erc20_transfer("0x" + "98" * 20, "0x" + "00" * 20, WALLET, amount),
+        _log(AAVE_POOL, "Supply(address,address,address,uint256,uint16)", [USDC, WALLET, 0],
+             ["address", "uint256"], [WALLET, amount]),
+    ]}
+
+
+def _nft_receipt(rng):
+    """ERC721 transfer + unknown event"""
+    return {"logs": [
+        _log(BAYC, "Transfer(address,address,uint256)", [POOL, WALLET, rng.randint(0, 9999)]),
+        _log(BAYC, "SomethingElse(uint256)", [], ["uint256"], [1]),
+    ]}
+
+
+def _corpus(size, seed=7):
+    rng = random.Random(seed)
+    builders = [_swap_receipt, _supply_receipt, _nft_receipt]
+    return [rng.choice(builders)(rng) for _ in range(size)]
+
+
+@pytest.mark.unit
+def test_logs_and_calls_are_decoded_and_classified():
+    registry = get_abi_registry()
+    swap, supply, nft = _swap_receipt(random.Random(1)), _supply_receipt(random.Random(2)), _nft_receipt(random.Random(3))
+
+    decoded = registry.decode_receipts([swap, None, nft])
+    assert [len(logs) for logs in decoded] == [3, 0, 1]  # Unknown event skipped
+
+    pool_swap = decoded[0][2]
+    assert (pool_swap["protocol"], pool_swap["activity"], pool_swap["address"]) == ("uniswap_v3", "swap", POOL)
+    assert pool_swap["args"]["amount1"] < 0 and pool_swap["args"]["tick"] == -201234
+    assert pool_swap["args"]["recipient"] == WALLET
+
+    # Same topic0, ERC20 vs ERC721 told apart by the topic count
+    assert decoded[0][0]["protocol"] == "erc20" and decoded[0][0]["args"]["from"] == WALLET
+    assert decoded[2][0]["protocol"] == "erc721" and decoded[2][0]["args"]["tokenId"] < 10000
+
+    # Truncated data is dropped, not raised
+    broken = dict(swap["logs"][2], data=swap["logs"][2]["data"][:40])
+    assert registry.decode_log(broken) is None
+
+    # Classification from the registry, not from explorer method names
+    call = _call("supply(address,uint256,address,uint16)", ["address", "uint256", "address", "uint16"],
+                 [USDC, 5 * 10**6, WALLET, 0])
+    result = TransactionDecoder().decode_transaction({"input": call, "logs": supply["logs"]})
+    assert result["function"]["name"] == "supply" and result["function"]["args"]["amount"] == 5 * 10**6
+    assert (result["protocol"], result["activity_type"]) == ("aave", "lend")
+    assert TransactionDecoder().decode_transaction({"input": "0x", "logs": swap["logs"]})["activity_type"] == "swap"
+    assert TransactionDecoder().decode_transaction({"input": "0xdeadbeef", "logs": []}) is None
+
+
+@pytest.mark.unit
+def test_parser_reads_tokens_from_decoded_calls_and_logs():
+    parser = BlockchainParser()
+    swap_call = _call(
+        "swapExactTokensForTokens(uint256,uint256,address[],address,uint256)",
+        ["uint256", "uint256", "address[]", "address", "uint256"],
+        [250 * 10**6, 10**17, [USDC, "0xc02aaa39c83d3d2b7a8e1b5c5b5f5b5b5b5b5b5b"], WALLET, 2**32]
+    )
+    function = parser.transaction_decoder.decode_function(swap_call)
+    assert (function["name"], function["activity"]) == ("swapExactTokensForTokens", "swap")
+    assert parser._token_amount(function["args"]["path"][0], function["args"]["amountIn"]) == ("USDC", 250.0)
+
+    decoded_logs = parser.transaction_decoder.decode_receipts([_supply_receipt(random.Random(4))])[0]
+    tokens = parser._parse_transfer_logs(decoded_logs, WALLET.upper().replace("0X", "0x"))
+    assert tokens["token_out"] == "USDC" and tokens["amount_out"] > 0
+    assert tokens["token_in"] is None  # aToken isn't a known token
+
+
+@pytest.mark.slow
+def test_receipt_decoding_throughput():
+    """Benchmark: decoding a batch of receipts with the precomputed decoders"""
+    registry = get_abi_registry()
+    corpus = _corpus(3000)
+
+    registry.decode_receipts(corpus[:100])  # Warm up
+    start = time.perf_counter()
+    decoded = registry.decode_receipts(corpus)
+    elapsed = time.perf_counter() - start
+
+    assert len(decoded) == len(corpus)
+    assert len(corpus) / elapsed > 2000, f"{len(corpus) / elapsed:,.0f} receipts/s"
@@ -0,0 +1,91 @@
+"""
+Unit tests for DeFi audit progress events
+"""
+
+import json
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.services import audit_progress
+from app.services.audit_progress import AuditProgress
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values, self.published = {}, []
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+    def execute(self):
+        pass
+
+    def get(self, key):
+        return self.values.get(key)
+
+
+def _audit(**fields):
+    values = dict(id=7, user_id=3, status="processing", chains=["ethereum", "base"],
+                  total_transactions=0, completed_at=None, error_message=None)
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.unit
+def test_progress_follows_chains_and_throttles_updates():
+    events, clock = [], FakeClock()
+    progress = AuditProgress(_audit(), publish=events.append, clock=clock)
+
+    progress.start_chain("ethereum")
+    progress.fetched_transactions(10)
+    assert [e["phase"] for e in events] == ["fetching", "processing"]
+    assert events[-1]["progress"] == 5  # Fetched: 10% of the first chain's half
+
+    for i in range(10):
+        clock.now += 0.25
+        progress.transaction_processed(persisted=i % 5 != 0)
+
+    # Phase changes are immediate, per-transaction updates once per second
+    assert len(events) == 4
+    progress.start_chain("base")
+    last = events[-1]
+    assert (last["chain"], last["chain_index"], last["progress"]) == ("base", 1, 50)
+    assert (last["fetched"], last["parsed"], last["persisted"]) == (10, 10, 8)
+    assert last["eta_seconds"] == 2 and last["user_id"] == 3
+    assert last["current_step"] == "Fetching base transactions (chain 2/2)"
+
+
+@pytest.mark.unit
+def test_status_is_one_redis_read(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(audit_progress, "_redis", lambda: fake)
+
+    audit_progress.publish_audit(_audit(status="pending"))
+    state = audit_progress.get_audit_progress(7)
+
+    assert fake.published == [("audit_progress:7:events", state)]
+    assert (state["status"], state["phase"], state["current_step"]) == ("pending", "queued", "Queued for processing")
+    assert not audit_progress.is_stale(state)
+
+    state["updated_at"] = (datetime.utcnow() - timedelta(hours=2)).isoformat()
+    assert audit_progress.is_stale(state)  # Worker lost: the endpoint checks the database
+
+    completed = audit_progress.audit_event(_audit(status="completed", total_transactions=42,
+                                                  completed_at=datetime(2025, 1, 2)))
+    assert (completed["progress"], completed["total_transactions"]) == (100, 42)
+    assert not audit_progress.is_stale(dict(completed, updated_at="2020-01-01T00:00:00"))
+    assert audit_progress.get_audit_progress(8) is None
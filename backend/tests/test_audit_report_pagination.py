@@ -0,0 +1,91 @@
+"""
+Unit tests for audit report keyset pagination
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import event
+from app.models.defi_protocol import (
+    DeFiAudit, DeFiProtocol, DeFiTransaction, ProtocolType, TransactionType
+)
+from app.services.defi_audit_service import DeFiAuditService, encode_report_cursor
+
+TABLES = [DeFiProtocol.__table__, DeFiAudit.__table__, DeFiTransaction.__table__]
+
+
+@pytest.fixture
+def audit(db, test_user):
+    for table in TABLES:
+        table.create(bind=db.get_bind(), checkfirst=True)
+
+    protocol = DeFiProtocol(name="Uniswap V3", protocol_type=ProtocolType.DEX, chain="ethereum")
+    audit = DeFiAudit(user_id=test_user.id, start_date=datetime(2025, 1, 1), end_date=datetime(2025, 12, 31),
+                      chains=["ethereum"], total_transactions=7, status="completed")
+    db.add_all([protocol, audit])
+    db.flush()
+
+    # Two transactions share each timestamp: the id breaks the tie
+    base = datetime(2025, 6, 1)
+    for i in range(7):
+        db.add(DeFiTransaction(
+            user_id=test_user.id, audit_id=audit.id, protocol_id=protocol.id if i % 2 else None,
+            tx_hash=f"0x{i:064x}", chain="ethereum", timestamp=base + timedelta(hours=i // 2),
+            transaction_type=TransactionType.SWAP, tax_category="capital_gains",
+            usd_value_in=100.0 + i, raw_data={"logs": ["..."] * 100}
+        ))
+    db.commit()
+
+    yield audit
+
+    db.close()
+    for table in reversed(TABLES):
+        table.drop(bind=db.get_bind(), checkfirst=True)
+
+
+def _report(db, audit_id, **kwargs):
+    return asyncio.run(DeFiAuditService(db, parser=MagicMock()).get_audit_report(audit_id, **kwargs))
+
+
+@pytest.mark.unit
+def test_cursor_pages_cover_every_transaction_once(db, audit):
+    audit_id = audit.id
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+
+    pages = [_report(db, audit_id, limit=3)]
+    while pages[-1]["pagination"]["has_more"]:
+        pages.append(_report(db, audit_id, limit=3, cursor=pages[-1]["pagination"]["next_cursor"]))
+    event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    transactions = [tx for page in pages for tx in page["transactions"]]
+    assert [page["pagination"]["returned"] for page in pages] == [3, 3, 1]
+    assert pages[-1]["pagination"]["next_cursor"] is None
+    assert [(tx["timestamp"], tx["id"]) for tx in transactions] == sorted(
+        ((tx["timestamp"], tx["id"]) for tx in transactions), reverse=True
+    )
+    assert len({tx["id"] for tx in transactions}) == 7
+    assert {tx["protocol"] for tx in transactions} == {"Uniswap V3", None}
+    assert pages[0]["pagination"]["total"] == 7
+
+    # Audit + one page query per page: no COUNT, no raw_data, no per-row protocol load
+    report_queries = [sql for sql in statements if "defi_transactions" in sql]
+    assert len(statements) == 2 * len(pages) and len(report_queries) == len(pages)
+    assert not any("count(" in sql.lower() or "raw_data" in sql for sql in report_queries)
+
+
+@pytest.mark.unit
+def test_offset_still_works_and_bad_cursor_is_rejected(db, audit):
+    by_offset = _report(db, audit.id, limit=2, offset=2)
+    by_cursor = _report(db, audit.id, limit=2, cursor=_report(db, audit.id, limit=2)["pagination"]["next_cursor"])
+    assert by_offset["transactions"] == by_cursor["transactions"]
+
+    last = by_cursor["transactions"][-1]
+    cursor = encode_report_cursor(datetime.fromisoformat(last["timestamp"]), last["id"])
+    assert _report(db, audit.id, limit=10, cursor=cursor)["pagination"]["returned"] == 3
+
+    with pytest.raises(ValueError):
+        _report(db, audit.id, cursor="not-a-cursor")
@@ -0,0 +1,82 @@
+"""
+Unit tests for the chat context cache
+"""
+
+import pytest
+from app.models.license import License, LicenseTier
+from app.services import chat_assistant, chat_context
+from app.services.chat_assistant import ChatAssistant
+
+
+@pytest.fixture
+def invalidations(monkeypatch):
+    calls = []
+    monkeypatch.setattr(
+        chat_context, "invalidate_chat_context",
+        lambda user_id, sections=None: calls.append((user_id, set(sections)))
+    )
+    return calls
+
+
+@pytest.mark.unit
+def test_license_writes_invalidate_except_chat_counter(db, test_user, invalidations):
+    License.__table__.create(bind=db.get_bind(), checkfirst=True)
+    try:
+        license = License(user_id=test_user.id, tier=LicenseTier.FREE)
+        db.add(license)
+        db.commit()
+        assert invalidations == [(test_user.id, {"license"})]
+
+        # Every chat message bumps this counter: not worth rebuilding the context
+        license.chat_messages_used = (license.chat_messages_used or 0) + 1
+        db.commit()
+        assert len(invalidations) == 1
+
+        license.tier = LicenseTier.PRO
+        db.commit()
+        assert invalidations[-1] == (test_user.id, {"license"})
+        assert len(invalidations) == 2
+    finally:
+        db.close()
+        License.__table__.drop(bind=db.get_bind(), checkfirst=True)
+
+
+@pytest.mark.unit
+def test_only_missing_sections_are_built(db, monkeypatch):
+    stored = {}
+    monkeypatch.setattr(chat_assistant, "get_cached_sections", lambda user_id: {
+        "license": "cached license", "defi": "cached defi", "cost_basis": "cached lots"
+    })
+    monkeypatch.setattr(chat_assistant, "store_sections", lambda user_id, sections: stored.update(sections))
+
+    assistant = ChatAssistant(db)
+    monkeypatch.setattr(assistant, "_get_tax_optimizer_context", lambda user_id: "fresh opportunities")
+
+    sections = assistant._get_user_context_sections(1)
+
+    assert stored == {"tax_optimizer": "fresh opportunities"}
+    assert sections["license"] == "cached license"
+    prompt = assistant._build_user_prompt(sections)
+    assert "cached lots" in prompt and prompt.rstrip().endswith("always include a disclaimer!")
+
+
+@pytest.mark.unit
+async def test_stream_broken_off_mid_response_ends_with_error(db, monkeypatch):
+    class BrokenStream:
+        async def __aiter__(self):
+            yield type("Chunk", (), {"text": "Portugal taxes"})()
+            raise ConnectionError("stream reset")
+
+    class FakeChat:
+        async def send_message_async(self, message, stream=False):
+            return BrokenStream()
+
+    assistant = ChatAssistant(db)
+    monkeypatch.setattr(assistant, "_build_comprehensive_system_prompt", lambda user_id: "prompt")
+    monkeypatch.setattr(assistant, "_start_chat", lambda system_prompt, history: FakeChat())
+    monkeypatch.setattr(assistant, "_complete_response", lambda *args: pytest.fail("partial reply completed"))
+
+    events = [event async for event in assistant.stream_message(1, "Crypto tax in Portugal?")]
+
+    assert events[0] == {"type": "delta", "text": "Portugal taxes"}
+    assert events[-1] == {"type": "error", "message": chat_assistant.STREAM_INTERRUPTED_MESSAGE}
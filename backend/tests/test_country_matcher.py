@@ -0,0 +1,86 @@
+"""
+Unit tests for the precompiled country mention matcher
+"""
+
+import random
+import string
+import time
+
+import pytest
+from decimal import Decimal
+from app.models.regulation import Regulation
+from app.services.country_matcher import CountryMatcher
+from app.services.regulation_catalog import RegulationRecord
+
+
+def _records(countries):
+    return [
+        RegulationRecord.from_model(Regulation(
+            country_code=code, country_name=name,
+            cgt_short_rate=Decimal("0.1"), cgt_long_rate=Decimal("0.1")
+        ))
+        for code, name in countries
+    ]
+
+
+COUNTRIES = [
+    ("US", "United States"), ("FR", "France"), ("PT", "Portugal"), ("DE", "Germany"),
+    ("AE", "United Arab Emirates"), ("NE", "Niger"), ("NG", "Nigeria"), ("IT", "Italy"),
+]
+
+
+@pytest.mark.unit
+def test_finds_names_aliases_and_codes_by_first_mention():
+    matcher = CountryMatcher(_records(COUNTRIES))
+
+    assert matcher.find("I live in France and want to move to Portugal") == ["FR", "PT"]
+    assert matcher.find("je vis aux Émirats arabes unis, pas en Allemagne") == ["AE", "DE"]
+    assert matcher.find("Nigeria or Niger? Nigeria.") == ["NG", "NE"]
+    assert matcher.find("IT consultant from the U.S. moving to PT") == ["US", "PT"]
+
+    # No substring matches ("us" in "because", "de" in "decide")
+    assert matcher.find("because I can't decide, frances") == []
+
+
+@pytest.mark.unit
+def test_large_country_lists_match_the_same_mentions():
+    """A 5,000-name matcher finds exactly the names mentioned, in order"""
+    rng = random.Random(3)
+    names = sorted({"".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 14))) for _ in range(5000)})
+    countries = [(f"X{i:04d}", name) for i, name in enumerate(names)]
+    matcher = CountryMatcher(_records(countries), aliases=None)
+
+    mentioned = rng.sample(range(len(countries)), 5)
+    words = rng.choices(["moving", "from", "to", "taxes", "crypto", "gains", "2025"], k=2000)
+    for position, index in zip(sorted(rng.sample(range(len(words)), 5)), mentioned):
+        words[position] = countries[index][1]
+
+    assert matcher.find(" ".join(words)) == [countries[index][0] for index in mentioned]
+
+
+def _scan_seconds(matcher, text, rounds=20):
+    """Best of 5 runs of `rounds` scans (per scan)"""
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            matcher.find(text)
+        timings.append((time.perf_counter() - start) / rounds)
+    return min(timings)
+
+
+@pytest.mark.slow
+def test_scan_time_holds_as_country_list_grows():
+    """Benchmark: 25x more names shouldn't make a scan much slower"""
+    rng = random.Random(3)
+
+    def synthetic(n):
+        names = {"".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 14))) for _ in range(n)}
+        codes = ("".join(pair) for pair in zip(rng.choices(string.ascii_uppercase, k=n), rng.choices(string.ascii_uppercase, k=n)))
+        return CountryMatcher(_records(zip(codes, names)), aliases=None)
+
+    text = " ".join(rng.choices(["moving", "from", "France", "to", "taxes", "crypto", "gains", "PT", "2025"], k=2000))
+    small, large = synthetic(200), synthetic(5000)
+
+    # A per-name scan would be ~25x slower; generous bound for noisy machines
+    assert _scan_seconds(large, text) < _scan_seconds(small, text) * 5
@@ -0,0 +1,37 @@
+"""
+Unit tests for the dashboard stats and portfolio builders
+"""
+
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from app.models.cost_basis import CostBasisLot
+from app.routers.dashboard import NO_LOCAL_CURRENCY, _build_portfolio_summary, _build_user_stats
+
+
+def _lot(token, chain, amount, price, verified=True):
+    return CostBasisLot(token=token, chain=chain, remaining_amount=amount,
+                        acquisition_price_usd=price, verified=verified)
+
+
+@pytest.mark.unit
+def test_stats_and_portfolio_share_queried_lots():
+    summary = SimpleNamespace(total_audits=2, last_audit_at=datetime(2025, 3, 1), wash_sale_warnings=1,
+                              settings_jurisdiction=None, current_country="PT")
+    lots = [_lot("ETH", "ethereum", 2.0, 1000.0), _lot("ETH", "base", 1.0, 2000.0, verified=False),
+            _lot("NOPE", "ethereum", 10.0, 1.0)]
+    prices = {"ETH": Decimal("3000"), "NOPE": None}  # No price: acquisition price
+
+    stats = _build_user_stats(summary, lots, [], prices, ("EUR", "€", 0.9))
+
+    assert stats.total_portfolio_value == 9010.0 and stats.portfolio_cost_basis == 4010.0
+    assert stats.unverified_lots_count == 1 and stats.wash_sale_warnings_count == 1
+    assert stats.tax_jurisdiction == "PT" and stats.onboarding_complete
+    assert stats.local_currency == "EUR" and stats.last_audit_date == "2025-03-01T00:00:00"
+
+    portfolio = _build_portfolio_summary(lots, prices, NO_LOCAL_CURRENCY)
+    assert portfolio.total_value_usd == stats.total_portfolio_value
+    assert (portfolio.chains_count, portfolio.tokens_count) == (2, 3)
+    assert portfolio.top_holdings[0].token == "ETH" and portfolio.total_value_local is None
+    assert _build_portfolio_summary([], prices, NO_LOCAL_CURRENCY) is None
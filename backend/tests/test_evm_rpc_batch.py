@@ -0,0 +1,151 @@
+"""
+Tests for the batched EVM balance reader (RPC fallback)
+
+Uses an in-process stand-in node (httpx.MockTransport) so the Multicall3 and
+plain-batch paths run offline, plus an optional anvil node.
+"""
+
+import pytest
+import httpx
+from eth_abi import encode, decode
+from app.services.evm_rpc_batch import (
+    EvmBalanceReader,
+    RpcBatchClient,
+    MULTICALL3_ADDRESS,
+    SELECTOR_AGGREGATE3,
+    SELECTOR_BALANCE_OF,
+    SELECTOR_GET_ETH_BALANCE,
+    encode_aggregate3,
+    decode_aggregate3,
+)
+from app.services.multi_chain_balance_service import MultiChainBalanceService
+
+
+WALLET_A = "0x" + "aa" * 20
+WALLET_B = "0x" + "bb" * 20
+USDC = "0x" + "01" * 20
+WETH = "0x" + "02" * 20
+
+
+class FakeEvmNode:
+    """Stand-in JSON-RPC node: native/ERC20 balances, optional Multicall3"""
+
+    def __init__(self, native, token_balances, multicall=True):
+        self.native = native
+        self.token_balances = token_balances
+        self.multicall = multicall
+        self.http_requests = 0
+
+    def _balance_of(self, token, data):
+        (owner,) = decode(["address"], data[4:])
+        return self.token_balances.get((token, owner.lower()), 0)
+
+    def _eth_call(self, to, data):
+        to = to.lower()
+        if to == MULTICALL3_ADDRESS:
+            if not self.multicall:
+                return "0x"
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = []
+            for target, _, calldata in calls:
+                if calldata[:4] == SELECTOR_GET_ETH_BALANCE:
+                    (owner,) = decode(["address"], calldata[4:])
+                    value = self.native.get(owner.lower(), 0)
+                else:
+                    value = self._balance_of(target.lower(), calldata)
+                results.append((True, value.to_bytes(32, "big")))
+            return "0x" + encode(["(bool,bytes)[]"], [results]).hex()
+        return "0x" + self._balance_of(to, data).to_bytes(32, "big").hex()
+
+    def _handle(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(19_000_000)
+        if method == "eth_getBalance":
+            return hex(self.native.get(params[0].lower(), 0))
+        if method == "eth_call":
+            return self._eth_call(params[0]["to"], bytes.fromhex(params[0]["data"][2:]))
+        raise ValueError(method)
+
+    def transport(self):
+        def handler(request):
+            import json
+            self.http_requests += 1
+            body = json.loads(request.content)
+            return httpx.Response(200, json=[
+                {"jsonrpc": "2.0", "id": item["id"], "result": self._handle(item["method"], item["params"])}
+                for item in body
+            ])
+        return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def node():
+    return FakeEvmNode(
+        native={WALLET_A: 2 * 10 ** 18, WALLET_B: 0},
+        token_balances={(USDC, WALLET_A): 1_500_000, (WETH, WALLET_B): 10 ** 17},
+    )
+
+
+def _reader(node):
+    client = httpx.AsyncClient(transport=node.transport())
+    return EvmBalanceReader(RpcBatchClient(client, "http://node"))
+
+
+@pytest.mark.unit
+def test_aggregate3_roundtrip():
+    calldata = encode_aggregate3([(USDC, SELECTOR_BALANCE_OF + encode(["address"], [WALLET_A]))])
+    assert calldata.startswith("0x" + SELECTOR_AGGREGATE3.hex())
+
+    encoded = "0x" + encode(["(bool,bytes)[]"], [[(True, (42).to_bytes(32, "big")), (False, b"")]]).hex()
+    assert decode_aggregate3(encoded) == [42, None]
+
+
+@pytest.mark.unit
+async def test_multicall_reads_all_wallets_in_one_round_trip(node):
+    balances, block = await _reader(node).read_balances([WALLET_A, WALLET_B], [USDC, WETH])
+
+    assert node.http_requests == 1
+    assert block == 19_000_000
+    assert balances[WALLET_A]["native"] == 2 * 10 ** 18
+    assert balances[WALLET_A]["tokens"][USDC] == 1_500_000
+    assert balances[WALLET_B]["tokens"][WETH] == 10 ** 17
+
+
+@pytest.mark.unit
+async def test_falls_back_to_plain_batch_without_multicall(node):
+    node.multicall = False
+    balances, _ = await _reader(node).read_balances([WALLET_A, WALLET_B], [USDC, WETH])
+
+    # Failed multicall attempt + one plain batch
+    assert node.http_requests == 2
+    assert balances[WALLET_A]["native"] == 2 * 10 ** 18
+    assert balances[WALLET_B]["tokens"][WETH] == 10 ** 17
+
+
+@pytest.mark.unit
+async def test_wallets_of_a_chain_share_one_round_trip(node, monkeypatch):
+    """get_wallet_balances_many reads RPC-only wallets per chain, not per wallet"""
+    service = MultiChainBalanceService(redis_client=object())
+    service.redis = None
+    service.alchemy_key = service.moralis_key = None
+    service.http_client = httpx.AsyncClient(transport=node.transport())
+    monkeypatch.setattr(service, "_get_rpc_url", lambda chain: "http://node")
+
+    balances = await service.get_wallet_balances_many([(WALLET_A, "ethereum"), (WALLET_B, "ethereum")])
+
+    assert node.http_requests == 1
+    assert balances[(WALLET_A, "ethereum")]["native_balance"] == 2
+    assert balances[(WALLET_B, "ethereum")]["native_balance"] == 0
+    assert not balances[(WALLET_A, "ethereum")].get("failed")
+
+
+@pytest.mark.slow
+async def test_plain_batch_against_anvil(anvil_rpc_url):
+    """anvil has no Multicall3 by default, so this exercises the fallback"""
+    funded = "0xf39fd6e51aad88f6f4ce6ab8827279cfffb92266"  # anvil account #0
+    async with httpx.AsyncClient() as client:
+        reader = EvmBalanceReader(RpcBatchClient(client, anvil_rpc_url))
+        balances, block = await reader.read_balances([funded], [])
+
+    assert block is not None
+    assert balances[funded]["native"] == 10_000 * 10 ** 18
@@ -0,0 +1,74 @@
+"""
+Unit tests for the feature flag snapshot
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+from app.dependencies import exchange_rate
+from app.models.feature_flag import FeatureFlag
+from app.models.user import UserRole
+from app.services import feature_flags
+from app.services.principal_cache import Principal
+
+
+def _fake_db(flags):
+    db = MagicMock()
+    db.query.return_value.all.return_value = flags
+    return db
+
+
+def _user(user_id, role=UserRole.USER, beta_tester=False):
+    return Principal(id=user_id, email=f"user{user_id}@example.com", role=role, beta_tester=beta_tester)
+
+
+@pytest.fixture(autouse=True)
+def reset_snapshot():
+    feature_flags.reset_feature_flags()
+    yield
+    feature_flags.reset_feature_flags()
+
+
+@pytest.mark.unit
+def test_flags_are_evaluated_from_the_snapshot():
+    db = _fake_db([
+        FeatureFlag(name="new_dashboard", enabled_globally=True),
+        FeatureFlag(name="ai_optimizer", beta_only=True),
+        FeatureFlag(name="fast_audits", rollout_percentage=30),
+        FeatureFlag(name="eu_reports", enabled_countries=["FR", "DE"]),
+    ])
+    feature_flags.load_feature_flags(db)
+    queries = db.query.call_count
+
+    assert feature_flags.is_enabled("new_dashboard")
+    assert feature_flags.is_enabled("ai_optimizer", _user(1, beta_tester=True))
+    assert feature_flags.is_enabled("ai_optimizer", _user(2, role=UserRole.ADMIN))
+    assert not feature_flags.is_enabled("ai_optimizer", _user(3))
+    assert feature_flags.is_enabled("eu_reports", country="FR")
+    assert not feature_flags.is_enabled("eu_reports", _user(4), country="US")
+    assert not feature_flags.is_enabled("unknown_flag", _user(5))
+
+    # Stable buckets, about 30% of users in
+    enabled = [feature_flags.is_enabled("fast_audits", _user(user_id)) for user_id in range(1000)]
+    assert enabled == [feature_flags.is_enabled("fast_audits", _user(user_id)) for user_id in range(1000)]
+    assert 250 < sum(enabled) < 350
+
+    assert db.query.call_count == queries  # No database after the load
+
+
+@pytest.mark.unit
+def test_admin_change_reloads_and_publishes(monkeypatch):
+    published = []
+    redis_client = MagicMock()
+    redis_client.publish.side_effect = lambda channel, name: published.append((channel, name))
+    monkeypatch.setattr(exchange_rate, "get_redis_client", lambda: redis_client)
+
+    feature_flags.load_feature_flags(_fake_db([FeatureFlag(name="beta_chat", enabled_globally=False)]))
+    before = feature_flags.get_flag_snapshot()
+    assert not feature_flags.is_enabled("beta_chat")
+
+    feature_flags.publish_flag_change("beta_chat", _fake_db([FeatureFlag(name="beta_chat", enabled_globally=True)]))
+
+    assert feature_flags.is_enabled("beta_chat")
+    assert not before.is_enabled("beta_chat")  # Old snapshot unchanged for readers holding it
+    assert published == [(feature_flags.CHANNEL, "beta_chat")]
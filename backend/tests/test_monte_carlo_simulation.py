@@ -0,0 +1,81 @@
+"""
+Unit tests for Monte Carlo residency simulations
+"""
+
+import numpy as np
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from app.models.regulation import Regulation
+from app.services.monte_carlo_simulation import MonteCarloTaxSimulation
+from app.services.regulation_catalog import RegulationRecord
+from app.services.residency_comparison import ResidencyComparisonEngine
+
+NOW = datetime(2025, 6, 30)
+
+
+def _engine():
+    regulations = [
+        Regulation(country_code="US", country_name="United States",
+                   cgt_short_rate=Decimal("0.37"), cgt_long_rate=Decimal("0.20")),
+        Regulation(country_code="AE", country_name="United Arab Emirates",
+                   cgt_short_rate=Decimal("0"), cgt_long_rate=Decimal("0")),
+    ]
+    return ResidencyComparisonEngine([RegulationRecord.from_model(r) for r in regulations])
+
+
+def _lots():
+    return [
+        # Old cheap lot (long-term at the horizon) and a recent expensive one
+        {"id": 1, "token": "BTC", "amount": 1.0, "cost": 20_000.0, "acquired": (NOW - timedelta(days=700)).isoformat()},
+        {"id": 2, "token": "BTC", "amount": 1.0, "cost": 60_000.0, "acquired": (NOW - timedelta(days=30)).isoformat()},
+    ]
+
+
+def _simulation(**kwargs):
+    options = dict(
+        spot_prices={"BTC": 50_000.0},
+        countries=["US", "AE"],
+        horizon_days=180,
+        n_paths=3000,
+        seed=7,
+        sell_fraction=0.5,
+        price_ranges={"BTC": (80_000, 100_000)},
+        now=NOW
+    )
+    options.update(kwargs)
+    return MonteCarloTaxSimulation(_engine(), _lots(), **options)
+
+
+@pytest.mark.unit
+def test_methods_sell_different_lots():
+    progress = []
+    result = _simulation().run(progress=lambda done, total: progress.append(done))
+
+    assert progress[-1] == 3000
+    btc = result["prices"]["BTC"]
+    assert 80_000 <= btc["p5"] <= btc["p95"] <= 100_000
+
+    fifo = result["methods"]["fifo"]["countries"]["US"]
+    hifo = result["methods"]["hifo"]["countries"]["US"]
+    # FIFO sells the $20k long-term lot, HIFO the $60k short-term one
+    assert fifo["p50"] == pytest.approx((90_000 - 20_000) * 0.20, rel=0.05)
+    assert hifo["p50"] == pytest.approx((90_000 - 60_000) * 0.37, rel=0.05)
+
+    assert result["methods"]["fifo"]["countries"]["AE"]["p95"] == 0
+    assert result["methods"]["fifo"]["lowest_median_tax"] == "AE"
+    assert result["methods"]["fifo"]["countries"]["AE"]["probability_lowest"] == 1.0
+
+
+@pytest.mark.unit
+def test_same_seed_same_result_and_unpriced_tokens_skipped():
+    lots = _lots() + [{"id": 3, "token": "XYZ", "amount": 5.0, "cost": 1.0, "acquired": NOW.isoformat()}]
+    first = MonteCarloTaxSimulation(
+        _engine(), lots, spot_prices={"BTC": 50_000.0}, countries=["US", "AE"],
+        horizon_days=180, n_paths=500, seed=11, now=NOW
+    ).run()
+    second = _simulation(price_ranges=None, n_paths=500, seed=11, sell_fraction=1.0).run()
+
+    assert first["skipped_tokens"] == ["XYZ"]
+    assert first["methods"] == second["methods"]
+    assert np.isclose(first["prices"]["BTC"]["p50"], second["prices"]["BTC"]["p50"])
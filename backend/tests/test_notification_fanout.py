@@ -0,0 +1,120 @@
+"""
+Unit tests for the notification fan-out
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from app.config import settings
+from app.models.notification_delivery import NotificationDelivery
+from app.models.user import User
+from app.services import notification_fanout
+from app.services.notification_fanout import NotificationFanout, NotificationMessage, Recipient
+from app.services.notification_service import NotificationService
+from app.services.notification_standin import ProviderStandIn
+
+
+@pytest.fixture
+def deliveries(db, monkeypatch):
+    NotificationDelivery.__table__.create(bind=db.get_bind(), checkfirst=True)
+    monkeypatch.setattr(settings, "SENDGRID_API_KEY", "test-key")
+    yield db
+    db.close()
+    NotificationDelivery.__table__.drop(bind=db.get_bind(), checkfirst=True)
+
+
+def _users(db, count):
+    users = [User(email=f"user{i}@example.com", password_hash="x") for i in range(count)]
+    users[3].notifications = {"email_notifications": False}
+    users[4].deleted_at = datetime.utcnow()
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+@pytest.mark.unit
+def test_bulk_send_batches_recipients_and_is_idempotent(deliveries, monkeypatch):
+    db = deliveries
+    user_ids = _users(db, 25)
+    monkeypatch.setattr(settings, "NOTIFICATION_EMAIL_RATE", 1000.0)
+    monkeypatch.setattr(notification_fanout, "SENDGRID_MAX_PERSONALIZATIONS", 4)
+
+    standin = ProviderStandIn(latency=0.01, throttle_every=3)
+    fanout = NotificationFanout(http_client=standin.client())
+    message = NotificationMessage(subject="Usage reset", body="Your quotas were reset")
+
+    results = asyncio.run(fanout.send_to_users(db, message, "email", "usage_reset:2025-11", batch_size=10))
+    assert results == {"success": 23, "failed": 0, "skipped": 1}  # Opted out skipped, deleted user not loaded
+    assert standin.recipients["email"] == 23
+    assert standin.requests["email"] == 7 + standin.throttled  # 3 batches -> 3+3+1 requests, 429s retried
+
+    rows = db.query(NotificationDelivery).all()
+    assert len(rows) == 23 and {row.status for row in rows} == {"sent"}
+    assert all(row.provider_message_id for row in rows)
+
+    # Re-triggered (task retry): nobody is notified twice
+    again = asyncio.run(fanout.send_to_users(db, message, "email", "usage_reset:2025-11", batch_size=10))
+    assert again == {"success": 0, "failed": 0, "skipped": 24}
+    assert standin.recipients["email"] == 23
+
+    # Admin bulk send by ids: unknown users fail, the rest go through the fan-out
+    service = NotificationService(db)
+    service.fanout = NotificationFanout(http_client=standin.client())
+    counts = asyncio.run(service.send_bulk_notification(user_ids[:2] + [99999], "Hello", "Body", "broadcast:1"))
+    assert counts == {"success": 2, "failed": 1, "skipped": 0}
+
+    # The same text sent again as a new broadcast reaches everyone again
+    counts = asyncio.run(service.send_bulk_notification(user_ids[:2], "Hello", "Body", "broadcast:2"))
+    assert counts == {"success": 2, "failed": 0, "skipped": 0}
+
+
+@pytest.mark.unit
+def test_failed_deliveries_are_retried_within_provider_limits(deliveries, monkeypatch):
+    db = deliveries
+    monkeypatch.setattr(settings, "NOTIFICATION_WEBHOOK_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "NOTIFICATION_WEBHOOK_RATE", 500.0)
+    recipients = [Recipient(f"http://hooks.local/{i}", user_id=None) for i in range(6)]
+    message = NotificationMessage(subject="Tax data", body="FR rate changed")
+
+    # Provider throttles everything: failed after MAX_ATTEMPTS
+    down = ProviderStandIn(throttle_every=1)
+    results = asyncio.run(NotificationFanout(http_client=down.client()).send(
+        db, recipients, message, "webhook", "tax_data_updated:FR:0.3"
+    ))
+    assert results == {"success": 0, "failed": 6, "skipped": 0}
+    assert down.requests["webhook"] == 6 * notification_fanout.MAX_ATTEMPTS
+
+    # Provider back: only the failures are retried, at most 2 requests in flight
+    up = ProviderStandIn(latency=0.01)
+    results = asyncio.run(NotificationFanout(http_client=up.client()).send(
+        db, recipients, message, "webhook", "tax_data_updated:FR:0.3"
+    ))
+    assert results == {"success": 6, "failed": 0, "skipped": 0}
+    assert up.max_in_flight == 2
+
+    rows = db.query(NotificationDelivery).all()
+    assert len(rows) == 6 and all(row.status == "sent" and row.attempts == 2 for row in rows)
+
+
+@pytest.mark.unit
+def test_concurrent_runs_of_a_notification_send_once(deliveries):
+    db = deliveries
+    recipients = [Recipient(f"http://hooks.local/{i}", user_id=None) for i in range(6)]
+    message = NotificationMessage(subject="Tax data", body="PT rate changed")
+    standin = ProviderStandIn(latency=0.01)
+    fanout = NotificationFanout(http_client=standin.client())
+
+    async def twice():
+        return await asyncio.gather(*(
+            fanout.send(db, recipients, message, "webhook", "tax_data_updated:PT:0.28", batch_size=2)
+            for _ in range(2)
+        ))
+
+    first, second = asyncio.run(twice())
+    assert first["success"] + second["success"] == 6
+    assert first["skipped"] + second["skipped"] == 6  # Claimed by the other run
+    assert standin.recipients["webhook"] == 6
+
+    rows = db.query(NotificationDelivery).all()
+    assert len(rows) == 6 and all(row.status == "sent" and row.attempts == 1 for row in rows)
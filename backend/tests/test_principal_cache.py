@@ -0,0 +1,141 @@
+"""
+Unit tests for the principal cache
+"""
+
+import pytest
+from sqlalchemy import event
+from app.models.license import License, LicenseTier, SubscriptionStatus
+from app.services import principal_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key) or 0) + 1)
+
+    def expire(self, key, seconds):
+        pass
+
+    # Pipelines run immediately (no concurrent writers in these tests)
+    def pipeline(self, transaction=True):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def watch(self, *keys):
+        pass
+
+    def multi(self):
+        pass
+
+    def execute(self):
+        return []
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(principal_cache, "_redis", lambda: client)
+    principal_cache.clear_local_cache()
+    yield client
+    principal_cache.clear_local_cache()
+
+
+@pytest.fixture
+def licenses(db):
+    License.__table__.create(bind=db.get_bind(), checkfirst=True)
+    yield
+    db.close()
+    License.__table__.drop(bind=db.get_bind(), checkfirst=True)
+
+
+@pytest.mark.unit
+def test_principal_is_loaded_once_then_cached(db, test_user, licenses, redis_client):
+    db.add(License(user_id=test_user.id, tier=LicenseTier.STARTER, status=SubscriptionStatus.ACTIVE))
+    db.commit()
+    user_id, email = test_user.id, test_user.email
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        first = principal_cache.get_principal(db, email)
+        second = principal_cache.get_principal(db, email)
+        principal_cache.clear_local_cache()
+        from_redis = principal_cache.get_principal(db, email)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert len(statements) == 2  # user id (for its generation), users joined with licenses, then LRU and Redis hits
+    assert first.id == user_id and first.tier == LicenseTier.STARTER
+    assert first.limits["defi_audits"] == 15 and first.license_active()
+    assert second is first
+    assert from_redis == first
+    assert principal_cache.get_principal(db, "unknown@example.com") is None
+
+
+@pytest.mark.unit
+def test_profile_and_license_changes_invalidate(db, test_user, licenses, redis_client):
+    license = License(user_id=test_user.id, tier=LicenseTier.FREE, status=SubscriptionStatus.ACTIVE)
+    db.add(license)
+    db.commit()
+    assert principal_cache.get_principal(db, test_user.email).tier == LicenseTier.FREE
+
+    # Usage counters aren't part of the principal
+    license.simulations_used = 1
+    db.commit()
+    assert principal_cache.cache_key(test_user.email) in redis_client.data
+
+    # Subscription webhook
+    license.tier = LicenseTier.PRO
+    db.commit()
+    assert principal_cache.cache_key(test_user.email) not in redis_client.data
+    assert principal_cache.get_principal(db, test_user.email).tier == LicenseTier.PRO
+
+    # Email change: the old subject stops resolving
+    old_email = test_user.email
+    test_user.email = "renamed@example.com"
+    db.commit()
+    assert principal_cache.get_principal(db, old_email) is None
+    assert principal_cache.get_principal(db, "renamed@example.com").id == test_user.id
+
+
+@pytest.mark.unit
+def test_principal_loaded_before_a_concurrent_commit_is_not_stored(db, test_user, licenses, redis_client, monkeypatch):
+    license = License(user_id=test_user.id, tier=LicenseTier.FREE, status=SubscriptionStatus.ACTIVE)
+    db.add(license)
+    db.commit()
+    load_principal = principal_cache.load_principal
+
+    def load_then_webhook(session, subject):
+        principal = load_principal(session, subject)
+        # Subscription webhook commits (and invalidates) before the load is stored
+        license.tier = LicenseTier.PRO
+        db.commit()
+        return principal
+
+    monkeypatch.setattr(principal_cache, "load_principal", load_then_webhook)
+    assert principal_cache.get_principal(db, test_user.email).tier == LicenseTier.FREE
+    monkeypatch.setattr(principal_cache, "load_principal", load_principal)
+
+    assert principal_cache.cache_key(test_user.email) not in redis_client.data
+    assert principal_cache.get_principal(db, test_user.email).tier == LicenseTier.PRO
@@ -0,0 +1,56 @@
+"""
+Unit tests for the request profiler
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.middleware.profiling import ProfilingMiddleware
+from app.models.user import User
+from app.monitoring import profiler
+from app.routers import health
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    profiler.reset_metrics()
+    yield
+    profiler.reset_metrics()
+
+
+@pytest.mark.unit
+def test_sql_calls_are_tagged_by_route(db, test_user):
+    # Small app with just the middleware (the main app can't start on SQLite)
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+    app.include_router(health.router)
+
+    @app.get("/users/{user_id}")
+    def read_user(user_id: int):
+        return {"email": db.query(User).filter(User.id == user_id).first().email}
+
+    profiler.instrument()
+    with TestClient(app) as client:
+        response = client.get(f"/users/{test_user.id}")
+        metrics = client.get("/metrics").text
+
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith('db;dur=')
+    assert 'desc="1 calls"' in response.headers["Server-Timing"]
+
+    assert 'app_requests_total{method="GET",route="/users/{user_id}"} 1' in metrics
+    assert 'app_request_calls_total{method="GET",route="/users/{user_id}",kind="db"} 1' in metrics
+    assert 'route="/metrics"' not in metrics
+
+
+@pytest.mark.unit
+def test_repeated_statement_counts_as_n_plus_one():
+    profile = profiler.RequestProfile()
+    for _ in range(profiler.REPEATED_QUERY_THRESHOLD):
+        profile.record("db", 0.001, "SELECT * FROM defi_transactions WHERE audit_id = ?")
+    profile.record("db", 0.001, "SELECT * FROM defi_audits WHERE id = ?")
+
+    profiler.record_request("GET", "/defi-audit/{audit_id}", 200, 0.05, profile)
+
+    assert profile.counts["db"] == profiler.REPEATED_QUERY_THRESHOLD + 1
+    assert 'app_request_repeated_queries_total{method="GET",route="/defi-audit/{audit_id}"} 1' in profiler.render_prometheus()
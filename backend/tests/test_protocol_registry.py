@@ -0,0 +1,133 @@
+"""
+Unit tests for the protocol registry
+"""
+
+import asyncio
+
+import pytest
+from app.models.known_protocol import KnownProtocol
+from app.services import protocol_registry
+from app.services.blockchain_parser_adapter import BlockchainParser as MoralisAdapter
+from app.services.protocol_detector import ProtocolDetector
+
+UNISWAP_V3_FACTORY = "0x1f98431c8ad98523631ae4a59f267346ea31f984"
+AAVE_ETHEREUM = "0x7fc66500c84a76ad7e9c93437bfc5ac33e2ddae9"
+GMX_ARBITRUM = "0xfc5a1a6eb076a2c7ad06ed22c90d7e710e35ad0a"
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeHttpClient:
+    def __init__(self, payload):
+        self.payload = payload
+
+    async def get(self, url):
+        assert url == protocol_registry.DEFILLAMA_PROTOCOLS_URL
+        return FakeResponse(self.payload)
+
+
+DEFILLAMA_PROTOCOLS = [
+    {"name": "Aave V3", "slug": "aave-v3", "address": AAVE_ETHEREUM.upper().replace("0X", "0x"),
+     "chain": "Ethereum", "category": "Lending"},
+    {"name": "GMX", "slug": "gmx", "address": f"arbitrum:{GMX_ARBITRUM}", "chain": "Multi-Chain",
+     "category": "Derivatives"},
+    {"name": "Uniswap V3", "slug": "uniswap-v3", "address": UNISWAP_V3_FACTORY, "chain": "Ethereum",
+     "category": "Dexes"},
+    {"name": "Raydium", "slug": "raydium", "address": "solana:4k3Dyjzvzp8eMZWUXbBCjEvwSkkk59S5iCNLY3QrkX6R",
+     "chain": "Solana", "category": "Dexes"},
+    {"name": "No Address", "slug": "no-address", "address": None, "chain": "Ethereum", "category": "Yield"},
+]
+
+
+@pytest.fixture
+def known_protocols(db):
+    KnownProtocol.__table__.create(bind=db.get_bind(), checkfirst=True)
+    protocol_registry.reset_protocol_registry()
+    yield
+    protocol_registry.reset_protocol_registry()
+    db.close()
+    KnownProtocol.__table__.drop(bind=db.get_bind(), checkfirst=True)
+
+
+@pytest.mark.unit
+def test_defillama_sync_fills_the_indexed_registry(db, known_protocols):
+    count = asyncio.run(protocol_registry.sync_defillama_protocols(db, FakeHttpClient(DEFILLAMA_PROTOCOLS)))
+
+    assert count == 3  # Solana and address-less protocols skipped
+    registry = protocol_registry.get_protocol_registry()
+
+    aave = registry.lookup(AAVE_ETHEREUM, "ethereum")
+    assert (aave.name, aave.type, aave.slug) == ("Aave V3", "lending", "aave-v3")
+    assert registry.lookup(AAVE_ETHEREUM, "polygon") is None  # Synced addresses are per chain
+    assert registry.lookup(GMX_ARBITRUM, "arbitrum").type == "derivatives"
+
+    # Curated built-in entry wins over the synced one, on every chain
+    assert registry.lookup(UNISWAP_V3_FACTORY, "base").name == "Uniswap V3"
+    assert registry.lookup(UNISWAP_V3_FACTORY, "base").version == "3"
+
+    # Second sync: one protocol renamed, one gone
+    changed = [dict(DEFILLAMA_PROTOCOLS[0], name="Aave"), DEFILLAMA_PROTOCOLS[2]]
+    assert asyncio.run(protocol_registry.sync_defillama_protocols(db, FakeHttpClient(changed))) == 2
+    assert db.query(KnownProtocol).count() == 2
+    assert protocol_registry.lookup_protocol(AAVE_ETHEREUM).name == "Aave"
+    assert protocol_registry.lookup_protocol(GMX_ARBITRUM, "arbitrum") is None
+
+    # Empty answer (DeFiLlama outage): nothing is pruned
+    assert asyncio.run(protocol_registry.sync_defillama_protocols(db, FakeHttpClient([]))) == 0
+    assert db.query(KnownProtocol).count() == 2
+    assert protocol_registry.lookup_protocol(AAVE_ETHEREUM).name == "Aave"
+
+
+@pytest.mark.unit
+def test_detector_uses_the_registry(db, known_protocols, monkeypatch):
+    db.add(KnownProtocol(chain="ethereum", address=AAVE_ETHEREUM, name="Aave V3", slug="aave-v3",
+                         protocol_type="lending"))
+    db.commit()
+    protocol_registry.load_protocol_registry(db)
+    monkeypatch.setattr(protocol_registry, "load_protocol_registry", lambda db=None: pytest.fail("reloaded"))
+
+    detector = ProtocolDetector()
+    assert detector.detect_protocol(AAVE_ETHEREUM.upper().replace("0X", "0x")) == {
+        "name": "Aave V3", "type": "lending", "slug": "aave-v3", "chain": "ethereum"
+    }
+    assert detector.detect_protocol("0xba12222222228d8ba445958a75a0704d566bf2c8", "arbitrum")["name"] == "Balancer V2 Vault"
+    assert detector.detect_protocol("0x000000000000000000000000000000000000dead") is None
+
+    info = detector.get_protocol_info("AAVE-V3")
+    assert info["chains"] == ["ethereum"] and info["addresses"] == {"ethereum": AAVE_ETHEREUM}
+    assert detector.get_protocol_info("unknown") is None
+
+    assert sorted(detector.detect_protocol_from_method("swapExactTokensForTokens")) == ["aggregator", "dex"]
+    assert sorted(detector.detect_protocol_from_method("unstake")) == ["staking"]
+
+
+@pytest.mark.unit
+def test_synced_addresses_name_but_dont_classify_transfers(db, known_protocols):
+    asyncio.run(protocol_registry.sync_defillama_protocols(db, FakeHttpClient(DEFILLAMA_PROTOCOLS)))
+    assert protocol_registry.lookup_protocol(AAVE_ETHEREUM).source == "defillama"
+    assert protocol_registry.lookup_protocol(UNISWAP_V3_FACTORY, "base").source == "builtin"
+
+    adapter = MoralisAdapter.__new__(MoralisAdapter)  # No Moralis / price clients needed
+
+    def transfer(to_address):
+        return adapter._convert_moralis_tx_to_legacy_format({
+            "hash": "0x01", "block_number": "1", "block_timestamp": "2025-11-05T10:00:00Z",
+            "category": "token send", "to_address": to_address,
+            "erc20_transfers": [{"direction": "send", "token_symbol": "AAVE", "value_formatted": "2", "value_usd": "400"}],
+        }, "ethereum", "0x" + "aa" * 20)
+
+    # AAVE token transfer: named after the protocol, still a plain transfer
+    aave = transfer(AAVE_ETHEREUM)
+    assert (aave["protocol_name"], aave["protocol_type"]) == ("Aave V3", "other")
+
+    router = transfer(UNISWAP_V3_FACTORY)
+    assert (router["protocol_name"], router["protocol_type"]) == ("Uniswap V3", "dex")
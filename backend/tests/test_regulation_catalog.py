@@ -0,0 +1,98 @@
+"""
+Unit tests for the in-memory regulation catalog
+
+Pre-resolved rates, pre-serialized responses and version-based reloads.
+"""
+
+import json
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+from app.models.regulation import Regulation
+from app.services import regulation_catalog
+from app.services.regulation_catalog import RegulationCatalog, RegulationRecord
+
+
+def _regulations():
+    return [
+        Regulation(
+            country_code="PT", country_name="Portugal",
+            cgt_short_rate=Decimal("0.28"), cgt_long_rate=Decimal("0.28"),
+            crypto_short_rate=Decimal("0.28"), crypto_long_rate=Decimal("0.00"),
+            holding_period_months=12, is_flat_tax=1,
+            treaty_countries=["US", "FR"], data_sources=["KPMG"], data_quality="high",
+            updated_at=datetime(2025, 1, 1)
+        ),
+        Regulation(
+            country_code="US", country_name="United States",
+            cgt_short_rate=Decimal("0.37"), cgt_long_rate=Decimal("0.20"),
+            notes=None, data_quality=None
+        ),
+        Regulation(
+            country_code="XX", country_name="Nowhere",
+            cgt_short_rate=Decimal("0.10"), cgt_long_rate=Decimal("0.10"),
+            data_quality="low"
+        ),
+    ]
+
+
+def _fake_db(regulations):
+    db = MagicMock()
+    db.query.return_value.order_by.return_value.all.return_value = regulations
+    return db
+
+
+@pytest.fixture(autouse=True)
+def reset_catalog():
+    regulation_catalog.reset_regulation_catalog()
+    yield
+    regulation_catalog.reset_regulation_catalog()
+
+
+@pytest.mark.unit
+def test_records_resolve_rates_and_serialize_once():
+    catalog = RegulationCatalog([RegulationRecord.from_model(r) for r in _regulations()], version="1")
+
+    pt = catalog.get("pt")
+    assert (pt.short_rate, pt.long_rate) == (0.28, 0.0)  # Crypto 0% long-term is kept
+    assert catalog.get("US").short_rate == 0.37            # No crypto rate: CGT fallback
+    assert pt.treaty_countries == ("US", "FR")
+    assert catalog.get("ZZ") is None
+
+    body, etag = catalog.serialized()
+    items = json.loads(body)
+    assert [item["country_code"] for item in items] == ["PT", "US", "XX"]
+    assert items[0]["is_flat_tax"] is True and items[0]["ai_analysis"] is None
+
+    reliable_body, reliable_etag = catalog.serialized(reliable_only=True)
+    assert [item["country_code"] for item in json.loads(reliable_body)] == ["PT", "US"]
+    assert reliable_etag != etag
+
+    crypto_body, _ = catalog.serialized(crypto_only=True)
+    assert [item["country_code"] for item in json.loads(crypto_body)] == ["PT"]
+
+    # Same data -> same ETag in every process
+    rebuilt = RegulationCatalog([RegulationRecord.from_model(r) for r in _regulations()], version="2")
+    assert rebuilt.serialized()[1] == etag
+
+
+@pytest.mark.unit
+def test_catalog_reloads_when_version_changes(monkeypatch):
+    version = {"value": "1"}
+    monkeypatch.setattr(regulation_catalog, "_current_version", lambda: version["value"])
+    monkeypatch.setattr(regulation_catalog, "VERSION_CHECK_SECONDS", 0)
+
+    db = _fake_db(_regulations())
+    first = regulation_catalog.get_regulation_catalog(db)
+    assert len(first) == 3
+
+    # Unchanged version: same catalog object, no query
+    assert regulation_catalog.get_regulation_catalog(db) is first
+    assert db.query.call_count == 1
+
+    version["value"] = "2"
+    second = regulation_catalog.get_regulation_catalog(db)
+    assert second is not first
+    assert second.version == "2"
+    assert db.query.call_count == 2
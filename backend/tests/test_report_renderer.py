@@ -0,0 +1,98 @@
+"""
+Unit tests for the report render pool and rendered document cache
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from app.config import settings
+from app.services import report_renderer
+from app.services.report_generators import ExcelReportGenerator, PDFReportGenerator
+
+
+def _report_data(count, gain=100.0):
+    start = datetime(2024, 1, 1)
+    rows = [
+        {
+            "id": i,
+            "token": "ETH",
+            "chain": "ethereum",
+            "amount": 1.5,
+            "acquisition_date": start,
+            "disposal_date": start + timedelta(days=30 + i % 300),
+            "cost_basis": 1000.0,
+            "proceeds": 1000.0 + gain,
+            "gain_loss": gain,
+            "holding_period_days": 30 + i % 300,
+            "is_long_term": False,
+            "wash_sale_loss_disallowed": 0.0,
+        }
+        for i in range(count)
+    ]
+    summary = {
+        "total_disposals": count, "short_term_transactions": count, "long_term_transactions": 0,
+        "short_term_gain": gain * count, "short_term_loss": 0.0, "short_term_net": gain * count,
+        "long_term_gain": 0.0, "long_term_loss": 0.0, "long_term_net": 0.0,
+        "total_gain": gain * count, "total_loss": 0.0, "net_gain_loss": gain * count, "wash_sales_count": 0,
+    }
+    return {"summary": summary, "short_term": rows, "long_term": [], "wash_sales": [],
+            "disposals": object()}  # ORM rows: never sent to the pool
+
+
+@pytest.fixture
+def render_calls(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_CACHE_DIR", str(tmp_path))
+    calls = []
+    run = report_renderer.run_in_render_pool
+
+    async def counting_run(render, *args):
+        calls.append(render)
+        return await run(render, *args)
+
+    monkeypatch.setattr(report_renderer, "run_in_render_pool", counting_run)
+    yield calls
+    report_renderer.shutdown_render_pool()
+
+
+@pytest.mark.unit
+def test_rendered_reports_are_cached_by_data_version(render_calls, tmp_path):
+    generator = ExcelReportGenerator(user_id=7, tax_year=2024)
+
+    first = asyncio.run(generator.generate(None, _report_data(20)))
+    again = asyncio.run(generator.generate(None, _report_data(20)))
+    assert first[:2] == b"PK" and again == first
+    assert len(render_calls) == 1  # Repeat download served from disk
+
+    changed = asyncio.run(generator.generate(None, _report_data(20, gain=250.0)))
+    assert changed != first and len(render_calls) == 2
+
+    # Only the latest version of the report is kept
+    files = list((tmp_path / "tax_report_xlsx" / "7-2024-US").iterdir())
+    assert len(files) == 1 and files[0].read_bytes() == changed
+
+
+@pytest.mark.unit
+def test_pdf_rendering_runs_off_the_event_loop(render_calls):
+    generator = PDFReportGenerator(user_id=8, tax_year=2024)
+    data = _report_data(1500)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticking = asyncio.create_task(ticker())
+        documents = await asyncio.gather(*(generator.generate(None, data) for _ in range(3)))
+        ticking.cancel()
+        return documents, ticks
+
+    documents, ticks = asyncio.run(scenario())
+    assert all(document.startswith(b"%PDF") for document in documents)
+    assert documents[0] == documents[1] == documents[2]
+    assert len(render_calls) == 1  # Concurrent requests share one render
+    assert ticks > 5  # The loop kept running while the PDF was built
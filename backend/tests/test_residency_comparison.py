@@ -0,0 +1,67 @@
+"""
+Unit tests for the vectorized residency comparison engine
+"""
+
+import numpy as np
+import pytest
+from decimal import Decimal
+from app.models.regulation import Regulation
+from app.services.regulation_catalog import RegulationRecord
+from app.services.residency_comparison import ResidencyComparisonEngine
+
+
+def _engine():
+    regulations = [
+        Regulation(country_code="US", country_name="United States",
+                   cgt_short_rate=Decimal("0.37"), cgt_long_rate=Decimal("0.20")),
+        Regulation(country_code="DE", country_name="Germany",
+                   cgt_short_rate=Decimal("0.45"), cgt_long_rate=Decimal("0.45"),
+                   crypto_short_rate=Decimal("0.45"), crypto_long_rate=Decimal("0.00"),
+                   holding_period_months=12),
+        Regulation(country_code="AU", country_name="Australia",
+                   cgt_short_rate=Decimal("0.30"), cgt_long_rate=Decimal("0.30"),
+                   long_term_discount_pct=Decimal("50"),
+                   exemption_threshold=Decimal("10000"), exemption_threshold_currency="USD"),
+        Regulation(country_code="PA", country_name="Panama",
+                   cgt_short_rate=Decimal("0.10"), cgt_long_rate=Decimal("0.10"), is_territorial=1),
+        Regulation(country_code="DZ", country_name="Algeria",
+                   cgt_short_rate=Decimal("0.00"), cgt_long_rate=Decimal("0.00"),
+                   crypto_legal_status="banned"),
+    ]
+    return ResidencyComparisonEngine([RegulationRecord.from_model(r) for r in regulations])
+
+
+@pytest.mark.unit
+def test_rank_matches_flat_rate_formula():
+    engine = _engine()
+    table = engine.rank(50_000, 100_000, current_country="US")
+
+    assert table["current"]["tax_amount"] == pytest.approx(50_000 * 0.37 + 100_000 * 0.20)
+
+    codes = [row["country_code"] for row in table["rankings"]]
+    assert "DZ" not in codes  # Banned countries are left out
+    assert codes == ["PA", "DE", "US", "AU"]  # Lowest tax first
+
+    de = next(row for row in table["rankings"] if row["country_code"] == "DE")
+    assert de["tax_amount"] == pytest.approx(50_000 * 0.45)
+    assert de["savings"] == pytest.approx(table["current"]["tax_amount"] - de["tax_amount"])
+
+
+@pytest.mark.unit
+def test_disposals_use_each_country_holding_period_and_allowances():
+    engine = _engine()
+
+    # Held 400 days: long-term everywhere; held 200 days: short-term everywhere
+    short_gains, long_gains = engine.split_disposals([10_000, 30_000, -5_000], [400, 200, 400])
+    assert np.allclose(long_gains, 5_000)
+    assert np.allclose(short_gains, 30_000)
+
+    short_tax, long_tax = engine.taxes(0, 40_000, apply_allowances=True, territorial_exempt=True)
+    au = engine.index["AU"]
+    # 50% discount -> 20k taxable, minus 10k exemption -> 10k at 30%
+    assert short_tax[au] + long_tax[au] == pytest.approx(3_000)
+    assert long_tax[engine.index["PA"]] == 0.0
+
+    scenarios = engine.rank_scenarios([0, 100_000], [100_000, 0], current_country="US", limit=2)
+    assert scenarios[0]["best"][0]["country_code"] == "DE"  # 0% long-term crypto rate
+    assert scenarios[1]["current_tax"] == pytest.approx(37_000)
@@ -0,0 +1,125 @@
+"""
+Unit tests for tax source circuit breakers
+
+Circuit opening, last-good fallback and concurrent per-source fetches.
+"""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+from app.services.tax_data_sources import aggregator as aggregator_module
+from app.services.tax_data_sources.aggregator import TaxDataAggregator
+from app.services.tax_data_sources.source_health import SourceHealthTracker, FAILURE_THRESHOLD
+
+
+class FakeRedis:
+    """Just enough of redis-py for SourceHealthTracker"""
+
+    def __init__(self):
+        self.data = {}
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hgetall(self, key):
+        return {k: str(v) for k, v in self.data.get(key, {}).items()}
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        entry = self.data.setdefault(key, {})
+        if mapping:
+            entry.update({k: str(v) for k, v in mapping.items()})
+        if field is not None:
+            entry[field] = str(value)
+
+    def hincrby(self, key, field, amount):
+        entry = self.data.setdefault(key, {})
+        entry[field] = str(int(entry.get(field, 0)) + amount)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def pipeline(self):
+        redis = self
+
+        class Pipeline:
+            def __init__(self):
+                self.ops = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.ops.append((name, args, kwargs))
+
+            def execute(self):
+                for name, args, kwargs in self.ops:
+                    getattr(redis, name)(*args, **kwargs)
+
+        return Pipeline()
+
+
+@pytest.fixture
+def aggregator(tmp_path):
+    from app.services.tax_data_sources.source_snapshot import SnapshotStore
+    aggregator = TaxDataAggregator(
+        MagicMock(),
+        store=SnapshotStore(str(tmp_path)),
+        health=SourceHealthTracker(FakeRedis())
+    )
+    aggregator._snapshots = {}
+    yield aggregator
+    asyncio.run(aggregator.close())
+
+
+@pytest.mark.unit
+def test_circuit_opens_after_consecutive_failures():
+    tracker = SourceHealthTracker(FakeRedis())
+
+    for _ in range(FAILURE_THRESHOLD):
+        assert not tracker.is_open("kpmg")
+        tracker.record_failure("kpmg", 0.5, "timeout")
+
+    assert tracker.is_open("kpmg")
+    assert tracker.get_health("kpmg")["status"] == "down"
+
+    # Circuit lets calls through again after the open period; a success closes it
+    assert not tracker.is_open("kpmg", now=time.time() + 3600)
+    tracker.record_success("kpmg", 0.2)
+    health = tracker.get_health("kpmg")
+    assert health["status"] == "healthy"
+    assert health["success_rate"] == pytest.approx(1 / (FAILURE_THRESHOLD + 1), abs=0.001)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_failed_source_falls_back_to_last_good(aggregator, monkeypatch):
+    monkeypatch.setitem(aggregator_module.SOURCE_TIMEOUTS, "world_bank", 0.05)
+
+    async def ok():
+        return {"tax_income_profits_pct": 40.0}
+
+    async def hangs():
+        await asyncio.sleep(1)
+
+    assert await aggregator._call_source("world_bank", "FR", ok) == {"tax_income_profits_pct": 40.0}
+    assert await aggregator._call_source("world_bank", "FR", hangs) == {"tax_income_profits_pct": 40.0}
+    assert aggregator.health.get_health("world_bank")["failures"] == 1
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_country_sources_fetched_concurrently(aggregator):
+    async def slow(result):
+        await asyncio.sleep(0.2)
+        return result
+
+    aggregator.wb_client.get_tax_data = lambda code: slow({"year": 2023})
+    aggregator.oecd_client.get_tax_rates = lambda code: slow({"personal_income_tax_top": 0.45})
+    aggregator.koinly_scraper.get_country_crypto_rate = lambda code: slow({"crypto_short_rate": 0.3})
+
+    started = time.monotonic()
+    result = await aggregator.fetch_country_data("DE")
+
+    assert time.monotonic() - started < 0.5
+    assert set(result["sources"]) == {"world_bank", "oecd", "koinly"}
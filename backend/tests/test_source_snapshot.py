@@ -0,0 +1,68 @@
+"""
+Unit tests for tax source snapshots
+
+Conditional revalidation of stored documents and parse-once behaviour.
+"""
+
+import httpx
+import pytest
+from app.services.tax_data_sources.source_snapshot import SnapshotStore, build_snapshot
+
+
+URL = "https://example.org/cgt-rates"
+BODY = b"FR,0.30\nDE,0.26\n"
+
+
+def _parse(body: bytes):
+    rows = [line.split(",") for line in body.decode().splitlines()]
+    return [{"country_code": code, "cgt_rate": float(rate)} for code, rate in rows]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_snapshot_revalidates_and_parses_once(tmp_path):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=BODY, headers={"ETag": '"v1"'})
+
+    parse_calls = []
+
+    def parse(body):
+        parse_calls.append(body)
+        return _parse(body)
+
+    store = SnapshotStore(str(tmp_path))
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        first = await build_snapshot(store, client, "test", URL, parse)
+        second = await build_snapshot(store, client, "test", URL, parse)
+
+    assert first.get("fr") == {"country_code": "FR", "cgt_rate": 0.30}
+    assert second.content_hash == first.content_hash
+    assert dict(second.countries) == dict(first.countries)
+
+    # Second run sent a conditional request, got 304 and reused the parsed records
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    assert len(parse_calls) == 1
+
+    with pytest.raises(TypeError):
+        first.countries["IT"] = {}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_snapshot_falls_back_to_stored_copy(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+
+    ok = httpx.MockTransport(lambda request: httpx.Response(200, content=BODY))
+    async with httpx.AsyncClient(transport=ok) as client:
+        await build_snapshot(store, client, "test", URL, _parse)
+
+    down = httpx.MockTransport(lambda request: httpx.Response(503))
+    async with httpx.AsyncClient(transport=down) as client:
+        snapshot = await build_snapshot(store, client, "test", URL, _parse)
+
+    assert snapshot.get("DE")["cgt_rate"] == 0.26
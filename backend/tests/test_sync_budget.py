@@ -0,0 +1,129 @@
+"""
+Unit tests for the wallet sync budget planner
+
+Checks cost estimation and that planned dispatch never exceeds provider quotas.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import MagicMock
+from app.models.user_wallet import UserWallet
+from app.models.wallet_snapshot import WalletSnapshot
+from app.services.wallet_portfolio_service import WalletPortfolioService
+from app.services.sync_budget import (
+    ApiBudget,
+    DispatchPlanner,
+    estimate_sync_cost,
+    sync_priority,
+)
+
+
+@pytest.fixture
+def budget():
+    """Budget without Redis (planning only)"""
+    budget = ApiBudget(
+        quotas={
+            "alchemy": {"rate": 10.0, "burst": 20},
+            "coingecko": {"rate": 1.0, "burst": 5},
+            "rpc": {"rate": 10.0, "burst": 10},
+        }
+    )
+    budget.redis = None
+    return budget
+
+
+@pytest.mark.unit
+def test_unthrottled_without_redis(budget):
+    assert budget.try_acquire("alchemy", 1000) == 0.0
+
+
+@pytest.mark.unit
+def test_planner_respects_rate(budget):
+    """After the burst is spent, dispatches are spaced by cost / rate"""
+    planner = DispatchPlanner(budget, window_seconds=3600, utilization=1.0)
+    countdowns = [planner.reserve({"coingecko": 1}) for _ in range(10)]
+
+    # First 5 fit the burst, then one per second
+    assert countdowns[:5] == [0, 0, 0, 0, 0]
+    assert countdowns[5:] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.unit
+def test_planner_defers_work_outside_window(budget):
+    planner = DispatchPlanner(budget, window_seconds=10, utilization=1.0)
+    countdowns = [planner.reserve({"coingecko": 1}) for _ in range(30)]
+
+    assert None in countdowns
+    assert all(c is None or c <= 10 for c in countdowns)
+
+
+@pytest.mark.unit
+def test_priority_prefers_stale_then_valuable():
+    assert sync_priority(72, 100) > sync_priority(24, 100)
+    assert sync_priority(24, 1_000_000) > sync_priority(24, 10)
+
+
+@pytest.mark.unit
+def test_cost_charges_metadata_only_for_new_wallets(monkeypatch):
+    from app.services import sync_budget
+    monkeypatch.setattr(sync_budget.settings, "ALCHEMY_API_KEY", "key")
+
+    new_wallet = estimate_sync_cost("ethereum", token_count=None)
+    small = estimate_sync_cost("ethereum", token_count=2)
+    large = estimate_sync_cost("ethereum", token_count=50)
+
+    # Token metadata is cached permanently once a wallet has been synced
+    assert new_wallet["alchemy"] > small["alchemy"]
+    assert small["alchemy"] == large["alchemy"]
+    assert small["coingecko"] == large["coingecko"] == 1
+
+
+@pytest.fixture
+def wallet_tables(db):
+    for model in (UserWallet, WalletSnapshot):
+        model.__table__.create(bind=db.get_bind(), checkfirst=True)
+    yield db
+    db.close()
+    for model in (WalletSnapshot, UserWallet):
+        model.__table__.drop(bind=db.get_bind(), checkfirst=True)
+
+
+@pytest.mark.unit
+def test_consolidated_snapshot_sums_wallet_snapshots(wallet_tables, test_user):
+    """No balance or price fetch: the nightly sync already wrote the wallet snapshots"""
+    db = wallet_tables
+    eth = UserWallet(user_id=test_user.id, wallet_address="0x" + "aa" * 20, chain="ethereum")
+    base = UserWallet(user_id=test_user.id, wallet_address="0x" + "bb" * 20, chain="base")
+    never_synced = UserWallet(user_id=test_user.id, wallet_address="0x" + "cc" * 20, chain="polygon")
+    db.add_all([eth, base, never_synced])
+    db.flush()
+
+    today = datetime(2025, 11, 5)
+
+    def snapshot(wallet, date, value, positions):
+        return WalletSnapshot(
+            user_id=test_user.id, wallet_id=wallet.id, snapshot_date=date,
+            total_value_usd=value, total_cost_basis=Decimal("100"),
+            total_unrealized_gain_loss=value - Decimal("100"), unrealized_gain_loss_percent=0,
+            positions=positions
+        )
+
+    usdc = {"token": "USDC", "amount": 50.0, "value_usd": 50.0, "cost_basis": 50.0}
+    db.add_all([
+        snapshot(eth, today - timedelta(days=1), Decimal("900"), [dict(usdc, chain="ethereum")]),
+        snapshot(eth, today, Decimal("1000"), [dict(usdc, chain="ethereum")]),
+        snapshot(base, today, Decimal("250"), [dict(usdc, chain="base")]),
+    ])
+    db.commit()
+
+    balance_service = MagicMock()
+    price_service = MagicMock()
+    service = WalletPortfolioService(db, balance_service=balance_service, price_service=price_service)
+    portfolio = service.consolidate_snapshots(test_user.id)
+
+    assert portfolio["total_value_usd"] == Decimal("1250")
+    assert portfolio["total_cost_basis"] == Decimal("200")
+    assert portfolio["total_chains"] == 2 and len(portfolio["wallets"]) == 2
+    assert portfolio["total_positions"][0]["total_amount"] == 100.0
+    assert not balance_service.method_calls and not price_service.method_calls
@@ -0,0 +1,87 @@
+"""
+Unit tests for the tax optimizer batch math
+
+Per-lot gain / holding period arrays and the analysis cache.
+"""
+
+import asyncio
+
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from app.services.tax_optimizer import cached_analysis, compute_lot_metrics, prices_moved
+
+
+NOW = datetime(2025, 11, 5, 12, 0, 0)
+
+
+def _lot(amount, price, days_held):
+    return SimpleNamespace(
+        remaining_amount=amount,
+        acquisition_price_usd=price,
+        acquisition_date=NOW - timedelta(days=days_held)
+    )
+
+
+@pytest.mark.unit
+def test_compute_lot_metrics():
+    lots = [_lot(2, 100, 400), _lot(1, 50, 10), _lot(3, 0, 5)]
+    metrics = compute_lot_metrics(lots, [150, 40, 10], required_holding_days=365, now=NOW)
+
+    assert metrics["unrealized"].tolist() == [100.0, -10.0, 30.0]
+    assert metrics["unrealized_percent"].tolist() == [50.0, -20.0, 0.0]  # zero cost basis -> 0%
+    assert metrics["is_long_term"].tolist() == [True, False, False]
+    assert metrics["days_to_long_term"].tolist() == [-35, 355, 360]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("current,expected", [
+    ({"ETH:ethereum": 2010.0, "SOL:solana": 100.0}, False),  # 0.5% move
+    ({"ETH:ethereum": 2100.0, "SOL:solana": 100.0}, True),   # 5% move
+    ({"ETH:ethereum": None, "SOL:solana": 100.0}, True),     # price disappeared
+])
+def test_prices_moved(current, expected):
+    cached = {"ETH:ethereum": 2000.0, "SOL:solana": 100.0}
+    assert prices_moved(cached, current) is expected
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+
+@pytest.mark.unit
+def test_cached_analysis_reruns_on_lot_change_or_price_move():
+    redis_client = FakeRedis()
+    prices = {"ETH": 2000.0}
+    runs = []
+
+    async def get_prices(keys):
+        return {key: prices[key] for key in keys}
+
+    async def analyze():
+        runs.append(dict(prices))
+        return dict(prices), {"total_value_usd": prices["ETH"] * 2}
+
+    def run(fingerprint):
+        return asyncio.run(cached_analysis(redis_client, "tax_analysis:1", fingerprint, get_prices, analyze))
+
+    assert run("lots-v1") == {"total_value_usd": 4000.0}
+    prices["ETH"] = 2010.0  # 0.5%: served from the cache
+    assert run("lots-v1") == {"total_value_usd": 4000.0}
+    assert len(runs) == 1
+
+    assert run("lots-v2") == {"total_value_usd": 4020.0}  # Lots changed
+    prices["ETH"] = 2200.0
+    assert run("lots-v2") == {"total_value_usd": 4400.0}  # Price moved
+    assert len(runs) == 3
+
+    # No Redis: always computed
+    assert asyncio.run(cached_analysis(None, "tax_analysis:1", "lots-v2", get_prices, analyze))
+    assert len(runs) == 4
@@ -0,0 +1,90 @@
+"""
+Unit tests for the permanent token metadata store (Alchemy path)
+"""
+
+import json
+
+import httpx
+import pytest
+from app.services.multi_chain_balance_service import TOKEN_METADATA_PREFIX, MultiChainBalanceService
+
+
+WALLET = "0x" + "aa" * 20
+USDC = "0x" + "01" * 20
+BROKEN = "0x" + "02" * 20
+NO_DECIMALS = "0x" + "03" * 20
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(field) for field in fields]
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+
+class FakeAlchemy:
+    """Answers like Alchemy, with a JSON-RPC error for BROKEN"""
+
+    def __init__(self):
+        self.metadata_calls = []
+
+    def _result(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(19_000_000)
+        if method == "eth_getBalance":
+            return hex(0)
+        if method == "alchemy_getTokenBalances":
+            return {"tokenBalances": [
+                {"contractAddress": token, "tokenBalance": hex(5_000_000)} for token in (USDC, BROKEN, NO_DECIMALS)
+            ]}
+        if params[0] == USDC:
+            return {"symbol": "USDC", "name": "USD Coin", "decimals": 6}
+        return {"symbol": "NODEC", "name": "No Decimals", "decimals": None}
+
+    def transport(self):
+        def handler(request):
+            body = json.loads(request.content)
+            if body["method"] == "alchemy_getTokenMetadata":
+                self.metadata_calls.append(body["params"][0])
+                if body["params"][0] == BROKEN:
+                    return httpx.Response(200, json={"jsonrpc": "2.0", "id": 1, "error": {"code": 429, "message": "capacity"}})
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": 1, "result": self._result(body["method"], body["params"])})
+        return httpx.MockTransport(handler)
+
+
+@pytest.fixture
+def alchemy_service(monkeypatch):
+    monkeypatch.setattr(MultiChainBalanceService, "_token_metadata_memo", {})
+    alchemy = FakeAlchemy()
+    service = MultiChainBalanceService(redis_client=FakeRedis())
+    service.http_client = httpx.AsyncClient(transport=alchemy.transport())
+    service.alchemy_key = "test"
+    return service, alchemy
+
+
+@pytest.mark.unit
+async def test_only_complete_metadata_is_stored(alchemy_service):
+    service, alchemy = alchemy_service
+
+    balances = await service._get_alchemy_balances(WALLET, "ethereum")
+    tokens = {token["token_address"]: token for token in balances["tokens"]}
+    assert tokens[USDC]["balance_formatted"] == 5  # 6 decimals
+    assert BROKEN not in tokens  # RPC error: not shown as a guessed UNKNOWN token
+    assert tokens[NO_DECIMALS]["decimals"] == 18  # Fallback for this view only
+
+    assert set(service.redis.hashes[f"{TOKEN_METADATA_PREFIX}:ethereum"]) == {USDC}
+
+
+@pytest.mark.unit
+async def test_incomplete_metadata_is_fetched_again(alchemy_service):
+    service, alchemy = alchemy_service
+
+    await service._get_alchemy_balances(WALLET, "ethereum")
+    await service._get_alchemy_balances(WALLET, "ethereum")
+    assert alchemy.metadata_calls.count(USDC) == 1
+    assert alchemy.metadata_calls.count(BROKEN) == 2  # JSON-RPC error: nothing cached
+    assert alchemy.metadata_calls.count(NO_DECIMALS) == 2
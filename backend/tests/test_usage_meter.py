@@ -0,0 +1,109 @@
+"""
+Unit tests for the Redis usage meter
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from app.models.license import License, LicenseTier, SubscriptionStatus, billing_period_start
+from app.models.user import UserRole
+from app.services import usage_meter
+from app.services.license_service import LicenseService
+from app.services.principal_cache import Principal
+
+
+class FakeRedis:
+    """Dict-backed Redis, CHECK_AND_INCREMENT emulated in Python"""
+
+    def __init__(self):
+        self.data = {}
+
+    def register_script(self, script):
+        assert script == usage_meter.CHECK_AND_INCREMENT
+
+        def check_and_increment(keys, args):
+            limit, seed, ttl, member, amount = args
+            counter, dirty = keys
+            if counter not in self.data:
+                if seed < 0:
+                    return [-1, 0]
+                self.data[counter] = str(seed)
+            used = int(self.data[counter])
+            if used + amount > limit:
+                return [0, used]
+            self.data[counter] = str(used + amount)
+            self.data.setdefault(dirty, set()).add(str(member))
+            return [1, used + amount]
+
+        return check_and_increment
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def spop(self, key, count):
+        members = self.data.get(key, set())
+        popped = [members.pop() for _ in range(min(count, len(members)))]
+        return popped
+
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(str(m) for m in members)
+
+
+@pytest.fixture
+def licenses(db):
+    License.__table__.create(bind=db.get_bind(), checkfirst=True)
+    yield
+    db.close()
+    License.__table__.drop(bind=db.get_bind(), checkfirst=True)
+
+
+@pytest.mark.unit
+def test_quota_is_metered_in_redis_then_flushed(db, test_user, licenses, monkeypatch):
+    redis_client = FakeRedis()
+    monkeypatch.setattr(usage_meter, "_redis", lambda: redis_client)
+    monkeypatch.setattr(usage_meter, "invalidate_chat_context", lambda *args: None)
+
+    license = License(user_id=test_user.id, tier=LicenseTier.FREE, status=SubscriptionStatus.ACTIVE,
+                      simulations_used=1, usage_reset_at=datetime.utcnow())
+    db.add(license)
+    db.commit()
+    principal = Principal(id=test_user.id, email=test_user.email, role=UserRole.USER,
+                          tier=LicenseTier.FREE, license_status=SubscriptionStatus.ACTIVE,
+                          limits=license.get_limits())
+
+    service = LicenseService(db)
+    results = [service.check_and_increment_usage(test_user.id, "simulations", principal) for _ in range(3)]
+
+    # Seeded with the 1 simulation already recorded: 2 more fit in the FREE limit of 3
+    assert [allowed for allowed, _ in results] == [True, True, False]
+    assert "3 FREE simulations" in results[2][1]
+    db.refresh(license)
+    assert license.simulations_used == 1  # Nothing written per request
+
+    assert usage_meter.UsageMeter().flush(db) == 1
+    db.refresh(license)
+    assert license.simulations_used == 3
+    assert usage_meter.UsageMeter().flush(db) == 0
+
+
+@pytest.mark.unit
+def test_database_fallback_rolls_stale_counters_over(db, test_user, licenses, monkeypatch):
+    def redis_down():
+        raise ConnectionError("Redis unavailable")
+    monkeypatch.setattr(usage_meter, "_redis", redis_down)
+
+    last_period = billing_period_start() - timedelta(days=3)
+    license = License(user_id=test_user.id, tier=LicenseTier.FREE, status=SubscriptionStatus.ACTIVE,
+                      simulations_used=3, defi_audits_used=2, usage_reset_at=last_period)
+    db.add(license)
+    db.commit()
+
+    # Last period's counters aren't reset in the table, they just read as 0
+    assert license.get_usage() == {"simulations": 0, "defi_audits": 0, "pdf_exports": 0, "chat_messages": 0}
+
+    allowed, error = LicenseService(db).check_and_increment_usage(test_user.id, "simulations")
+
+    assert allowed and error is None
+    db.refresh(license)
+    assert (license.simulations_used, license.defi_audits_used) == (1, 0)
+    assert license.usage_reset_at >= billing_period_start()
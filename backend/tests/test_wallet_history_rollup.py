@@ -0,0 +1,38 @@
+"""
+Unit tests for wallet history rollups
+
+Bucket alignment and tier selection for history queries.
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from app.services.wallet_history_rollup import bucket_start, pick_resolution
+
+
+NOW = datetime(2025, 11, 5, 14, 37, 12)  # Wednesday
+
+
+@pytest.mark.unit
+def test_bucket_alignment():
+    assert bucket_start(NOW, "hour") == datetime(2025, 11, 5, 14)
+    assert bucket_start(NOW, "day") == datetime(2025, 11, 5)
+    assert bucket_start(NOW, "week") == datetime(2025, 11, 3)  # Monday
+
+
+@pytest.mark.unit
+def test_bucket_rejects_unknown_resolution():
+    with pytest.raises(ValueError):
+        bucket_start(NOW, "minute")
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("days,expected", [
+    (7, "hour"),     # 7 daily points is too coarse for a chart
+    (30, "day"),
+    (90, "day"),
+    (365, "week"),   # Hourly tier no longer covers it, weekly still gives 52 points
+    (5 * 365, "week"),
+])
+def test_pick_resolution(days, expected):
+    start = NOW - timedelta(days=days)
+    assert pick_resolution(start, NOW, now=NOW) == expected
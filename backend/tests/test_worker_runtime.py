@@ -0,0 +1,68 @@
+"""
+Unit tests for the Celery worker async runtime
+"""
+
+import asyncio
+import pytest
+from app.tasks import worker_runtime
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.loop = None
+        self.closed = False
+
+    async def get(self):
+        # httpx pools are bound to the loop they first ran on
+        loop = asyncio.get_running_loop()
+        assert self.loop in (None, loop), "client used from another event loop"
+        self.loop = loop
+        return "ok"
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeService:
+    created = 0
+
+    def __init__(self):
+        FakeService.created += 1
+        self.http_client = FakeAsyncClient()
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    monkeypatch.setattr(worker_runtime, "_runtime", None)
+    FakeService.created = 0
+    yield worker_runtime.get_runtime()
+    worker_runtime.stop_worker_runtime()
+
+
+@pytest.mark.unit
+def test_tasks_share_loop_and_clients(runtime):
+    def task():
+        service = runtime.service("fake", FakeService)
+        return worker_runtime.run_async(service.http_client.get()), service
+
+    (first, service), (second, same_service) = task(), task()
+
+    assert first == second == "ok"
+    assert same_service is service and FakeService.created == 1
+    assert service.http_client.loop is runtime.loop and runtime.thread.is_alive()
+
+    worker_runtime.stop_worker_runtime()
+    assert service.http_client.closed and not runtime.thread.is_alive()
+
+
+@pytest.mark.unit
+def test_forked_process_gets_its_own_runtime(runtime, monkeypatch):
+    assert worker_runtime.get_runtime() is runtime
+
+    monkeypatch.setattr(worker_runtime.os, "getpid", lambda: runtime.pid + 1)
+    child = worker_runtime.get_runtime()
+
+    assert child is not runtime and child.services == {}
+    assert worker_runtime.run_async(asyncio.sleep(0, result=42)) == 42
+    child.close()
+    runtime.close()